@@ -0,0 +1,66 @@
+"""
+Measure the cold-start cost of importing the core simulator layers.
+
+Each sample imports the layers in a fresh interpreter, so nothing is cached
+in-process. The script exits non-zero if the median exceeds the target.
+
+Usage: python benchmarks/cold_start.py [--runs N] [--target SECONDS]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Core layers only: no scenario, plotting or CLI code.
+CORE_IMPORT = "import netsim.physical, netsim.data_link, netsim.network, netsim.transport"
+
+# Median cold-start target for CORE_IMPORT, interpreter start-up excluded.
+# NumPy (pulled in by the checksum engine) accounts for most of it.
+TARGET_SECONDS = 0.25
+
+HEAVY_MODULES = ("matplotlib", "networkx")
+
+
+def timed_import(statement):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(elapsed, *[m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout.split()
+    return float(output[0]), output[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=9)
+    parser.add_argument("--target", type=float, default=TARGET_SECONDS)
+    args = parser.parse_args()
+
+    samples = []
+    loaded_heavy = set()
+    for _ in range(args.runs):
+        elapsed, heavy = timed_import(CORE_IMPORT)
+        samples.append(elapsed)
+        loaded_heavy.update(heavy)
+
+    median = statistics.median(samples)
+    print(f"core import: median {median * 1e3:.1f} ms, min {min(samples) * 1e3:.1f} ms, "
+          f"max {max(samples) * 1e3:.1f} ms over {args.runs} runs (target {args.target * 1e3:.0f} ms)")
+    if loaded_heavy:
+        print(f"FAIL: plotting dependencies imported eagerly: {', '.join(sorted(loaded_heavy))}")
+        return 1
+    if median > args.target:
+        print("FAIL: cold start is over target")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
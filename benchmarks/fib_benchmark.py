@@ -0,0 +1,104 @@
+"""
+Compare the compiled FIB against a linear scan of the routing table.
+
+Usage: python benchmarks/fib_benchmark.py [--routes N] [--lookups N] [--linear-lookups N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from netsim.ipv4 import int_to_ip  # noqa: E402
+from netsim.network import Router  # noqa: E402
+
+
+def random_routes(count, rng):
+    """
+    Generate `count` distinct prefixes with a length distribution resembling a full table.
+    """
+    lengths = [16, 19, 20, 21, 22, 23, 24, 24, 24, 24, 24, 24]
+    routes = {}
+    while len(routes) < count:
+        length = rng.choice(lengths)
+        mask = (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+        network = rng.getrandbits(32) & mask
+        routes[int_to_ip(network)] = int_to_ip(mask)
+    return routes
+
+
+def ip_to_bin(ip):
+    return ''.join(f'{int(octet):08b}' for octet in ip.split('.'))
+
+
+def mask_length(subnet_mask):
+    return sum(bin(int(octet)).count('1') for octet in subnet_mask.split('.'))
+
+
+def linear_lookup(string_table, destination_ip):
+    """
+    The lookup Router.forward_packet used to do: scan a table of dotted-string
+    routes, compare binary strings and pick the longest mask.
+    """
+    destination_bin = ip_to_bin(destination_ip)
+    matching_routes = []
+    for net, info in string_table.items():
+        length = mask_length(info['subnet_mask'])
+        if destination_bin[:length] == ip_to_bin(net)[:length]:
+            matching_routes.append((net, info))
+    if not matching_routes:
+        return None
+    return max(matching_routes, key=lambda x: mask_length(x[1]['subnet_mask']))[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--routes", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--linear-lookups", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    routes = random_routes(args.routes, rng)
+    router = Router("BenchRouter")
+
+    start = time.perf_counter()
+    for i, (network, mask) in enumerate(routes.items()):
+        router.add_static_route(network, f"10.255.{(i >> 8) & 255}.{i & 255}", f"eth{i % 48}", mask)
+    build_time = time.perf_counter() - start
+    string_table = {network: {'interface': f"eth{i % 48}", 'subnet_mask': mask}
+                    for i, (network, mask) in enumerate(routes.items())}
+
+    destinations = [int_to_ip(rng.getrandbits(32)) for _ in range(args.lookups)]
+
+    start = time.perf_counter()
+    for destination in destinations:
+        router.lookup_route(destination)
+    fib_time = time.perf_counter() - start
+
+    sample = destinations[:args.linear_lookups]
+    start = time.perf_counter()
+    linear_results = [linear_lookup(string_table, destination) for destination in sample]
+    linear_time = time.perf_counter() - start
+
+    mismatches = 0
+    for destination, expected in zip(sample, linear_results):
+        route = router.lookup_route(destination)
+        if (route and route['interface']) != (expected and expected['interface']):
+            mismatches += 1
+
+    fib_per_lookup = fib_time / len(destinations)
+    linear_per_lookup = linear_time / len(sample)
+    print(f"routes:              {len(routes)}")
+    print(f"FIB build:           {build_time:.3f} s ({build_time / len(routes) * 1e6:.2f} us/route)")
+    print(f"FIB lookup:          {fib_per_lookup * 1e6:.2f} us/lookup ({len(destinations)} lookups)")
+    print(f"linear scan lookup:  {linear_per_lookup * 1e3:.2f} ms/lookup ({len(sample)} lookups)")
+    print(f"speedup:             {linear_per_lookup / fib_per_lookup:.0f}x")
+    print(f"mismatches:          {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Layered network simulator.
+
+The layer modules are importable on their own and have no side effects:
+
+- netsim.physical: PhysicalLayerDevice, Connection, Hub, EndDevice
+- netsim.data_link: DataLinkLayerDevice, Bridge, Switch
+- netsim.network: Router, Network, Device
+- netsim.transport: TCPSimulator
+- netsim.scheduler: the virtual-time EventScheduler everything schedules into
+
+Demo scenarios live in netsim.scenarios and run through `netsim run <scenario>`.
+"""
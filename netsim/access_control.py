@@ -0,0 +1,35 @@
+import random
+
+from netsim.tracing import EventKind, get_tracer
+
+
+class AccessControlProtocol:
+    # For basic implementation,used CSMA/CD.
+    idle_probability = 0.1  # Probability of the medium being idle
+    max_backoff_attempts = 10  # Maximum number of backoff attempts
+
+    @staticmethod
+    def control_access(scheduler, on_access, *args):
+        """
+        Sense the medium and call on_access(*args) once it is idle.
+        Backoff periods are scheduled on the virtual clock instead of sleeping.
+        :param scheduler: The EventScheduler the retries are scheduled into.
+        :param on_access: Callback invoked when the device may transmit.
+        """
+        AccessControlProtocol._attempt(scheduler, 0, on_access, args)
+
+    @staticmethod
+    def _attempt(scheduler, backoff_attempts, on_access, args):
+        if random.random() < AccessControlProtocol.idle_probability:
+            on_access(*args)  # Medium is idle, device can transmit
+        elif backoff_attempts + 1 < AccessControlProtocol.max_backoff_attempts:
+            # Medium is busy, wait for a random backoff period
+            backoff_time = random.uniform(0, 1)  # Random backoff time between 0 and 1 seconds
+            tracer = get_tracer()
+            if tracer.enabled:
+                tracer.emit(EventKind.BACKOFF, None, seq=backoff_attempts + 1, value=backoff_time)
+            scheduler.schedule(backoff_time, AccessControlProtocol._attempt, scheduler, backoff_attempts + 1, on_access, args)
+        else:
+            tracer = get_tracer()
+            if tracer.enabled:
+                tracer.emit(EventKind.ACCESS_FAILED, None, seq=backoff_attempts + 1)
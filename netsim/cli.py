@@ -0,0 +1,100 @@
+"""
+Command line entry point: `netsim run <scenario>`, `netsim sweep <scenario>` and `netsim list`.
+"""
+import argparse
+import sys
+import time
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="netsim", description="Network simulator scenario runner")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    subcommands.add_parser("list", help="List the registered scenarios")
+
+    run = subcommands.add_parser("run", help="Run a registered scenario")
+    run.add_argument("scenario", help="Scenario name (see `netsim list`)")
+    run.add_argument("--headless", action="store_true", help="Never open plot windows")
+    run.add_argument("--plot-dir", help="Save figures as PNG files in this directory")
+    run.add_argument("--seed", type=int, help="Seed the random number generator")
+    run.add_argument("--trace", default="console",
+                     help="Trace sink: console (default), null, ring[:N], jsonl:PATH or binary:PATH")
+    run.add_argument("--timing", action="store_true", help="Print the wall-clock run time")
+
+    sweep = subcommands.add_parser("sweep", help="Run a scenario over a parameter grid in worker processes")
+    sweep.add_argument("scenario", help="Scenario name (see `netsim list`)")
+    sweep.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2,...",
+                       help="Parameter values to sweep; repeat for a grid")
+    sweep.add_argument("--replicas", type=int, default=5, help="Runs per grid point (default 5)")
+    sweep.add_argument("--workers", type=int, help="Worker processes (default: CPU count, 0: run in-process)")
+    sweep.add_argument("--seed", type=int, default=0, help="Base seed of the sweep (default 0)")
+    sweep.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals")
+    return parser
+
+
+def _parse_value(text):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return {'true': True, 'false': False}.get(text.lower(), text)
+
+
+def parse_grid(specs):
+    """
+    Parse ["name=v1,v2", ...] into {name: [v1, v2]}, converting numbers and booleans.
+    """
+    grid = {}
+    for spec in specs:
+        name, separator, values = spec.partition('=')
+        if not separator or not name:
+            raise ValueError(f"Invalid parameter {spec!r}; use NAME=V1,V2,...")
+        grid[name] = [_parse_value(value) for value in values.split(',')]
+    return grid
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from netsim.scenarios import SCENARIOS, get_scenario
+    from netsim.tracing import open_sink
+
+    if args.command == "list":
+        width = max(len(name) for name in SCENARIOS)
+        for name, registered in SCENARIOS.items():
+            print(f"{name:<{width}}  {registered.description}")
+        return 0
+
+    if args.command == "sweep":
+        from netsim.sweep import run_sweep
+
+        try:
+            get_scenario(args.scenario)
+            grid = parse_grid(args.param)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+        def progress(result):
+            print(f"{result.params} replica {result.replica}: {result.elapsed:.2f} s", file=sys.stderr)
+
+        table = run_sweep(args.scenario, grid, args.replicas, args.workers, args.seed, args.confidence, progress)
+        print(table.format())
+        return 0
+
+    try:
+        selected = get_scenario(args.scenario)
+        sink = open_sink(args.trace)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    start = time.perf_counter()
+    selected.run(headless=args.headless, plot_dir=args.plot_dir, seed=args.seed, sink=sink)
+    if args.timing:
+        print(f"Scenario {selected.name} finished in {time.perf_counter() - start:.3f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
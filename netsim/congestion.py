@@ -0,0 +1,373 @@
+"""
+TCP congestion control for many flows sharing one bottleneck.
+
+Per-flow TCP state lives in NumPy arrays, one slot per flow: congestion
+window, slow start threshold, phase, RTT estimator, controller state and
+counters. A tick advances every active flow with a few array operations
+instead of one object per flow. Windows are counted in MSS-sized packets.
+
+Each tick of `tick` seconds works like this:
+
+- every flow sends cwnd / RTT packets per second (none while waiting out an
+  RTO) into a drop-tail queue that drains at the link rate;
+- the part that overflows the buffer is dropped. A flow sees a loss event
+  with probability 1 - (1 - p)^sent, and reacts one RTT later;
+- the ACKed data grows the window. Slow start adds one packet per ACKed
+  packet, and congestion avoidance is left to the flow's controller;
+- a loss event with cwnd >= 4 is a fast retransmit: the controller reduces
+  the window, and the flow is in fast recovery for one RTT. With a smaller
+  window the flow times out: cwnd = 1, and it waits for its RTO;
+- RTT samples (base RTT plus queueing delay) drive the RFC 6298 SRTT,
+  RTTVAR and RTO.
+
+Controllers are objects with vectorized grow() and reduce() methods.
+RenoController and CubicController are provided.
+"""
+import collections
+import random
+
+import numpy as np
+
+from netsim.scheduler import get_default_scheduler
+
+SLOW_START = 0
+CONGESTION_AVOIDANCE = 1
+FAST_RECOVERY = 2
+RTO_WAIT = 3
+
+MIN_RTO = 0.2
+MAX_RTO = 60.0
+
+
+class RenoController:
+    """
+    Additive increase by one packet per RTT, halve the window on loss.
+    """
+    name = 'reno'
+
+    def reset(self, flows, index):
+        pass
+
+    def grow(self, flows, index, acked, now):
+        flows.cwnd[index] += acked / flows.cwnd[index]
+
+    def reduce(self, flows, index, now):
+        flows.ssthresh[index] = np.maximum(flows.cwnd[index] / 2, 2.0)
+
+
+class CubicController:
+    """
+    CUBIC (RFC 8312): the window follows C * (t - K)^3 + W_max after a loss,
+    and never grows slower than Reno would (the TCP-friendly region).
+    """
+    name = 'cubic'
+
+    def __init__(self, c=0.4, beta=0.7, fast_convergence=True):
+        self.c = c
+        self.beta = beta
+        self.fast_convergence = fast_convergence
+
+    def reset(self, flows, index):
+        flows.w_max[index] = 0.0
+        flows.epoch_start[index] = -1.0
+
+    def grow(self, flows, index, acked, now):
+        cwnd = flows.cwnd[index]
+        epoch = flows.epoch_start[index]
+        new_epoch = epoch < 0
+        if new_epoch.any():
+            # First growth since slow start or a loss without reduce(): start the curve here.
+            starting = index[new_epoch]
+            flows.epoch_start[starting] = now
+            flows.w_max[starting] = np.maximum(flows.w_max[starting], flows.cwnd[starting])
+            flows.cubic_k[starting] = np.cbrt(np.maximum(flows.w_max[starting] - flows.cwnd[starting], 0.0) / self.c)
+            epoch = flows.epoch_start[index]
+        w_max = flows.w_max[index]
+        rtt = flows.srtt[index]
+        t = now - epoch + rtt
+        offset = t - flows.cubic_k[index]
+        target = self.c * offset * offset * offset + w_max
+        reno = w_max * self.beta + 3 * (1 - self.beta) / (1 + self.beta) * (t / rtt)
+        target = np.maximum(target, reno)
+        step = np.where(target > cwnd, (target - cwnd) / cwnd, 0.01 / cwnd)
+        flows.cwnd[index] = cwnd + step * acked
+
+    def reduce(self, flows, index, now):
+        cwnd = flows.cwnd[index]
+        w_max = cwnd
+        if self.fast_convergence:
+            w_max = np.where(cwnd < flows.w_max[index], cwnd * (1 + self.beta) / 2, cwnd)
+        flows.w_max[index] = w_max
+        flows.ssthresh[index] = np.maximum(cwnd * self.beta, 2.0)
+        flows.epoch_start[index] = now
+        flows.cubic_k[index] = np.cbrt(w_max * (1 - self.beta) / self.c)
+
+
+CONTROLLERS = {'reno': RenoController, 'cubic': CubicController}
+
+
+class BottleneckLink:
+    """
+    A drop-tail bottleneck shared by every flow.
+    :param bandwidth: Link rate in bits per second.
+    :param buffer_packets: Queue capacity in packets.
+    :param mss: Packet (segment) size in bytes.
+    """
+
+    def __init__(self, bandwidth=100e6, buffer_packets=1000, mss=1460):
+        self.bandwidth = bandwidth
+        self.buffer_packets = buffer_packets
+        self.mss = mss
+        self.queue = 0.0
+
+    @property
+    def capacity(self):
+        """
+        Service rate in packets per second.
+        """
+        return self.bandwidth / (self.mss * 8)
+
+
+CongestionReport = collections.namedtuple(
+    'CongestionReport', 'duration throughput utilization loss_rate fairness fast_retransmits timeouts queue_samples')
+CongestionReport.__doc__ = """
+Summary of a run.
+:param duration: Simulated seconds covered.
+:param throughput: Per-flow goodput in bits per second (array indexed by flow).
+:param utilization: Fraction of the link capacity delivered.
+:param loss_rate: Dropped / offered packets.
+:param fairness: Jain's fairness index of the throughput of the flows that were active.
+:param fast_retransmits: Total fast retransmits.
+:param timeouts: Total retransmission timeouts.
+:param queue_samples: Array of (time, queue length in packets) rows, one per tick.
+"""
+
+
+class TCPFlows:
+    """
+    Any number of TCP flows over a BottleneckLink, advanced tick by tick on the
+    event scheduler.
+    :param link: The shared BottleneckLink.
+    :param tick: Simulation step in seconds; keep it well below the smallest RTT.
+    :param rng: NumPy Generator or seed for loss sampling; defaults to one drawn from the random module.
+    """
+
+    _FLOAT_FIELDS = ('cwnd', 'ssthresh', 'base_rtt', 'srtt', 'rttvar', 'rto', 'phase_until', 'loss_at',
+                     'size', 'delivered', 'lost', 'start', 'finish', 'w_max', 'epoch_start', 'cubic_k')
+    _INT_FIELDS = ('phase', 'controller', 'fast_retransmits', 'timeouts')
+
+    def __init__(self, link, tick=1e-3, scheduler=None, rng=None):
+        self.link = link
+        self.tick = tick
+        self.scheduler = scheduler or get_default_scheduler()
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        self.rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+        self.count = 0
+        self._allocated = 0
+        for field in self._FLOAT_FIELDS:
+            setattr(self, field, np.zeros(0))
+        for field in self._INT_FIELDS:
+            setattr(self, field, np.zeros(0, dtype=np.int64))
+        self.controllers = []
+        self._ticking = None
+        self._first_tick = None
+        self.offered = 0.0
+        self.dropped = 0.0
+        self.served = 0.0
+        self._queue_samples = []
+
+    def _grow(self, needed):
+        size = max(needed, 2 * self._allocated, 64)
+        for field in self._FLOAT_FIELDS + self._INT_FIELDS:
+            old = getattr(self, field)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, field, new)
+        self._allocated = size
+
+    def _controller_id(self, controller):
+        if isinstance(controller, str):
+            try:
+                controller = CONTROLLERS[controller]()
+            except KeyError:
+                raise ValueError(f"Unknown congestion controller {controller!r}; use one of {', '.join(CONTROLLERS)}") from None
+        for i, existing in enumerate(self.controllers):
+            if existing is controller:
+                return i
+        self.controllers.append(controller)
+        return len(self.controllers) - 1
+
+    def add_flows(self, count, base_rtt=0.05, size=np.inf, controller='reno', start=None, initial_window=10):
+        """
+        Add flows that start sending at `start` (default: now).
+        :param base_rtt: Round-trip propagation delay, a scalar or one value per flow.
+        :param size: Packets to deliver, or inf for a long-lived flow.
+        :param controller: 'reno', 'cubic' or a controller object (shared by these flows).
+        :return: Array of the new flows' indices.
+        """
+        first = self.count
+        end = first + count
+        if end > self._allocated:
+            self._grow(end)
+        index = np.arange(first, end)
+        now = self.scheduler.now
+        self.cwnd[index] = initial_window
+        self.ssthresh[index] = np.inf
+        self.base_rtt[index] = base_rtt
+        self.srtt[index] = base_rtt
+        self.rttvar[index] = np.asarray(base_rtt) / 2
+        self.rto[index] = 1.0
+        self.phase[index] = SLOW_START
+        self.phase_until[index] = 0.0
+        self.loss_at[index] = np.inf
+        self.size[index] = size
+        self.start[index] = now if start is None else start
+        self.finish[index] = np.inf
+        controller_id = self._controller_id(controller)
+        self.controller[index] = controller_id
+        self.controllers[controller_id].reset(self, index)
+        self.count = end
+        if self._ticking is None:
+            self._ticking = self.scheduler.schedule(0.0, self._tick)
+        return index
+
+    def _tick(self):
+        now = self.scheduler.now
+        dt = self.tick
+        n = self.count
+        link = self.link
+        if self._first_tick is None:
+            self._first_tick = now
+        active = np.nonzero((self.start[:n] <= now) & (self.finish[:n] == np.inf))[0]
+        pending = (self.start[:n] > now).any()
+
+        # Phase timers: recovery ends in congestion avoidance, an RTO in slow start.
+        phase = self.phase[active]
+        expired = (phase >= FAST_RECOVERY) & (self.phase_until[active] <= now)
+        if expired.any():
+            done = active[expired]
+            recovering = self.phase[done] == FAST_RECOVERY
+            self.phase[done] = np.where(recovering, CONGESTION_AVOIDANCE, SLOW_START)
+            phase = self.phase[active]
+
+        # Loss reactions come due one RTT after the drop.
+        due = self.loss_at[active] <= now
+        if due.any():
+            self._react(active[due], now)
+            phase = self.phase[active]
+
+        cwnd = self.cwnd[active]
+        queue_delay = link.queue / link.capacity
+        rtt = self.base_rtt[active] + queue_delay
+        sending = phase != RTO_WAIT
+        sent = np.where(sending, cwnd / rtt * dt, 0.0)
+        sent = np.minimum(sent, self.size[active] - self.delivered[active])
+        offered = sent.sum()
+
+        queue = link.queue + offered
+        served = min(queue, link.capacity * dt)
+        queue -= served
+        overflow = max(queue - link.buffer_packets, 0.0)
+        queue -= overflow
+        link.queue = queue
+        drop = overflow / offered if offered > 0 else 0.0
+
+        acked = sent * (1 - drop)
+        self.delivered[active] += acked
+        self.lost[active] += sent - acked
+        self.offered += offered
+        self.dropped += overflow
+        self.served += served
+
+        if drop > 0:
+            hit = self.rng.random(len(active)) < -np.expm1(np.log1p(-min(drop, 1.0)) * sent)
+            hit &= self.loss_at[active] == np.inf
+            self.loss_at[active[hit]] = now + rtt[hit]
+
+        # RTT estimator, weighted by the fraction of an RTT this tick covers.
+        sampled = acked > 0
+        if sampled.any():
+            flows = active[sampled]
+            sample = rtt[sampled]
+            weight = np.minimum(dt / self.srtt[flows], 1.0)
+            self.rttvar[flows] += 0.25 * weight * (np.abs(self.srtt[flows] - sample) - self.rttvar[flows])
+            self.srtt[flows] += 0.125 * weight * (sample - self.srtt[flows])
+            self.rto[flows] = np.clip(self.srtt[flows] + 4 * self.rttvar[flows], MIN_RTO, MAX_RTO)
+
+        slow = (phase == SLOW_START) & sampled
+        if slow.any():
+            flows = active[slow]
+            self.cwnd[flows] = np.minimum(self.cwnd[flows] + acked[slow], np.maximum(self.ssthresh[flows], self.cwnd[flows]))
+            self.phase[flows[self.cwnd[flows] >= self.ssthresh[flows]]] = CONGESTION_AVOIDANCE
+        avoiding = (phase == CONGESTION_AVOIDANCE) & sampled
+        if avoiding.any():
+            flows = active[avoiding]
+            flow_acked = acked[avoiding]
+            owners = self.controller[flows]
+            for controller_id, controller in enumerate(self.controllers):
+                mine = owners == controller_id
+                if mine.any():
+                    controller.grow(self, flows[mine], flow_acked[mine], now)
+
+        finished = active[self.delivered[active] >= self.size[active] - 1e-9]
+        self.finish[finished] = now + dt
+        self._queue_samples.append((now, queue))
+
+        if len(active) > len(finished) or pending:
+            self._ticking = self.scheduler.schedule(dt, self._tick)
+        else:
+            self._ticking = None
+
+    def _react(self, flows, now):
+        self.loss_at[flows] = np.inf
+        in_recovery = self.phase[flows] >= FAST_RECOVERY
+        flows = flows[~in_recovery]  # one reduction per window, as in NewReno
+        fast = self.cwnd[flows] >= 4
+        retransmit = flows[fast]
+        if len(retransmit):
+            owners = self.controller[retransmit]
+            for controller_id, controller in enumerate(self.controllers):
+                mine = retransmit[owners == controller_id]
+                if len(mine):
+                    controller.reduce(self, mine, now)
+            self.cwnd[retransmit] = self.ssthresh[retransmit]
+            self.phase[retransmit] = FAST_RECOVERY
+            self.phase_until[retransmit] = now + self.srtt[retransmit]
+            self.fast_retransmits[retransmit] += 1
+        timed_out = flows[~fast]
+        if len(timed_out):
+            self.ssthresh[timed_out] = np.maximum(self.cwnd[timed_out] / 2, 2.0)
+            self.cwnd[timed_out] = 1.0
+            self.phase[timed_out] = RTO_WAIT
+            self.phase_until[timed_out] = now + self.rto[timed_out]
+            self.rto[timed_out] = np.minimum(self.rto[timed_out] * 2, MAX_RTO)
+            self.timeouts[timed_out] += 1
+            for controller in self.controllers:
+                controller.reset(self, timed_out)
+
+    def run(self, duration):
+        """
+        Advance the simulation by duration seconds of virtual time.
+        :return: CongestionReport for everything simulated so far.
+        """
+        self.scheduler.run(until=self.scheduler.now + duration)
+        return self.report()
+
+    def report(self):
+        n = self.count
+        now = self.scheduler.now
+        began = self._first_tick if self._first_tick is not None else now
+        start = np.maximum(self.start[:n], began)
+        end = np.minimum(self.finish[:n], now)
+        active_time = end - start
+        with np.errstate(divide='ignore', invalid='ignore'):
+            throughput = np.where(active_time > 0, self.delivered[:n] * self.link.mss * 8 / active_time, 0.0)
+        measured = throughput[active_time > 0]
+        fairness = float(measured.sum() ** 2 / (len(measured) * (measured ** 2).sum())) if measured.any() else 0.0
+        duration = now - began
+        utilization = self.served / (self.link.capacity * duration) if duration > 0 else 0.0
+        loss_rate = self.dropped / self.offered if self.offered else 0.0
+        return CongestionReport(duration, throughput, utilization, loss_rate, fairness,
+                                int(self.fast_retransmits[:n].sum()), int(self.timeouts[:n].sum()),
+                                np.array(self._queue_samples).reshape(-1, 2))
@@ -0,0 +1,260 @@
+import collections
+
+from netsim.frames import EthernetFrame
+from netsim.physical import Hub, PhysicalLayerDevice
+from netsim.tracing import EventKind, get_tracer
+
+BROADCAST_MACS = frozenset(("Broadcast", "ff:ff:ff:ff:ff:ff", "FF:FF:FF:FF:FF:FF"))
+
+
+class DataLinkLayerDevice(PhysicalLayerDevice):
+    def __init__(self, device_id, scheduler=None):
+        super().__init__(device_id, scheduler)
+        self.mac_address = None
+
+    def set_mac_address(self, mac_address):
+        self.mac_address = mac_address
+
+
+class BridgePort:
+    """
+    One port of a Bridge/Switch. The attached device uses it as its connection,
+    so device.send_data() hands frames to the bridge, and frames the bridge
+    sends out of this port are delivered to the device (or broadcast on the hub).
+    On a hub the port is a member of the medium and takes in what the hub's
+    devices broadcast. Between two bridges, each side's port has the other as
+    its peer, and frames sent out of one are forwarded by the other bridge.
+    """
+
+    def __init__(self, bridge, number, attachment, propagation_delay):
+        self.bridge = bridge
+        self.number = number
+        self.attachment = attachment
+        self.propagation_delay = propagation_delay
+        self.device_id = f"{bridge.device_id}:{number}"
+        self.peer = None
+
+    def send(self, data, destination_mac=None, checksum=None, receiver_id=None):
+        """
+        Ingress: a frame from the attached device. The port is full duplex, so there is no contention.
+        """
+        if isinstance(data, EthernetFrame):
+            source_mac = data.source_mac
+        else:
+            source_mac = getattr(self.attachment, 'mac_address', None)
+        self.bridge.scheduler.schedule(self.propagation_delay, self.bridge.forward, data, destination_mac,
+                                       source_mac, self.number, checksum, receiver_id)
+
+    def receive_data(self, data, checksum, sender_id, valid=None):
+        """
+        Ingress from a hub: a frame one of the hub's devices put on the medium.
+        Frames the bridge itself broadcast on the hub come from senders that are
+        not on it, and are not taken back in.
+        """
+        sender = self.attachment.members.get(sender_id)
+        if sender is None:
+            return
+        if isinstance(data, EthernetFrame):
+            destination_mac, source_mac = None, data.source_mac
+        else:
+            destination_mac, source_mac = "Broadcast", getattr(sender, 'mac_address', None)
+        self.bridge.scheduler.schedule(self.propagation_delay, self.bridge.forward, data, destination_mac,
+                                       source_mac, self.number, checksum, sender_id)
+
+    def deliver(self, data, checksum, sender_id, destination_mac=None, source_mac=None):
+        """
+        Egress: put a frame on the wire towards the attached device.
+        """
+        schedule = self.bridge.scheduler.schedule
+        if self.peer is not None:
+            peer = self.peer
+            schedule(self.propagation_delay, peer.bridge.forward, data, destination_mac, source_mac, peer.number,
+                     checksum, sender_id)
+        elif isinstance(self.attachment, Hub):
+            schedule(self.propagation_delay, self.attachment.broadcast, data, sender_id, checksum)
+        else:
+            schedule(self.propagation_delay, self.attachment.receive_data, data, checksum, sender_id)
+
+
+class Bridge(DataLinkLayerDevice):
+    """
+    Learning bridge. Source MACs are learned on ingress into a CAM table, which
+    is kept in last-seen order. That makes LRU eviction at `capacity` and aging
+    on the virtual clock both pops from the front: learning, aging and lookups
+    are O(1) however many entries the table holds.
+    :param capacity: Maximum number of CAM entries.
+    :param aging_time: Virtual seconds an entry lives without its MAC being seen again.
+    :param port_delay: Propagation delay of each port's link.
+    """
+
+    def __init__(self, device_id, capacity=8192, aging_time=300.0, port_delay=1e-6, scheduler=None):
+        super().__init__(device_id, scheduler)
+        self.table = collections.OrderedDict()  # MAC -> port, oldest first
+        self._last_seen = {}  # MAC -> virtual time
+        self.capacity = capacity
+        self.aging_time = aging_time
+        self.port_delay = port_delay
+        self.ports = {}
+        self._flood_ports = ()
+        self.evictions = 0
+        self.aged_out = 0
+
+    def _add_port(self, attachment, port):
+        if port is None:
+            port = max(self.ports, default=0) + 1
+        elif port in self.ports:
+            raise ValueError(f"Port {port} of {self.device_id} is already in use")
+        bridge_port = BridgePort(self, port, attachment, self.port_delay)
+        self.ports[port] = bridge_port
+        self._flood_ports = tuple(self.ports.values())
+        return bridge_port
+
+    def attach(self, attachment, port=None, peer_port=None):
+        """
+        Attach a device, a hub or another bridge to a port.
+        :param port: Port number to use; defaults to the next free one.
+        :param peer_port: For another bridge, the port number to use on it; defaults
+            to its next free one.
+        :return: The port number.
+        """
+        if isinstance(attachment, Bridge) and peer_port is not None and peer_port in attachment.ports:
+            raise ValueError(f"Port {peer_port} of {attachment.device_id} is already in use")
+        bridge_port = self._add_port(attachment, port)
+        if isinstance(attachment, Bridge):
+            bridge_port.peer = attachment._add_port(self, peer_port)
+            bridge_port.peer.peer = bridge_port
+        elif isinstance(attachment, Hub):
+            attachment.connect_port(bridge_port)
+        else:
+            attachment.connect(bridge_port)
+        return bridge_port.number
+
+    def disconnect(self, port):
+        """
+        Detach a port and forget the MACs learned on it. A link to another bridge
+        is taken down on both sides.
+        """
+        bridge_port = self.ports.pop(port)
+        if bridge_port.peer is not None:
+            bridge_port.peer.peer = None
+            bridge_port.attachment.disconnect(bridge_port.peer.number)
+        elif isinstance(bridge_port.attachment, Hub):
+            bridge_port.attachment.disconnect_port(bridge_port)
+        self._flood_ports = tuple(self.ports.values())
+        for mac_address in [mac for mac, learned in self.table.items() if learned == port]:
+            del self.table[mac_address]
+            del self._last_seen[mac_address]
+
+    def receive_data(self, data, checksum, receiver_id, valid=None):
+        """
+        A frame delivered to the bridge itself over a Connection: verify it and
+        forward it like one that came in on a port.
+        """
+        if super().receive_data(data, checksum, receiver_id, valid):
+            self.forward(data, None, None, None, checksum, receiver_id)
+
+    def _expire(self, now):
+        table = self.table
+        last_seen = self._last_seen
+        deadline = now - self.aging_time
+        while table:
+            oldest = next(iter(table))
+            if last_seen[oldest] > deadline:
+                break
+            table.popitem(last=False)
+            del last_seen[oldest]
+            self.aged_out += 1
+
+    def learn_mac_address(self, mac_address, port):
+        """
+        Record that mac_address was seen on port now. Refreshes an existing entry
+        and evicts the least recently seen one when the table is full.
+        """
+        table = self.table
+        now = self.scheduler.now
+        self._expire(now)
+        previous = table.get(mac_address)
+        if previous is None:
+            if len(table) >= self.capacity:
+                evicted, _ = table.popitem(last=False)
+                del self._last_seen[evicted]
+                self.evictions += 1
+            tracer = get_tracer()
+            if tracer.enabled:
+                tracer.emit(EventKind.SWITCH_LEARN, self.device_id, peer=mac_address, port=port)
+        else:
+            table.move_to_end(mac_address)
+        table[mac_address] = port
+        self._last_seen[mac_address] = now
+
+    def preload(self, entries):
+        """
+        Fill the table with (mac_address, port) entries seen now, e.g. when a topology
+        is built. Unlike learn_mac_address() this emits no trace event per entry;
+        a full table still evicts its least recently seen entries.
+        """
+        table = self.table
+        last_seen = self._last_seen
+        now = self.scheduler.now
+        self._expire(now)
+        for mac_address, port in entries:
+            if mac_address in table:
+                table.move_to_end(mac_address)
+            elif len(table) >= self.capacity:
+                evicted, _ = table.popitem(last=False)
+                del last_seen[evicted]
+                self.evictions += 1
+            table[mac_address] = port
+            last_seen[mac_address] = now
+
+    def lookup(self, mac_address):
+        """
+        Return the port mac_address was learned on, or None if it is unknown or aged out.
+        """
+        self._expire(self.scheduler.now)
+        return self.table.get(mac_address)
+
+    def forward(self, data, destination_mac, source_mac=None, in_port=None, checksum=None, sender_id=None):
+        """
+        Forward a frame: learn its source, then send it out of the destination's
+        port, or flood it out of every other port if the destination is broadcast
+        or unknown. Frames for the port they came in on are filtered.
+        :param data: Payload, or an EthernetFrame whose header supplies the MACs
+            not passed explicitly.
+        """
+        if isinstance(data, EthernetFrame):
+            if destination_mac is None:
+                destination_mac = data.destination_mac
+            if source_mac is None:
+                source_mac = data.source_mac
+        if source_mac is not None and in_port is not None:
+            self.learn_mac_address(source_mac, in_port)
+        tracer = get_tracer()
+        port = None if destination_mac in BROADCAST_MACS else self.lookup(destination_mac)
+        if port is not None:
+            if port == in_port:
+                return
+            if tracer.enabled:
+                tracer.emit(EventKind.SWITCH_FORWARD, self.device_id, peer=destination_mac, port=port, data=data)
+            bridge_port = self.ports.get(port)
+            if bridge_port is not None:
+                bridge_port.deliver(data, checksum, sender_id, destination_mac, source_mac)
+            return
+
+        if tracer.enabled:
+            if destination_mac in BROADCAST_MACS:
+                tracer.emit(EventKind.SWITCH_FLOOD, self.device_id, peer=destination_mac, data=data)
+            else:
+                tracer.emit(EventKind.SWITCH_UNKNOWN, self.device_id, peer=destination_mac, data=data)
+        for bridge_port in self._flood_ports:
+            if bridge_port.number != in_port:
+                if tracer.enabled:
+                    tracer.emit(EventKind.SWITCH_FLOOD_PORT, self.device_id, port=bridge_port.number, data=data)
+                bridge_port.deliver(data, checksum, sender_id, destination_mac, source_mac)
+
+
+class Switch(Bridge):
+    def print_switch_table(self):
+        print("Switch Table:")
+        for mac_address, port in self.table.items():
+            print(f"MAC Address: {mac_address}, Port: {port}")
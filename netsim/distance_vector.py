@@ -0,0 +1,250 @@
+"""
+Distance-vector (RIP-style) routing, computed a whole round at a time.
+
+The distance vectors of all routers are the rows of one NumPy matrix. In a
+synchronous round every router advertises its vector to every neighbor, and
+every router recomputes its routes from what it heard. All of that is one
+min-plus relaxation over the link list: candidate[e, d] = cost(e) +
+advertised(e, d), reduced to a minimum per receiving router.
+
+Metrics are capped at `infinity` (16 as in RIP), which is what ends a count
+to infinity. Advertisements back to the next hop follow one of three
+policies:
+
+- 'none': the full vector is advertised, so loops can count to infinity;
+- 'split-horizon': routes are left out, so the next hop keeps its stale route;
+- 'poison-reverse': routes are advertised with metric infinity.
+"""
+import collections
+
+import numpy as np
+
+HORIZON_POLICIES = ('none', 'split-horizon', 'poison-reverse')
+
+DistanceVectorReport = collections.namedtuple(
+    'DistanceVectorReport', 'rounds converged messages entries_changed count_to_infinity')
+DistanceVectorReport.__doc__ = """
+Result of one converge() call.
+:param rounds: Update rounds run until no vector changed (or max_rounds).
+:param converged: False if max_rounds was reached first.
+:param messages: Vector advertisements sent (one per link direction per round).
+:param entries_changed: Total (router, destination) entries whose metric or next hop changed.
+:param count_to_infinity: Destination router IDs whose metric, at some router, went up
+    count_threshold times without coming down, i.e. that counted towards infinity.
+"""
+
+
+class DistanceVectorProtocol:
+    """
+    Runs distance-vector routing on a set of Routers linked with Router.add_neighbor().
+    Destinations are routers; install() turns them into routes for their interface networks.
+    :param routers: The participating routers.
+    :param infinity: Metric meaning unreachable.
+    :param horizon: One of HORIZON_POLICIES.
+    :param record_updates: Append each router's changed entries to Router.routing_updates
+        after every round, as a list of (round, {destination_id: (metric, next_hop_id)}).
+    :param count_threshold: Number of times a metric may go up without coming down
+        before its destination is flagged as counting to infinity.
+    """
+
+    def __init__(self, routers, infinity=16, horizon='poison-reverse', record_updates=True, count_threshold=3):
+        if horizon not in HORIZON_POLICIES:
+            raise ValueError(f"Unknown horizon policy {horizon!r}; use one of {', '.join(HORIZON_POLICIES)}")
+        self.routers = list(routers)
+        self.nodes = [router.router_id for router in self.routers]
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.infinity = infinity
+        self.horizon = horizon
+        self.record_updates = record_updates
+        self.count_threshold = count_threshold
+        self.round = 0
+
+        # Directed links u -> v (v hears u's vector), sorted by receiver.
+        links = sorted((self.index[v.router_id], self.index[u_id], link['cost'])
+                       for v in self.routers for u_id, link in v.neighbors.items() if u_id in self.index)
+        self.link_dst = np.array([v for v, _, _ in links], dtype=np.int64)
+        self.link_src = np.array([u for _, u, _ in links], dtype=np.int64)
+        self.link_cost = np.array([c for _, _, c in links], dtype=np.float64)
+        self._link_id = {(u, v): e for e, (v, u, _) in enumerate(links)}
+        n = len(self.nodes)
+        # Layer k holds the k-th incoming link of every router with more than k links,
+        # so a round reduces over neighbors with max-degree vectorized steps.
+        degree = np.bincount(self.link_dst, minlength=n)
+        start = np.concatenate(([0], np.cumsum(degree)[:-1]))
+        self._layers = []
+        for k in range(int(degree.max()) if len(links) else 0):
+            rows = np.nonzero(degree > k)[0]
+            self._layers.append((rows, start[rows] + k))
+
+        self.dist = np.full((n, n), float(infinity))
+        np.fill_diagonal(self.dist, 0.0)
+        self.via = np.full((n, n), -1, dtype=np.int64)  # link index of the chosen route, or -1
+        self._installed = [{} for _ in range(n)]
+
+    def next_hop_matrix(self):
+        """
+        Return the n x n matrix of next hop router indices (-1 for none).
+        """
+        return np.where(self.via >= 0, self.link_src[np.maximum(self.via, 0)], -1)
+
+    def set_link_cost(self, a, b, cost):
+        """
+        Change the cost of the link between routers a and b in both directions.
+        """
+        i, j = self.index[a], self.index[b]
+        for u, v in ((i, j), (j, i)):
+            self.link_cost[self._link_id[(u, v)]] = cost
+        self.routers[i].neighbors[b]['cost'] = cost
+        self.routers[j].neighbors[a]['cost'] = cost
+
+    def link_down(self, a, b):
+        """
+        Fail the link between routers a and b: nothing is heard over it any more.
+        """
+        i, j = self.index[a], self.index[b]
+        for u, v in ((i, j), (j, i)):
+            self.link_cost[self._link_id[(u, v)]] = np.inf
+
+    def link_up(self, a, b):
+        """
+        Restore a failed link with its configured cost.
+        """
+        self.set_link_cost(a, b, self.routers[self.index[a]].neighbors[b]['cost'])
+
+    def step(self):
+        """
+        Run one synchronous update round.
+        :return: Boolean mask of the (router, destination) entries that changed.
+        """
+        infinity = self.infinity
+        src, dst = self.link_src, self.link_dst
+        advertised = self.dist[src]
+        if self.horizon != 'none':
+            # Entries the sender routes through the receiver.
+            reverse = self.next_hop_matrix()[src] == dst[:, None]
+            advertised = np.where(reverse, np.inf, advertised)
+        candidate = np.minimum(advertised + self.link_cost[:, None], infinity)
+        if self.horizon == 'split-horizon':
+            # Nothing was heard for a left-out route, so the receiver keeps its own.
+            own = self.via[dst] == np.arange(len(src))[:, None]
+            candidate = np.where(reverse & own, self.dist[dst], candidate)
+
+        n = len(self.nodes)
+        best = np.full((n, n), float(infinity))
+        first = np.full((n, n), -1, dtype=np.int64)
+        for rows, layer in self._layers:
+            offer = candidate[layer]
+            if len(rows) == n:
+                better = offer < best
+                np.copyto(best, offer, where=better)
+                np.copyto(first, layer[:, None], where=better)
+            else:
+                best_rows, first_rows = best[rows], first[rows]
+                better = offer < best_rows
+                np.copyto(best_rows, offer, where=better)
+                np.copyto(first_rows, layer[:, None], where=better)
+                best[rows], first[rows] = best_rows, first_rows
+        np.fill_diagonal(best, 0.0)
+
+        # Keep the current route while it is still among the best.
+        current = self.via
+        held = current >= 0
+        keep = held.copy()
+        keep[held] = candidate[current[held], np.nonzero(held)[1]] == best[held]
+        via = np.where(keep, current, first)
+        via[best >= infinity] = -1
+        np.fill_diagonal(via, -1)
+
+        changed = (best != self.dist) | (via != current)
+        self.dist = best
+        self.via = via
+        self.round += 1
+        if self.record_updates and changed.any():
+            self._record(changed)
+        return changed
+
+    def _record(self, changed):
+        next_hops = self.next_hop_matrix()
+        for v, d in zip(*np.nonzero(changed)):
+            router = self.routers[v]
+            if not router.routing_updates or router.routing_updates[-1][0] != self.round:
+                router.routing_updates.append((self.round, {}))
+            hop = next_hops[v, d]
+            router.routing_updates[-1][1][self.nodes[d]] = (float(self.dist[v, d]), self.nodes[hop] if hop >= 0 else None)
+
+    def converge(self, max_rounds=None):
+        """
+        Run rounds until no entry changes.
+        :param max_rounds: Give up after this many rounds; defaults to 4 * infinity + number of routers.
+        :return: DistanceVectorReport.
+        """
+        if max_rounds is None:
+            max_rounds = 4 * self.infinity + len(self.nodes)
+        n = len(self.nodes)
+        rises = np.zeros((n, n), dtype=np.int64)
+        counting = np.zeros(n, dtype=bool)
+        entries_changed = 0
+        rounds = 0
+        converged = False
+        while rounds < max_rounds:
+            previous = self.dist
+            changed = self.step()
+            rounds += 1
+            count = int(changed.sum())
+            if not count:
+                converged = True
+                break
+            entries_changed += count
+            # Count the times each metric went up since it last went down.
+            rises = np.where(self.dist > previous, rises + 1, np.where(self.dist < previous, 0, rises))
+            counting |= (rises >= self.count_threshold).any(axis=0)
+        messages = rounds * int(np.isfinite(self.link_cost).sum())
+        return DistanceVectorReport(rounds, converged, messages, entries_changed,
+                                    [self.nodes[d] for d in np.nonzero(counting)[0]])
+
+    def distance(self, source, destination):
+        """
+        Return the metric from source to destination (infinity if unreachable).
+        """
+        return float(self.dist[self.index[source], self.index[destination]])
+
+    def next_hop(self, source, destination):
+        """
+        Return the neighbor source uses towards destination, or None.
+        """
+        e = int(self.via[self.index[source], self.index[destination]])
+        return self.nodes[self.link_src[e]] if e >= 0 else None
+
+    def install(self):
+        """
+        Write routes for every interface network of every reachable router into the
+        routing tables, via the next hop towards its nearest advertising router.
+        Only routes that changed since the last install() are rewritten.
+        :return: Number of routes added, changed or removed.
+        """
+        prefixes = [[iface['ip_address'].network for iface in router.interfaces.values()] for router in self.routers]
+        next_hops = self.next_hop_matrix()
+        changes = 0
+        for s, router in enumerate(self.routers):
+            dist = self.dist[s].tolist()
+            hops = next_hops[s].tolist()
+            local = set(prefixes[s])
+            best = {}
+            for d, cost in enumerate(dist):
+                if d == s or hops[d] < 0:
+                    continue
+                for prefix in prefixes[d]:
+                    if prefix not in local and (prefix not in best or cost < best[prefix][0]):
+                        best[prefix] = (cost, self.nodes[hops[d]])
+            installed = self._installed[s]
+            for prefix in installed.keys() - best.keys():
+                router.remove_route(prefix)
+                changes += 1
+            routes = {}
+            for prefix, (_, hop) in best.items():
+                routes[prefix] = hop
+                if installed.get(prefix) != hop:
+                    router.configure_routing_table(prefix, router.neighbor_address(hop), router.neighbors[hop]['interface'])
+                    changes += 1
+            self._installed[s] = routes
+        return changes
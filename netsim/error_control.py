@@ -0,0 +1,86 @@
+import numpy as np
+
+from netsim import checksum as checksum_engine
+from netsim.frames import EthernetFrame, IPv4Packet
+
+
+class ErrorControlProtocol:
+    @staticmethod
+    def checksum(data):
+        """
+        Calculates the checksum of the data.
+        :param data: The data for which the checksum will be calculated (str, bytes-like,
+            or an EthernetFrame/IPv4Packet, which is checksummed in wire format).
+        :return: The checksum value.
+        """
+        if isinstance(data, (str, bytes, bytearray, memoryview, np.ndarray)):
+            # Sum of character code points (byte values for binary data)
+            return checksum_engine.additive_checksum(data)
+        elif isinstance(data, (EthernetFrame, IPv4Packet)):
+            return checksum_engine.additive_checksum(data.to_bytes())
+        else:
+            print(f"requires a String type")
+
+    @staticmethod
+    def checksum_batch(frames):
+        """
+        Calculates the additive checksum of every frame in a batch in one call.
+        :param frames: Sequence of str/bytes-like frames or a 2-D uint8 array.
+        :return: NumPy array with one checksum per frame.
+        """
+        return checksum_engine.additive_checksum_batch(frames)
+
+    @staticmethod
+    def internet_checksum(data):
+        """
+        Calculates the RFC 1071 Internet checksum of a bytes-like frame.
+        """
+        return checksum_engine.internet_checksum(data)
+
+    @staticmethod
+    def internet_checksum_batch(frames):
+        """
+        Calculates the Internet checksum of every frame in a batch in one call.
+        """
+        return checksum_engine.internet_checksum_batch(frames)
+
+    @staticmethod
+    def binary_checksum(data_blocks, n_bits):
+        """
+        Calculates the checksum of the data using binary addition.
+        :param data_blocks: List of data blocks (each block represented as an integer).
+        :param n_bits: Number of bits in each data block.
+        :return: The checksum value.
+        """
+        return checksum_engine.ones_complement_checksum(data_blocks, n_bits)
+
+
+
+    @staticmethod
+    def detect_errors(data, checksum):
+        # Calculate the checksum of the received data
+        calculated_checksum = ErrorControlProtocol.checksum(data)
+
+        # Compare the calculated checksum with the received checksum
+        if calculated_checksum == checksum:
+            return False  # No errors detected
+        else:
+            return True
+    
+    @staticmethod
+    def detect_errors_binary(data_blocks, checksum, n_bits):
+        """
+        Detects errors in the received data by comparing the checksum.
+        :param data_blocks: List of received data blocks (each block represented as an integer).
+        :param checksum: The checksum received along with the data.
+        :param n_bits: Number of bits in each data block.
+        :return: True if errors are detected, False otherwise.
+        """
+        # One's-complement sum of the data blocks and the checksum, complemented
+        computed_checksum = checksum_engine.ones_complement_checksum(np.append(data_blocks, checksum), n_bits)
+
+        # Check if the result is all 1s
+        if computed_checksum == 0:
+            return False  # No errors detected
+        else:
+            return True
@@ -0,0 +1,124 @@
+from netsim.ipv4 import MASKS
+
+
+class _TrieNode:
+    __slots__ = ('prefix', 'length', 'route', 'children')
+
+    def __init__(self, prefix, length, route=None):
+        self.prefix = prefix
+        self.length = length
+        self.route = route
+        self.children = [None, None]
+
+
+class PrefixTrie:
+    """
+    Path-compressed binary trie for IPv4 longest-prefix matching.
+
+    Prefixes are held as (int, length) pairs. Each node stores the bits it
+    covers, so a lookup descends at most 33 nodes and only does integer
+    masking and shifting. Inserts and removals update the trie in place.
+    """
+
+    def __init__(self):
+        self._root = _TrieNode(0, 0)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, prefix, length, route):
+        """
+        Insert or replace the route for prefix/length.
+        :param prefix: Network address as a 32-bit integer (host bits are ignored).
+        :param length: Prefix length, 0 to 32.
+        :param route: Object returned by lookup() for addresses in this prefix.
+        """
+        if route is None:
+            raise ValueError("route must not be None")
+        prefix &= MASKS[length]
+        node = self._root
+        while True:
+            # Invariant: node covers the first node.length bits of prefix.
+            if node.length == length:
+                if node.route is None:
+                    self._size += 1
+                node.route = route
+                return
+            bit = (prefix >> (31 - node.length)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _TrieNode(prefix, length, route)
+                self._size += 1
+                return
+            diff = prefix ^ child.prefix
+            common = min(32 - diff.bit_length(), length, child.length)
+            if common == child.length:
+                node = child
+                continue
+            if common == length:
+                # The new prefix sits between node and child.
+                new = _TrieNode(prefix, length, route)
+                new.children[(child.prefix >> (31 - length)) & 1] = child
+            else:
+                # Branch point: a glue node holding the shared bits.
+                new = _TrieNode(prefix & MASKS[common], common)
+                new.children[(child.prefix >> (31 - common)) & 1] = child
+                new.children[(prefix >> (31 - common)) & 1] = _TrieNode(prefix, length, route)
+            node.children[bit] = new
+            self._size += 1
+            return
+
+    def remove(self, prefix, length):
+        """
+        Remove the route for prefix/length.
+        :return: The removed route, or None if the prefix was not present.
+        """
+        prefix &= MASKS[length]
+        parent = None
+        node = self._root
+        while node is not None and node.length < length:
+            if (prefix ^ node.prefix) & MASKS[node.length]:
+                return None
+            parent = node
+            node = node.children[(prefix >> (31 - node.length)) & 1]
+        if node is None or node.length != length or node.prefix != prefix or node.route is None:
+            return None
+        route = node.route
+        node.route = None
+        self._size -= 1
+        # Splice out the node if it no longer branches.
+        if parent is not None:
+            left, right = node.children
+            if left is None or right is None:
+                parent.children[(prefix >> (31 - parent.length)) & 1] = left or right
+        return route
+
+    def lookup(self, address):
+        """
+        Return the route of the longest prefix containing address, or None.
+        :param address: Destination IPv4 address as a 32-bit integer.
+        """
+        masks = MASKS
+        best = None
+        node = self._root
+        while node is not None:
+            if (address ^ node.prefix) & masks[node.length]:
+                break
+            if node.route is not None:
+                best = node.route
+            if node.length == 32:
+                break
+            node = node.children[(address >> (31 - node.length)) & 1]
+        return best
+
+    def items(self):
+        """
+        Yield (prefix, length, route) for every stored route.
+        """
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.route is not None:
+                yield node.prefix, node.length, node.route
+            stack.extend(child for child in node.children if child is not None)
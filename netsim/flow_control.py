@@ -0,0 +1,255 @@
+"""
+Sliding-window ARQ: Go-Back-N and Selective Repeat.
+
+Transfers are simulated in rounds. In each round the sender transmits what
+its window allows, then waits one round-trip time if every packet in the
+round was acknowledged, or until its retransmission timeout otherwise:
+
+- Go-Back-N: the receiver accepts packets in order only. A cumulative ACK
+  moves the window to just after the highest acknowledged in-order packet,
+  and everything after it is sent again.
+- Selective Repeat: the receiver buffers out-of-order packets and ACKs each
+  one. Only packets without an ACK are sent again.
+
+Losses come from a ChannelModel and a seeded NumPy Generator. simulate()
+runs one transfer and can trace every packet. simulate_batch() runs many
+independent transfers at once with array operations; its results follow the
+same distribution but not the same random draws.
+"""
+import collections
+import random
+
+import numpy as np
+
+from netsim.frames import EthernetFrame, IPv4Packet
+from netsim.tracing import EventKind, get_tracer
+
+GO_BACK_N = 'gbn'
+SELECTIVE_REPEAT = 'sr'
+ARQ_MODES = (GO_BACK_N, SELECTIVE_REPEAT)
+
+
+class ChannelModel:
+    """
+    Loss and delay model of the link a transfer runs over.
+    :param loss_rate: Probability that a data packet is lost, in [0, 1).
+    :param ack_loss_rate: Probability that an ACK is lost, in [0, 1); defaults to loss_rate.
+    :param delay: One-way propagation delay in seconds.
+    :param jitter: Extra round-trip delay, uniform in [0, jitter) per round.
+    :param bandwidth: Link rate in bits per second.
+    :param packet_size: Data packet size in bytes.
+    :param timeout: Retransmission timeout counted from the end of a round's
+        transmissions; defaults to twice the worst-case round-trip time.
+    """
+
+    def __init__(self, loss_rate=0.0, ack_loss_rate=None, delay=0.01, jitter=0.0, bandwidth=10e6,
+                 packet_size=1000, timeout=None):
+        if ack_loss_rate is None:
+            ack_loss_rate = loss_rate
+        for name, rate in (('loss_rate', loss_rate), ('ack_loss_rate', ack_loss_rate)):
+            # At a rate of 1 nothing gets through and a transfer never completes.
+            if not 0 <= rate < 1:
+                raise ValueError(f"{name} must be in [0, 1), got {rate}")
+        self.loss_rate = loss_rate
+        self.ack_loss_rate = ack_loss_rate
+        self.delay = delay
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.packet_size = packet_size
+        self.timeout = 2 * (2 * delay + jitter) if timeout is None else timeout
+
+    @property
+    def transmission_time(self):
+        return self.packet_size * 8 / self.bandwidth
+
+
+ARQResult = collections.namedtuple(
+    'ARQResult', 'mode window_size packets transmissions retransmissions timeouts completion_time goodput')
+ARQResult.__doc__ = """
+Outcome of a transfer. From simulate_batch() the per-transfer fields are arrays.
+:param packets: Packets delivered.
+:param transmissions: Data packets sent, including retransmissions.
+:param retransmissions: transmissions - packets.
+:param timeouts: Rounds that ended in a retransmission timeout.
+:param completion_time: Seconds until the last packet was acknowledged.
+:param goodput: Delivered payload bits per second.
+"""
+
+
+def _as_rng(rng):
+    if rng is None:
+        # Follow the global random module, so a seeded run stays reproducible.
+        return np.random.default_rng(random.getrandbits(64))
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(rng)
+
+
+def _check(mode, window_size, num_packets):
+    if mode not in ARQ_MODES:
+        raise ValueError(f"Unknown ARQ mode {mode!r}; use one of {', '.join(ARQ_MODES)}")
+    if window_size < 1:
+        raise ValueError("window_size must be at least 1")
+    if num_packets < 0:
+        raise ValueError("num_packets must not be negative")
+
+
+#implemetation of go back n protocol
+class FlowControlProtocol:
+    @staticmethod
+    def sliding_window(window_size, data, node=None):
+        """
+        Send data in chunks of window_size with Go-Back-N, window_size chunks at a
+        time, over a channel that loses half of the ACKs. Every packet is traced.
+        :param data: str, bytes-like, or an EthernetFrame/IPv4Packet, which is sent
+            in wire format.
+        """
+        if isinstance(data, (EthernetFrame, IPv4Packet)):
+            data = data.to_bytes()
+        chunks = [data[i:i + window_size] for i in range(0, len(data), window_size)]
+        channel = ChannelModel(loss_rate=0.0, ack_loss_rate=0.5)
+        return FlowControlProtocol.simulate(len(chunks), window_size, GO_BACK_N, channel, node=node, payloads=chunks)
+
+    @staticmethod
+    def simulate(num_packets, window_size, mode=GO_BACK_N, channel=None, rng=None, node=None, payloads=None):
+        """
+        Simulate one transfer.
+        :param num_packets: Number of data packets to deliver.
+        :param mode: GO_BACK_N or SELECTIVE_REPEAT.
+        :param channel: ChannelModel; defaults to a lossless one.
+        :param rng: NumPy Generator or seed; defaults to one drawn from the random module.
+        :param node: Device ID to report trace events under.
+        :param payloads: Optional per-packet data to include in trace events.
+        :return: ARQResult.
+        """
+        _check(mode, window_size, num_packets)
+        channel = channel or ChannelModel()
+        rng = _as_rng(rng)
+        tracer = get_tracer()
+        trace = tracer.enabled
+        payload = (lambda seq: payloads[seq]) if payloads is not None else (lambda seq: None)
+        tx_time = channel.transmission_time
+        acked = np.zeros(num_packets, dtype=bool)
+        base = 0
+        transmissions = timeouts = 0
+        elapsed = 0.0
+        while base < num_packets:
+            end = min(base + window_size, num_packets)
+            if mode == GO_BACK_N:
+                sent = np.arange(base, end)
+            else:
+                sent = base + np.nonzero(~acked[base:end])[0]
+            count = len(sent)
+            data_ok = rng.random(count) >= channel.loss_rate
+            ack_ok = rng.random(count) >= channel.ack_loss_rate
+            if mode == GO_BACK_N:
+                # Only the in-order prefix is accepted; its highest surviving ACK covers the rest.
+                in_order = np.logical_and.accumulate(data_ok)
+                acknowledged = np.nonzero(in_order & ack_ok)[0]
+                if len(acknowledged):
+                    acked[base:base + acknowledged[-1] + 1] = True
+                received = in_order
+            else:
+                received = data_ok
+                acked[sent[data_ok & ack_ok]] = True
+            if trace:
+                for i, seq in enumerate(sent.tolist()):
+                    tracer.emit(EventKind.SEND, node, seq=seq, data=payload(seq))
+                for i, seq in enumerate(sent.tolist()):
+                    if not data_ok[i]:
+                        tracer.emit(EventKind.PACKET_LOST, node, seq=seq, data=payload(seq))
+                    elif received[i]:
+                        tracer.emit(EventKind.ACK if ack_ok[i] else EventKind.ACK_LOST, node, seq=seq, data=payload(seq))
+            transmissions += count
+            elapsed += count * tx_time
+            complete = bool(acked[sent].all())
+            if complete:
+                elapsed += 2 * channel.delay + (rng.random() * channel.jitter if channel.jitter else 0.0)
+            else:
+                elapsed += channel.timeout
+                timeouts += 1
+            while base < num_packets and acked[base]:
+                base += 1
+            if trace and not complete:
+                tracer.emit(EventKind.TIMEOUT, node, seq=base, data=payload(base) if base < num_packets else None)
+        if trace:
+            tracer.emit(EventKind.TRANSFER_COMPLETE, node, seq=num_packets, value=elapsed)
+        goodput = num_packets * channel.packet_size * 8 / elapsed if elapsed else 0.0
+        return ARQResult(mode, window_size, num_packets, transmissions, transmissions - num_packets, timeouts,
+                         elapsed, goodput)
+
+    @staticmethod
+    def simulate_batch(transfers, num_packets, window_size, mode=GO_BACK_N, channel=None, rng=None):
+        """
+        Simulate many independent transfers at once. Each round advances every
+        unfinished transfer with a few array operations over (transfers, window).
+        :param transfers: Number of independent transfers.
+        :return: ARQResult whose per-transfer fields are NumPy arrays.
+        """
+        _check(mode, window_size, num_packets)
+        channel = channel or ChannelModel()
+        rng = _as_rng(rng)
+        tx_time = channel.transmission_time
+        window = window_size
+        columns = np.arange(window)
+        base = np.zeros(transfers, dtype=np.int64)
+        transmissions = np.zeros(transfers, dtype=np.int64)
+        timeouts = np.zeros(transfers, dtype=np.int64)
+        elapsed = np.zeros(transfers)
+        # Selective Repeat: ACK state of the window slots base .. base + window - 1.
+        acked = np.zeros((transfers, window), dtype=bool)
+        active = np.nonzero(base < num_packets)[0]
+        while len(active):
+            in_window = columns < np.minimum(window, num_packets - base[active])[:, None]
+            data_ok = rng.random((len(active), window)) >= channel.loss_rate
+            ack_ok = rng.random((len(active), window)) >= channel.ack_loss_rate
+            if mode == GO_BACK_N:
+                sent = in_window
+                in_order = np.logical_and.accumulate(data_ok | ~in_window, axis=1) & in_window
+                acknowledged = in_order & ack_ok
+                # Cumulative ACK: advance past the highest acknowledged slot.
+                advance = np.where(acknowledged.any(axis=1), window - np.argmax(acknowledged[:, ::-1], axis=1), 0)
+                complete = advance == sent.sum(axis=1)
+            else:
+                slots = acked[active]
+                sent = in_window & ~slots
+                slots |= sent & data_ok & ack_ok
+                complete = ~(sent & ~slots).any(axis=1)
+                # Slide past the leading run of acknowledged slots.
+                advance = np.argmin(np.concatenate((slots, np.zeros((len(active), 1), dtype=bool)), axis=1), axis=1)
+                shifted = columns + advance[:, None]
+                padded = np.concatenate((slots, np.zeros((len(active), window), dtype=bool)), axis=1)
+                acked[active] = np.take_along_axis(padded, shifted, axis=1)
+            count = sent.sum(axis=1)
+            transmissions[active] += count
+            round_time = count * tx_time + np.where(complete, 2 * channel.delay, channel.timeout)
+            if channel.jitter:
+                round_time += np.where(complete, rng.random(len(active)) * channel.jitter, 0.0)
+            elapsed[active] += round_time
+            timeouts[active] += ~complete
+            base[active] += advance
+            active = active[base[active] < num_packets]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            goodput = np.where(elapsed > 0, num_packets * channel.packet_size * 8 / elapsed, 0.0)
+        return ARQResult(mode, window_size, num_packets, transmissions, transmissions - num_packets, timeouts,
+                         elapsed, goodput)
+
+    @staticmethod
+    def sweep(window_sizes, loss_rates, num_packets=100, transfers=10000, mode=GO_BACK_N, channel=None, rng=None):
+        """
+        Mean goodput and retransmissions over a grid of window sizes and loss rates.
+        :param channel: Template ChannelModel; its loss rates are replaced by each swept value.
+        :return: (goodput, retransmissions), arrays of shape (len(window_sizes), len(loss_rates)).
+        """
+        channel = channel or ChannelModel()
+        rng = _as_rng(rng)
+        goodput = np.zeros((len(window_sizes), len(loss_rates)))
+        retransmissions = np.zeros_like(goodput)
+        for i, window_size in enumerate(window_sizes):
+            for j, loss_rate in enumerate(loss_rates):
+                swept = ChannelModel(loss_rate, None, channel.delay, channel.jitter, channel.bandwidth,
+                                     channel.packet_size, channel.timeout)
+                result = FlowControlProtocol.simulate_batch(transfers, num_packets, window_size, mode, swept, rng)
+                goodput[i, j] = result.goodput.mean()
+                retransmissions[i, j] = result.retransmissions.mean()
+        return goodput, retransmissions
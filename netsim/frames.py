@@ -0,0 +1,378 @@
+"""
+Ethernet frames and IPv4 packets.
+
+EthernetFrame and IPv4Packet keep their header fields as ints in __slots__,
+so a packet costs a few dozen bytes instead of a dict of strings. Both
+serialize to wire format with struct. When parsing, the payload is left as a
+memoryview into the received buffer, so nothing is copied.
+
+PacketBatch holds the IPv4 headers of many packets in one NumPy structured
+array whose layout is the wire layout: 20 bytes per packet, and a buffer of
+back-to-back headers can be viewed as a batch without copying.
+"""
+import struct
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+from netsim.checksum import fold_carries, verify_internet_checksum_batch
+from netsim.ipv4 import IPv4Address, as_ipv4
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_ARP = 0x0806
+BROADCAST_MAC = 0xFFFFFFFFFFFF
+
+PROTOCOL_ICMP = 1
+PROTOCOL_TCP = 6
+PROTOCOL_UDP = 17
+
+
+@lru_cache(maxsize=65536)
+def mac_to_int(mac):
+    """
+    Convert a MAC address string ('00:11:22:33:44:55', '-' separators also
+    accepted, or "Broadcast") to a 48-bit integer.
+    """
+    if mac == "Broadcast":
+        return BROADCAST_MAC
+    digits = mac.replace(':', '').replace('-', '')
+    if len(digits) != 12:
+        raise ValueError(f"Invalid MAC address: {mac!r}")
+    return int(digits, 16)
+
+
+@lru_cache(maxsize=65536)
+def int_to_mac(value):
+    """
+    Format a 48-bit integer as a colon-separated MAC address.
+    """
+    return ':'.join(f'{(value >> shift) & 0xFF:02x}' for shift in range(40, -1, -8))
+
+
+def _as_mac(mac):
+    return mac if isinstance(mac, int) else mac_to_int(mac)
+
+
+def _as_address(address):
+    return address if isinstance(address, int) else as_ipv4(address).value
+
+
+# 48-bit MACs are packed as a 16-bit high part and a 32-bit low part.
+_ETHERNET_HEADER = struct.Struct('!HIHIH')
+_FCS = struct.Struct('<I')
+
+
+class EthernetFrame:
+    """
+    An Ethernet II frame.
+    :param destination: Destination MAC as a 48-bit int or string.
+    :param source: Source MAC as a 48-bit int or string.
+    :param payload: bytes-like payload, or an IPv4Packet.
+    :param ethertype: EtherType of the payload.
+    """
+    __slots__ = ('destination', 'source', 'ethertype', 'payload')
+    header_size = _ETHERNET_HEADER.size
+    fcs_size = _FCS.size
+
+    def __init__(self, destination, source, payload=b'', ethertype=ETHERTYPE_IPV4):
+        self.destination = _as_mac(destination)
+        self.source = _as_mac(source)
+        self.ethertype = ethertype
+        self.payload = payload
+
+    @property
+    def destination_mac(self):
+        return int_to_mac(self.destination)
+
+    @property
+    def source_mac(self):
+        return int_to_mac(self.source)
+
+    @property
+    def is_broadcast(self):
+        return self.destination == BROADCAST_MAC
+
+    def _payload_bytes(self):
+        payload = self.payload
+        return payload.to_bytes() if isinstance(payload, IPv4Packet) else payload
+
+    def __len__(self):
+        payload = self.payload
+        size = len(payload) if isinstance(payload, IPv4Packet) else memoryview(payload).nbytes
+        return self.header_size + size + self.fcs_size
+
+    def pack_into(self, buffer, offset=0, payload=None):
+        """
+        Write the frame, with its FCS, into a writable buffer.
+        :return: The number of bytes written.
+        """
+        if payload is None:
+            payload = self._payload_bytes()
+        size = memoryview(payload).nbytes
+        end = offset + self.header_size + size
+        d, s = self.destination, self.source
+        _ETHERNET_HEADER.pack_into(buffer, offset, d >> 32, d & 0xFFFFFFFF, s >> 32, s & 0xFFFFFFFF, self.ethertype)
+        view = memoryview(buffer)
+        view[offset + self.header_size:end] = memoryview(payload).cast('B')
+        _FCS.pack_into(buffer, end, zlib.crc32(view[offset:end]))
+        return end + self.fcs_size - offset
+
+    def to_bytes(self):
+        payload = self._payload_bytes()
+        buffer = bytearray(self.header_size + memoryview(payload).nbytes + self.fcs_size)
+        self.pack_into(buffer, 0, payload)
+        return bytes(buffer)
+
+    __bytes__ = to_bytes
+
+    @classmethod
+    def from_bytes(cls, buffer, check_fcs=True):
+        """
+        Parse a frame from wire bytes. The payload is a memoryview into buffer.
+        :raise ValueError: If the buffer is too short or the FCS does not match.
+        """
+        view = memoryview(buffer).cast('B')
+        if len(view) < cls.header_size + cls.fcs_size:
+            raise ValueError(f"Ethernet frame too short: {len(view)} bytes")
+        end = len(view) - cls.fcs_size
+        if check_fcs and zlib.crc32(view[:end]) != _FCS.unpack_from(view, end)[0]:
+            raise ValueError("Ethernet frame check sequence mismatch")
+        d_high, d_low, s_high, s_low, ethertype = _ETHERNET_HEADER.unpack_from(view)
+        frame = cls.__new__(cls)
+        frame.destination = d_high << 32 | d_low
+        frame.source = s_high << 32 | s_low
+        frame.ethertype = ethertype
+        frame.payload = view[cls.header_size:end]
+        return frame
+
+    def __eq__(self, other):
+        if isinstance(other, EthernetFrame):
+            return ((self.destination, self.source, self.ethertype) == (other.destination, other.source, other.ethertype)
+                    and bytes(self._payload_bytes()) == bytes(other._payload_bytes()))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"EthernetFrame({self.destination_mac} <- {self.source_mac}, type=0x{self.ethertype:04x}, {len(self)} bytes)"
+
+
+_IPV4_HEADER = struct.Struct('!BBHHHBBHII')
+_IPV4_WORDS = struct.Struct('!10H')
+
+
+def _header_checksum(header):
+    return ~fold_carries(sum(_IPV4_WORDS.unpack_from(header)), 16) & 0xFFFF
+
+
+class IPv4Packet:
+    """
+    An IPv4 packet without options.
+    :param source: Source address as an int, IPv4Address or string.
+    :param destination: Destination address as an int, IPv4Address or string.
+    :param payload: bytes-like payload.
+    """
+    __slots__ = ('source', 'destination', 'protocol', 'ttl', 'identification', 'tos', 'flags_fragment', 'payload')
+    header_size = _IPV4_HEADER.size
+
+    def __init__(self, source, destination, payload=b'', protocol=PROTOCOL_UDP, ttl=64, identification=0,
+                 tos=0, flags_fragment=0):
+        self.source = _as_address(source)
+        self.destination = _as_address(destination)
+        self.protocol = protocol
+        self.ttl = ttl
+        self.identification = identification
+        self.tos = tos
+        self.flags_fragment = flags_fragment
+        self.payload = payload
+
+    @property
+    def source_ip(self):
+        return IPv4Address(self.source)
+
+    @property
+    def destination_ip(self):
+        return IPv4Address(self.destination)
+
+    def __len__(self):
+        return self.header_size + memoryview(self.payload).nbytes
+
+    def pack_into(self, buffer, offset=0):
+        """
+        Write the packet, with a computed header checksum, into a writable buffer.
+        :return: The number of bytes written.
+        """
+        total_length = len(self)
+        _IPV4_HEADER.pack_into(buffer, offset, 0x45, self.tos, total_length, self.identification,
+                               self.flags_fragment, self.ttl, self.protocol, 0, self.source, self.destination)
+        view = memoryview(buffer)
+        struct.pack_into('!H', buffer, offset + 10, _header_checksum(view[offset:offset + self.header_size]))
+        view[offset + self.header_size:offset + total_length] = memoryview(self.payload).cast('B')
+        return total_length
+
+    def to_bytes(self):
+        buffer = bytearray(len(self))
+        self.pack_into(buffer)
+        return bytes(buffer)
+
+    __bytes__ = to_bytes
+
+    @classmethod
+    def from_bytes(cls, buffer, check_checksum=True):
+        """
+        Parse a packet from wire bytes. Options are skipped and the payload is a
+        memoryview into buffer.
+        :raise ValueError: If the header is malformed or its checksum does not match.
+        """
+        view = memoryview(buffer).cast('B')
+        if len(view) < cls.header_size:
+            raise ValueError(f"IPv4 packet too short: {len(view)} bytes")
+        (version_ihl, tos, total_length, identification, flags_fragment, ttl, protocol, _,
+         source, destination) = _IPV4_HEADER.unpack_from(view)
+        header_length = (version_ihl & 0x0F) * 4
+        if version_ihl >> 4 != 4 or header_length < cls.header_size or not header_length <= total_length <= len(view):
+            raise ValueError("Malformed IPv4 header")
+        if check_checksum and fold_carries(sum(struct.unpack_from(f'!{header_length // 2}H', view)), 16) != 0xFFFF:
+            raise ValueError("IPv4 header checksum mismatch")
+        packet = cls.__new__(cls)
+        packet.source = source
+        packet.destination = destination
+        packet.protocol = protocol
+        packet.ttl = ttl
+        packet.identification = identification
+        packet.tos = tos
+        packet.flags_fragment = flags_fragment
+        packet.payload = view[header_length:total_length]
+        return packet
+
+    def __eq__(self, other):
+        if isinstance(other, IPv4Packet):
+            return all(getattr(self, field) == getattr(other, field) for field in self.__slots__[:-1]) \
+                and bytes(self.payload) == bytes(other.payload)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"IPv4Packet({self.source_ip} -> {self.destination_ip}, proto={self.protocol}, ttl={self.ttl}, {len(self)} bytes)"
+
+
+IPV4_HEADER_DTYPE = np.dtype([
+    ('version_ihl', 'u1'), ('tos', 'u1'), ('total_length', '>u2'), ('identification', '>u2'),
+    ('flags_fragment', '>u2'), ('ttl', 'u1'), ('protocol', 'u1'), ('checksum', '>u2'),
+    ('source', '>u4'), ('destination', '>u4'),
+])
+
+
+class PacketBatch:
+    """
+    IPv4 headers of many packets as one structured array in wire layout, plus
+    their payloads in a list (or None if only headers are handled).
+    """
+
+    def __init__(self, headers, payloads=None):
+        if headers.dtype != IPV4_HEADER_DTYPE:
+            raise ValueError("headers must use IPV4_HEADER_DTYPE")
+        self.headers = headers
+        self.payloads = payloads
+
+    @classmethod
+    def empty(cls, count):
+        headers = np.zeros(count, dtype=IPV4_HEADER_DTYPE)
+        headers['version_ihl'] = 0x45
+        headers['ttl'] = 64
+        headers['total_length'] = IPv4Packet.header_size
+        return cls(headers)
+
+    @classmethod
+    def from_packets(cls, packets):
+        packets = list(packets)
+        headers = np.zeros(len(packets), dtype=IPV4_HEADER_DTYPE)
+        headers['version_ihl'] = 0x45
+        for name in ('tos', 'identification', 'flags_fragment', 'ttl', 'protocol', 'source', 'destination'):
+            headers[name] = [getattr(packet, name) for packet in packets]
+        headers['total_length'] = [len(packet) for packet in packets]
+        batch = cls(headers, [packet.payload for packet in packets])
+        batch.update_checksums()
+        return batch
+
+    @classmethod
+    def from_buffer(cls, buffer, count=-1, offset=0):
+        """
+        View back-to-back 20-byte headers in buffer as a batch without copying.
+        The batch is read-only if buffer is.
+        """
+        return cls(np.frombuffer(buffer, dtype=IPV4_HEADER_DTYPE, count=count, offset=offset))
+
+    def __len__(self):
+        return len(self.headers)
+
+    def __getitem__(self, index):
+        header = self.headers[index]
+        packet = IPv4Packet.__new__(IPv4Packet)
+        packet.source = int(header['source'])
+        packet.destination = int(header['destination'])
+        packet.protocol = int(header['protocol'])
+        packet.ttl = int(header['ttl'])
+        packet.identification = int(header['identification'])
+        packet.tos = int(header['tos'])
+        packet.flags_fragment = int(header['flags_fragment'])
+        packet.payload = self.payloads[index] if self.payloads is not None else b''
+        return packet
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def destinations(self):
+        """
+        Destination addresses as native uint32, ready for arithmetic and masking.
+        """
+        return self.headers['destination'].astype(np.uint32)
+
+    @property
+    def sources(self):
+        return self.headers['source'].astype(np.uint32)
+
+    def _words(self):
+        return self.headers.view(np.uint8).reshape(len(self), IPv4Packet.header_size).view('>u2')
+
+    def update_checksums(self):
+        """
+        Recompute every header checksum in one pass.
+        """
+        words = self._words()
+        sums = words.sum(axis=1, dtype=np.uint64) - words[:, 5]
+        self.headers['checksum'] = ~fold_carries(sums, 16) & np.uint64(0xFFFF)
+
+    def verify_checksums(self):
+        """
+        :return: Boolean array, True where the header checksum is correct.
+        """
+        return verify_internet_checksum_batch(self.headers.view(np.uint8).reshape(len(self), IPv4Packet.header_size))
+
+    def decrement_ttl(self):
+        """
+        Decrement the TTL of every live packet and fix up the checksums, as a router does.
+        :return: Boolean array, True where the packet has expired (TTL reached zero).
+        """
+        ttl = self.headers['ttl']
+        live = ttl > 0
+        ttl[live] -= 1
+        self.update_checksums()
+        return ttl == 0
+
+    def tobytes(self):
+        """
+        Serialize the batch: headers only if there are no payloads, otherwise
+        each header followed by its payload.
+        """
+        if self.payloads is None:
+            return self.headers.tobytes()
+        raw = self.headers.view(np.uint8).reshape(len(self), IPv4Packet.header_size)
+        parts = []
+        for header, payload in zip(raw, self.payloads):
+            parts.append(header.tobytes())
+            parts.append(payload)
+        return b''.join(parts)
@@ -0,0 +1,474 @@
+"""
+FTP transfers over pooled sessions, and a stand-in server.
+
+FTPSessionPool keeps logged-in control connections per (host, port, user,
+password) and hands them out to transfers, so a sequence of commands pays for connect
+and login once. Transfers stream in `block_size` blocks straight between
+the data connection and the file, so memory does not grow with file size.
+An interrupted transfer resumes from where the partial copy ends, using REST.
+transfer_many() runs several transfers at once, one pooled session each.
+
+LocalFTPServer is a small threaded FTP server on localhost (passive mode
+only) serving a directory, so the demo and tests run offline.
+"""
+import collections
+import contextlib
+import ftplib
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+FTPTransfer = collections.namedtuple('FTPTransfer', 'direction remote_path local_path bytes resumed_from elapsed throughput')
+FTPTransfer.__doc__ = """
+A completed transfer.
+:param direction: 'download' or 'upload'.
+:param bytes: Bytes moved by this transfer, excluding the part that was already there.
+:param resumed_from: Offset the transfer restarted at (0 for a full transfer).
+:param elapsed: Seconds the transfer took.
+:param throughput: bytes / elapsed, in bytes per second.
+"""
+
+
+class FTPSessionPool:
+    """
+    Logged-in FTP control connections, reused across commands and transfers.
+    Safe to share between threads.
+    :param max_idle_per_server: Idle sessions kept per (host, port, user, password); extra ones are closed.
+    :param keepalive: Idle sessions older than this many seconds are checked with NOOP before reuse.
+    :param timeout: Socket timeout in seconds.
+    """
+
+    def __init__(self, max_idle_per_server=4, keepalive=30.0, timeout=10.0):
+        self.max_idle_per_server = max_idle_per_server
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.logins = 0
+        self.reuses = 0
+        self._idle = collections.defaultdict(collections.deque)  # key -> (session, idle since)
+        self._lock = threading.Lock()
+
+    def _login(self, host, port, username, password):
+        session = ftplib.FTP(timeout=self.timeout)
+        session.connect(host, port)
+        session.login(username, password)
+        session.voidcmd('TYPE I')
+        with self._lock:
+            self.logins += 1
+        return session
+
+    @contextlib.contextmanager
+    def session(self, host, username, password, port=21):
+        """
+        Check out a logged-in session in binary mode. It goes back to the pool
+        if the block finishes or fails with a permanent-error reply (error_perm),
+        and is closed if the block fails in any other way.
+        """
+        # The password is part of the key, so a wrong one never gets a session someone else logged in.
+        key = (host, port, username, password)
+        session = None
+        while session is None:
+            with self._lock:
+                idle = self._idle.get(key)
+                candidate, since = idle.pop() if idle else (None, 0.0)
+            if candidate is None:
+                session = self._login(host, port, username, password)
+                break
+            if time.monotonic() - since > self.keepalive:
+                try:
+                    candidate.voidcmd('NOOP')
+                except (OSError, ftplib.Error, EOFError):
+                    candidate.close()
+                    continue
+            with self._lock:
+                self.reuses += 1
+            session = candidate
+        try:
+            yield session
+        except ftplib.error_perm:
+            # The permanent-error reply has been read in full, so the session is still in step.
+            self._checkin(key, session)
+            raise
+        except BaseException:
+            # Anything else (a dropped connection, or an exception raised mid-transfer, e.g. by a
+            # progress callback) may leave a reply unread on the control channel: discard the session.
+            session.close()
+            raise
+        self._checkin(key, session)
+
+    def _checkin(self, key, session):
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_server:
+                idle.append((session, time.monotonic()))
+                return
+        session.quit()
+
+    def close(self):
+        """
+        Log out of every idle session.
+        """
+        with self._lock:
+            sessions = [session for idle in self._idle.values() for session, _ in idle]
+            self._idle.clear()
+        for session in sessions:
+            try:
+                session.quit()
+            except (OSError, ftplib.Error, EOFError):
+                session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FTPClient:
+    """
+    Streaming, resumable transfers against one server through an FTPSessionPool.
+    :param block_size: Bytes per read/write block.
+    """
+
+    def __init__(self, host, username="anonymous", password="", port=21, pool=None, block_size=DEFAULT_BLOCK_SIZE):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.pool = pool or FTPSessionPool()
+        self.block_size = block_size
+
+    def session(self):
+        return self.pool.session(self.host, self.username, self.password, self.port)
+
+    def list(self, path=""):
+        """
+        :return: The LIST output lines for path.
+        """
+        lines = []
+        with self.session() as session:
+            session.retrlines(f'LIST {path}'.rstrip(), lines.append)
+        return lines
+
+    def size(self, remote_path):
+        """
+        :return: Size of a remote file in bytes, or None if it does not exist.
+        """
+        with self.session() as session:
+            try:
+                return session.size(remote_path)
+            except ftplib.error_perm:
+                return None
+
+    def download(self, remote_path, local_path=None, resume=True, progress=None):
+        """
+        Stream a remote file to local_path (default: its base name).
+        :param resume: If local_path already holds a prefix of the file, fetch only the rest.
+        :param progress: Called as progress(bytes_done, total_bytes) after every block.
+        :return: FTPTransfer.
+        """
+        local_path = local_path or os.path.basename(remote_path)
+        offset = os.path.getsize(local_path) if resume and os.path.exists(local_path) else 0
+        start = time.perf_counter()
+        with self.session() as session:
+            total = session.size(remote_path)
+            if total is not None and offset > total:
+                offset = 0  # the local file is not a prefix of this one
+            done = offset
+            if total is None or offset < total or not total:
+                with open(local_path, 'ab' if offset else 'wb') as file:
+                    def write(block):
+                        nonlocal done
+                        file.write(block)
+                        done += len(block)
+                        if progress is not None:
+                            progress(done, total)
+
+                    session.retrbinary(f'RETR {remote_path}', write, self.block_size, offset or None)
+        return self._result('download', remote_path, local_path, done - offset, offset, start)
+
+    def upload(self, local_path, remote_path=None, resume=True, progress=None):
+        """
+        Stream local_path to the server (default: its base name in the current directory).
+        :param resume: If the remote file already holds a prefix of local_path, send only the rest.
+        :return: FTPTransfer.
+        """
+        remote_path = remote_path or os.path.basename(local_path)
+        total = os.path.getsize(local_path)
+        start = time.perf_counter()
+        with self.session() as session:
+            offset = 0
+            if resume:
+                try:
+                    offset = min(session.size(remote_path) or 0, total)
+                except ftplib.error_perm:
+                    offset = 0
+            done = offset
+            if offset < total or not total:
+                with open(local_path, 'rb') as file:
+                    file.seek(offset)
+
+                    def sent(block):
+                        nonlocal done
+                        done += len(block)
+                        if progress is not None:
+                            progress(done, total)
+
+                    session.storbinary(f'STOR {remote_path}', file, self.block_size, sent, offset or None)
+        return self._result('upload', remote_path, local_path, done - offset, offset, start)
+
+    @staticmethod
+    def _result(direction, remote_path, local_path, moved, offset, start):
+        elapsed = time.perf_counter() - start
+        return FTPTransfer(direction, remote_path, local_path, moved, offset, elapsed,
+                           moved / elapsed if elapsed > 0 else 0.0)
+
+    def transfer_many(self, transfers, workers=4):
+        """
+        Run several transfers at once, each on its own pooled session.
+        :param transfers: Iterable of ('download', remote_path, local_path) or
+            ('upload', local_path, remote_path) tuples.
+        :return: List of FTPTransfer, or the exception a transfer raised, in order.
+        """
+        def run(transfer):
+            direction, source, target = transfer
+            try:
+                if direction == 'download':
+                    return self.download(source, target)
+                if direction == 'upload':
+                    return self.upload(source, target)
+                raise ValueError(f"Unknown transfer direction {direction!r}")
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, transfers))
+
+
+class _FTPHandler(socketserver.StreamRequestHandler):
+    """
+    One control connection of LocalFTPServer.
+    """
+    disable_nagle_algorithm = True
+
+    def reply(self, text):
+        self.wfile.write(f"{text}\r\n".encode())
+
+    def handle(self):
+        self.user = None
+        self.authenticated = False
+        self.cwd = "/"
+        self.rest = 0
+        self.passive = None
+        self.reply("220 netsim FTP stand-in ready")
+        for line in self.rfile:
+            command, _, argument = line.decode('utf-8', 'replace').rstrip('\r\n').partition(' ')
+            command = command.upper()
+            handler = getattr(self, f'ftp_{command.lower()}', None)
+            if command not in ('USER', 'PASS', 'QUIT', 'FEAT', 'SYST') and not self.authenticated:
+                self.reply("530 Not logged in")
+            elif handler is None:
+                self.reply(f"502 {command} not implemented")
+            elif handler(argument) is False:
+                break
+        if self.passive is not None:
+            self.passive.close()
+
+    def _path(self, argument):
+        path = os.path.normpath(os.path.join(self.cwd, argument or "."))
+        return os.path.join(self.server.root, path.lstrip('/'))
+
+    def _data_connection(self):
+        if self.passive is None:
+            self.reply("425 Use PASV first")
+            return None
+        listener, self.passive = self.passive, None
+        with listener:
+            connection, _ = listener.accept()
+        connection.settimeout(self.server.data_timeout)
+        return connection
+
+    def ftp_user(self, argument):
+        self.user = argument
+        self.reply("331 Password required")
+
+    def ftp_pass(self, argument):
+        credentials = self.server.credentials
+        if credentials is None or credentials.get(self.user) == argument:
+            self.authenticated = True
+            self.reply("230 Logged in")
+        else:
+            self.reply("530 Login incorrect")
+
+    def ftp_quit(self, argument):
+        self.reply("221 Goodbye")
+        return False
+
+    def ftp_syst(self, argument):
+        self.reply("215 UNIX Type: L8")
+
+    def ftp_feat(self, argument):
+        self.wfile.write(b"211-Features:\r\n SIZE\r\n REST STREAM\r\n PASV\r\n211 End\r\n")
+
+    def ftp_noop(self, argument):
+        self.reply("200 OK")
+
+    def ftp_type(self, argument):
+        self.reply(f"200 Type set to {argument}")
+
+    def ftp_pwd(self, argument):
+        self.reply(f'257 "{self.cwd}"')
+
+    def ftp_cwd(self, argument):
+        if os.path.isdir(self._path(argument)):
+            self.cwd = os.path.normpath(os.path.join(self.cwd, argument))
+            self.reply("250 OK")
+        else:
+            self.reply("550 No such directory")
+
+    def ftp_pasv(self, argument):
+        if self.passive is not None:
+            self.passive.close()
+        self.passive = socket.create_server((self.server.server_address[0], 0))
+        host, port = self.passive.getsockname()[:2]
+        self.reply(f"227 Entering Passive Mode ({host.replace('.', ',')},{port >> 8},{port & 255})")
+
+    def ftp_size(self, argument):
+        path = self._path(argument)
+        if os.path.isfile(path):
+            self.reply(f"213 {os.path.getsize(path)}")
+        else:
+            self.reply("550 No such file")
+
+    def ftp_rest(self, argument):
+        self.rest = int(argument)
+        self.reply(f"350 Restarting at {self.rest}")
+
+    def ftp_dele(self, argument):
+        try:
+            os.remove(self._path(argument))
+            self.reply("250 Deleted")
+        except OSError:
+            self.reply("550 No such file")
+
+    def _listing(self, argument, names_only):
+        path = self._path(argument)
+        if not os.path.exists(path):
+            self.reply("550 No such file or directory")
+            return
+        names = sorted(os.listdir(path)) if os.path.isdir(path) else [os.path.basename(path)]
+        directory = path if os.path.isdir(path) else os.path.dirname(path)
+        connection = self._data_connection()
+        if connection is None:
+            return
+        self.reply("150 Here comes the listing")
+        with connection:
+            lines = []
+            for name in names:
+                if names_only:
+                    lines.append(name)
+                else:
+                    stat = os.stat(os.path.join(directory, name))
+                    kind = 'd' if os.path.isdir(os.path.join(directory, name)) else '-'
+                    stamp = time.strftime('%b %d %H:%M', time.localtime(stat.st_mtime))
+                    lines.append(f"{kind}rw-r--r-- 1 netsim netsim {stat.st_size:>12} {stamp} {name}")
+            connection.sendall("".join(f"{line}\r\n" for line in lines).encode())
+        self.reply("226 Transfer complete")
+
+    def ftp_list(self, argument):
+        self._listing(argument, False)
+
+    def ftp_nlst(self, argument):
+        self._listing(argument, True)
+
+    def ftp_retr(self, argument):
+        path = self._path(argument)
+        offset, self.rest = self.rest, 0
+        if not os.path.isfile(path):
+            self.reply("550 No such file")
+            return
+        connection = self._data_connection()
+        if connection is None:
+            return
+        self.reply("150 Opening BINARY mode data connection")
+        with connection, open(path, 'rb') as file:
+            file.seek(offset)
+            while True:
+                block = file.read(self.server.block_size)
+                if not block:
+                    break
+                connection.sendall(block)
+        self.reply("226 Transfer complete")
+
+    def ftp_stor(self, argument, append=False):
+        path = self._path(argument)
+        offset, self.rest = self.rest, 0
+        connection = self._data_connection()
+        if connection is None:
+            return
+        self.reply("150 Ok to send data")
+        mode = 'ab' if append else ('r+b' if offset and os.path.exists(path) else 'wb')
+        with connection, open(path, mode) as file:
+            if offset and not append:
+                file.seek(offset)
+                file.truncate()
+            while True:
+                block = connection.recv(self.server.block_size)
+                if not block:
+                    break
+                file.write(block)
+        self.reply("226 Transfer complete")
+
+    def ftp_appe(self, argument):
+        self.ftp_stor(argument, append=True)
+
+
+class _FTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalFTPServer:
+    """
+    Threaded passive-mode FTP server on localhost serving a directory. Supports
+    USER/PASS, PWD/CWD, PASV, LIST/NLST, SIZE, REST, RETR, STOR, APPE, DELE.
+    Use as a context manager.
+    :param root: Directory to serve; defaults to a fresh temporary one.
+    :param credentials: Dict of username -> password, or None to accept any login.
+    :param port: Control port; 0 picks a free one.
+    """
+
+    def __init__(self, root=None, credentials=None, host="127.0.0.1", port=0, block_size=DEFAULT_BLOCK_SIZE,
+                 timeout=10.0):
+        self._temporary = tempfile.TemporaryDirectory(prefix="netsim-ftp-") if root is None else None
+        self.root = root if root is not None else self._temporary.name
+        self.server = _FTPServer((host, port), _FTPHandler)
+        self.server.root = self.root
+        self.server.credentials = credentials
+        self.server.block_size = block_size
+        self.server.data_timeout = timeout
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="netsim-ftp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+        if self._temporary is not None:
+            self._temporary.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,364 @@
+"""
+HTTP/1.1 clients for the application layer, and a stand-in server.
+
+HTTPConnectionPool keeps idle keep-alive connections per (host, port), so
+consecutive requests to a host reuse one TCP connection instead of paying a
+handshake each time. AsyncHTTPClient does the same over asyncio streams and
+keeps many requests in flight at once, with at most `connections_per_host`
+connections to each host. Both record counts, bytes and latencies in an
+HTTPStats.
+
+LocalHTTPServer is a threaded keep-alive server on localhost that answers
+like the JSON placeholder API the transport demo used to call, so the demo
+and tests run offline.
+"""
+import asyncio
+import collections
+import http.client
+import http.server
+import json
+import threading
+import time
+
+import numpy as np
+
+HTTPResponse = collections.namedtuple('HTTPResponse', 'status headers body latency')
+HTTPResponse.__doc__ = """
+A completed request.
+:param status: Status code.
+:param headers: Dict of response headers, names lower-cased.
+:param body: Body bytes.
+:param latency: Seconds from sending the request to reading the whole body.
+"""
+
+# A reused connection the server closed in the meantime fails with one of these; retry once on a fresh one.
+_STALE_CONNECTION = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError,
+                     BrokenPipeError, asyncio.IncompleteReadError)
+
+
+class HTTPStats:
+    """
+    Request counters and latency samples shared by a client's requests.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.latencies = []
+        self.started = time.perf_counter()
+
+    def record(self, response):
+        self.requests += 1
+        self.bytes_received += len(response.body)
+        self.latencies.append(response.latency)
+
+    def summary(self):
+        """
+        :return: Dict with request and error counts, connection reuse, requests
+            per second since creation, and latency percentiles in seconds.
+        """
+        elapsed = time.perf_counter() - self.started
+        latencies = np.array(self.latencies)
+        summary = {
+            'requests': self.requests,
+            'errors': self.errors,
+            'bytes_received': self.bytes_received,
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused,
+            'requests_per_second': self.requests / elapsed if elapsed > 0 else 0.0,
+        }
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            summary.update(latency_mean=float(latencies.mean()), latency_p50=float(p50), latency_p90=float(p90),
+                           latency_p99=float(p99), latency_max=float(latencies.max()))
+        return summary
+
+
+class HTTPConnectionPool:
+    """
+    Blocking HTTP/1.1 client with a pool of idle keep-alive connections per host.
+    Safe to share between threads.
+    :param max_idle_per_host: Idle connections kept per host; extra ones are closed.
+    :param timeout: Socket timeout in seconds.
+    """
+
+    def __init__(self, max_idle_per_host=8, timeout=10.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self.stats = HTTPStats()
+        self._idle = collections.defaultdict(collections.deque)  # (host, port) -> idle connections
+        self._lock = threading.Lock()
+
+    def _checkout(self, host, port):
+        with self._lock:
+            idle = self._idle.get((host, port))
+            if idle:
+                self.stats.connections_reused += 1
+                return idle.pop(), True
+            self.stats.connections_opened += 1
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _checkin(self, host, port, connection):
+        with self._lock:
+            idle = self._idle[(host, port)]
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def request(self, method, host, port, path, body=None, headers=None):
+        """
+        Send a request, reusing an idle connection to host:port if there is one.
+        :return: HTTPResponse.
+        :raise OSError, http.client.HTTPException: If the request fails.
+        """
+        connection, reused = self._checkout(host, port)
+        start = time.perf_counter()
+        try:
+            try:
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+            except _STALE_CONNECTION:
+                if not reused:
+                    raise
+                connection.close()
+                with self._lock:
+                    self.stats.connections_opened += 1
+                connection.request(method, path, body, headers or {})
+                response = connection.getresponse()
+            data = response.read()
+        except Exception:
+            connection.close()
+            with self._lock:
+                self.stats.errors += 1
+            raise
+        result = HTTPResponse(response.status, {name.lower(): value for name, value in response.getheaders()},
+                              data, time.perf_counter() - start)
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(host, port, connection)
+        with self._lock:
+            self.stats.record(result)
+        return result
+
+    def get(self, host, port, path, headers=None):
+        return self.request("GET", host, port, path, headers=headers)
+
+    def close(self):
+        """
+        Close every idle connection.
+        """
+        with self._lock:
+            for idle in self._idle.values():
+                while idle:
+                    idle.pop().close()
+            self._idle.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncHTTPClient:
+    """
+    Concurrent HTTP/1.1 client on asyncio streams with keep-alive connections.
+    :param connections_per_host: Connections open at once to one host; further
+        requests to it wait for one of them to become free.
+    :param timeout: Seconds allowed per request.
+    """
+
+    def __init__(self, connections_per_host=100, timeout=10.0):
+        self.connections_per_host = connections_per_host
+        self.timeout = timeout
+        self.stats = HTTPStats()
+        self._idle = collections.defaultdict(collections.deque)
+        self._limits = {}
+
+    def _limit(self, key):
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = self._limits[key] = asyncio.Semaphore(self.connections_per_host)
+        return limit
+
+    async def request(self, method, host, port, path, body=b'', headers=None):
+        """
+        Send a request and read the response.
+        :return: HTTPResponse.
+        """
+        key = (host, port)
+        async with self._limit(key):
+            idle = self._idle[key]
+            start = time.perf_counter()
+            streams = None
+            keep = False
+            try:
+                if idle:
+                    self.stats.connections_reused += 1
+                    streams = idle.pop()
+                    try:
+                        status, response_headers, data = await asyncio.wait_for(
+                            self._exchange(streams, method, host, path, body, headers), self.timeout)
+                    except _STALE_CONNECTION:
+                        streams[1].close()
+                        streams = await self._open(host, port)
+                        status, response_headers, data = await asyncio.wait_for(
+                            self._exchange(streams, method, host, path, body, headers), self.timeout)
+                else:
+                    streams = await self._open(host, port)
+                    status, response_headers, data = await asyncio.wait_for(
+                        self._exchange(streams, method, host, path, body, headers), self.timeout)
+                result = HTTPResponse(status, response_headers, data, time.perf_counter() - start)
+                keep = response_headers.get('connection', '').lower() != 'close'
+            except Exception:
+                self.stats.errors += 1
+                raise
+            finally:
+                # A failed exchange leaves the connection in an unknown state: never reuse it.
+                if keep:
+                    idle.append(streams)
+                elif streams is not None:
+                    streams[1].close()
+            self.stats.record(result)
+            return result
+
+    async def _open(self, host, port):
+        self.stats.connections_opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+
+    @staticmethod
+    async def _exchange(streams, method, host, path, body, headers):
+        reader, writer = streams
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        status = int(status_line.split(None, 2)[1])
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            data = await reader.readexactly(int(response_headers['content-length']))
+        else:
+            data = await reader.read()
+            response_headers['connection'] = 'close'
+        return status, response_headers, data
+
+    async def get(self, host, port, path, headers=None):
+        return await self.request("GET", host, port, path, headers=headers)
+
+    async def get_many(self, requests, return_exceptions=True):
+        """
+        Run many GETs concurrently.
+        :param requests: Iterable of (host, port, path).
+        :return: List of HTTPResponse (or the exception a request raised), in order.
+        """
+        return await asyncio.gather(*(self.get(host, port, path) for host, port, path in requests),
+                                    return_exceptions=return_exceptions)
+
+    def close(self):
+        for idle in self._idle.values():
+            while idle:
+                idle.pop()[1].close()
+        self._idle.clear()
+
+    @classmethod
+    def fetch_all(cls, requests, connections_per_host=100, timeout=10.0):
+        """
+        Blocking helper: run get_many() on a fresh event loop.
+        :return: (responses, HTTPStats).
+        """
+        client = cls(connections_per_host, timeout)
+
+        async def run():
+            try:
+                return await client.get_many(requests)
+            finally:
+                client.close()
+
+        return asyncio.run(run()), client.stats
+
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle each response would wait for a delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'todos' and parts[1].isdigit():
+            todo = int(parts[1])
+            body = json.dumps({"userId": (todo - 1) // 20 + 1, "id": todo, "title": f"todo {todo}",
+                               "completed": todo % 2 == 0}, indent=2).encode()
+            content_type = "application/json; charset=utf-8"
+        elif len(parts) == 2 and parts[0] == 'bytes' and parts[1].isdigit():
+            body = bytes(int(parts[1]))
+            content_type = "application/octet-stream"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class LocalHTTPServer:
+    """
+    Threaded keep-alive HTTP/1.1 server on localhost, serving /todos/<n> as JSON
+    and /bytes/<n> as n zero bytes. Use as a context manager.
+    :param port: Port to listen on; 0 picks a free one.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.server = _StandInServer((host, port), _StandInHandler)
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="netsim-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
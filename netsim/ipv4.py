@@ -0,0 +1,228 @@
+from functools import lru_cache
+
+# MASKS[n] is the 32-bit netmask with n leading one bits.
+MASKS = tuple((0xFFFFFFFF << (32 - n)) & 0xFFFFFFFF for n in range(33))
+_MASK_LENGTHS = {mask: length for length, mask in enumerate(MASKS)}
+
+
+@lru_cache(maxsize=65536)
+def ip_to_int(ip):
+    """
+    Convert a dotted-quad IPv4 string to a 32-bit integer.
+    Results are cached, so repeated addresses are parsed only once.
+    """
+    parts = ip.split('.')
+    if len(parts) != 4:
+        raise ValueError(f"Invalid IPv4 address: {ip!r}")
+    value = 0
+    for part in parts:
+        octet = int(part)
+        if not 0 <= octet <= 255:
+            raise ValueError(f"Invalid IPv4 address: {ip!r}")
+        value = (value << 8) | octet
+    return value
+
+
+def int_to_ip(value):
+    """
+    Format a 32-bit integer as a dotted-quad string.
+    """
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def mask_to_length(subnet_mask):
+    """
+    Convert a subnet mask to a prefix length.
+    :param subnet_mask: Dotted-quad string, prefix length int, or None for /32.
+    """
+    if subnet_mask is None:
+        return 32
+    if isinstance(subnet_mask, int):
+        if not 0 <= subnet_mask <= 32:
+            raise ValueError(f"Invalid prefix length: {subnet_mask}")
+        return subnet_mask
+    if isinstance(subnet_mask, IPv4Address):
+        subnet_mask = subnet_mask.value
+    else:
+        subnet_mask = ip_to_int(subnet_mask)
+    try:
+        return _MASK_LENGTHS[subnet_mask]
+    except KeyError:
+        raise ValueError(f"Non-contiguous subnet mask: {int_to_ip(subnet_mask)}") from None
+
+
+def _split_cidr(address):
+    address, _, length = address.partition('/')
+    return ip_to_int(address), (int(length) if length else None)
+
+
+class IPv4Address:
+    """
+    An IPv4 address held as a 32-bit integer, optionally with the prefix
+    length of the subnet it belongs to (like an interface address).
+
+    Equality and hashing use the address only. The dotted-quad text is
+    formatted on first use and then cached.
+    """
+    __slots__ = ('value', 'prefix_len', '_text')
+
+    def __init__(self, address, subnet_mask=None):
+        if isinstance(address, IPv4Address):
+            value, prefix_len = address.value, address.prefix_len
+        elif isinstance(address, int):
+            value, prefix_len = address, None
+        else:
+            value, prefix_len = _split_cidr(address)
+        if not 0 <= value <= 0xFFFFFFFF:
+            raise ValueError(f"IPv4 address out of range: {value}")
+        if subnet_mask is not None:
+            prefix_len = mask_to_length(subnet_mask)
+        self.value = value
+        self.prefix_len = 32 if prefix_len is None else prefix_len
+        self._text = None
+
+    @property
+    def address(self):
+        return str(self)
+
+    @property
+    def subnet_mask(self):
+        return int_to_ip(MASKS[self.prefix_len])
+
+    @property
+    def network(self):
+        """
+        The prefix this address belongs to.
+        """
+        return IPv4Prefix(self.value, self.prefix_len)
+
+    @property
+    def with_prefix(self):
+        return f"{self}/{self.prefix_len}"
+
+    def in_subnet(self, prefix):
+        """
+        Check whether this address lies inside prefix (an IPv4Prefix or anything it accepts).
+        """
+        return as_ipv4_prefix(prefix).contains(self)
+
+    def __int__(self):
+        return self.value
+
+    def __index__(self):
+        return self.value
+
+    def __str__(self):
+        text = self._text
+        if text is None:
+            text = self._text = int_to_ip(self.value)
+        return text
+
+    def __repr__(self):
+        return f"IPv4Address('{self.with_prefix}')"
+
+    def __eq__(self, other):
+        if isinstance(other, IPv4Address):
+            return self.value == other.value
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, IPv4Address):
+            return self.value < other.value
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+
+class IPv4Prefix:
+    """
+    An IPv4 network prefix: a 32-bit network address with its host bits
+    cleared and a prefix length. Containment checks are a single mask.
+    """
+    __slots__ = ('value', 'prefix_len')
+
+    def __init__(self, network, subnet_mask=None):
+        if isinstance(network, (IPv4Address, IPv4Prefix)):
+            value, prefix_len = network.value, network.prefix_len
+        elif isinstance(network, int):
+            value, prefix_len = network, None
+        else:
+            value, prefix_len = _split_cidr(network)
+        if subnet_mask is not None:
+            prefix_len = mask_to_length(subnet_mask)
+        if prefix_len is None:
+            prefix_len = 32
+        self.value = value & MASKS[prefix_len]
+        self.prefix_len = prefix_len
+
+    @property
+    def network_address(self):
+        return IPv4Address(self.value, self.prefix_len)
+
+    @property
+    def subnet_mask(self):
+        return int_to_ip(MASKS[self.prefix_len])
+
+    @property
+    def num_addresses(self):
+        return 1 << (32 - self.prefix_len)
+
+    def contains(self, address):
+        """
+        Check whether an address (IPv4Address, int or string) is inside this prefix.
+        """
+        value = address if isinstance(address, int) else as_ipv4(address).value
+        return not (value ^ self.value) & MASKS[self.prefix_len]
+
+    __contains__ = contains
+
+    def __str__(self):
+        return f"{int_to_ip(self.value)}/{self.prefix_len}"
+
+    def __repr__(self):
+        return f"IPv4Prefix('{self}')"
+
+    def __eq__(self, other):
+        if isinstance(other, IPv4Prefix):
+            return self.value == other.value and self.prefix_len == other.prefix_len
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.value, self.prefix_len))
+
+
+@lru_cache(maxsize=65536)
+def _parse_address(text):
+    return IPv4Address(text)
+
+
+@lru_cache(maxsize=65536)
+def _parse_prefix(text, subnet_mask):
+    return IPv4Prefix(text, subnet_mask)
+
+
+def as_ipv4(address, subnet_mask=None):
+    """
+    Return address as an IPv4Address. Strings go through a cached parse,
+    so the same text is only ever split once.
+    """
+    if isinstance(address, IPv4Address) and subnet_mask is None:
+        return address
+    if isinstance(address, str) and subnet_mask is None:
+        return _parse_address(address)
+    return IPv4Address(address, subnet_mask)
+
+
+def as_ipv4_prefix(network, subnet_mask=None):
+    """
+    Return network as an IPv4Prefix, parsing strings through a cache.
+    """
+    if isinstance(network, IPv4Prefix) and subnet_mask is None:
+        return network
+    if isinstance(network, str) and (subnet_mask is None or isinstance(subnet_mask, (str, int))):
+        return _parse_prefix(network, subnet_mask)
+    return IPv4Prefix(network, subnet_mask)
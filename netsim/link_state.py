@@ -0,0 +1,370 @@
+"""
+OSPF-like link-state routing over Router.neighbors.
+
+Every router originates an LSA listing its up links and interface networks.
+LSAs are flooded hop by hop on the event scheduler. Updates for the same
+neighbor are packed into one message per pacing interval, so a flood costs
+one event per adjacency and not one per LSA. A router keeps only the newest
+sequence number per origin, which drops duplicate and stale copies.
+
+SPF runs are throttled per router, like OSPF's SPF timers. The first change
+after a quiet period waits spf_delay, so the rest of a flood can arrive.
+While changes keep coming, runs are spaced by a hold time that doubles up to
+spf_max_hold. A flapping link therefore causes a bounded number of runs.
+
+Each SPF builds a CSR adjacency from the LSDB. Routers whose LSDBs match
+share one cached copy. Only routes that changed are rewritten in the routing
+table and FIB.
+"""
+import collections
+import heapq
+
+import numpy as np
+
+from netsim.scheduler import get_default_scheduler
+from netsim.tracing import EventKind, get_tracer
+
+INF = float('inf')
+
+LinkStateAdvertisement = collections.namedtuple('LinkStateAdvertisement', 'origin seq links prefixes')
+LinkStateAdvertisement.__doc__ = """
+:param origin: ID of the originating router.
+:param seq: Sequence number; a higher number replaces an older LSA from the same origin.
+:param links: Tuple of (neighbor_id, cost) for the origin's up links.
+:param prefixes: Tuple of IPv4Prefix for the origin's interface networks.
+"""
+
+ConvergenceReport = collections.namedtuple(
+    'ConvergenceReport', 'convergence_time messages lsas_sent lsas_installed duplicates spf_runs spf_batched route_changes')
+ConvergenceReport.__doc__ = """
+Counters for one converge() call.
+:param convergence_time: Virtual time from the call until the last routing table change.
+:param messages: Link state update messages sent (each may carry several LSAs).
+:param lsas_sent: LSAs carried by those messages.
+:param lsas_installed: LSAs that were newer than the LSDB copy and were installed.
+:param duplicates: LSAs dropped because the LSDB already held that sequence number or newer.
+:param spf_runs: SPF computations run.
+:param spf_batched: SPF triggers absorbed by an already scheduled run.
+:param route_changes: Routes added, changed or removed.
+"""
+
+
+class LinkStateDatabase:
+    """
+    The LSAs a router knows, keyed by origin. Routers whose LSDBs hold the same
+    (origin, seq) pairs share one compiled graph; key() is that set.
+    """
+
+    def __init__(self):
+        self.lsas = {}
+
+    def install(self, lsa):
+        """
+        Install an LSA if it is newer than the copy held for its origin.
+        :return: True if the LSA was installed, False for a duplicate or stale copy.
+        """
+        current = self.lsas.get(lsa.origin)
+        if current is not None:
+            if current.seq >= lsa.seq:
+                return False
+        self.lsas[lsa.origin] = lsa
+        return True
+
+    def key(self):
+        """
+        Return the LSDB's exact contents as a frozenset of (origin, seq) pairs. An
+        origin's LSA never changes without its sequence number changing, so two
+        equal keys mean equal LSDBs.
+        """
+        return frozenset((origin, lsa.seq) for origin, lsa in self.lsas.items())
+
+    def compile(self):
+        """
+        Build the CSR adjacency of the LSDB. A link is used only if both ends
+        advertise it (OSPF's two-way check). Prefixes are numbered, and each one
+        lists the routers that advertise it, so SPF can pick routes with array
+        operations.
+        """
+        nodes = sorted(self.lsas)
+        index = {node: i for i, node in enumerate(nodes)}
+        lsas = self.lsas
+        indptr = [0]
+        indices = []
+        weights = []
+        prefix_ids = {}
+        owners = []
+        for i, node in enumerate(nodes):
+            for neighbor, cost in lsas[node].links:
+                peer = lsas.get(neighbor)
+                if peer is not None and any(back == node for back, _ in peer.links):
+                    indices.append(index[neighbor])
+                    weights.append(cost)
+            indptr.append(len(indices))
+            for prefix in lsas[node].prefixes:
+                owners.append((prefix_ids.setdefault(prefix, len(prefix_ids)), i))
+        owners.sort()
+        owner_prefix = np.array([p for p, _ in owners], dtype=np.int64)
+        return LinkStateGraph(nodes, index, np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int32),
+                              np.array(weights, dtype=np.float64), tuple(prefix_ids),
+                              np.searchsorted(owner_prefix, np.arange(len(prefix_ids))),
+                              owner_prefix, np.array([n for _, n in owners], dtype=np.int64))
+
+
+LinkStateGraph = collections.namedtuple(
+    'LinkStateGraph', 'nodes index indptr indices weights prefixes prefix_start owner_prefix owner_node')
+LinkStateGraph.__doc__ = """
+A compiled LSDB.
+:param nodes: Router IDs in index order.
+:param indptr: CSR row offsets; the links of node i are indices/weights[indptr[i]:indptr[i + 1]].
+:param prefixes: Tuple of every advertised IPv4Prefix, in prefix id order.
+:param prefix_start: Offset of each prefix id's first entry in owner_prefix/owner_node.
+:param owner_prefix: Prefix id of each (prefix, advertising router) entry, sorted.
+:param owner_node: Router index of each entry.
+"""
+
+
+class _RouterState:
+    def __init__(self, router):
+        self.router = router
+        self.lsdb = LinkStateDatabase()
+        self.seq = 0
+        self.outbox = {}  # neighbor_id -> LSAs waiting for the next update message
+        self.spf_event = None
+        self.last_spf = -INF
+        self.hold = 0.0
+        self.prefixes = ()  # prefixes of the graph the installed routes came from
+        self.installed = np.empty(0, dtype=np.int64)  # neighbor position per prefix, or -1
+
+
+class LinkStateProtocol:
+    """
+    Runs link-state routing on a set of Routers linked with Router.add_neighbor().
+    :param routers: The participating routers.
+    :param scheduler: EventScheduler to run on; defaults to the default scheduler.
+    :param link_delay: Virtual seconds for an update to cross a link.
+    :param pacing: Interval over which LSAs for the same neighbor are packed into one update.
+    :param spf_delay: Wait before the first SPF after a quiet period.
+    :param spf_hold: Initial minimum spacing between consecutive SPF runs.
+    :param spf_max_hold: Upper bound of the doubling hold time.
+    """
+
+    def __init__(self, routers, scheduler=None, link_delay=1e-3, pacing=1e-3,
+                 spf_delay=0.05, spf_hold=0.2, spf_max_hold=5.0):
+        self.scheduler = scheduler or get_default_scheduler()
+        self.states = {router.router_id: _RouterState(router) for router in routers}
+        self.link_delay = link_delay
+        self.pacing = pacing
+        self.spf_delay = spf_delay
+        self.spf_hold = spf_hold
+        self.spf_max_hold = spf_max_hold
+        self._down = set()
+        self._graphs = {}
+        self._prefixes = ()
+        self._counters = collections.Counter()
+        self._last_change = None
+
+    def _link_up(self, a, b):
+        return frozenset((a, b)) not in self._down
+
+    def originate(self, router_id):
+        """
+        Build a new LSA for a router from its current links and interfaces and flood it.
+        """
+        state = self.states[router_id]
+        router = state.router
+        state.seq += 1
+        links = tuple((neighbor_id, link['cost']) for neighbor_id, link in router.neighbors.items()
+                      if neighbor_id in self.states and self._link_up(router_id, neighbor_id))
+        prefixes = tuple(iface['ip_address'].network for iface in router.interfaces.values())
+        lsa = LinkStateAdvertisement(router_id, state.seq, links, prefixes)
+        self._receive(router_id, None, (lsa,))
+
+    def start(self):
+        """
+        Have every router originate its first LSA.
+        """
+        for router_id in self.states:
+            self.originate(router_id)
+
+    def set_link_cost(self, a, b, cost):
+        """
+        Change the cost of the link between routers a and b in both directions and
+        re-originate both routers' LSAs.
+        """
+        self.states[a].router.neighbors[b]['cost'] = cost
+        self.states[b].router.neighbors[a]['cost'] = cost
+        self.originate(a)
+        self.originate(b)
+
+    def link_down(self, a, b):
+        """
+        Fail the link between routers a and b. Neither end floods over it until link_up().
+        """
+        self._down.add(frozenset((a, b)))
+        self.originate(a)
+        self.originate(b)
+
+    def link_up(self, a, b):
+        """
+        Restore a link failed with link_down().
+        """
+        self._down.discard(frozenset((a, b)))
+        self.originate(a)
+        self.originate(b)
+
+    def converge(self, until=None):
+        """
+        Start the protocol if no LSA has been originated yet, then run the scheduler
+        until flooding and SPF have settled.
+        :param until: Optional virtual time limit.
+        :return: ConvergenceReport with the counters for this call.
+        """
+        start = self.scheduler.now
+        self._counters.clear()
+        self._last_change = None
+        if not any(state.seq for state in self.states.values()):
+            self.start()
+        self.scheduler.run(until=until)
+        counters = self._counters
+        last_change = self._last_change if self._last_change is not None else start
+        return ConvergenceReport(last_change - start, counters['messages'], counters['lsas_sent'],
+                                 counters['lsas_installed'], counters['duplicates'], counters['spf_runs'],
+                                 counters['spf_batched'], counters['route_changes'])
+
+    def _receive(self, router_id, sender, lsas):
+        state = self.states[router_id]
+        counters = self._counters
+        fresh = [lsa for lsa in lsas if state.lsdb.install(lsa)]
+        counters['lsas_installed'] += len(fresh)
+        counters['duplicates'] += len(lsas) - len(fresh)
+        if not fresh:
+            return
+        tracer = get_tracer()
+        if tracer.enabled:
+            for lsa in fresh:
+                tracer.emit(EventKind.LSA_INSTALL, router_id, peer=sender, seq=lsa.seq, data=lsa.origin)
+        for neighbor_id in state.router.neighbors:
+            if neighbor_id == sender or neighbor_id not in self.states or not self._link_up(router_id, neighbor_id):
+                continue
+            outbox = state.outbox.get(neighbor_id)
+            if outbox is None:
+                outbox = state.outbox[neighbor_id] = []
+                self.scheduler.schedule(self.pacing, self._send, router_id, neighbor_id)
+            outbox.extend(fresh)
+        self._trigger_spf(state)
+
+    def _send(self, router_id, neighbor_id):
+        lsas = self.states[router_id].outbox.pop(neighbor_id)
+        if not self._link_up(router_id, neighbor_id):
+            return
+        self._counters['messages'] += 1
+        self._counters['lsas_sent'] += len(lsas)
+        self.scheduler.schedule(self.link_delay, self._receive, neighbor_id, router_id, tuple(lsas))
+
+    def _trigger_spf(self, state):
+        if state.spf_event is not None:
+            self._counters['spf_batched'] += 1
+            return
+        now = self.scheduler.now
+        if now - state.last_spf >= state.hold:
+            # Quiet for a full hold period: back to the initial timers.
+            state.hold = self.spf_hold
+            wait = self.spf_delay
+        else:
+            wait = max(self.spf_delay, state.last_spf + state.hold - now)
+            state.hold = min(state.hold * 2, self.spf_max_hold)
+        state.spf_event = self.scheduler.schedule(wait, self._run_spf, state)
+
+    def _graph(self, lsdb):
+        key = lsdb.key()
+        graph = self._graphs.get(key)
+        if graph is None:
+            if len(self._graphs) > 64:
+                self._graphs.clear()
+            graph = lsdb.compile()
+            # Reuse the previous prefix tuple when it has not changed, so routers
+            # can tell that by identity and diff their routes as arrays.
+            if graph.prefixes == self._prefixes:
+                graph = graph._replace(prefixes=self._prefixes)
+            self._prefixes = graph.prefixes
+            self._graphs[key] = graph
+        return graph
+
+    def _run_spf(self, state):
+        state.spf_event = None
+        state.last_spf = self.scheduler.now
+        self._counters['spf_runs'] += 1
+        graph = self._graph(state.lsdb)
+        router = state.router
+        source = graph.index[router.router_id]
+        dist, first = shortest_path_tree(source, graph.indptr, graph.indices, graph.weights)
+
+        tracer = get_tracer()
+        if tracer.enabled:
+            tracer.emit(EventKind.SPF_RUN, router.router_id, value=len(graph.nodes))
+
+        # For every prefix take its nearest advertising router (lowest index on ties),
+        # then map that router's first hop to our neighbor position.
+        dist = np.array(dist)
+        first = np.array(first, dtype=np.int64)
+        cost = dist[graph.owner_node]
+        order = np.lexsort((cost, graph.owner_prefix))
+        nearest = graph.owner_node[order[graph.prefix_start]]
+        slot = np.full(len(graph.nodes) + 1, -1, dtype=np.int64)
+        neighbors = list(router.neighbors)
+        for position, neighbor_id in enumerate(neighbors):
+            if neighbor_id in graph.index:
+                slot[graph.index[neighbor_id]] = position
+        routes = slot[first[nearest]]  # first == -1 picks the trailing -1
+        routes[np.isinf(dist[nearest])] = -1
+        routes[graph.owner_prefix[graph.owner_node == source]] = -1  # directly connected
+
+        if graph.prefixes is state.prefixes:
+            changed = np.nonzero(routes != state.installed)[0].tolist()
+            updates = [(graph.prefixes[i], int(routes[i])) for i in changed]
+        else:
+            old = dict(zip(state.prefixes, state.installed.tolist()))
+            updates = [(prefix, position) for prefix, position in zip(graph.prefixes, routes.tolist())
+                       if old.pop(prefix, -1) != position]
+            updates.extend((prefix, -1) for prefix, position in old.items() if position >= 0)
+        for prefix, position in updates:
+            if position < 0:
+                router.remove_route(prefix)
+            else:
+                hop = neighbors[position]
+                router.configure_routing_table(prefix, router.neighbor_address(hop), router.neighbors[hop]['interface'])
+        state.prefixes = graph.prefixes
+        state.installed = routes
+        if updates:
+            self._counters['route_changes'] += len(updates)
+            self._last_change = self.scheduler.now
+
+
+def shortest_path_tree(source, indptr, indices, weights):
+    """
+    Dijkstra over a CSR graph.
+    :return: (dist, first_hop) lists indexed by node; unreachable nodes have
+        dist inf and first hop -1.
+    """
+    n = len(indptr) - 1
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    weights = weights.tolist()
+    dist = [INF] * n
+    first = [-1] * n
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+    while heap:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        hop = first[u]
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            nd = d + weights[k]
+            if nd < dist[v]:
+                dist[v] = nd
+                first[v] = v if u == source else hop
+                heappush(heap, (nd, v))
+    return dist, first
@@ -0,0 +1,297 @@
+import heapq
+from netsim.ipv4 import MASKS, IPv4Address, IPv4Prefix, as_ipv4, as_ipv4_prefix, mask_to_length
+from netsim.fib import PrefixTrie
+from netsim.frames import IPv4Packet
+from netsim.tracing import EventKind, get_tracer
+
+
+class RoutingTable(dict):
+    """
+    Routes keyed by IPv4Prefix. A key may also be given as a string: "10.0.0.0/8"
+    names one prefix, and a bare network address such as "192.168.2.0" finds
+    the longest prefix stored for that network.
+    """
+    __slots__ = ()
+
+    def _key(self, key):
+        if not isinstance(key, str):
+            return key
+        prefix = as_ipv4_prefix(key)
+        if '/' in key:
+            return prefix
+        value = prefix.value
+        for length in range(32, -1, -1):
+            if value & MASKS[length] != value:
+                break
+            candidate = IPv4Prefix(value, length)
+            if dict.__contains__(self, candidate):
+                return candidate
+        return prefix
+
+    def __getitem__(self, key):
+        return dict.__getitem__(self, self._key(key))
+
+    def __contains__(self, key):
+        return dict.__contains__(self, self._key(key))
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, self._key(key))
+
+    def get(self, key, default=None):
+        return dict.get(self, self._key(key), default)
+
+    def pop(self, key, *default):
+        return dict.pop(self, self._key(key), *default)
+
+
+class Router:
+    """
+    A router. routing_table maps IPv4Prefix to a route dict whose 'next_hop' is an
+    IPv4Address (or None), 'interface' the outgoing interface name and
+    'subnet_mask' the prefix length as an int; str(route['next_hop']) and
+    IPv4Prefix.subnet_mask give the dotted-quad forms.
+    """
+
+    def __init__(self, router_id):
+        self.router_id = router_id
+        self.interfaces = {}  # Dictionary to store interface information
+        self.routing_table = RoutingTable()  # Routing table to store network layer routing information
+        self.neighbors = {}  # Dictionary to store neighboring routers and their interfaces
+        self.routing_updates = []  # List to store received routing updates
+        self.fib = PrefixTrie()  # Compiled forwarding table used for longest prefix matching
+
+    def add_interface(self, interface_name, ip_address, subnet_mask=None):
+        """
+        Add an interface to the router.
+        :param ip_address: IPv4Address or string, optionally in CIDR form.
+        :param subnet_mask: Dotted-quad mask or prefix length; overrides a CIDR suffix.
+        """
+        address = IPv4Address(ip_address, subnet_mask)
+        self.interfaces[interface_name] = {'ip_address': address, 'subnet_mask': address.prefix_len}
+
+    def add_neighbor(self, neighbor, interface, cost=1):
+        """
+        Record a directly connected router reachable through one of our interfaces.
+        :param neighbor: The neighboring Router.
+        :param interface: Name of our interface facing the neighbor.
+        :param cost: Link metric used by shortest-path routing.
+        """
+        self.neighbors[neighbor.router_id] = {'router': neighbor, 'interface': interface, 'cost': cost}
+
+    def neighbor_address(self, neighbor_id):
+        """
+        Return the neighbor's address on the subnet shared with our facing interface,
+        or None if no neighbor interface is on that subnet.
+        """
+        link = self.neighbors[neighbor_id]
+        local = self.interfaces[link['interface']]['ip_address']
+        mask = MASKS[local.prefix_len]
+        for iface in link['router'].interfaces.values():
+            if not (iface['ip_address'].value ^ local.value) & mask:
+                return iface['ip_address']
+        return None
+
+    def directly_connected(self, address):
+        """
+        Check whether an address lies on one of this router's interface subnets.
+        """
+        value = as_ipv4(address).value
+        return any(not (value ^ iface['ip_address'].value) & MASKS[iface['subnet_mask']]
+                   for iface in self.interfaces.values())
+
+    def configure_routing_table(self, destination_network, next_hop, interface, subnet_mask=None):
+        """
+        Configure the routing table of the router.
+        The route is also compiled into the FIB so lookups never rescan the table.
+        Addresses may be IPv4Address/IPv4Prefix objects or strings.
+        """
+        prefix = as_ipv4_prefix(destination_network, subnet_mask)
+        route = {
+            'next_hop': as_ipv4(next_hop) if next_hop is not None else None,
+            'interface': interface,
+            'subnet_mask': prefix.prefix_len
+        }
+        self.routing_table[prefix] = route
+        self.fib.insert(prefix.value, prefix.prefix_len, route)
+
+    def remove_route(self, destination_network, subnet_mask=None):
+        """
+        Remove a route from the routing table and the FIB.
+        :return: The removed route, or None if there was no route for the network.
+        """
+        prefix = as_ipv4_prefix(destination_network, subnet_mask)
+        route = self.routing_table.pop(prefix, None)
+        if route is not None:
+            self.fib.remove(prefix.value, prefix.prefix_len)
+        return route
+
+    def lookup_route(self, destination_ip):
+        """
+        Return the longest-prefix-match route for a destination, or None.
+        """
+        return self.fib.lookup(as_ipv4(destination_ip).value)
+
+    def forward_packet(self, packet):
+        """
+        Forward a packet based on the routing table using the longest mask matching.
+        :param packet: IPv4Packet, or a dict with a 'destination_ip'.
+        :return: The matching route, or None if there is no route.
+        """
+        if isinstance(packet, IPv4Packet):
+            destination_ip = packet.destination_ip
+            route = self.fib.lookup(packet.destination)
+        else:
+            destination_ip = packet['destination_ip']
+            route = self.lookup_route(destination_ip)
+        tracer = get_tracer()
+        if route is not None:
+            if tracer.enabled:
+                tracer.emit(EventKind.ROUTE_FORWARD, self.router_id, peer=route['next_hop'],
+                            port=route['interface'], data=destination_ip)
+            # Here you can implement the actual packet forwarding mechanism
+        elif tracer.enabled:
+            tracer.emit(EventKind.ROUTE_MISS, self.router_id, data=destination_ip)
+        return route
+
+    def receive_packet(self, packet):
+        """
+        Receive a packet and process it.
+        :param packet: IPv4Packet, or a dict with a 'destination_ip'.
+        """
+        if isinstance(packet, IPv4Packet):
+            destination_ip = packet.destination_ip
+            destination = packet.destination
+        else:
+            destination_ip = packet['destination_ip']
+            destination = as_ipv4(destination_ip).value
+        local = any(iface['ip_address'].value == destination for iface in self.interfaces.values())
+        tracer = get_tracer()
+        if tracer.enabled:
+            tracer.emit(EventKind.PACKET_LOCAL if local else EventKind.PACKET_NOT_LOCAL, self.router_id, data=destination_ip)
+        # Here you can implement processing of incoming packets
+        return local
+
+    def add_static_route(self, destination_network, next_hop, interface, subnet_mask=None):
+        """
+        Add a static route to the routing table of the router.
+        """
+        self.configure_routing_table(destination_network, next_hop, interface, subnet_mask)
+
+    def ip_in_subnet(self, ip, network, subnet_mask):
+        """
+        Check if an IP address is in a given subnet.
+        The comparison uses the prefix length carried by ip (/32 if it has none).
+        """
+        ip = as_ipv4(ip)
+        return not (ip.value ^ as_ipv4(network).value) & MASKS[ip.prefix_len]
+
+    def ip_to_bin(self, ip):
+        """
+        Convert an IP address to its binary representation.
+        """
+        return f'{as_ipv4(ip).value:032b}'
+
+    def mask_length(self, subnet_mask):
+        """
+        Calculate the length of the subnet mask.
+        """
+        return mask_to_length(subnet_mask)
+
+    def compute_shortest_path(self, graph, start, return_predecessors=False):
+        """
+        Compute shortest paths using Dijkstra's algorithm.
+        Paths are kept as a predecessor map rather than copied lists.
+        :param graph: Dict of node -> {neighbor: weight}.
+        :param return_predecessors: Also return the predecessor of every reached node.
+        :return: min_dist, or (min_dist, predecessors) if return_predecessors is set.
+        """
+        queue = [(0, start)]
+        seen = set()
+        min_dist = {start: 0}
+        predecessors = {start: None}
+        while queue:
+            (cost, v1) = heapq.heappop(queue)
+            if v1 in seen:
+                continue
+            seen.add(v1)
+            for v2, weight in graph.get(v1, {}).items():
+                if v2 in seen:
+                    continue
+                prev = min_dist.get(v2, None)
+                next = cost + weight
+                if prev is None or next < prev:
+                    min_dist[v2] = next
+                    predecessors[v2] = v1
+                    heapq.heappush(queue, (next, v2))
+        if return_predecessors:
+            return min_dist, predecessors
+        return min_dist
+
+class Network:
+    def __init__(self, network_address, subnet_mask=None):
+        self.prefix = as_ipv4_prefix(network_address, subnet_mask)
+        self.devices = []
+
+    @property
+    def network_address(self):
+        return self.prefix.network_address
+
+    @property
+    def subnet_mask(self):
+        return self.prefix.subnet_mask
+
+    def assign_ip_address(self, device):
+        """
+        Assign an IPv4 address to a device within the network.
+        """
+        # Increment the host part of the network address for each device
+        host_address = len(self.devices) + 1  # Increment for each new device
+        ip_address = IPv4Address(self.prefix.value + host_address, self.prefix.prefix_len)
+        device.ip_address = ip_address
+        device.network = self
+        self.devices.append(device)
+
+    def broadcast_arp_response(self, target_ip, target_mac, sender_ip):
+        """
+        Broadcast an ARP response to all devices in the network.
+        """
+        target_ip = as_ipv4(target_ip)
+        for device in self.devices:
+            if device.ip_address == target_ip:
+                # Simulate receiving the ARP response
+                device.receive_arp_response(sender_ip, target_mac)
+
+
+class Device:
+    def __init__(self, name):
+        self.name = name
+        self.ip_address = None
+        self.mac_address = None
+        self.network = None
+
+    def send_arp_request(self, ip_address):
+        """
+        Simulate sending an ARP request to resolve the MAC address for the given IP address.
+        """
+        if self.network:
+            ip_address = as_ipv4(ip_address)
+            # Send ARP request to all devices in the network
+            for device in self.network.devices:
+                if device.ip_address == ip_address:
+                    # Simulate receiving an ARP request
+                    device.receive_arp_request(self.ip_address)
+
+    def receive_arp_request(self, sender_ip):
+        """
+        Simulate receiving an ARP request and send a response.
+        """
+        if self.network:
+            # Simulate sending an ARP response
+            self.network.broadcast_arp_response(self.ip_address, self.mac_address, sender_ip)
+
+    def receive_arp_response(self, ip_address, mac_address):
+        """
+        Receive an ARP response containing the MAC address.
+        """
+        print(f"{self.name} received ARP response: IP - {ip_address}, MAC - {mac_address}")
+        self.mac_address = mac_address
@@ -0,0 +1,479 @@
+"""
+Conservative parallel discrete-event simulation of packet forwarding.
+
+A large topology is reduced to a PacketModel: nodes, directed links with a
+propagation delay and bandwidth, hop-count routes towards every traffic
+destination, and Poisson packet flows. partition_graph() splits the nodes
+into balanced parts with few links between them. Each part then runs in its
+own worker process with its own event heap.
+
+The parts advance in lockstep windows. The lookahead L is the smallest
+propagation delay of any link between two parts: a packet sent at time t
+arrives no earlier than t + L. So once every part has finished its events
+before T, nothing can still arrive before T + L, and every part may run all
+of its events in [T, T + L) independently. Packets crossing a cut are then
+exchanged through shared-memory outboxes, and the next window starts at the
+earliest pending event anywhere.
+
+Events are ordered by (time, packet id), never by insertion order, so every
+node sees its events in the same order however the topology is split. The
+deliveries of a parallel run are therefore bit-identical to run_sequential().
+"""
+import array
+import collections
+import heapq
+import math
+import time
+import traceback
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+
+import numpy as np
+
+EVENT_DTYPE = np.dtype([('time', 'f8'), ('packet', 'i8'), ('node', 'i4'), ('hops', 'i4'), ('created', 'f8')])
+DELIVERY_DTYPE = np.dtype([('packet', 'i8'), ('time', 'f8'), ('hops', 'i4'), ('created', 'f8')])
+
+_SEQUENCE_BITS = 32
+_SEQUENCE_MASK = (1 << _SEQUENCE_BITS) - 1
+
+
+def csr_graph(num_nodes, src, dst):
+    """
+    Build (indptr, indices, link ids) of the outgoing links of every node.
+    """
+    order = np.argsort(src, kind='stable')
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+    return indptr, np.asarray(dst)[order], order
+
+
+def _neighbors(indptr, indices, frontier):
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+    return indices[offsets]
+
+
+def _bfs_order(indptr, indices, members, start):
+    """
+    Breadth-first order of the member nodes from start, continuing into other
+    components when one is exhausted. Returns (order, last level).
+    """
+    visited = ~members
+    visited[start] = True
+    frontier = np.array([start])
+    levels = []
+    while True:
+        while len(frontier):
+            levels.append(frontier)
+            reached = _neighbors(indptr, indices, frontier)
+            frontier = np.unique(reached[~visited[reached]])
+            visited[frontier] = True
+        remaining = np.flatnonzero(~visited)
+        if not len(remaining):
+            break
+        frontier = remaining[:1]
+        visited[frontier] = True
+    return np.concatenate(levels), levels[-1]
+
+
+def partition_graph(indptr, indices, parts, imbalance=0.03, refine_passes=4):
+    """
+    Split a graph into `parts` balanced parts with few edges between them.
+
+    Recursive bisection orders each part breadth-first from a pseudo-peripheral
+    node and cuts the order at the target size, which keeps parts contiguous.
+    Boundary nodes are then moved to the neighboring part most of their
+    neighbors are in, as long as no part grows past (1 + imbalance) times its
+    fair share.
+    :param indptr, indices: CSR adjacency; links should exist in both directions.
+    :return: Array with the part number of every node.
+    """
+    n = len(indptr) - 1
+    labels = np.zeros(n, dtype=np.int32)
+    if parts <= 1 or n == 0:
+        return labels
+    pending = [(np.arange(n), parts, 0)]
+    while pending:
+        nodes, k, first_label = pending.pop()
+        if k == 1 or len(nodes) <= 1:
+            labels[nodes] = first_label
+            continue
+        members = np.zeros(n, dtype=bool)
+        members[nodes] = True
+        _, last = _bfs_order(indptr, indices, members.copy(), nodes[0])
+        order, _ = _bfs_order(indptr, indices, members, last[0])
+        k_left = k // 2
+        cut = int(round(len(nodes) * k_left / k))
+        pending.append((order[cut:], k - k_left, first_label + k_left))
+        pending.append((order[:cut], k_left, first_label))
+
+    limit = math.ceil(n / parts * (1 + imbalance))
+    floor = math.floor(n / parts * (1 - imbalance))
+    sizes = np.bincount(labels, minlength=parts)
+    source = np.repeat(np.arange(n), np.diff(indptr))
+    for _ in range(refine_passes):
+        crossing = labels[source] != labels[indices]
+        boundary = np.unique(source[crossing]).tolist()
+        moved = 0
+        for node in boundary:
+            own = int(labels[node])
+            counts = collections.Counter(labels[indices[indptr[node]:indptr[node + 1]]].tolist())
+            best, best_count = own, counts.get(own, 0)
+            for part, count in sorted(counts.items()):
+                if count > best_count and sizes[part] < limit:
+                    best, best_count = part, count
+            if best != own and sizes[own] > floor:
+                labels[node] = best
+                sizes[own] -= 1
+                sizes[best] += 1
+                moved += 1
+        if not moved:
+            break
+    return labels
+
+
+class PacketModel:
+    """
+    A packet-forwarding model of a topology: store-and-forward links with FIFO
+    queues, hop-count shortest-path routing and Poisson flows.
+    :param num_nodes: Number of nodes, numbered 0 .. num_nodes - 1.
+    :param link_src, link_dst: Endpoints of each directed link.
+    :param delay: Propagation delay per link in seconds (scalar or array).
+    :param bandwidth: Bandwidth per link in bits per second (scalar or array).
+    """
+
+    def __init__(self, num_nodes, link_src, link_dst, delay=1e-3, bandwidth=1e9, names=None):
+        self.num_nodes = num_nodes
+        self.link_src = np.asarray(link_src, dtype=np.int64)
+        self.link_dst = np.asarray(link_dst, dtype=np.int64)
+        links = len(self.link_src)
+        self.delay = np.broadcast_to(np.asarray(delay, dtype=np.float64), (links,)).copy()
+        self.bandwidth = np.broadcast_to(np.asarray(bandwidth, dtype=np.float64), (links,)).copy()
+        if links and self.delay.min() <= 0:
+            raise ValueError("Link delays must be positive to give the simulation lookahead")
+        self.names = names
+        self.indptr, self.indices, self.out_links = csr_graph(num_nodes, self.link_src, self.link_dst)
+        self.flow_src = np.empty(0, dtype=np.int64)
+        self.flow_dst = np.empty(0, dtype=np.int64)
+        self.flow_rate = np.empty(0)
+        self.flow_bits = np.empty(0)
+        self.flow_start = np.empty(0)
+        self._routes = {}
+
+    @classmethod
+    def from_devices(cls, devices, delay=1e-3, bandwidth=1e9):
+        """
+        Build a model from Routers (their neighbors), Bridges/Switches (their
+        ports) and Hubs (their connected devices). Every link becomes a pair of
+        directed links. Node names are the device or router IDs.
+        """
+        from netsim.data_link import Bridge
+        from netsim.network import Router
+        from netsim.physical import Hub
+
+        index = {}
+
+        def node(device):
+            name = getattr(device, 'router_id', None) or getattr(device, 'device_id', None) or f"hub-{id(device):x}"
+            if name not in index:
+                index[name] = len(index)
+            return index[name]
+
+        edges = set()
+        for device in devices:
+            if isinstance(device, Router):
+                peers = [link['router'] for link in device.neighbors.values()]
+            elif isinstance(device, Bridge):
+                peers = [port.attachment for port in device.ports.values()]
+            elif isinstance(device, Hub):
+                peers = list(device.connected_devices)
+            else:
+                peers = []
+            u = node(device)
+            for peer in peers:
+                v = node(peer)
+                if u != v:
+                    edges.add((min(u, v), max(u, v)))
+        edges = sorted(edges)
+        src = [u for u, v in edges] + [v for u, v in edges]
+        dst = [v for u, v in edges] + [u for u, v in edges]
+        return cls(len(index), src, dst, delay, bandwidth, names=list(index))
+
+    def add_flows(self, sources, destinations, rate, packet_size=1500, start=0.0):
+        """
+        Add Poisson packet flows.
+        :param rate: Packets per second per flow (scalar or array).
+        :param packet_size: Bytes per packet.
+        """
+        sources = np.atleast_1d(np.asarray(sources, dtype=np.int64))
+        destinations = np.broadcast_to(np.asarray(destinations, dtype=np.int64), sources.shape)
+        count = len(sources)
+        self.flow_src = np.concatenate((self.flow_src, sources))
+        self.flow_dst = np.concatenate((self.flow_dst, destinations))
+        self.flow_rate = np.concatenate((self.flow_rate, np.broadcast_to(rate, (count,)).astype(np.float64)))
+        self.flow_bits = np.concatenate((self.flow_bits, np.broadcast_to(packet_size * 8.0, (count,))))
+        self.flow_start = np.concatenate((self.flow_start, np.broadcast_to(start, (count,)).astype(np.float64)))
+
+    def routes(self):
+        """
+        Next link towards every flow destination, by hop count: breadth first
+        from the destination over reversed links, with ties broken by link order.
+        :return: (destinations, matrix) with matrix[i, node] the link to take
+            towards destinations[i], or -1.
+        """
+        destinations = np.unique(self.flow_dst)
+        key = destinations.tobytes()
+        if key in self._routes:
+            return self._routes[key]
+        # Incoming links of every node: reverse CSR.
+        order = np.lexsort((np.arange(len(self.link_dst)), self.link_dst))
+        in_ptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.link_dst, minlength=self.num_nodes), out=in_ptr[1:])
+        matrix = np.full((len(destinations), self.num_nodes), -1, dtype=np.int32)
+        for row, destination in enumerate(destinations):
+            reached = np.zeros(self.num_nodes, dtype=bool)
+            reached[destination] = True
+            frontier = np.array([destination])
+            while len(frontier):
+                links = order[_neighbors(in_ptr, np.arange(len(order)), frontier)]
+                senders = self.link_src[links]
+                fresh = ~reached[senders]
+                links, senders = links[fresh], senders[fresh]
+                senders, first = np.unique(senders, return_index=True)
+                matrix[row, senders] = links[first]
+                reached[senders] = True
+                frontier = senders
+        self._routes = {key: (destinations, matrix)}
+        return destinations, matrix
+
+
+ParallelResult = collections.namedtuple(
+    'ParallelResult', 'deliveries events windows messages partitions cut_links lookahead wall_time')
+ParallelResult.__doc__ = """
+Result of a run.
+:param deliveries: DELIVERY_DTYPE array (packet id, arrival time, hops, creation time), sorted by packet id.
+:param events: Events processed, summed over partitions.
+:param windows: Synchronization windows (1 for a sequential run).
+:param messages: Events that crossed a partition boundary.
+:param cut_links: Directed links between partitions.
+:param lookahead: Window length in seconds (inf for a sequential run).
+:param wall_time: Wall-clock seconds.
+"""
+
+
+class _PartitionEngine:
+    """
+    The events of the nodes one partition owns.
+    """
+
+    def __init__(self, model, owner, me, until, seed):
+        self.me = me
+        self.owner = array.array('i', owner.tolist())
+        self.link_dst = array.array('i', model.link_dst.tolist())
+        self.delay = array.array('d', model.delay.tolist())
+        self.bandwidth = array.array('d', model.bandwidth.tolist())
+        self.busy = array.array('d', bytes(8 * len(model.link_dst)))
+        destinations, matrix = model.routes()
+        rows = [array.array('i', matrix[i].tobytes()) for i in range(len(destinations))]
+        row = {d: rows[i] for i, d in enumerate(destinations.tolist())}
+        self.flow_route = [row[d] for d in model.flow_dst.tolist()]
+        self.flow_dst = model.flow_dst.tolist()
+        self.flow_src = model.flow_src.tolist()
+        self.flow_bits = model.flow_bits.tolist()
+        self.heap = []
+        self.deliveries = []
+        self.outbox = []
+        self.events = 0
+        # Each flow draws its arrivals from its own child seed, so they do not depend on the partitioning.
+        seeds = np.random.SeedSequence(seed).spawn(len(self.flow_src))
+        self.arrivals = {}
+        for flow, source in enumerate(self.flow_src):
+            if owner[source] != me:
+                continue
+            rng = np.random.default_rng(seeds[flow])
+            rate = model.flow_rate[flow]
+            start = model.flow_start[flow]
+            expected = int((until - start) * rate * 1.2) + 16
+            times = start + np.cumsum(rng.exponential(1.0 / rate, expected))
+            while times[-1] < until:
+                times = np.concatenate((times, times[-1] + np.cumsum(rng.exponential(1.0 / rate, expected))))
+            times = times[times < until].tolist()
+            if times:
+                self.arrivals[flow] = times
+                self.heap.append((times[0], flow << _SEQUENCE_BITS, source, 0, times[0]))
+        heapq.heapify(self.heap)
+
+    def advance(self, horizon):
+        """
+        Run every local event before horizon. Events for other partitions go to the outbox.
+        """
+        heap = self.heap
+        heappop, heappush = heapq.heappop, heapq.heappush
+        owner, me = self.owner, self.me
+        link_dst, delay, bandwidth, busy = self.link_dst, self.delay, self.bandwidth, self.busy
+        flow_dst, flow_route, flow_bits, arrivals = self.flow_dst, self.flow_route, self.flow_bits, self.arrivals
+        deliveries, outbox = self.deliveries, self.outbox
+        events = 0
+        while heap and heap[0][0] < horizon:
+            now, packet, node, hops, created = heappop(heap)
+            events += 1
+            flow = packet >> _SEQUENCE_BITS
+            if not hops:
+                # Creation at the source: schedule the flow's next packet.
+                times = arrivals[flow]
+                sequence = (packet & _SEQUENCE_MASK) + 1
+                if sequence < len(times):
+                    heappush(heap, (times[sequence], packet + 1, node, 0, times[sequence]))
+            if node == flow_dst[flow]:
+                deliveries.append((packet, now, hops, created))
+                continue
+            link = flow_route[flow][node]
+            if link < 0:
+                continue
+            start = busy[link]
+            if start < now:
+                start = now
+            finish = start + flow_bits[flow] / bandwidth[link]
+            busy[link] = finish
+            event = (finish + delay[link], packet, link_dst[link], hops + 1, created)
+            if owner[event[2]] == me:
+                heappush(heap, event)
+            else:
+                outbox.append(event)
+        self.events += events
+
+    def receive(self, records):
+        heap = self.heap
+        for event in records.tolist():
+            heapq.heappush(heap, event)
+
+    def next_time(self):
+        return self.heap[0][0] if self.heap else math.inf
+
+    def delivered(self):
+        deliveries = np.array(self.deliveries, dtype=DELIVERY_DTYPE)
+        deliveries.sort(order='packet')
+        return deliveries
+
+
+def _worker(model, owner, me, parts, until, seed, lookahead, capacity, names, barrier, results):
+    segments = [shared_memory.SharedMemory(name) for name in names]
+    try:
+        boxes = [np.ndarray((capacity,), EVENT_DTYPE, segment.buf, offset=8 * (parts + 1)) for segment in segments[:-1]]
+        offsets = [np.ndarray((parts + 1,), np.int64, segment.buf) for segment in segments[:-1]]
+        control = np.ndarray((2, parts), np.float64, segments[-1].buf)
+        engine = _PartitionEngine(model, owner, me, until, seed)
+        windows = messages = 0
+        control[0, me] = engine.next_time()
+        barrier.wait()
+        start = float(control[0].min())
+        while start < until:
+            engine.advance(min(start + lookahead, until))
+            windows += 1
+            # Exchange rounds until every outbox has been drained.
+            pending = sorted(engine.outbox, key=lambda event: owner[event[2]])
+            engine.outbox = []
+            while True:
+                batch, pending = pending[:capacity], pending[capacity:]
+                records = np.array(batch, dtype=EVENT_DTYPE)
+                destinations = owner[records['node']] if len(records) else np.empty(0, dtype=np.int64)
+                offsets[me][:] = np.searchsorted(destinations, np.arange(parts + 1))
+                boxes[me][:len(records)] = records
+                control[1, me] = len(pending)
+                messages += len(records)
+                barrier.wait()
+                for source in range(parts):
+                    if source != me:
+                        engine.receive(boxes[source][offsets[source][me]:offsets[source][me + 1]])
+                more = control[1].any()
+                barrier.wait()
+                if not more:
+                    break
+            control[0, me] = engine.next_time()
+            barrier.wait()
+            start = float(control[0].min())
+            barrier.wait()
+        results.put((me, engine.delivered(), engine.events, windows, messages))
+    except BaseException:
+        barrier.abort()
+        results.put((me, traceback.format_exc(), 0, 0, 0))
+    finally:
+        for segment in segments:
+            segment.close()
+
+
+class ParallelSimulation:
+    """
+    Runs a PacketModel split into partitions, one worker process each.
+    :param partitions: Number of partitions (and worker processes).
+    :param until: Simulated seconds; flows generate packets before this time.
+    :param seed: Seed of the flows' arrival processes.
+    :param capacity: Events per outbox per exchange round; larger bursts take extra rounds.
+    """
+
+    def __init__(self, model, partitions, until, seed=0, capacity=65536, imbalance=0.03):
+        self.model = model
+        self.partitions = partitions
+        self.until = until
+        self.seed = seed
+        self.capacity = capacity
+        self.owner = partition_graph(model.indptr, model.indices, partitions, imbalance)
+        cut = self.owner[model.link_src] != self.owner[model.link_dst]
+        self.cut_links = int(cut.sum())
+        self.lookahead = float(model.delay[cut].min()) if self.cut_links else math.inf
+
+    def run_sequential(self):
+        """
+        Run every node in this process, as one partition: the reference result.
+        """
+        start = time.perf_counter()
+        model = self.model
+        engine = _PartitionEngine(model, np.zeros(model.num_nodes, dtype=np.int32), 0, self.until, self.seed)
+        engine.advance(self.until)
+        return ParallelResult(engine.delivered(), engine.events, 1, 0, 1, 0, math.inf, time.perf_counter() - start)
+
+    def run(self):
+        """
+        Run the partitions in parallel worker processes.
+        :raise RuntimeError: If a worker fails.
+        """
+        parts = self.partitions
+        if parts <= 1:
+            return self.run_sequential()
+        start = time.perf_counter()
+        model = self.model
+        model.routes()  # computed once here, inherited by forked workers
+        context = get_context('fork') if 'fork' in get_all_start_methods() else get_context()
+        box_size = 8 * (parts + 1) + EVENT_DTYPE.itemsize * self.capacity
+        segments = [shared_memory.SharedMemory(create=True, size=box_size) for _ in range(parts)]
+        segments.append(shared_memory.SharedMemory(create=True, size=8 * 2 * parts))
+        barrier = context.Barrier(parts)
+        results = context.Queue()
+        names = [segment.name for segment in segments]
+        workers = [context.Process(target=_worker, name=f"netsim-partition-{me}",
+                                   args=(model, self.owner, me, parts, self.until, self.seed, self.lookahead,
+                                         self.capacity, names, barrier, results))
+                   for me in range(parts)]
+        try:
+            for worker in workers:
+                worker.start()
+            collected = [results.get() for _ in range(parts)]
+            for worker in workers:
+                worker.join()
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+        failures = [output for _, output, _, _, _ in collected if isinstance(output, str)]
+        if failures:
+            raise RuntimeError("Partition worker failed:\n" + failures[0])
+        deliveries = np.concatenate([output for _, output, _, _, _ in collected])
+        deliveries.sort(order='packet')
+        events = sum(result[2] for result in collected)
+        windows = max(result[3] for result in collected)
+        messages = sum(result[4] for result in collected)
+        return ParallelResult(deliveries, events, windows, messages, parts, self.cut_links, self.lookahead,
+                              time.perf_counter() - start)
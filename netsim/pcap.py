@@ -0,0 +1,405 @@
+"""
+Writing simulated traffic to pcap files and replaying captures.
+
+PcapWriter writes the classic libpcap format with nanosecond timestamps
+taken from the virtual clock, through one large write buffer, so capturing
+adds no system call per packet. Capture taps the points where frames leave
+a device, and writes each one as a real Ethernet II frame (without FCS):
+
+- Connection: when a frame sent with send() goes on the wire (transmit).
+- Hub: when a frame gets through the medium (collided attempts are not on it).
+- Bridge/Switch: every frame the bridge forwards or floods.
+- Router: every packet forward_packet() finds a route for.
+
+EthernetFrames and IPv4Packets are written as they are. Other payloads (the
+strings most scenarios send, bytes, or routing dicts) are wrapped in
+UDP/IPv4/Ethernet headers, using the devices' MAC and IP addresses where
+they have them. Devices without a MAC (routers, hosts that were never
+assigned one) get a stable locally administered MAC derived from their ID.
+
+PcapReader streams a capture in fixed-size chunks, so reading a capture of
+any size needs memory for one chunk plus the largest record. Replay feeds a
+capture into a simulated device one event at a time: each delivery
+schedules the next record, so there is never more than one pending event
+and one record in memory however long the capture is.
+"""
+import collections
+import hashlib
+import struct
+
+from netsim.frames import ETHERTYPE_IPV4, BROADCAST_MAC, EthernetFrame, IPv4Packet, mac_to_int
+from netsim.ipv4 import as_ipv4
+from netsim.scheduler import get_default_scheduler
+
+LINKTYPE_ETHERNET = 1
+MAGIC_MICROSECONDS = 0xa1b2c3d4
+MAGIC_NANOSECONDS = 0xa1b23c4d
+UDP_PORT = 9  # discard; scenario payloads have no real port
+
+_GLOBAL_HEADER = struct.Struct('<IHHiIII')
+_RECORD_HEADER = struct.Struct('<IIII')
+# 48-bit MACs are packed as a 16-bit high part and a 32-bit low part, as in netsim.frames.
+_ETHERNET_HEADER = struct.Struct('!HIHIH')
+_UDP_HEADER = struct.Struct('!HHHH')
+
+PcapRecord = collections.namedtuple('PcapRecord', 'time data original_length')
+PcapRecord.__doc__ = """
+One captured packet: capture time in seconds, the captured bytes (at most
+snaplen of them) and the length of the packet on the wire.
+"""
+
+
+def synthetic_mac(name):
+    """
+    Return a stable locally administered unicast MAC (as an int) for a device ID.
+    """
+    digest = hashlib.blake2b(str(name).encode('utf-8'), digest_size=5).digest()
+    return 0x02 << 40 | int.from_bytes(digest, 'big')
+
+
+def _as_mac(mac, name):
+    if mac is None:
+        return synthetic_mac(name)
+    if isinstance(mac, int):
+        return mac
+    try:
+        return mac_to_int(mac)
+    except ValueError:
+        return synthetic_mac(mac)
+
+
+def _mac(device, name=None):
+    if name is None:
+        name = getattr(device, 'device_id', device)
+    return _as_mac(getattr(device, 'mac_address', None), name)
+
+
+def _address(device):
+    address = getattr(device, 'ip_address', None)
+    return 0 if address is None else as_ipv4(address).value
+
+
+def _payload(data):
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    if isinstance(data, dict):
+        return _payload(data.get('payload', b''))
+    return str(data).encode('utf-8')
+
+
+def encode(data, destination_mac, source_mac, destination_ip=0, source_ip=0):
+    """
+    Encode a simulated payload as an Ethernet frame without FCS, as pcap stores it.
+    :param data: EthernetFrame (written as is), IPv4Packet (wrapped in Ethernet),
+        a dict with 'destination_ip' (and optionally 'source_ip' and 'payload'),
+        or a str/bytes payload (wrapped in UDP, IPv4 and Ethernet).
+    :param destination_mac: 48-bit int used when data has no Ethernet header.
+    :param source_mac: 48-bit int used when data has no Ethernet header.
+    :param destination_ip: IPv4 address used when data has no IPv4 header.
+    :param source_ip: IPv4 address used when data has no IPv4 header.
+    :return: bytes.
+    """
+    if isinstance(data, EthernetFrame):
+        return data.to_bytes()[:-EthernetFrame.fcs_size]
+    if isinstance(data, dict):
+        destination_ip = data['destination_ip']
+        source_ip = data.get('source_ip', source_ip)
+    if not isinstance(data, IPv4Packet):
+        payload = _payload(data)
+        size = _UDP_HEADER.size + memoryview(payload).nbytes
+        data = IPv4Packet(source_ip, destination_ip, _UDP_HEADER.pack(UDP_PORT, UDP_PORT, size, 0) + bytes(payload))
+    return (_ETHERNET_HEADER.pack(destination_mac >> 32, destination_mac & 0xFFFFFFFF, source_mac >> 32,
+                                  source_mac & 0xFFFFFFFF, ETHERTYPE_IPV4) + data.to_bytes())
+
+
+def decode(data):
+    """
+    Parse a captured Ethernet frame (no FCS). The payload is a memoryview into data;
+    IPv4Packet.from_bytes() parses it further.
+    """
+    view = memoryview(data).cast('B')
+    if len(view) < _ETHERNET_HEADER.size:
+        raise ValueError(f"Captured frame too short: {len(view)} bytes")
+    d_high, d_low, s_high, s_low, ethertype = _ETHERNET_HEADER.unpack_from(view)
+    frame = EthernetFrame.__new__(EthernetFrame)
+    frame.destination = d_high << 32 | d_low
+    frame.source = s_high << 32 | s_low
+    frame.ethertype = ethertype
+    frame.payload = view[_ETHERNET_HEADER.size:]
+    return frame
+
+
+class PcapWriter:
+    """
+    Writes packets to a libpcap file, stamped with the virtual time.
+    :param path: Output file.
+    :param clock: Object with a `now` attribute, normally the EventScheduler.
+    :param snaplen: Longest prefix of a packet that is stored.
+    :param buffer_size: Bytes buffered before each write to the file.
+    """
+
+    def __init__(self, path, clock=None, snaplen=65535, buffer_size=4 << 20):
+        self._file = open(path, 'wb', buffering=buffer_size)
+        self.clock = clock
+        self.snaplen = snaplen
+        self.packets = 0
+        self.bytes = 0
+        self._file.write(_GLOBAL_HEADER.pack(MAGIC_NANOSECONDS, 2, 4, 0, 0, snaplen, LINKTYPE_ETHERNET))
+
+    def write(self, frame, time=None):
+        """
+        Append one Ethernet frame (bytes-like, without FCS).
+        :param time: Capture time; defaults to the clock's current time.
+        """
+        if time is None:
+            time = (self.clock or get_default_scheduler()).now
+        length = memoryview(frame).nbytes
+        stored = min(length, self.snaplen)
+        nanoseconds = round(time * 1e9)
+        self._file.write(_RECORD_HEADER.pack(nanoseconds // 1_000_000_000, nanoseconds % 1_000_000_000, stored, length))
+        self._file.write(frame if stored == length else memoryview(frame)[:stored])
+        self.packets += 1
+        self.bytes += length
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PcapReader:
+    """
+    Streams the records of a libpcap file (either byte order, microsecond or
+    nanosecond timestamps). Iterating yields PcapRecords.
+    :param path: Capture file.
+    :param chunk_size: Bytes read from the file at a time.
+    :raise ValueError: If the file is not a pcap file.
+    """
+
+    def __init__(self, path, chunk_size=1 << 20):
+        self._file = open(path, 'rb')
+        self.chunk_size = chunk_size
+        header = self._file.read(_GLOBAL_HEADER.size)
+        if len(header) < _GLOBAL_HEADER.size:
+            raise ValueError(f"{path} is too short to be a pcap file")
+        for order in '<>':
+            magic = struct.unpack_from(order + 'I', header)[0]
+            if magic in (MAGIC_MICROSECONDS, MAGIC_NANOSECONDS):
+                break
+        else:
+            raise ValueError(f"{path} is not a pcap file (pcapng is not supported)")
+        _, self.version_major, self.version_minor, _, _, self.snaplen, self.linktype = struct.unpack(
+            order + 'IHHiIII', header)
+        self._record = struct.Struct(order + 'IIII')
+        self._resolution = 1e-9 if magic == MAGIC_NANOSECONDS else 1e-6
+
+    def __iter__(self):
+        read = self._file.read
+        record = self._record
+        header_size = record.size
+        resolution = self._resolution
+        buffer = b''
+        position = 0
+        while True:
+            if len(buffer) - position < header_size:
+                buffer = buffer[position:] + read(max(self.chunk_size, header_size - len(buffer) + position))
+                position = 0
+                if len(buffer) < header_size:
+                    if buffer:
+                        raise ValueError("pcap file ends inside a record header")
+                    return
+            seconds, fraction, stored, length = record.unpack_from(buffer, position)
+            end = position + header_size + stored
+            if end > len(buffer):
+                buffer = buffer[position:] + read(max(self.chunk_size, end - len(buffer)))
+                end -= position
+                position = 0
+                if end > len(buffer):
+                    raise ValueError("pcap file ends inside a record")
+            yield PcapRecord(seconds + fraction * resolution, buffer[position + header_size:end], length)
+            position = end
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Capture:
+    """
+    Taps devices and writes every frame they send to a PcapWriter.
+    Taps replace methods on the device instances, so detach() before
+    checkpointing a tapped simulation.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self._tapped = []
+
+    def attach(self, *targets):
+        """
+        Tap Connections, Hubs, Bridges/Switches and Routers. A Topology (or any
+        iterable of devices) taps every device in it; other objects are ignored.
+        :return: self.
+        """
+        from netsim.data_link import Bridge
+        from netsim.network import Router
+        from netsim.physical import Connection, Hub
+
+        for target in targets:
+            if isinstance(target, Connection):
+                self._tap(target, 'transmit', self._connection_tap(target))
+            elif isinstance(target, Hub):
+                self._tap(target, '_fan_out', self._hub_tap(target))
+            elif isinstance(target, Bridge):
+                self._tap(target, 'forward', self._bridge_tap(target))
+            elif isinstance(target, Router):
+                self._tap(target, 'forward_packet', self._router_tap(target))
+            elif hasattr(target, 'devices') or isinstance(target, (list, tuple)):
+                self.attach(*getattr(target, 'devices', target))
+        return self
+
+    def detach(self):
+        """
+        Remove every tap.
+        """
+        for target, method in self._tapped:
+            del target.__dict__[method]
+        self._tapped.clear()
+
+    def _tap(self, target, method, tap):
+        if method not in target.__dict__:
+            setattr(target, method, tap)
+            self._tapped.append((target, method))
+
+    def _connection_tap(self, connection):
+        transmit = connection.transmit
+        write = self.writer.write
+        ends = (connection.device1, connection.device2)
+
+        def tapped(data, destination_mac=None, checksum=None, receiver_id=None):
+            destination = next((end for end in ends if end.device_id == destination_mac), None)
+            if destination is not None:
+                source = next((end for end in ends if end.device_id == receiver_id), receiver_id)
+                write(encode(data, _mac(destination), _mac(source, receiver_id), _address(destination), _address(source)))
+            transmit(data, destination_mac, checksum, receiver_id)
+
+        return tapped
+
+    def _hub_tap(self, hub):
+        fan_out = hub._fan_out
+        write = self.writer.write
+
+        def tapped(frame):
+            source = hub.members.get(frame.sender_id, frame.sender_id)
+            write(encode(frame.data, BROADCAST_MAC, _mac(source, frame.sender_id), 0xFFFFFFFF, _address(source)))
+            fan_out(frame)
+
+        return tapped
+
+    def _bridge_tap(self, bridge):
+        forward = bridge.forward
+        write = self.writer.write
+
+        def tapped(data, destination_mac, source_mac=None, in_port=None, checksum=None, sender_id=None):
+            ports = bridge.ports
+            source = ports[in_port].attachment if in_port in ports else None
+            port = None if destination_mac is None else ports.get(bridge.lookup(destination_mac))
+            destination = BROADCAST_MAC if destination_mac is None else _as_mac(destination_mac, None)
+            destination_ip = 0xFFFFFFFF if destination == BROADCAST_MAC else 0 if port is None else \
+                _address(port.attachment)
+            write(encode(data, destination, _as_mac(source_mac, sender_id), destination_ip, _address(source)))
+            forward(data, destination_mac, source_mac, in_port, checksum, sender_id)
+
+        return tapped
+
+    def _router_tap(self, router):
+        forward_packet = router.forward_packet
+        write = self.writer.write
+
+        def tapped(packet):
+            route = forward_packet(packet)
+            if route is not None:
+                write(encode(packet, synthetic_mac(route['next_hop']),
+                             synthetic_mac(f"{router.router_id}/{route['interface']}")))
+            return route
+
+        return tapped
+
+
+class Replay:
+    """
+    Feeds a capture into a simulated device. Records are delivered with the
+    device's receive_data(frame, None, source MAC, True) at their capture
+    times, shifted so the first one arrives at `start`.
+    :param reader: PcapReader, or any iterable of PcapRecords.
+    :param device: The receiving device (anything with receive_data).
+    :param scheduler: Scheduler to deliver on; defaults to the device's.
+    :param start: Virtual time of the first record; defaults to now.
+    :param speed: Capture seconds per virtual second.
+    """
+
+    def __init__(self, reader, device, scheduler=None, start=None, speed=1.0):
+        self.device = device
+        self.scheduler = scheduler or getattr(device, 'scheduler', None) or get_default_scheduler()
+        self.start_time = self.scheduler.now if start is None else start
+        self.speed = speed
+        self.frames = 0
+        self.bytes = 0
+        self._reader = reader
+        self._records = iter(reader)
+        self._origin = None
+
+    def start(self):
+        """
+        Schedule the first record.
+        :return: self.
+        """
+        self._schedule_next()
+        return self
+
+    def _schedule_next(self):
+        record = next(self._records, None)
+        if record is None:
+            self.close()
+            return
+        if self._origin is None:
+            self._origin = record.time
+        time = self.start_time + (record.time - self._origin) / self.speed
+        self.scheduler.schedule_at(max(time, self.scheduler.now), self._deliver, record)
+
+    def close(self):
+        """
+        Close the reader; called automatically when the capture runs out.
+        """
+        close = getattr(self._reader, 'close', None)
+        if close is not None:
+            close()
+
+    def _deliver(self, record):
+        frame = decode(record.data)
+        self.frames += 1
+        self.bytes += record.original_length
+        self.device.receive_data(frame, None, frame.source_mac, True)
+        self._schedule_next()
+
+
+def replay(path, device, scheduler=None, start=None, speed=1.0, chunk_size=1 << 20):
+    """
+    Stream a pcap file into a device; see Replay. Call scheduler.run() to play it.
+    :return: The started Replay.
+    """
+    return Replay(PcapReader(path, chunk_size), device, scheduler, start, speed).start()
@@ -0,0 +1,250 @@
+import random
+
+from netsim.access_control import AccessControlProtocol
+from netsim.error_control import ErrorControlProtocol
+from netsim.flow_control import FlowControlProtocol
+from netsim.frames import EthernetFrame, IPv4Packet
+from netsim.scheduler import get_default_scheduler
+from netsim.tracing import EventKind, get_tracer
+
+
+class PhysicalLayerDevice:
+    def __init__(self, device_id, scheduler=None):
+        self.device_id = device_id
+        self.connection = None
+        self.scheduler = scheduler or get_default_scheduler()
+
+    def connect(self, connection):
+        self.connection = connection
+
+    def send_data(self, data, destination_mac=None, window_size=3):
+        if self.connection:
+            FlowControlProtocol.sliding_window(window_size, data, node=self.device_id)
+            checksum = ErrorControlProtocol.checksum(data)
+            self.connection.send(data, destination_mac, checksum,receiver_id=self.device_id)
+    
+    def receive_data(self, data, checksum, receiver_id, valid=None):
+        """
+        Receive data along with checksum and sender ID.
+        :param data: The received data (string).
+        :param checksum: The checksum received along with the data.
+        :param receiver_id: The ID of the sender device.
+        :param valid: Result of the checksum check if it was already done for this
+            frame (a hub checks each frame once for all of its ports).
+        """
+        # Verify checksum
+        if valid is None:
+            valid = not ErrorControlProtocol.detect_errors(data, checksum)
+        tracer = get_tracer()
+        if tracer.enabled:
+            # Valid data is processed; corrupted data is reported as an error
+            tracer.emit(EventKind.RECEIVE if valid else EventKind.CORRUPT, self.device_id, peer=receiver_id, data=data)
+        return valid
+
+
+class _Transmission:
+    __slots__ = ('data', 'checksum', 'sender_id', 'size', 'start', 'end', 'event', 'attempt', 'collided')
+
+    def __init__(self, data, checksum, sender_id, size):
+        self.data = data
+        self.checksum = checksum
+        self.sender_id = sender_id
+        self.size = size
+        self.start = 0.0
+        self.end = 0.0
+        self.event = None
+        self.attempt = 0
+        self.collided = False
+
+
+class Hub:
+    """
+    A shared medium: one collision domain for every connected device.
+
+    A frame occupies the medium for size * 8 / bandwidth seconds. A sender that
+    starts while another frame has been on the wire for longer than the
+    propagation delay hears the carrier and defers until the medium is idle.
+    A sender that starts inside that window collides with it: all colliding
+    senders abort after a jam signal, retry with truncated binary exponential
+    backoff, and drop the frame after max_attempts.
+
+    A frame that gets through is checksummed and verified once, and delivered
+    to all ports in a single event. Every receiver gets a reference to the same
+    immutable payload.
+    """
+
+    def __init__(self, scheduler=None, propagation_delay=1e-6, bandwidth=10e6, slot_time=51.2e-6, max_attempts=16,
+                 jam_bits=32):
+        self.connected_devices = []
+        self.members = {}  # device ID -> connected device
+        self.bridge_ports = []
+        self.scheduler = scheduler or get_default_scheduler()
+        self.propagation_delay = propagation_delay
+        self.bandwidth = bandwidth
+        self.slot_time = slot_time
+        self.max_attempts = max_attempts
+        self.jam_bits = jam_bits
+        self.busy_until = 0.0
+        self._active = []
+        self._receivers = ()
+        self.first_transmission = None
+        self.frames_offered = 0
+        self.frames_delivered = 0
+        self.deliveries = 0
+        self.bytes_delivered = 0
+        self.collisions = 0
+        self.frames_dropped = 0
+        self.busy_time = 0.0
+
+    def connect_device(self, device):
+        self.connected_devices.append(device)
+        self.members[device.device_id] = device
+        self._update_receivers()
+
+    def connect_port(self, port):
+        """
+        Attach a bridge port to the medium. It hears every frame like a connected
+        device does, but is not one of connected_devices.
+        """
+        self.bridge_ports.append(port)
+        self._update_receivers()
+
+    def disconnect_port(self, port):
+        self.bridge_ports.remove(port)
+        self._update_receivers()
+
+    def _update_receivers(self):
+        members = self.connected_devices + self.bridge_ports
+        self._receivers = tuple((member.device_id, member.receive_data) for member in members)
+
+    def broadcast(self, data, receiver_id, checksum=None):
+        """
+        Offer a frame to the medium; it reaches every other device unless it collides.
+        :param data: Payload. str, bytes, EthernetFrames and IPv4Packets are shared as
+            they are; other buffers are copied once into bytes.
+        :param receiver_id: The ID of the sending device.
+        """
+        if not isinstance(data, (str, bytes, EthernetFrame, IPv4Packet)):
+            data = bytes(data)
+        self.frames_offered += 1
+        self._transmit(_Transmission(data, checksum, receiver_id, len(data)))
+
+    def _transmit(self, frame):
+        now = self.scheduler.now
+        if self.first_transmission is None:
+            self.first_transmission = now
+        active = self._active
+        if active and now < self.busy_until:
+            if all(now - other.start > self.propagation_delay for other in active):
+                # Carrier sensed: wait for the medium to go idle (1-persistent).
+                self.scheduler.schedule_at(self.busy_until, self._transmit, frame)
+                return
+            # Started before the other frames' signal arrived: everything on the wire
+            # collides, and every sender aborts once it has detected that and sent a jam.
+            self.collisions += 1
+            abort = now + self.propagation_delay + self.jam_bits / self.bandwidth
+            frame.collided = True
+            frame.start = now
+            frame.end = abort
+            active.append(frame)
+            frame.event = self.scheduler.schedule(abort - now, self._end_transmission, frame)
+            for other in active:
+                other.collided = True
+                if other.end > abort:
+                    self.scheduler.cancel(other.event)
+                    other.end = abort
+                    other.event = self.scheduler.schedule(abort - now, self._end_transmission, other)
+            self.busy_time += abort - self.busy_until
+            self.busy_until = abort
+            return
+        frame.start = now
+        frame.end = now + frame.size * 8 / self.bandwidth
+        self.busy_time += frame.end - now
+        self.busy_until = frame.end
+        active.append(frame)
+        frame.event = self.scheduler.schedule(frame.end - now, self._end_transmission, frame)
+
+    def _end_transmission(self, frame):
+        self._active.remove(frame)
+        if not frame.collided:
+            self.scheduler.schedule(self.propagation_delay, self._fan_out, frame)
+            return
+        frame.collided = False
+        frame.attempt += 1
+        tracer = get_tracer()
+        if frame.attempt >= self.max_attempts:
+            self.frames_dropped += 1
+            if tracer.enabled:
+                tracer.emit(EventKind.COLLISION_DROP, frame.sender_id, seq=frame.attempt, data=frame.data)
+            return
+        backoff = random.randint(0, (1 << min(frame.attempt, 10)) - 1) * self.slot_time
+        if tracer.enabled:
+            tracer.emit(EventKind.COLLISION, frame.sender_id, seq=frame.attempt, value=backoff, data=frame.data)
+        self.scheduler.schedule(backoff, self._transmit, frame)
+
+    def _fan_out(self, frame):
+        data, sender_id = frame.data, frame.sender_id
+        checksum = frame.checksum
+        if checksum is None:
+            checksum = ErrorControlProtocol.checksum(data)
+        valid = not ErrorControlProtocol.detect_errors(data, checksum)
+        delivered = 0
+        for device_id, receive in self._receivers:
+            if device_id != sender_id:
+                receive(data, checksum, sender_id, valid)
+                delivered += 1
+        self.frames_delivered += 1
+        self.deliveries += delivered
+        self.bytes_delivered += frame.size
+
+    def throughput(self):
+        """
+        Return the delivered payload rate of the collision domain in bits per second,
+        measured from the first transmission until now.
+        """
+        if self.first_transmission is None:
+            return 0.0
+        elapsed = self.scheduler.now - self.first_transmission
+        return self.bytes_delivered * 8 / elapsed if elapsed > 0 else 0.0
+
+    def utilization(self):
+        """
+        Return the fraction of time since the first transmission that the medium was busy.
+        """
+        if self.first_transmission is None:
+            return 0.0
+        elapsed = max(self.scheduler.now, self.busy_until) - self.first_transmission
+        return self.busy_time / elapsed if elapsed > 0 else 0.0
+
+
+class Connection:
+    def __init__(self, device1, device2, propagation_delay=1e-6, scheduler=None):
+        self.device1 = device1
+        self.device2 = device2
+        self.propagation_delay = propagation_delay
+        self.scheduler = scheduler or device1.scheduler
+        device1.connect(self)
+        device2.connect(self)
+
+    def send(self, data, destination_mac=None, checksum=None,receiver_id=None):
+        """
+        Contend for the medium and, once access is granted, schedule delivery
+        to the device whose ID matches destination_mac.
+        """
+        AccessControlProtocol.control_access(self.scheduler, self.transmit, data, destination_mac, checksum, receiver_id)
+
+    def transmit(self, data, destination_mac=None, checksum=None, receiver_id=None):
+        if destination_mac == self.device1.device_id:
+            self.scheduler.schedule(self.propagation_delay, self.device1.receive_data, data, checksum, receiver_id)
+        elif destination_mac == self.device2.device_id:
+            self.scheduler.schedule(self.propagation_delay, self.device2.receive_data, data, checksum, receiver_id)
+
+
+class EndDevice(PhysicalLayerDevice):
+    def __init__(self, device_id, scheduler=None):
+        super().__init__(device_id, scheduler)
+        self.mac_address = None
+        self.ip_address = None
+
+    def set_mac_address(self, mac_address):
+        self.mac_address = mac_address
@@ -0,0 +1,107 @@
+"""
+Figures for the demo scenarios.
+
+matplotlib and networkx are imported inside the functions that need them,
+so importing netsim never pays for them and headless runs never load them.
+"""
+import math
+import os
+
+import numpy as np
+
+
+def _pyplot(headless):
+    import matplotlib
+    if headless:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def finish(plt, context, name):
+    """
+    Save the current figure to context.plot_dir (if set) and show it unless headless.
+    """
+    if context.plot_dir:
+        os.makedirs(context.plot_dir, exist_ok=True)
+        plt.savefig(os.path.join(context.plot_dir, f"{name}.png"))
+    if not context.headless:
+        plt.show()
+    plt.close()
+
+
+def draw_dedicated_link(context, devices, title):
+    plt = _pyplot(context.headless)
+    plt.figure(figsize=(6, 4))
+
+    # Plot the devices
+    for i, device in enumerate(devices):
+        plt.text(i, 0.5, device, ha='center', va='center', size=12, bbox=dict(facecolor='lightblue', alpha=0.5))
+
+    # Draw a line representing the dedicated connection
+    plt.plot([0, 1], [0.5, 0.5], color='black', linestyle='-', linewidth=2)
+    plt.title(title)
+    plt.axis("off")
+    finish(plt, context, "dedicated_link")
+
+
+def draw_star(context, hub, devices, title):
+    plt = _pyplot(context.headless)
+    plt.figure(figsize=(8, 6))
+
+    # Plot the devices around the hub
+    num_devices = len(devices)
+    theta = 2 * math.pi / num_devices  # Calculate angle between devices
+    radius = 2
+
+    for i, device in enumerate(devices):
+        x = radius * math.cos(i * theta)
+        y = radius * math.sin(i * theta)
+        plt.text(x, y, device, ha='center', va='center', size=12, bbox=dict(facecolor='lightblue', alpha=0.5))
+        plt.plot([0, x], [0, y], color='black', linestyle='-', linewidth=1)  # Connect device to hub
+
+    # Plot the hub at the center
+    plt.text(0, 0, hub, ha='center', va='center', size=12, bbox=dict(facecolor='lightgreen', alpha=0.5))
+
+    plt.title(title)
+    plt.axis("off")
+    finish(plt, context, "star")
+
+
+def draw_hub_topology(context, hubs, switch, title):
+    """
+    Draw hubs (a dict of hub name -> end devices) interconnected by a switch.
+    """
+    import networkx as nx
+    plt = _pyplot(context.headless)
+
+    # Create the network topology graph
+    G = nx.Graph()
+    for hub_name, devices in hubs.items():
+        G.add_node(hub_name)
+        for device in devices:
+            G.add_node(device.device_id)
+            G.add_edge(hub_name, device.device_id)
+        # Add edges for interconnection via the switch
+        G.add_edge(switch, hub_name)
+
+    # Lay the graph out by device role: the switch in the middle, each hub's devices fanned out around it
+    from netsim import rendering
+    from netsim.topology import HOST, HUB, SWITCH
+    names = list(G.nodes)
+    index = {name: i for i, name in enumerate(names)}
+    roles = [SWITCH if name == switch else HUB if name in hubs else HOST for name in names]
+    edges = np.array([(index[u], index[v]) for u, v in G.edges], dtype=np.int64).reshape(-1, 2)
+    graph = rendering.TopologyGraph(names, np.array(roles, dtype=np.uint8), edges[:, 0], edges[:, 1],
+                                    np.ones(len(names), dtype=np.int64))
+    positions = rendering.radial_layout(graph, root=index[switch])
+    pos = dict(zip(names, positions))
+    nx.draw_networkx_nodes(G, pos, nodelist=list(hubs), node_color='blue', node_size=3000)
+    nx.draw_networkx_nodes(G, pos, nodelist=[switch], node_color='red', node_size=4000)
+    for devices in hubs.values():
+        nx.draw_networkx_nodes(G, pos, nodelist=[device.device_id for device in devices], node_color='skyblue', node_size=2000)
+    nx.draw_networkx_edges(G, pos, width=2)
+    nx.draw_networkx_labels(G, pos, font_size=8, font_family='sans-serif')
+
+    plt.title(title)
+    finish(plt, context, "hub_topology")
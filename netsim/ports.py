@@ -0,0 +1,264 @@
+"""
+Transport-layer port allocation and connection demultiplexing.
+
+A PortPool tracks its ports in a bitmap of 64-bit words (set bit = free),
+plus a summary word per 64 words recording which words still have a free
+bit. Finding a free port reads a handful of summary words and isolates the
+lowest set bit twice, so allocate() and release() are O(1). A full 64k port
+space costs about 8 KB per host, however many ports are in use.
+
+PortManager splits the port space into a well-known and an ephemeral pool,
+and holds released ports in TIME_WAIT before they can be allocated again.
+
+ConnectionTable maps the 5-tuple (local IP, local port, remote IP, remote
+port, protocol), packed into one int, to a connection. Unmatched packets
+fall back to listening sockets.
+"""
+import array
+import collections
+
+from netsim.frames import PROTOCOL_TCP
+from netsim.ipv4 import as_ipv4
+from netsim.scheduler import get_default_scheduler
+
+WELL_KNOWN_PORTS = (0, 1024)
+EPHEMERAL_PORTS = (1024, 49152)
+ANY_ADDRESS = 0
+
+_FULL_WORD = (1 << 64) - 1
+
+
+class PortPool:
+    """
+    Ports low .. high - 1 in a two-level bitmap.
+    """
+
+    def __init__(self, low, high):
+        if not 0 <= low < high <= 65536:
+            raise ValueError(f"Invalid port range {low}..{high - 1}")
+        self.low = low
+        self.high = high
+        size = high - low
+        words = (size + 63) // 64
+        self._words = array.array('Q', [_FULL_WORD]) * words
+        if size % 64:
+            self._words[-1] = (1 << (size % 64)) - 1
+        self._summary = array.array('Q', [0]) * ((words + 63) // 64)
+        for word in range(words):
+            self._summary[word >> 6] |= 1 << (word & 63)
+        self.free = size
+
+    def __contains__(self, port):
+        return self.low <= port < self.high
+
+    def is_free(self, port):
+        offset = port - self.low
+        return bool(self._words[offset >> 6] >> (offset & 63) & 1)
+
+    def allocate(self):
+        """
+        Take the lowest free port.
+        :return: The port, or None if the pool is exhausted.
+        """
+        if not self.free:
+            return None
+        summary = self._summary
+        for block, bits in enumerate(summary):
+            if bits:
+                break
+        word = (block << 6) + (bits & -bits).bit_length() - 1
+        bits = self._words[word]
+        offset = (word << 6) + (bits & -bits).bit_length() - 1
+        self._take(offset)
+        return self.low + offset
+
+    def take(self, port):
+        """
+        Take a specific port.
+        :raise ValueError: If it is not free.
+        """
+        if port not in self or not self.is_free(port):
+            raise ValueError(f"Port {port} is not available")
+        self._take(port - self.low)
+
+    def _take(self, offset):
+        word = offset >> 6
+        bits = self._words[word] & ~(1 << (offset & 63))
+        self._words[word] = bits
+        if not bits:
+            self._summary[word >> 6] &= ~(1 << (word & 63))
+        self.free -= 1
+
+    def release(self, port):
+        offset = port - self.low
+        if port not in self or self.is_free(port):
+            raise ValueError(f"Port {port} is not allocated")
+        word = offset >> 6
+        self._words[word] |= 1 << (offset & 63)
+        self._summary[word >> 6] |= 1 << (word & 63)
+        self.free += 1
+
+
+class PortManager:
+    """
+    Port allocation for one host.
+    :param time_wait: Seconds a released port is held before it is reused (2 * MSL).
+    :param reuse_time_wait: When the ephemeral pool is exhausted, hand out the
+        port that has been in TIME_WAIT longest instead of failing.
+    :param well_known: (low, high) range of the well-known pool.
+    :param ephemeral: (low, high) range of the ephemeral pool.
+    """
+
+    def __init__(self, time_wait=60.0, reuse_time_wait=True, well_known=WELL_KNOWN_PORTS, ephemeral=EPHEMERAL_PORTS,
+                 scheduler=None):
+        self.scheduler = scheduler or get_default_scheduler()
+        self.time_wait = time_wait
+        self.reuse_time_wait = reuse_time_wait
+        self.well_known = PortPool(*well_known)
+        self.ephemeral = PortPool(*ephemeral)
+        # Ports in TIME_WAIT, oldest first: their hold-downs expire in order.
+        self._time_wait = collections.OrderedDict()  # port -> expiry time
+        self.time_wait_reuses = 0
+
+    def _pool(self, port):
+        if port in self.well_known:
+            return self.well_known
+        if port in self.ephemeral:
+            return self.ephemeral
+        raise ValueError(f"Port {port} is outside the managed ranges")
+
+    def _expire(self):
+        now = self.scheduler.now
+        held = self._time_wait
+        while held:
+            port, expiry = next(iter(held.items()))
+            if expiry > now:
+                break
+            del held[port]
+            self._pool(port).release(port)
+
+    def allocate(self, well_known=False):
+        """
+        Allocate the lowest free port of a pool.
+        :param well_known: Allocate from the well-known pool instead of the ephemeral one.
+        :raise RuntimeError: If no port is available.
+        """
+        self._expire()
+        pool = self.well_known if well_known else self.ephemeral
+        port = pool.allocate()
+        if port is None:
+            port = self._reuse(pool)
+        if port is None:
+            raise RuntimeError("No available ports")
+        return port
+
+    def _reuse(self, pool):
+        if not self.reuse_time_wait:
+            return None
+        for port in self._time_wait:
+            if port in pool:
+                del self._time_wait[port]
+                self.time_wait_reuses += 1
+                return port
+        return None
+
+    def bind(self, port):
+        """
+        Allocate a specific port, e.g. a service's well-known port.
+        :raise ValueError: If the port is in use or in TIME_WAIT.
+        """
+        self._expire()
+        self._pool(port).take(port)
+        return port
+
+    def release(self, port, time_wait=True):
+        """
+        Give a port back. With time_wait it stays unavailable for self.time_wait seconds.
+        """
+        pool = self._pool(port)
+        if port in self._time_wait or pool.is_free(port):
+            raise ValueError(f"Port {port} is not allocated")
+        if time_wait and self.time_wait > 0:
+            self._time_wait[port] = self.scheduler.now + self.time_wait
+        else:
+            pool.release(port)
+
+    def in_use(self, port):
+        """
+        Whether port is allocated or in TIME_WAIT.
+        """
+        self._expire()
+        return not self._pool(port).is_free(port)
+
+    @property
+    def in_time_wait(self):
+        self._expire()
+        return len(self._time_wait)
+
+
+def _as_int(address):
+    return address if isinstance(address, int) else as_ipv4(address).value
+
+
+def connection_key(local_ip, local_port, remote_ip, remote_port, protocol=PROTOCOL_TCP):
+    """
+    Pack a 5-tuple into one int: 32 + 16 + 32 + 16 + 8 bits.
+    """
+    return ((((_as_int(local_ip) << 16 | local_port) << 32 | _as_int(remote_ip)) << 16 | remote_port) << 8) | protocol
+
+
+class ConnectionTable:
+    """
+    Demultiplexes incoming segments to connections or listening sockets.
+    Lookups are one or two dict probes on int keys.
+    """
+
+    def __init__(self):
+        self.connections = {}
+        self.listeners = {}
+
+    def __len__(self):
+        return len(self.connections)
+
+    def add(self, local_ip, local_port, remote_ip, remote_port, connection, protocol=PROTOCOL_TCP):
+        key = connection_key(local_ip, local_port, remote_ip, remote_port, protocol)
+        if key in self.connections:
+            raise ValueError(f"Connection {local_ip}:{local_port} -> {remote_ip}:{remote_port} already exists")
+        self.connections[key] = connection
+        return key
+
+    def remove(self, local_ip, local_port, remote_ip, remote_port, protocol=PROTOCOL_TCP):
+        return self.connections.pop(connection_key(local_ip, local_port, remote_ip, remote_port, protocol))
+
+    def discard(self, key):
+        """
+        Remove a connection by the key add() returned, if it is still there.
+        """
+        self.connections.pop(key, None)
+
+    def listen(self, local_port, listener, local_ip=ANY_ADDRESS, protocol=PROTOCOL_TCP):
+        """
+        Register a listening socket on local_port; local_ip ANY_ADDRESS (0) matches every address.
+        """
+        self.listeners[(_as_int(local_ip), local_port, protocol)] = listener
+
+    def unlisten(self, local_port, local_ip=ANY_ADDRESS, protocol=PROTOCOL_TCP):
+        return self.listeners.pop((_as_int(local_ip), local_port, protocol))
+
+    def demultiplex(self, source_ip, source_port, destination_ip, destination_port, protocol=PROTOCOL_TCP):
+        """
+        Find what an incoming segment belongs to: the established connection for
+        its 5-tuple, else a listener on its destination address, else a wildcard listener.
+        :return: The connection or listener, or None.
+        """
+        destination = _as_int(destination_ip)
+        connection = self.connections.get(connection_key(destination, destination_port, source_ip, source_port, protocol))
+        if connection is not None:
+            return connection
+        listeners = self.listeners
+        if not listeners:
+            return None
+        listener = listeners.get((destination, destination_port, protocol))
+        if listener is None:
+            listener = listeners.get((ANY_ADDRESS, destination_port, protocol))
+        return listener
@@ -0,0 +1,547 @@
+"""
+Headless topology rendering for networks of any size.
+
+graph_from_devices() walks live devices: router neighbors, switch ports and
+hub members. Each router is also linked to the LANs its interface subnets
+contain, through the addresses of the hosts on them. The layout follows the
+device roles instead of a force simulation:
+
+- hierarchical: when every link joins adjacent tiers, counted in hops from
+  the hosts (host, access, edge, aggregation, core, ...). Tiers are stacked
+  and ordered by the barycenter of their neighbors to keep crossings down.
+- radial: otherwise. A breadth-first tree from the best-connected node, or
+  from a router ring laid out as a circle, fans out in wedges sized by the
+  number of leaves below each node.
+
+Both are a few NumPy passes over the links, so thousands of nodes lay out in
+milliseconds where spring_layout takes minutes. Layouts are cached in memory
+and as .npy files, keyed by a hash of the graph. Above aggregate_above nodes,
+each hub or switch is merged with its end devices and hosts on a router are
+grouped into one node, so a picture shows the fabric rather than a blur of
+leaves. Figures are drawn on a bare matplotlib Figure and saved to a file
+(PNG, SVG or anything matplotlib writes), so no display is ever needed.
+"""
+import collections
+import hashlib
+import math
+import os
+
+import numpy as np
+
+from netsim.ipv4 import MASKS
+from netsim.parallel import csr_graph
+from netsim.topology import HOST, HUB, KIND_NAMES, ROUTER, SWITCH
+
+HIERARCHICAL = 'hierarchical'
+RADIAL = 'radial'
+LAYOUTS = (HIERARCHICAL, RADIAL)
+# Part of every cache key: bump it when a layout function changes, so stale cached layouts are ignored.
+LAYOUT_VERSION = 1
+ROLE_STYLES = {
+    ROUTER: ('tab:red', 80),
+    SWITCH: ('tab:orange', 60),
+    HUB: ('tab:blue', 50),
+    HOST: ('lightskyblue', 20),
+}
+
+TopologyGraph = collections.namedtuple('TopologyGraph', 'names roles src dst weights')
+TopologyGraph.__doc__ = """
+Undirected graph of a topology, in a deterministic node order.
+:param names: Node names.
+:param roles: uint8 array of netsim.topology kind codes (ROUTER, SWITCH, HUB, HOST).
+:param src: int64 array, one end of each link.
+:param dst: int64 array, the other end.
+:param weights: int64 array, the number of devices each node stands for (more than 1 after aggregate()).
+"""
+
+Rendering = collections.namedtuple('Rendering', 'path graph positions layout cached')
+Rendering.__doc__ = """
+Result of render_topology().
+:param path: File written.
+:param graph: The TopologyGraph drawn, after aggregation.
+:param positions: (nodes, 2) float array of node coordinates.
+:param layout: HIERARCHICAL or RADIAL.
+:param cached: Whether the layout came from the cache.
+"""
+
+
+def _role(device):
+    from netsim.data_link import Bridge
+    from netsim.network import Router
+    from netsim.physical import Hub
+
+    if isinstance(device, Router):
+        return ROUTER
+    if isinstance(device, Bridge):
+        return SWITCH
+    if isinstance(device, Hub):
+        return HUB
+    return HOST
+
+
+def graph_from_devices(source):
+    """
+    Collect the graph of a netsim.topology.Topology or an iterable of devices,
+    following links to devices not listed.
+    :return: TopologyGraph.
+    """
+    devices = list(getattr(source, 'devices', source))
+    spec = getattr(source, 'spec', None)
+    known = {id(device): name for device, name in zip(devices, spec.names)} if spec is not None else {}
+    index = {}
+    nodes = []
+    names = []
+    hubs = 0
+
+    def node(device):
+        nonlocal hubs
+        key = id(device)
+        if key not in index:
+            index[key] = len(nodes)
+            nodes.append(device)
+            name = known.get(key) or getattr(device, 'router_id', None) or getattr(device, 'device_id', None) \
+                or getattr(device, 'name', None)
+            if name is None:
+                hubs += 1
+                name = f"Hub{hubs}"
+            names.append(name)
+        return index[key]
+
+    for device in devices:
+        node(device)
+    links = set()
+    i = 0
+    while i < len(nodes):
+        device = nodes[i]
+        if hasattr(device, 'neighbors') and hasattr(device, 'router_id'):
+            peers = [link['router'] for link in device.neighbors.values()]
+        elif hasattr(device, 'ports') and hasattr(device, 'table'):
+            peers = [port.attachment for port in device.ports.values()]
+        elif hasattr(device, 'connected_devices'):
+            peers = device.connected_devices
+        else:
+            peers = ()
+        for peer in peers:
+            j = node(peer)
+            if i != j:
+                links.add((min(i, j), max(i, j)))
+        i += 1
+    roles = np.array([_role(device) for device in nodes], np.uint8)
+
+    # Routers reach their LANs through interface subnets, not object links: match host addresses to them.
+    subnets = {}
+    for i in np.flatnonzero(roles == ROUTER).tolist():
+        for interface in nodes[i].interfaces.values():
+            address = interface['ip_address']
+            if address.prefix_len < 31:
+                subnets[(address.value & MASKS[address.prefix_len], address.prefix_len)] = i
+    lengths = sorted({length for _, length in subnets}, reverse=True)
+    if lengths:
+        attached = collections.defaultdict(list)
+        for u, v in links:
+            attached[u].append(v)
+            attached[v].append(u)
+        for i in np.flatnonzero(roles == HOST).tolist():
+            address = getattr(nodes[i], 'ip_address', None)
+            if address is None:
+                continue
+            value = getattr(address, 'value', None)
+            if value is None:
+                continue
+            router = next((subnets[key] for key in ((value & MASKS[length], length) for length in lengths)
+                           if key in subnets), None)
+            if router is None:
+                continue
+            access = [j for j in attached.get(i, ()) if roles[j] in (SWITCH, HUB)]
+            for j in access or [i]:
+                links.add((min(router, j), max(router, j)))
+    links = np.array(sorted(links), np.int64).reshape(-1, 2)
+    return TopologyGraph(names, roles, links[:, 0], links[:, 1], np.ones(len(nodes), np.int64))
+
+
+def aggregate(graph):
+    """
+    Merge every hub and switch with the single-homed hosts on it, and group
+    the hosts attached straight to a router into one node per router.
+    :return: A smaller TopologyGraph; weights count the devices each node stands for.
+    """
+    n = len(graph.names)
+    src, dst = graph.src, graph.dst
+    degree = np.bincount(np.concatenate([src, dst]), minlength=n)
+    leaf = (graph.roles == HOST) & (degree == 1)
+    parent = np.full(n, -1, np.int64)
+    parent[src[leaf[src]]] = dst[leaf[src]]
+    parent[dst[leaf[dst]]] = src[leaf[dst]]
+    leaves = np.flatnonzero(parent >= 0)
+    on_router = graph.roles[parent[leaves]] == ROUTER
+    merged = leaves[~on_router]
+    grouped = leaves[on_router]
+
+    weights = graph.weights.copy()
+    np.add.at(weights, parent[merged], weights[merged])
+    keep = np.ones(n, bool)
+    keep[leaves] = False
+    kept = np.flatnonzero(keep)
+    remap = np.full(n, -1, np.int64)
+    remap[kept] = np.arange(len(kept))
+    group_parents, group_of = np.unique(parent[grouped], return_inverse=True)
+    group_weights = np.bincount(group_of, weights=weights[grouped], minlength=len(group_parents)).astype(np.int64)
+
+    link = keep[src] & keep[dst]
+    group_nodes = len(kept) + np.arange(len(group_parents))
+    names = [graph.names[i] for i in kept.tolist()] + [f"{graph.names[p]} hosts" for p in group_parents.tolist()]
+    return TopologyGraph(names, np.concatenate([graph.roles[kept], np.full(len(group_parents), HOST, np.uint8)]),
+                         np.concatenate([remap[src[link]], remap[group_parents]]),
+                         np.concatenate([remap[dst[link]], group_nodes]),
+                         np.concatenate([weights[kept], group_weights]))
+
+
+def _adjacency(graph):
+    n = len(graph.names)
+    indptr, indices, _ = csr_graph(n, np.concatenate([graph.src, graph.dst]), np.concatenate([graph.dst, graph.src]))
+    return indptr, indices
+
+
+def _expand(indptr, indices, frontier):
+    """
+    Return (sources, targets) of every link leaving the frontier.
+    """
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+    return np.repeat(frontier, lengths), indices[offsets]
+
+
+def _tiers(graph):
+    """
+    Hop distance of every node from the nearest host, -1 where no host is reachable.
+    """
+    indptr, indices = _adjacency(graph)
+    tier = np.full(len(graph.names), -1, np.int64)
+    frontier = np.flatnonzero(graph.roles == HOST)
+    tier[frontier] = 0
+    level = 0
+    while len(frontier):
+        level += 1
+        _, reached = _expand(indptr, indices, frontier)
+        frontier = np.unique(reached[tier[reached] < 0])
+        tier[frontier] = level
+    return tier
+
+
+def choose_layout(graph):
+    """
+    HIERARCHICAL if the graph has hosts, every node is tiered by its distance
+    from them, every link joins adjacent tiers and the top tier has more than
+    one node; RADIAL otherwise.
+    """
+    if not (graph.roles == HOST).any():
+        return RADIAL
+    tier = _tiers(graph)
+    if (tier < 0).any() or (np.abs(tier[graph.src] - tier[graph.dst]) != 1).any():
+        return RADIAL
+    return HIERARCHICAL if (tier == tier.max()).sum() > 1 else RADIAL
+
+
+def hierarchical_layout(graph, sweeps=2):
+    """
+    Tiers stacked from the hosts (bottom) up, each ordered by the mean
+    position of its neighbors in the tier above, then refined by sweeps
+    passes up and down.
+    :return: (nodes, 2) float array.
+    """
+    tier = _tiers(graph)
+    tier[tier < 0] = tier.max() + 1
+    top = int(tier.max())
+    members = [np.flatnonzero(tier == level) for level in range(top + 1)]
+    width = max(len(level) for level in members)
+    x = np.zeros(len(graph.names))
+    for level in members:
+        x[level] = (np.arange(len(level)) + 0.5) * width / len(level)
+    src = np.concatenate([graph.src, graph.dst])
+    dst = np.concatenate([graph.dst, graph.src])
+
+    def order(level, neighbor_level):
+        nodes = members[level]
+        towards = (tier[src] == level) & (tier[dst] == neighbor_level)
+        total = np.bincount(src[towards], weights=x[dst[towards]], minlength=len(x))[nodes]
+        count = np.bincount(src[towards], minlength=len(x))[nodes]
+        key = np.where(count > 0, total / np.maximum(count, 1), x[nodes])
+        nodes = nodes[np.argsort(key, kind='stable')]
+        members[level] = nodes
+        x[nodes] = (np.arange(len(nodes)) + 0.5) * width / len(nodes)
+
+    for _ in range(sweeps):
+        for level in range(top - 1, -1, -1):
+            order(level, level + 1)
+        for level in range(1, top + 1):
+            order(level, level - 1)
+    for level in range(top - 1, -1, -1):
+        order(level, level + 1)
+    spacing = max(width / max(top, 1) / 2, 1.0)
+    return np.column_stack([x, tier * spacing])
+
+
+def _router_cycle(graph):
+    """
+    The routers in cycle order if they form one ring, else None.
+    """
+    routers = np.flatnonzero(graph.roles == ROUTER)
+    if len(routers) < 3:
+        return None
+    core = (graph.roles[graph.src] == ROUTER) & (graph.roles[graph.dst] == ROUTER)
+    src, dst = graph.src[core], graph.dst[core]
+    if len(src) != len(routers) or (np.bincount(np.concatenate([src, dst]), minlength=len(graph.names))[routers]
+                                    != 2).any():
+        return None
+    neighbors = collections.defaultdict(list)
+    for u, v in zip(src.tolist(), dst.tolist()):
+        neighbors[u].append(v)
+        neighbors[v].append(u)
+    cycle = [int(routers[0])]
+    previous = -1
+    while len(cycle) < len(routers):
+        current = cycle[-1]
+        following = neighbors[current][0] if neighbors[current][0] != previous else neighbors[current][1]
+        if following == cycle[0]:
+            return None
+        cycle.append(following)
+        previous = current
+    return np.array(cycle)
+
+
+def radial_layout(graph, root=None):
+    """
+    Breadth-first trees fanned out in wedges proportional to their leaf counts.
+    A router ring becomes the first circle around an empty center; otherwise
+    each connected component is rooted at its highest-degree node, and the
+    components are placed side by side.
+    :param root: Node index to center the first component on instead.
+    :return: (nodes, 2) float array.
+    """
+    n = len(graph.names)
+    indptr, indices = _adjacency(graph)
+    degree = np.diff(indptr)
+    depth = np.full(n, -1, np.int64)
+    parent = np.full(n, -1, np.int64)
+    components = []
+
+    def grow(roots):
+        levels = [roots]
+        frontier = roots
+        while True:
+            sources, targets = _expand(indptr, indices, frontier)
+            fresh = depth[targets] < 0
+            targets, first = np.unique(targets[fresh], return_index=True)
+            if not len(targets):
+                break
+            parent[targets] = sources[fresh][first]
+            depth[targets] = depth[frontier[0]] + 1
+            levels.append(targets)
+            frontier = targets
+        components.append(levels)
+
+    cycle = _router_cycle(graph) if root is None else None
+    if root is not None:
+        depth[root] = 0
+        grow(np.array([root]))
+    elif cycle is not None:
+        depth[cycle] = 1
+        grow(cycle)
+    # Components in order of their best-connected unvisited node, found by one pass down the degree order.
+    for root in np.argsort(-degree, kind='stable').tolist():
+        if depth[root] < 0:
+            depth[root] = 0
+            grow(np.array([root]))
+
+    angle = np.zeros(n)
+    positions = np.zeros((n, 2))
+    offset = 0.0
+    for levels in components:
+        span = np.zeros(n)
+        for level in reversed(levels[1:]):
+            span[level] = np.maximum(span[level], 1)
+            np.add.at(span, parent[level], span[level])
+        roots = levels[0]
+        span[roots] = np.maximum(span[roots], 1)
+        start = np.zeros(n)
+        width = np.zeros(n)
+        # The roots share the full circle: one root takes all of it, a ring splits it by span.
+        width[roots] = 2 * math.pi * span[roots] / span[roots].sum()
+        start[roots] = np.cumsum(width[roots]) - width[roots]
+        for level in levels[1:]:
+            level = level[np.argsort(parent[level], kind='stable')]
+            owners = parent[level]
+            cumulative = np.cumsum(span[level])
+            group_start = np.searchsorted(owners, owners)
+            before = cumulative - span[level] - (cumulative[group_start] - span[level][group_start])
+            scale = width[owners] / span[owners]
+            start[level] = start[owners] + before * scale
+            width[level] = span[level] * scale
+        members = np.concatenate(levels)
+        angle[members] = start[members] + width[members] / 2
+        radius = depth[members].astype(float)
+        extent = max(float(radius.max()), 0.5)
+        positions[members, 0] = offset + extent + radius * np.cos(angle[members])
+        positions[members, 1] = radius * np.sin(angle[members])
+        offset += 2 * extent + 1
+    return positions
+
+
+_LAYOUT_FUNCTIONS = {HIERARCHICAL: hierarchical_layout, RADIAL: radial_layout}
+
+
+def graph_hash(graph, layout):
+    """
+    Hex digest identifying a graph (names, roles, links, weights), a layout kind and LAYOUT_VERSION.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{layout}/{LAYOUT_VERSION}".encode())
+    digest.update("\0".join(graph.names).encode())
+    for array in (graph.roles, graph.src, graph.dst, graph.weights):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def default_cache_directory():
+    """
+    $NETSIM_LAYOUT_CACHE, or netsim/layouts under $XDG_CACHE_HOME (~/.cache by default).
+    """
+    directory = os.environ.get("NETSIM_LAYOUT_CACHE")
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "netsim", "layouts")
+
+
+class LayoutCache:
+    """
+    Computed layouts keyed by graph_hash(). The most recent `capacity` stay in
+    memory; with a directory they are also kept as <hash>.npy files there, so
+    later runs reuse them. Disk errors only cost the cache, never the render.
+    """
+
+    def __init__(self, directory=None, capacity=32):
+        self.directory = directory
+        self.capacity = capacity
+        self._memory = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, graph, layout):
+        """
+        :return: (positions, whether they came from the cache).
+        """
+        key = graph_hash(graph, layout)
+        positions = self._memory.get(key)
+        if positions is None and self.directory:
+            try:
+                positions = np.load(os.path.join(self.directory, f"{key}.npy"))
+            except (OSError, ValueError):
+                positions = None
+        if positions is not None and len(positions) == len(graph.names):
+            self.hits += 1
+            self._remember(key, positions)
+            return positions, True
+        self.misses += 1
+        positions = _LAYOUT_FUNCTIONS[layout](graph)
+        self._remember(key, positions)
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                staging = os.path.join(self.directory, f"{key}.tmp.npy")
+                np.save(staging, positions)
+                os.replace(staging, os.path.join(self.directory, f"{key}.npy"))
+            except OSError:
+                pass
+        return positions, False
+
+    def _remember(self, key, positions):
+        self._memory[key] = positions
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    The LayoutCache render_topology() uses when none is given, stored under default_cache_directory().
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LayoutCache(default_cache_directory())
+    return _default_cache
+
+
+def _label(graph, i):
+    weight = int(graph.weights[i])
+    if weight == 1:
+        return graph.names[i]
+    if graph.roles[i] == HOST:
+        return f"{weight} hosts"
+    return f"{graph.names[i]}\n+{weight - 1} hosts"
+
+
+def draw(graph, positions, path, title=None, label_limit=150, dpi=100):
+    """
+    Draw a laid-out graph to a file; the format follows the extension.
+    Nodes are colored by role and sized by weight. Names are shown up to label_limit nodes.
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    n = len(graph.names)
+    extent = np.maximum(np.ptp(positions, axis=0), 1e-9) if n else np.ones(2)
+    side = min(max(6.0, math.sqrt(n) * 0.4), 40.0)
+    aspect = min(max(extent[1] / extent[0], 0.4), 2.5)
+    figure = Figure(figsize=(side, side * aspect) if aspect <= 1 else (side / aspect, side))
+    axes = figure.add_subplot()
+    shrink = 1.0 / max(1.0, math.sqrt(n / 200))
+    segments = np.stack([positions[graph.src], positions[graph.dst]], axis=1)
+    axes.add_collection(LineCollection(segments, colors='0.6', linewidths=max(0.2, 1.2 * shrink), zorder=1))
+    for role, (color, size) in ROLE_STYLES.items():
+        nodes = np.flatnonzero(graph.roles == role)
+        if len(nodes):
+            axes.scatter(positions[nodes, 0], positions[nodes, 1], s=size * shrink * np.sqrt(graph.weights[nodes]),
+                         c=color, label=KIND_NAMES[role], zorder=2, linewidths=0)
+    if n <= label_limit:
+        for i in range(n):
+            axes.annotate(_label(graph, i), positions[i], fontsize=7, ha='center', va='bottom',
+                          xytext=(0, 4), textcoords='offset points', zorder=3)
+    axes.legend(loc='upper right', fontsize=8, markerscale=1 / max(shrink, 0.25))
+    axes.set_axis_off()
+    axes.autoscale_view()
+    if title:
+        axes.set_title(title)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    figure.savefig(path, dpi=dpi, bbox_inches='tight')
+
+
+def render_topology(source, path, layout='auto', title=None, aggregate_above=500, cache=None, label_limit=150,
+                    dpi=100):
+    """
+    Lay out and draw a topology to a PNG, SVG or other image file without a display.
+    :param source: netsim.topology.Topology or an iterable of devices.
+    :param layout: HIERARCHICAL, RADIAL or 'auto' (see choose_layout()).
+    :param aggregate_above: Aggregate hubs and hosts (see aggregate()) in graphs with more nodes.
+    :param cache: LayoutCache; defaults to get_default_cache().
+    :return: Rendering.
+    """
+    graph = graph_from_devices(source)
+    if len(graph.names) > aggregate_above:
+        graph = aggregate(graph)
+    if layout == 'auto':
+        layout = choose_layout(graph)
+    elif layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout {layout!r}; expected one of {', '.join(LAYOUTS)} or 'auto'")
+    positions, cached = (cache or get_default_cache()).get(graph, layout)
+    draw(graph, positions, path, title, label_limit, dpi)
+    return Rendering(path, graph, positions, layout, cached)
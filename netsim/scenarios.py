@@ -0,0 +1,806 @@
+"""
+Registered demo scenarios.
+
+Each scenario is a function taking a ScenarioContext. Scenarios are looked
+up by name, so `netsim run <scenario>` and the compatibility scripts run the
+same code. Figures go through netsim.plotting, which loads matplotlib only
+when a figure is actually drawn.
+"""
+import random
+
+import numpy as np
+
+from netsim.data_link import DataLinkLayerDevice, Switch
+from netsim.error_control import ErrorControlProtocol
+from netsim.flow_control import FlowControlProtocol
+from netsim.network import Device, Network, Router
+from netsim.physical import Connection, EndDevice, Hub, PhysicalLayerDevice
+from netsim.scheduler import EventScheduler, set_default_scheduler
+from netsim.tracing import ConsoleSink, Tracer, set_tracer
+
+
+class ScenarioContext:
+    """
+    Per-run settings handed to a scenario.
+    :param headless: Never open interactive plot windows.
+    :param plot_dir: Directory to save figures to, or None.
+    :param sink: Trace sink for the run; defaults to printing events to the console.
+    :param params: Dict of scenario parameters overriding its defaults (see param()).
+    :param rng: NumPy Generator for the scenario's random draws.
+    """
+
+    def __init__(self, headless=False, plot_dir=None, scheduler=None, sink=None, params=None, rng=None):
+        self.headless = headless
+        self.plot_dir = plot_dir
+        self.scheduler = scheduler or EventScheduler()
+        self.tracer = Tracer(ConsoleSink() if sink is None else sink, clock=self.scheduler)
+        self.params = dict(params or {})
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+
+    def param(self, name, default):
+        """
+        Return the value of a scenario parameter, or default if the run did not set it.
+        """
+        return self.params.get(name, default)
+
+    @property
+    def draws(self):
+        """
+        Whether figures should be produced at all.
+        """
+        return not self.headless or bool(self.plot_dir)
+
+
+class Scenario:
+    def __init__(self, name, description, function):
+        self.name = name
+        self.description = description
+        self.function = function
+
+    def run(self, headless=False, plot_dir=None, seed=None, sink=None, params=None):
+        """
+        Run the scenario on a fresh scheduler and tracer, which are the defaults for its duration.
+        :param seed: An int or a numpy.random.SeedSequence. It seeds both the random
+            module and the context's NumPy Generator.
+        :param params: Scenario parameters; see ScenarioContext.param().
+        :return: Whatever the scenario returns, e.g. a dict of metrics.
+        """
+        rng = None
+        if seed is not None:
+            if isinstance(seed, np.random.SeedSequence):
+                random.seed(int(seed.generate_state(1, np.uint64)[0]))
+            else:
+                random.seed(seed)
+            rng = np.random.default_rng(seed)
+        context = ScenarioContext(headless=headless, plot_dir=plot_dir, sink=sink, params=params, rng=rng)
+        try:
+            return self.run_in(context)
+        finally:
+            context.tracer.close()
+
+    def run_in(self, context):
+        """
+        Run the scenario with the context's scheduler and tracer as the defaults.
+        Unlike run(), this leaves the context's sink open.
+        """
+        previous_scheduler = set_default_scheduler(context.scheduler)
+        previous_tracer = set_tracer(context.tracer)
+        try:
+            return self.function(context)
+        finally:
+            set_default_scheduler(previous_scheduler)
+            set_tracer(previous_tracer)
+
+
+SCENARIOS = {}
+
+
+def scenario(name, description):
+    """
+    Decorator registering a scenario function under name.
+    """
+    def register(function):
+        if name in SCENARIOS:
+            raise ValueError(f"Scenario {name!r} is already registered")
+        SCENARIOS[name] = Scenario(name, description, function)
+        return function
+    return register
+
+
+def get_scenario(name):
+    try:
+        return SCENARIOS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scenario {name!r}; available: {', '.join(SCENARIOS)}") from None
+
+
+def run_scenario(name, headless=False, plot_dir=None, seed=None, sink=None, params=None):
+    return get_scenario(name).run(headless=headless, plot_dir=plot_dir, seed=seed, sink=sink, params=params)
+
+
+@scenario("dedicated-link", "Two end devices with a dedicated connection")
+def dedicated_link(context):
+    device1 = PhysicalLayerDevice("Device1")
+    device2 = PhysicalLayerDevice("Device2")
+    Connection(device1, device2)
+    device1.send_data("Hello from Device 1", destination_mac="Device2")
+    device2.send_data("Hello from Device 2", destination_mac="Device1")
+    context.scheduler.run()
+
+    if context.draws:
+        from netsim import plotting
+        plotting.draw_dedicated_link(context, ["Device1", "Device2"],
+                                     "Test Case 1: Two End Devices with Dedicated Connection")
+
+
+@scenario("hub-star", "Star topology with five end devices connected to a hub")
+def hub_star(context):
+    hub = Hub()
+    end_devices = [EndDevice(f"Device{i}") for i in range(1, 6)]
+
+    for device in end_devices:
+        hub.connect_device(device)
+
+    # Enable communication within end devices via the hub's broadcast
+    data_to_broadcast = "Hello, everyone!"
+    receiver_id = end_devices[0].device_id  # Assuming the first device is initiating the broadcast
+    hub.broadcast(data_to_broadcast, receiver_id)
+    context.scheduler.run()
+
+    # Two devices start transmitting at the same instant: their frames collide and are retried
+    print("Device2 and Device3 transmit at the same time...")
+    hub.broadcast("Hello from Device2", end_devices[1].device_id)
+    hub.broadcast("Hello from Device3", end_devices[2].device_id)
+    context.scheduler.run()
+    print(f"Hub: {hub.frames_delivered} frames delivered, {hub.collisions} collisions, "
+          f"throughput {hub.throughput() / 1e3:.1f} kbit/s")
+
+    if context.draws:
+        from netsim import plotting
+        plotting.draw_star(context, "Hub", [device.device_id for device in end_devices],
+                           "Star Topology: Hub with Five End Devices")
+
+
+@scenario("sliding-window", "Go-Back-N sliding window over the alphabet")
+def sliding_window(context):
+    window_size = 3
+    data = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    FlowControlProtocol.sliding_window(window_size, data)
+
+
+@scenario("arq", "Go-Back-N vs Selective Repeat over a lossy link, plus a window/loss goodput sweep")
+def arq(context):
+    from netsim.flow_control import ARQ_MODES, ChannelModel
+
+    window_size = context.param('window_size', 8)
+    loss_rate = context.param('loss_rate', 0.05)
+    packets = context.param('packets', 200)
+    channel = ChannelModel(loss_rate=loss_rate, delay=context.param('delay', 0.005))
+    metrics = {}
+    for mode in ARQ_MODES:
+        result = FlowControlProtocol.simulate_batch(context.param('transfers', 10000), packets, window_size, mode,
+                                                    channel, context.rng)
+        print(f"{mode}: {packets} packets, window {window_size}, {loss_rate:.0%} loss: "
+              f"completion {result.completion_time.mean():.3f}s, "
+              f"{result.retransmissions.mean():.1f} retransmissions, goodput {result.goodput.mean() / 1e6:.2f} Mbit/s")
+        metrics[f'{mode}_goodput'] = float(result.goodput.mean())
+        metrics[f'{mode}_retransmissions'] = float(result.retransmissions.mean())
+
+    if context.param('table', True):
+        window_sizes = [1, 4, 16, 64]
+        loss_rates = [0.0, 0.01, 0.1, 0.3]
+        goodput, _ = FlowControlProtocol.sweep(window_sizes, loss_rates, transfers=2000, channel=channel, rng=context.rng)
+        print("Go-Back-N goodput in Mbit/s by window size (rows) and loss rate (columns):")
+        print("window " + " ".join(f"{loss:>6}" for loss in loss_rates))
+        for window_size, row in zip(window_sizes, goodput):
+            print(f"{window_size:>6} " + " ".join(f"{value / 1e6:6.2f}" for value in row))
+    return metrics
+
+
+@scenario("switch", "Five data link devices exchanging frames through a switch")
+def switch_forwarding(context):
+    switch = Switch("Switch1")
+    devices = [DataLinkLayerDevice(f"Device{i}") for i in range(1, 6)]
+
+    for i, device in enumerate(devices):
+        device.set_mac_address(f"00:11:22:33:44:0{i+1}")
+        switch.attach(device, port=i + 1)
+
+    # (sender, destination MAC) pairs. The switch learns each sender's MAC from its
+    # first frame, so early frames to unknown MACs are flooded and later ones forwarded.
+    transfers = [(0, "00:11:22:33:44:03"), (1, "00:11:22:33:44:05"), (2, "00:11:22:33:44:01"),
+                 (3, "00:11:22:33:44:02"), (4, "00:11:22:33:44:04")]
+    for sender, destination_mac in transfers:
+        data = f"Hello from Device{sender + 1}"
+        devices[sender].send_data(data, destination_mac)
+        context.scheduler.run()
+
+    switch.print_switch_table()
+
+
+@scenario("checksum", "One's-complement checksum of binary data blocks")
+def binary_checksum(context):
+    data_blocks = [0b1101, 0b1010, 0b0110]  # Example data blocks (each represented as binary integers)
+    n_bits = 4  # Number of bits in each data block
+    checksum = ErrorControlProtocol.binary_checksum(data_blocks, n_bits)
+    print(f"Checksum of {[bin(block) for block in data_blocks]}: {checksum:0{n_bits}b}")
+
+    received_data_blocks = [0b1101, 0b1010, 0b0110]  # Example received data blocks
+    received_checksum = 0b1111  # Received checksum (example)
+    if ErrorControlProtocol.detect_errors_binary(received_data_blocks, received_checksum, n_bits):
+        print("Errors detected in the received data.")
+    else:
+        print("No errors detected in the received data.")
+
+
+@scenario("two-hubs", "Two hubs with five end devices each, interconnected by a switch")
+def two_hubs(context):
+    hub1 = Hub()
+    hub2 = Hub()
+
+    end_devices1 = [EndDevice(f"Device{i}") for i in range(1, 6)]
+    end_devices2 = [EndDevice(f"Device{i}") for i in range(6, 11)]
+
+    for device in end_devices1:
+        hub1.connect_device(device)
+
+    for device in end_devices2:
+        hub2.connect_device(device)
+
+    # Create and setup the switch
+    interconnect_switch = Switch("Switch")
+    interconnect_switch.attach(hub1)
+    interconnect_switch.attach(hub2)
+
+    setup_devices_and_learn_mac(end_devices1, interconnect_switch, start_index=1, learn=False)
+    setup_devices_and_learn_mac(end_devices2, interconnect_switch, start_index=6, learn=False)
+
+    # Simulate sending a message from Device4 to Device1
+    sender_id = "Device4"
+    receiver_id = "Device1"
+    message = "Hello, everyone, I am Device 4!"
+
+    print(f"Sending message from {sender_id}: {message}")
+
+    hub_of = {device.device_id: hub1 for device in end_devices1}
+    hub_of.update({device.device_id: hub2 for device in end_devices2})
+    sender_hub = hub_of.get(sender_id)
+    receiver_hub = hub_of.get(receiver_id)
+
+    # The switch hears the broadcast on the sender's hub, learns the sender's MAC
+    # on that port and floods the frame onto the other hub.
+    sender_hub.broadcast(message, sender_id)
+    context.scheduler.run()
+
+    if sender_hub is receiver_hub:
+        print("Sender and receiver are in the same hub. The switch still floods the broadcast to the other hub.")
+    else:
+        print("Sender and receiver are in different hubs. The switch floods the broadcast to the receiver's hub.")
+
+    interconnect_switch.print_switch_table()
+
+    if context.draws:
+        from netsim import plotting
+        plotting.draw_hub_topology(context, {"Hub1": end_devices1, "Hub2": end_devices2}, "Switch",
+                                   "Network Topology - Hub with End Devices")
+
+    total_broadcast_domains = 1  # The switch floods broadcasts between the hubs
+    total_collision_domains = 2  # One collision domain per hub
+    print("Total Broadcast Domains:", total_broadcast_domains)
+    print("Total Collision Domains:", total_collision_domains)
+
+
+def setup_devices_and_learn_mac(devices, switch, start_index=1, learn=True):
+    """
+    Assign MAC addresses to devices and make the switch learn them.
+    """
+    for i, device in enumerate(devices):
+        mac_address = f"00:11:22:33:44:{start_index + i:02d}"
+        device.set_mac_address(mac_address)
+        if learn:
+            switch.learn_mac_address(mac_address, start_index + i)
+
+
+@scenario("router-example", "A single router forwarding and receiving packets, plus ARP in one network")
+def router_example(context):
+    # Create a router instance
+    router1 = Router("Router1")
+
+    # Add interfaces to the router
+    router1.add_interface("eth0", "192.168.1.1", "255.255.255.0")
+    router1.add_interface("eth1", "10.0.0.1", "255.255.255.0")
+
+    # Configure the routing table for the router (static routing)
+    router1.configure_routing_table("192.168.2.0", "192.168.1.2", "eth0", "255.255.255.0")
+    router1.configure_routing_table("10.1.0.0", "10.0.0.2", "eth1", "255.255.0.0")
+
+    # Simulate forwarding a packet to destination IP 192.168.2.10
+    router1.forward_packet({'destination_ip': "192.168.2.10"})
+
+    # Simulate receiving a packet destined for IP 192.168.1.1 on eth0
+    router1.receive_packet({'destination_ip': "192.168.1.1"})
+
+    device1 = Device("Device1")
+    device2 = Device("Device2")
+
+    network = Network("192.168.1.0", "255.255.255.0")
+    network.assign_ip_address(device1)
+    network.assign_ip_address(device2)
+
+    print(f"{device1.name} IP Address: {device1.ip_address} / Subnet Mask: {network.subnet_mask}")
+    print(f"{device2.name} IP Address: {device2.ip_address} / Subnet Mask: {network.subnet_mask}")
+
+    # Simulate ARP request from Device1 to resolve the MAC address of Device2
+    print(f"{device1.name} is sending an ARP request to resolve the MAC address of {device2.name}...")
+    device1.send_arp_request(device2.ip_address)
+
+    # Simulate ARP response from Device2 to Device1
+    print(f"{device2.name} is sending an ARP response to {device1.name}...")
+    device2.receive_arp_response(device1.ip_address, "00:11:22:33:44:55")
+
+    print(f"{device1.name} MAC Address: {device1.mac_address}")
+    print(f"{device2.name} MAC Address: {device2.mac_address}")
+
+
+@scenario("routing", "Three routers with static routes forwarding packets between three networks")
+def routing(context):
+    # Step 1: Create Routers
+    router1 = Router("Router1")
+    router2 = Router("Router2")
+    router3 = Router("Router3")
+
+    # Step 2: Add Interfaces to the Routers
+    router1.add_interface("eth0", "192.168.1.1", "255.255.255.0")
+    router1.add_interface("eth1", "10.0.0.1", "255.255.255.0")
+
+    router2.add_interface("eth0", "192.168.2.1", "255.255.255.0")
+    router2.add_interface("eth1", "192.168.1.2", "255.255.255.0")
+
+    router3.add_interface("eth0", "10.0.0.2", "255.255.255.0")
+    router3.add_interface("eth1", "10.1.0.1", "255.255.255.0")
+
+    # Step 3: Configure Routing Tables
+    router1.configure_routing_table("192.168.2.0", "192.168.1.2", "eth0", "255.255.255.0")
+    router1.configure_routing_table("10.1.0.0", "10.0.0.2", "eth1", "255.255.0.0")
+
+    router2.configure_routing_table("192.168.1.0", "192.168.1.1", "eth1", "255.255.255.0")
+    router2.configure_routing_table("10.1.0.0", "10.0.0.2", "eth1", "255.255.0.0")
+
+    router3.configure_routing_table("192.168.1.0", "10.0.0.1", "eth0", "255.255.255.0")
+    router3.configure_routing_table("192.168.2.0", "10.0.0.1", "eth0", "255.255.255.0")
+
+    # Step 4: Create Networks and Assign Devices
+    network1 = Network("192.168.1.0", "255.255.255.0")
+    network2 = Network("192.168.2.0", "255.255.255.0")
+    network3 = Network("10.1.0.0", "255.255.255.0")
+
+    device1 = Device("Device1")
+    device2 = Device("Device2")
+    device3 = Device("Device3")
+    device4 = Device("Device4")
+    device5 = Device("Device5")
+
+    network1.assign_ip_address(device1)
+    network1.assign_ip_address(device2)
+    network2.assign_ip_address(device3)
+    network2.assign_ip_address(device4)
+    network3.assign_ip_address(device5)
+
+    # Step 5: Simulate ARP Requests/Responses within networks
+    print(f"{device1.name} is sending an ARP request to resolve the MAC address of {device2.name}...")
+    device1.send_arp_request(device2.ip_address)
+
+    print(f"{device2.name} is sending an ARP response to {device1.name}...")
+    device2.receive_arp_response(device1.ip_address, "00:11:22:33:44:55")
+
+    print(f"{device3.name} is sending an ARP request to resolve the MAC address of {device4.name}...")
+    device3.send_arp_request(device4.ip_address)
+
+    print(f"{device4.name} is sending an ARP response to {device3.name}...")
+    device4.receive_arp_response(device3.ip_address, "66:77:88:99:AA:BB")
+
+    print(f"{device5.name} is sending an ARP request to resolve the MAC address of {router3.interfaces['eth1']['ip_address']}...")
+    device5.send_arp_request(router3.interfaces['eth1']['ip_address'])
+
+    print(f"{router3.router_id} is sending an ARP response to {device5.name}...")
+    device5.receive_arp_response(router3.interfaces['eth1']['ip_address'], "CC:DD:EE:FF:00:11")
+
+    # Step 6: Simulate Packet Forwarding across networks
+    print(f"{device1.name} sends a packet to {device3.name}...")
+    router1.forward_packet({'destination_ip': device3.ip_address})
+
+    print(f"{device3.name} sends a packet to {device5.name}...")
+    router2.forward_packet({'destination_ip': device5.ip_address})
+
+    # Print final MAC addresses of devices
+    for device in (device1, device2, device3, device4, device5):
+        print(f"{device.name} MAC Address: {device.mac_address}")
+
+
+def build_router_ring(count):
+    """
+    Create routers Router1..RouterN linked in a ring, with ring links on
+    10.0.i.0/24 and one LAN per router on 192.168.i.0/24.
+    """
+    routers = [Router(f"Router{i}") for i in range(1, count + 1)]
+    for i, router in enumerate(routers):
+        neighbor = routers[(i + 1) % count]
+        router.add_interface(f"to-{neighbor.router_id}", f"10.0.{i}.1", "255.255.255.0")
+        neighbor.add_interface(f"to-{router.router_id}", f"10.0.{i}.2", "255.255.255.0")
+        router.add_interface("lan", f"192.168.{i + 1}.1", "255.255.255.0")
+    for i, router in enumerate(routers):
+        neighbor = routers[(i + 1) % count]
+        router.add_neighbor(neighbor, f"to-{neighbor.router_id}")
+        neighbor.add_neighbor(router, f"to-{router.router_id}")
+    return routers
+
+
+@scenario("route-compiler", "Compile routes for a ring of routers, then fail a link and reconverge")
+def route_compiler(context):
+    from netsim.routing import RouteCompiler
+
+    routers = build_router_ring(4)
+    compiler = RouteCompiler.from_routers(routers)
+    print(f"Installed {compiler.install()} routes")
+    router1 = routers[0]
+    router1.forward_packet({'destination_ip': "192.168.2.10"})
+
+    print("Link Router1 <-> Router2 fails...")
+    affected = compiler.remove_link("Router1", "Router2")
+    print(f"Reinstalled {compiler.install(affected)} routes on {len(affected)} routers")
+    router1.forward_packet({'destination_ip': "192.168.2.10"})
+    print("Path:", " -> ".join(compiler.path("Router1", "Router2")))
+
+
+@scenario("link-state", "Link-state routing on a ring of routers: flood LSAs, run SPF, then fail a link")
+def link_state(context):
+    from netsim.link_state import LinkStateProtocol
+
+    routers = build_router_ring(4)
+    protocol = LinkStateProtocol(routers, scheduler=context.scheduler)
+    report = protocol.converge()
+    print(f"Converged in {report.convergence_time:.3f}s: {report.messages} messages, "
+          f"{report.lsas_installed} LSAs installed, {report.duplicates} duplicates, {report.spf_runs} SPF runs")
+    router1 = routers[0]
+    router1.forward_packet({'destination_ip': "192.168.2.10"})
+
+    print("Link Router1 <-> Router2 fails...")
+    protocol.link_down("Router1", "Router2")
+    report = protocol.converge()
+    print(f"Reconverged in {report.convergence_time:.3f}s: {report.messages} messages, "
+          f"{report.route_changes} route changes")
+    router1.forward_packet({'destination_ip': "192.168.2.10"})
+
+
+@scenario("distance-vector", "Distance-vector routing on a ring of routers, isolating one router under each horizon policy")
+def distance_vector(context):
+    from netsim.distance_vector import HORIZON_POLICIES, DistanceVectorProtocol
+
+    for horizon in HORIZON_POLICIES:
+        routers = build_router_ring(4)
+        protocol = DistanceVectorProtocol(routers, horizon=horizon)
+        report = protocol.converge()
+        protocol.install()
+        print(f"[{horizon}] Converged in {report.rounds} rounds with {report.messages} messages")
+        routers[1].forward_packet({'destination_ip': "192.168.1.10"})
+
+        print(f"[{horizon}] Router1 loses both of its links...")
+        protocol.link_down("Router1", "Router2")
+        protocol.link_down("Router1", "Router4")
+        report = protocol.converge()
+        protocol.install()
+        print(f"[{horizon}] Reconverged in {report.rounds} rounds; "
+              f"counting to infinity: {', '.join(report.count_to_infinity) or 'none'}")
+        routers[1].forward_packet({'destination_ip': "192.168.1.10"})
+
+
+@scenario("congestion", "Reno and CUBIC flows sharing a drop-tail bottleneck: throughput, fairness and queue")
+def congestion(context):
+    from netsim.congestion import BottleneckLink
+    from netsim.transport import TCPSimulator
+
+    flows = context.param('flows', 1000)
+    bandwidth = context.param('bandwidth', 1e9)
+    tcp_simulator = TCPSimulator()
+    link = BottleneckLink(bandwidth=bandwidth, buffer_packets=context.param('buffer', 2000))
+    rtt = context.param('rtt', 0.04)
+    reno = tcp_simulator.open_flows("reno_clients", link, flows // 2, base_rtt=rtt, controller='reno')
+    cubic = tcp_simulator.open_flows("cubic_clients", link, flows - flows // 2, base_rtt=rtt, controller='cubic')
+    report = tcp_simulator.flows.run(context.param('duration', 5.0))
+    print(f"{flows} flows over {bandwidth / 1e9:g} Gbit/s for {report.duration:.1f}s: "
+          f"utilization {report.utilization:.1%}, loss {report.loss_rate:.2%}, Jain fairness {report.fairness:.3f}")
+    print(f"Reno mean {report.throughput[reno].mean() / 1e6:.2f} Mbit/s, "
+          f"CUBIC mean {report.throughput[cubic].mean() / 1e6:.2f} Mbit/s; "
+          f"{report.fast_retransmits} fast retransmits, {report.timeouts} timeouts")
+    queue = report.queue_samples[:, 1]
+    print(f"Queue: mean {queue.mean():.0f}, max {queue.max():.0f} of {link.buffer_packets} packets")
+    return {'utilization': report.utilization, 'loss_rate': report.loss_rate, 'fairness': report.fairness,
+            'reno_throughput': float(report.throughput[reno].mean()),
+            'cubic_throughput': float(report.throughput[cubic].mean()), 'queue_mean': float(queue.mean())}
+
+
+@scenario("workload", "Thousands of simulated HTTP clients (Poisson, on/off, closed loop) against pooled servers")
+def workload(context):
+    from netsim.workload import CLOSED_LOOP, ON_OFF, POISSON, Workload
+
+    load = Workload(rtt=context.param('rtt', 0.02), rng=context.rng)
+    load.add_server("web", "10.0.0.1", workers=context.param('web_workers', 16), service_time=0.004)
+    load.add_server("api", "10.0.0.2", workers=context.param('api_workers', 4), service_time=0.002, queue_limit=200)
+    load.add_clients(context.param('poisson_clients', 2000), "web", arrival=POISSON, rate=context.param('rate', 1.0),
+                     network="10.1.0.0")
+    load.add_clients(context.param('on_off_clients', 1000), "web", arrival=ON_OFF, rate=2.0, on_time=0.5,
+                     off_time=1.5, network="10.2.0.0")
+    load.add_clients(context.param('closed_loop_clients', 500), "api", arrival=CLOSED_LOOP,
+                     think_time=context.param('think_time', 0.5), network="10.3.0.0")
+    report = load.run(context.param('duration', 20.0))
+    print(f"{report.issued} requests, {report.completed} completed, {report.rejected} rejected: "
+          f"{report.throughput:.0f} requests/s")
+    latency = report.latency.summary()
+    print("Latency: " + ", ".join(f"{name} {latency[name] * 1e3:.2f} ms" for name in ('p50', 'p90', 'p99', 'p99.9', 'max')))
+    for name, utilization in report.utilization.items():
+        print(f"Server {name}: {utilization:.0%} busy")
+    return {'throughput': report.throughput, 'rejected': report.rejected, 'latency_p50': latency['p50'],
+            'latency_p99': latency['p99'], 'web_utilization': report.utilization['web'],
+            'api_utilization': report.utilization['api']}
+
+
+@scenario("parallel", "Packet forwarding on a grid split across worker processes, checked against a sequential run")
+def parallel(context):
+    from netsim.parallel import PacketModel, ParallelSimulation
+
+    side = context.param('side', 60)
+    grid = np.arange(side * side).reshape(side, side)
+    a = np.concatenate((grid[:, :-1].ravel(), grid[:-1, :].ravel()))
+    b = np.concatenate((grid[:, 1:].ravel(), grid[1:, :].ravel()))
+    rng = context.rng
+    model = PacketModel(side * side, np.concatenate((a, b)), np.concatenate((b, a)),
+                        delay=rng.uniform(1e-4, 1e-3, 2 * len(a)), bandwidth=1e9)
+    flows = context.param('flows', 1000)
+    sinks = rng.choice(side * side, 16, replace=False)
+    model.add_flows(rng.integers(0, side * side, flows), sinks[rng.integers(0, len(sinks), flows)], rate=100.0)
+    simulation = ParallelSimulation(model, context.param('partitions', 4), context.param('until', 0.1),
+                                    seed=int(rng.integers(2 ** 32)))
+    sequential = simulation.run_sequential()
+    result = simulation.run()
+    identical = sequential.deliveries.tobytes() == result.deliveries.tobytes()
+    latency = result.deliveries['time'] - result.deliveries['created']
+    print(f"{side * side} nodes in {result.partitions} partitions: {result.cut_links} cut links, "
+          f"lookahead {result.lookahead * 1e6:.0f} us, {result.windows} windows, {result.messages} boundary events")
+    print(f"{result.events} events, {len(result.deliveries)} packets delivered, mean latency {latency.mean() * 1e3:.3f} ms")
+    print(f"Sequential {sequential.wall_time:.2f}s, parallel {result.wall_time:.2f}s; "
+          f"results {'bit-identical' if identical else 'DIFFER'}")
+    return {'identical': float(identical), 'speedup': sequential.wall_time / result.wall_time,
+            'events': result.events, 'windows': result.windows}
+
+
+@scenario("topology", "Generate fat-tree, leaf-spine, ring, grid, random and scale-free networks in bulk")
+def topology(context):
+    import os
+    import time
+
+    from netsim import topology
+
+    nodes = context.param('nodes', 2000)
+    side = max(int(nodes ** 0.5), 2)
+    specs = {
+        'fat-tree': topology.fat_tree(context.param('k', 8)),
+        'leaf-spine': topology.leaf_spine(4, 16, hosts=8),
+        'ring': topology.ring(nodes, hosts=1),
+        'grid': topology.grid(side, side, hosts=1, access='hub'),
+        'random': topology.random_graph(nodes, 3 * nodes, rng=context.rng),
+        'barabasi-albert': topology.barabasi_albert(nodes, 2, rng=context.rng),
+    }
+    metrics = {}
+    for name, spec in specs.items():
+        start = time.perf_counter()
+        built = topology.build_topology(spec, scheduler=context.scheduler)
+        elapsed = time.perf_counter() - start
+        counts = built.counts()
+        print(f"{name:>16}: " + ", ".join(f"{count} {kind}" for kind, count in counts.items())
+              + f" in {elapsed * 1e3:.0f} ms")
+        metrics[f'{name}_seconds'] = elapsed
+        if context.plot_dir:
+            from netsim.rendering import render_topology
+            rendering = render_topology(built, os.path.join(context.plot_dir, f"topology_{name}.png"),
+                                        title=f"{name} ({len(built)} devices)")
+            print(f"{'':>18}drawn {rendering.layout} as {len(rendering.graph.names)} nodes"
+                  f"{' from the layout cache' if rendering.cached else ''}: {rendering.path}")
+
+    fabric = topology.build_topology(specs['fat-tree'], scheduler=context.scheduler)
+    print(f"Installed {fabric.route_compiler().install()} routes in the fat tree")
+    source, destination = fabric.routers[-1], fabric.hosts[0]
+    route = source.lookup_route(destination.ip_address)
+    print(f"{source.router_id} reaches {destination.device_id} ({destination.ip_address}) "
+          f"via {route['interface']}")
+    return metrics
+
+
+def _hub_traffic(times, senders, checkpoint=None):
+    """
+    Broadcast one frame per (time, hub) on a ring of routers with hub LANs, optionally
+    checkpointing halfway and finishing on the restored copy. Returns per-hub counters.
+    """
+    from netsim import topology
+    from netsim.snapshot import load_checkpoint, save_checkpoint
+
+    scheduler = EventScheduler()
+    network = topology.build_topology(topology.ring(12, hosts=3, access='hub'), scheduler=scheduler)
+    hubs = network.hubs
+    for i, (time, sender) in enumerate(zip(times.tolist(), senders.tolist())):
+        hub = hubs[sender]
+        scheduler.schedule(time, hub.broadcast, f"frame {i}", hub.connected_devices[i % 3].device_id)
+    if checkpoint is not None:
+        scheduler.run(until=float(np.median(times)))
+        save_checkpoint(checkpoint, scheduler, network)
+        restored = load_checkpoint(checkpoint)
+        scheduler, hubs = restored.scheduler, restored.topology.hubs
+    scheduler.run()
+    return [(hub.frames_delivered, hub.collisions, hub.frames_dropped, hub.busy_time) for hub in hubs], scheduler.now
+
+
+@scenario("snapshot", "Save a routed fat tree as a memory-mapped snapshot, then checkpoint and resume hub traffic")
+def snapshot(context):
+    import os
+    import tempfile
+    import time
+
+    from netsim import topology
+    from netsim.snapshot import Snapshot, save_snapshot
+
+    fabric = topology.build_topology(topology.fat_tree(context.param('k', 8)), scheduler=context.scheduler)
+    routes = fabric.route_compiler().install()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "fabric")
+        start = time.perf_counter()
+        manifest = save_snapshot(path, fabric, context.scheduler)
+        saved = time.perf_counter()
+        stored = Snapshot(path)
+        opened = time.perf_counter()
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        print(f"Saved {manifest['nodes']} nodes and {routes} routes in {len(manifest['columns'])} columns, "
+              f"{size / 1024:.0f} KiB, in {(saved - start) * 1e3:.0f} ms; reopened in {(opened - saved) * 1e3:.2f} ms")
+
+        router = fabric.routers[0]
+        hosts = fabric.addresses[fabric.addresses > 0]
+        matches = stored.lookup_many(router.router_id, hosts)
+        agree = all(stored.route(index) == router.lookup_route(address)
+                    for index, address in zip(matches.tolist(), hosts.tolist()))
+        restored = stored.restore(context.scheduler)
+        same = all(a.routing_table == b.routing_table for a, b in zip(fabric.routers, restored.routers))
+        print(f"Lookups on the mapped routes of {router.router_id} {'match' if agree else 'DIFFER from'} its FIB; "
+              f"restored routing tables {'match' if same else 'DIFFER'}")
+
+        # The traffic runs untraced: it is run twice and only the two outcomes are compared.
+        times = np.sort(context.rng.uniform(0, 0.05, context.param('frames', 200)))
+        senders = context.rng.integers(0, 12, len(times))
+        previous = set_tracer(Tracer())
+        state = random.getstate()
+        try:
+            straight = _hub_traffic(times, senders)
+            random.setstate(state)
+            resumed = _hub_traffic(times, senders, os.path.join(directory, "traffic.ckpt"))
+        finally:
+            set_tracer(previous)
+    delivered = sum(counters[0] for counters in straight[0])
+    print(f"{delivered} frames delivered by t={straight[1]:.4f}s; the run resumed from a mid-run checkpoint "
+          f"{'matches it exactly' if straight == resumed else 'DIFFERS'}")
+    return {'save_seconds': saved - start, 'open_seconds': opened - saved, 'lookups_agree': float(agree),
+            'restored_match': float(same), 'resume_identical': float(straight == resumed)}
+
+
+@scenario("pcap", "Capture switched leaf-spine traffic to a pcap file, then stream it back into a host")
+def pcap(context):
+    import os
+    import tempfile
+
+    from netsim import topology
+    from netsim.pcap import Capture, PcapReader, PcapWriter, replay
+
+    scheduler = context.scheduler
+    count = context.param('frames', 500)
+    times = np.sort(context.rng.uniform(0, 0.01, count)).tolist()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(context.plot_dir or directory, "leaf_spine.pcap")
+        # Built and captured untraced: the pcap file is the record of this run.
+        previous = set_tracer(Tracer())
+        try:
+            fabric = topology.build_topology(topology.leaf_spine(2, 4, hosts=4, access='switch'), scheduler=scheduler)
+            hosts = fabric.hosts
+            pairs = context.rng.integers(0, len(hosts), (count, 2)).tolist()
+            with PcapWriter(path, clock=scheduler) as writer:
+                capture = Capture(writer).attach(fabric)
+                for i, (time, (source, destination)) in enumerate(zip(times, pairs)):
+                    scheduler.schedule(time, hosts[source].send_data, f"frame {i}", hosts[destination].mac_address)
+                scheduler.run()
+                capture.detach()
+        finally:
+            set_tracer(previous)
+        print(f"Captured {writer.packets} frames ({writer.bytes} bytes) from {count} sends to {path}")
+
+        with PcapReader(path) as reader:
+            stored = sum(1 for _ in reader)
+        sink = EndDevice("Replay sink")
+        start = scheduler.now
+        played = replay(path, sink, scheduler)
+        scheduler.run(max_events=context.param('replay_events', 5))
+        previous = set_tracer(Tracer())
+        try:
+            scheduler.run()
+        finally:
+            set_tracer(previous)
+            played.close()
+        print(f"Replayed {played.frames} of {stored} stored frames into {sink.device_id} over "
+              f"{scheduler.now - start:.6f}s of virtual time")
+    return {'frames_captured': writer.packets, 'bytes_captured': writer.bytes, 'frames_replayed': played.frames}
+
+
+@scenario("trace-replay", "Stream a synthetic flow/packet trace from CSV and binary files into a leaf-spine fabric")
+def trace_replay(context):
+    import os
+    import tempfile
+    import time
+
+    from netsim import topology
+    from netsim.trace_replay import TRACE_DTYPE, EndpointMap, csv_to_binary, replay_trace, write_trace
+
+    # A trace from a network far larger than the fabric: Poisson arrivals between
+    # random 10/8 endpoints, with every twentieth record a multi-packet flow.
+    count = context.param('records', 20000)
+    trace = np.zeros(count, TRACE_DTYPE)
+    trace['time'] = np.cumsum(context.rng.exponential(1e-4, count))
+    trace['source'] = context.rng.integers(0x0A000000, 0x0B000000, count)
+    trace['destination'] = context.rng.integers(0x0A000000, 0x0B000000, count)
+    flows = context.rng.random(count) < 0.05
+    trace['packets'] = np.where(flows, context.rng.integers(2, 50, count), 1)
+    trace['bytes'] = trace['packets'] * context.rng.integers(64, 1500, count)
+    trace['duration'] = np.where(flows, context.rng.exponential(0.01, count), 0.0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(context.plot_dir or directory, "trace.csv")
+        binary_path = os.path.join(directory, "trace.bin")
+        write_trace(csv_path, [trace])
+        csv_to_binary(csv_path, binary_path)
+        print(f"Wrote {count} records: {os.path.getsize(csv_path)} bytes as CSV, "
+              f"{os.path.getsize(binary_path)} bytes binary")
+
+        metrics = {}
+        for name, path in (("csv", csv_path), ("binary", binary_path)):
+            scheduler = EventScheduler()
+            # Replayed untraced: the trace is far larger than anything worth printing.
+            previous = set_tracer(Tracer())
+            try:
+                fabric = topology.build_topology(topology.leaf_spine(2, 4, hosts=8, access='switch'),
+                                                 scheduler=scheduler)
+                endpoints = EndpointMap.from_topology(fabric)
+                start = time.perf_counter()
+                replay = replay_trace(path, endpoints, scheduler, max_flows=context.param('max_flows', 64),
+                                      max_pending=context.param('max_pending', 1000),
+                                      chunk_records=context.param('chunk_records', 4096))
+                scheduler.run()
+                elapsed = time.perf_counter() - start
+            finally:
+                set_tracer(previous)
+            print(f"{name}: {replay.records} records, {replay.packets} packets, {replay.bytes} bytes "
+                  f"onto {len(endpoints.devices)} hosts in {elapsed:.2f}s; {replay.deferrals} deferrals, "
+                  f"max lag {replay.max_lag * 1e3:.3f} ms")
+            metrics[f'{name}_seconds'] = elapsed
+            metrics['packets'] = replay.packets
+            metrics['deferrals'] = replay.deferrals
+    return metrics
+
+
+@scenario("transport", "Port assignment, reliable send, and HTTP and FTP against local stand-in servers")
+def transport(context):
+    from netsim.transport import TCPSimulator
+    tcp_simulator = TCPSimulator()
+    tcp_simulator.test_protocol_stack()
+
+
+@scenario("all", "Every scenario above, in order")
+def run_all(context):
+    for name, registered in SCENARIOS.items():
+        if registered.function is not run_all:
+            print(f"=== {name}: {registered.description} ===")
+            # A fresh scheduler per scenario, so no events or state leak into the next one.
+            registered.run_in(ScenarioContext(headless=context.headless, plot_dir=context.plot_dir,
+                                              sink=context.tracer.sink, params=context.params, rng=context.rng))
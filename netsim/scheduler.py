@@ -0,0 +1,151 @@
+import heapq
+import itertools
+
+
+class EventScheduler:
+    """
+    Discrete-event scheduler driven by a virtual clock.
+
+    Events are kept in a heap ordered by (time, sequence number), so events
+    scheduled for the same instant run in the order they were scheduled.
+    Advancing the clock costs nothing: a backoff of several simulated seconds
+    is just a larger timestamp on the heap.
+    """
+
+    def __init__(self, start_time=0.0):
+        self.now = start_time
+        self.events_processed = 0
+        self._queue = []
+        self._sequence = itertools.count()
+
+    def __getstate__(self):
+        # itertools.count objects cannot be pickled on newer Pythons; save the next sequence number instead.
+        state = self.__dict__.copy()
+        state['_sequence'] = next(self._sequence)
+        self._sequence = itertools.count(state['_sequence'])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._sequence = itertools.count(state['_sequence'])
+
+    def schedule(self, delay, callback, *args):
+        """
+        Schedule callback(*args) to run `delay` virtual seconds from now.
+        :param delay: Non-negative delay in virtual seconds.
+        :param callback: Callable invoked when the event fires.
+        :return: An event handle that can be passed to cancel().
+        """
+        if delay < 0:
+            raise ValueError(f"Cannot schedule an event {delay} seconds in the past")
+        event = [self.now + delay, next(self._sequence), callback, args]
+        heapq.heappush(self._queue, event)
+        return event
+
+    def schedule_at(self, time, callback, *args):
+        """
+        Schedule callback(*args) to run at an absolute virtual time.
+        """
+        return self.schedule(time - self.now, callback, *args)
+
+    def cancel(self, event):
+        """
+        Cancel a pending event. The entry stays in the heap and is skipped when popped.
+        """
+        event[2] = None
+
+    def discard_cancelled(self):
+        """
+        Remove cancelled events from the queue.
+        """
+        self._queue = [event for event in self._queue if event[2] is not None]
+        heapq.heapify(self._queue)
+
+    def pending(self):
+        """
+        Return the number of events still in the queue (including cancelled ones).
+        """
+        return len(self._queue)
+
+    def has_live_events(self):
+        """
+        Return True if an event that has not been cancelled is still queued.
+        """
+        return any(event[2] is not None for event in self._queue)
+
+    def peek(self):
+        """
+        Return the time of the next event, or None if the queue is empty.
+        """
+        return self._queue[0][0] if self._queue else None
+
+    def step(self):
+        """
+        Run the next pending event.
+        :return: True if an event was run, False if the queue is empty.
+        """
+        queue = self._queue
+        while queue:
+            time, _, callback, args = heapq.heappop(queue)
+            if callback is None:
+                continue
+            self.now = time
+            callback(*args)
+            self.events_processed += 1
+            return True
+        return False
+
+    def run(self, until=None, max_events=None):
+        """
+        Run events in timestamp order.
+        :param until: Stop before the first event later than this virtual time.
+        :param max_events: Stop after running this many events.
+        :return: The number of events run.
+        """
+        queue = self._queue
+        heappop = heapq.heappop
+        processed = 0
+        while queue:
+            if until is not None and queue[0][0] > until:
+                break
+            if max_events is not None and processed >= max_events:
+                break
+            time, _, callback, args = heappop(queue)
+            if callback is None:
+                continue
+            self.now = time
+            callback(*args)
+            processed += 1
+        if until is not None and self.now < until and (max_events is None or processed < max_events):
+            self.now = until
+        self.events_processed += processed
+        return processed
+
+    def reset(self, start_time=0.0):
+        """
+        Drop all pending events and rewind the clock.
+        """
+        self.now = start_time
+        self.events_processed = 0
+        self._queue = []
+        self._sequence = itertools.count()
+
+
+_default_scheduler = EventScheduler()
+
+
+def get_default_scheduler():
+    """
+    Return the scheduler used by devices that were not given one explicitly.
+    """
+    return _default_scheduler
+
+
+def set_default_scheduler(scheduler):
+    """
+    Replace the default scheduler and return the previous one.
+    """
+    global _default_scheduler
+    previous = _default_scheduler
+    _default_scheduler = scheduler
+    return previous
@@ -0,0 +1,541 @@
+"""
+Saving and reopening built networks, and checkpointing running simulations.
+
+A snapshot is a directory of .npy columns plus a manifest.json. Per-node
+values (kind, MAC, host address, switch and hub settings) are one column
+each. Variable-length per-node data (router interfaces, neighbors and
+routes, switch ports and CAM entries, hub members) are flat columns with an
+`<table>_indptr` column giving each node's slice, like a CSR matrix. Strings
+are a byte column plus offsets. Snapshot opens the columns memory-mapped, so
+reopening a multi-gigabyte snapshot costs nothing until a column is read.
+Route lookups work on the mapped columns directly: each router's routes are
+stored longest prefix first and sorted within a length, so a lookup is a
+binary search per prefix length. restore() turns a snapshot back into live
+devices.
+
+A checkpoint is a pickle of a whole simulation mid-run: every device's
+attributes, the scheduler with its pending events, the random module's
+state, and any other objects passed in. Devices refer to each other in long
+chains (router to neighbor router, switch port to host and back), which
+pickle would follow one recursion level per hop. The checkpoint instead
+writes each device once, and writes every reference to a device as its
+index in the topology.
+"""
+import collections
+import io
+import json
+import os
+import pickle
+import random
+import shutil
+
+import numpy as np
+
+from netsim.data_link import Switch
+from netsim.frames import int_to_mac, mac_to_int
+from netsim.ipv4 import MASKS, IPv4Address, IPv4Prefix, as_ipv4
+from netsim.network import Router
+from netsim.physical import EndDevice, Hub
+from netsim.scheduler import EventScheduler
+from netsim.topology import HOST, HUB, ROUTER, SWITCH, Topology, TopologySpec, paused_collection
+
+FORMAT = "netsim-snapshot"
+VERSION = 1
+_MASKS = np.array(MASKS, np.uint32)
+_NO_ADDRESS = -1
+
+
+class _StringColumn:
+    """
+    A column of strings stored as UTF-8 bytes plus offsets; entries decode on access.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(strings):
+        encoded = [string.encode() for string in strings]
+        offsets = np.zeros(len(encoded) + 1, np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        return np.frombuffer(b''.join(encoded), np.uint8), offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode()
+
+    def tolist(self):
+        blob = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        return [blob[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+
+
+def _indptr(counts):
+    indptr = np.zeros(len(counts) + 1, np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr
+
+
+def _columns(topology):
+    """
+    Flatten a topology's devices and tables into a dict of arrays.
+    """
+    devices = topology.devices
+    kinds = np.asarray(topology.spec.kinds, np.uint8)
+    index = {id(device): i for i, device in enumerate(devices)}
+
+    def node_of(device):
+        try:
+            return index[id(device)]
+        except KeyError:
+            raise ValueError(f"{device!r} is linked to the topology but not part of it") from None
+
+    n = len(devices)
+    macs = np.array(topology.macs, np.int64)
+    addresses = np.zeros(n, np.uint32)
+    address_length = np.zeros(n, np.uint8)
+    capacity = np.zeros(n, np.int64)
+    aging = np.zeros(n, np.float64)
+    delay = np.zeros(n, np.float64)
+    bandwidth = np.zeros(n, np.float64)
+    counts = {table: np.zeros(n, np.int64) for table in ('interface', 'neighbor', 'route', 'port', 'cam', 'member')}
+    interface_names, interface_address, interface_length = [], [], []
+    neighbor_peer, neighbor_interface, neighbor_cost = [], [], []
+    route_prefix, route_length, route_next_hop, route_interface = [], [], [], []
+    port_number, port_peer = [], []
+    cam_mac, cam_port, cam_seen = [], [], []
+    members = []
+
+    for i, device in enumerate(devices):
+        kind = kinds[i]
+        if kind == ROUTER:
+            counts['interface'][i] = len(device.interfaces)
+            for name, interface in device.interfaces.items():
+                interface_names.append(name)
+                interface_address.append(interface['ip_address'].value)
+                interface_length.append(interface['subnet_mask'])
+            counts['neighbor'][i] = len(device.neighbors)
+            for link in device.neighbors.values():
+                neighbor_peer.append(node_of(link['router']))
+                neighbor_interface.append(link['interface'])
+                neighbor_cost.append(link['cost'])
+            routes = sorted(device.routing_table.items(), key=lambda item: (-item[0].prefix_len, item[0].value))
+            counts['route'][i] = len(routes)
+            for prefix, route in routes:
+                route_prefix.append(prefix.value)
+                route_length.append(prefix.prefix_len)
+                next_hop = route['next_hop']
+                route_next_hop.append(_NO_ADDRESS if next_hop is None else next_hop.value)
+                route_interface.append(route['interface'])
+        elif kind == SWITCH:
+            capacity[i] = device.capacity
+            aging[i] = device.aging_time
+            delay[i] = device.port_delay
+            counts['port'][i] = len(device.ports)
+            for number, port in device.ports.items():
+                port_number.append(number)
+                port_peer.append(node_of(port.attachment))
+            counts['cam'][i] = len(device.table)
+            for mac, port in device.table.items():
+                cam_mac.append(mac_to_int(mac))
+                cam_port.append(port)
+                cam_seen.append(device._last_seen[mac])
+        elif kind == HUB:
+            delay[i] = device.propagation_delay
+            bandwidth[i] = device.bandwidth
+            counts['member'][i] = len(device.connected_devices)
+            members.extend(node_of(member) for member in device.connected_devices)
+        if kind in (SWITCH, HOST):
+            macs[i] = _NO_ADDRESS if device.mac_address is None else mac_to_int(device.mac_address)
+        if kind == HOST and device.ip_address is not None:
+            addresses[i] = device.ip_address.value
+            address_length[i] = device.ip_address.prefix_len
+
+    names, names_offsets = _StringColumn.encode(topology.spec.names)
+    interface_data, interface_offsets = _StringColumn.encode(interface_names)
+    neighbor_data, neighbor_offsets = _StringColumn.encode(neighbor_interface)
+    route_data, route_offsets = _StringColumn.encode(route_interface)
+    columns = {
+        'kinds': kinds, 'names': names, 'names_offsets': names_offsets, 'macs': macs,
+        'addresses': addresses, 'address_length': address_length,
+        'capacity': capacity, 'aging': aging, 'delay': delay, 'bandwidth': bandwidth,
+        'link_src': np.asarray(topology.spec.src, np.int32), 'link_dst': np.asarray(topology.spec.dst, np.int32),
+        'interface_name': interface_data, 'interface_name_offsets': interface_offsets,
+        'interface_address': np.array(interface_address, np.uint32),
+        'interface_length': np.array(interface_length, np.uint8),
+        'neighbor_peer': np.array(neighbor_peer, np.int32),
+        'neighbor_interface': neighbor_data, 'neighbor_interface_offsets': neighbor_offsets,
+        'neighbor_cost': np.array(neighbor_cost, np.float64),
+        'route_prefix': np.array(route_prefix, np.uint32), 'route_length': np.array(route_length, np.uint8),
+        'route_next_hop': np.array(route_next_hop, np.int64),
+        'route_interface': route_data, 'route_interface_offsets': route_offsets,
+        'port_number': np.array(port_number, np.int32), 'port_peer': np.array(port_peer, np.int32),
+        'cam_mac': np.array(cam_mac, np.int64), 'cam_port': np.array(cam_port, np.int32),
+        'cam_seen': np.array(cam_seen, np.float64),
+        'member': np.array(members, np.int32),
+    }
+    for table, table_counts in counts.items():
+        columns[f'{table}_indptr'] = _indptr(table_counts)
+    return columns
+
+
+def save_snapshot(path, topology, scheduler=None):
+    """
+    Write a topology, with its current routing, CAM and address state, as a
+    snapshot directory. An existing snapshot at path is replaced only once
+    the new one is complete.
+    :param topology: netsim.topology.Topology.
+    :param scheduler: Recorded so restore() can resume the switches' aging clock.
+    :return: The manifest dict.
+    :raise ValueError: If a device links to a device outside the topology.
+    """
+    columns = _columns(topology)
+    staging = f"{path}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    for name, column in columns.items():
+        np.save(os.path.join(staging, f"{name}.npy"), column)
+    manifest = {
+        'format': FORMAT,
+        'version': VERSION,
+        'time': scheduler.now if scheduler is not None else 0.0,
+        'nodes': len(topology.devices),
+        'columns': {name: {'dtype': column.dtype.str, 'shape': list(column.shape)} for name, column in columns.items()},
+    }
+    with open(os.path.join(staging, "manifest.json"), "w") as file:
+        json.dump(manifest, file, indent=2)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(staging, path)
+    return manifest
+
+
+class Snapshot:
+    """
+    An opened snapshot directory. Columns are read-only arrays, memory-mapped
+    unless mmap=False; they are mapped on first access.
+    :raise ValueError: If path holds no snapshot of a supported version.
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        with open(os.path.join(path, "manifest.json")) as file:
+            self.manifest = json.load(file)
+        if self.manifest.get('format') != FORMAT or self.manifest.get('version') != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} {FORMAT}")
+        self.time = self.manifest['time']
+        self._mmap_mode = 'r' if mmap else None
+        self._columns = {}
+        self._index = None
+
+    def __len__(self):
+        return self.manifest['nodes']
+
+    def __getitem__(self, column):
+        array = self._columns.get(column)
+        if array is None:
+            if column not in self.manifest['columns']:
+                raise KeyError(column)
+            array = np.load(os.path.join(self.path, f"{column}.npy"), mmap_mode=self._mmap_mode)
+            self._columns[column] = array
+        return array
+
+    def strings(self, column):
+        return _StringColumn(self[column], self[f'{column}_offsets'])
+
+    @property
+    def names(self):
+        return self.strings('names')
+
+    def node(self, name):
+        """
+        Return the node index of a device name.
+        """
+        if self._index is None:
+            self._index = {node: i for i, node in enumerate(self.names.tolist())}
+        return self._index[name]
+
+    def _slice(self, table, node):
+        indptr = self[f'{table}_indptr']
+        if isinstance(node, str):
+            node = self.node(node)
+        return int(indptr[node]), int(indptr[node + 1])
+
+    def cam(self, switch):
+        """
+        :return: (macs, ports, last_seen) arrays of a switch's CAM table, oldest entry first.
+        """
+        start, end = self._slice('cam', switch)
+        return self['cam_mac'][start:end], self['cam_port'][start:end], self['cam_seen'][start:end]
+
+    def lookup_many(self, router, addresses):
+        """
+        Longest-prefix match a batch of addresses against a router's stored routes.
+        :param addresses: Integer addresses.
+        :return: int64 array of indices into the route columns, -1 where no route matches.
+        """
+        addresses = np.asarray(addresses, np.uint32)
+        start, end = self._slice('route', router)
+        prefixes = self['route_prefix'][start:end]
+        lengths = np.asarray(self['route_length'][start:end])
+        result = np.full(len(addresses), -1, np.int64)
+        # Routes are stored longest prefix first and sorted within a length, so each length is one sorted run.
+        bounds = [0] + (np.flatnonzero(np.diff(lengths)) + 1).tolist() + [len(lengths)]
+        for run_start, run_end in zip(bounds, bounds[1:]):
+            pending = np.flatnonzero(result < 0)
+            if not len(pending) or run_start == run_end:
+                break
+            run = prefixes[run_start:run_end]
+            keys = addresses[pending] & _MASKS[lengths[run_start]]
+            positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            found = run[positions] == keys
+            result[pending[found]] = start + run_start + positions[found]
+        return result
+
+    def route(self, index):
+        """
+        Return a stored route in the form Router.lookup_route() returns it.
+        """
+        next_hop = int(self['route_next_hop'][index])
+        return {
+            'next_hop': None if next_hop == _NO_ADDRESS else IPv4Address(next_hop),
+            'interface': self.strings('route_interface')[index],
+            'subnet_mask': int(self['route_length'][index]),
+        }
+
+    def lookup(self, router, destination_ip):
+        """
+        Return the longest-prefix-match route of a router for a destination, or None.
+        """
+        index = int(self.lookup_many(router, [as_ipv4(destination_ip).value])[0])
+        return None if index < 0 else self.route(index)
+
+    def restore(self, scheduler=None):
+        """
+        Rebuild the live devices, links and tables.
+        :param scheduler: Scheduler of the hosts, switches and hubs; defaults to the default scheduler.
+        :return: netsim.topology.Topology.
+        """
+        with paused_collection():
+            return self._restore(scheduler)
+
+    def _restore(self, scheduler):
+        kinds = np.asarray(self['kinds'])
+        names = self.names.tolist()
+        macs = np.asarray(self['macs'])
+        n = len(kinds)
+        devices = [None] * n
+        for i in np.flatnonzero(kinds == ROUTER).tolist():
+            devices[i] = Router(names[i])
+        for i in np.flatnonzero(kinds == SWITCH).tolist():
+            devices[i] = Switch(names[i], capacity=int(self['capacity'][i]), aging_time=float(self['aging'][i]),
+                                port_delay=float(self['delay'][i]), scheduler=scheduler)
+        for i in np.flatnonzero(kinds == HUB).tolist():
+            devices[i] = Hub(scheduler, propagation_delay=float(self['delay'][i]),
+                             bandwidth=float(self['bandwidth'][i]))
+        addresses = np.asarray(self['addresses'])
+        address_length = np.asarray(self['address_length'])
+        for i in np.flatnonzero(kinds == HOST).tolist():
+            device = devices[i] = EndDevice(names[i], scheduler)
+            if address_length[i] or addresses[i]:
+                device.ip_address = IPv4Address(int(addresses[i]), int(address_length[i]))
+        for i in np.flatnonzero((kinds == HOST) | (kinds == SWITCH)).tolist():
+            if macs[i] != _NO_ADDRESS:
+                devices[i].set_mac_address(int_to_mac(int(macs[i])))
+
+        member_indptr = self['member_indptr'].tolist()
+        member = self['member'].tolist()
+        for i in np.flatnonzero(kinds == HUB).tolist():
+            for peer in member[member_indptr[i]:member_indptr[i + 1]]:
+                devices[i].connect_device(devices[peer])
+        port_indptr = self['port_indptr'].tolist()
+        port_number = self['port_number'].tolist()
+        port_peer = self['port_peer'].tolist()
+        cam_indptr = self['cam_indptr'].tolist()
+        cam_mac = self['cam_mac'].tolist()
+        cam_port = self['cam_port'].tolist()
+        cam_seen = self['cam_seen'].tolist()
+        for i in np.flatnonzero(kinds == SWITCH).tolist():
+            switch = devices[i]
+            for number, peer in zip(port_number[port_indptr[i]:port_indptr[i + 1]],
+                                    port_peer[port_indptr[i]:port_indptr[i + 1]]):
+                if kinds[peer] != SWITCH:
+                    switch.attach(devices[peer], number)
+                elif peer > i:
+                    # A switch-switch link is attached once, from its lower-numbered end.
+                    peer_ports = zip(port_number[port_indptr[peer]:port_indptr[peer + 1]],
+                                     port_peer[port_indptr[peer]:port_indptr[peer + 1]])
+                    peer_number = next(n for n, back in peer_ports if back == i and n not in devices[peer].ports)
+                    switch.attach(devices[peer], number, peer_number)
+            # Entries are stored oldest first with their last-seen times, so the LRU order and aging carry over.
+            for entry in range(cam_indptr[i], cam_indptr[i + 1]):
+                mac = int_to_mac(cam_mac[entry])
+                switch.table[mac] = cam_port[entry]
+                switch._last_seen[mac] = cam_seen[entry]
+
+        interface_indptr = self['interface_indptr'].tolist()
+        interface_names = self.strings('interface_name').tolist()
+        interface_address = self['interface_address'].tolist()
+        interface_length = self['interface_length'].tolist()
+        neighbor_indptr = self['neighbor_indptr'].tolist()
+        neighbor_peer = self['neighbor_peer'].tolist()
+        neighbor_interface = self.strings('neighbor_interface').tolist()
+        neighbor_cost = self['neighbor_cost'].tolist()
+        route_indptr = self['route_indptr'].tolist()
+        route_prefix = self['route_prefix'].tolist()
+        route_length = self['route_length'].tolist()
+        route_next_hop = self['route_next_hop'].tolist()
+        route_interface = self.strings('route_interface').tolist()
+        for i in np.flatnonzero(kinds == ROUTER).tolist():
+            router = devices[i]
+            for entry in range(interface_indptr[i], interface_indptr[i + 1]):
+                router.add_interface(interface_names[entry], interface_address[entry], interface_length[entry])
+            for entry in range(neighbor_indptr[i], neighbor_indptr[i + 1]):
+                router.add_neighbor(devices[neighbor_peer[entry]], neighbor_interface[entry], neighbor_cost[entry])
+            for entry in range(route_indptr[i], route_indptr[i + 1]):
+                next_hop = route_next_hop[entry]
+                router.configure_routing_table(IPv4Prefix(route_prefix[entry], route_length[entry]),
+                                               None if next_hop == _NO_ADDRESS else next_hop, route_interface[entry])
+
+        spec = TopologySpec(kinds.copy(), names, np.array(self['link_src']), np.array(self['link_dst']))
+        return Topology(spec, devices, macs.copy(), addresses.copy())
+
+
+Checkpoint = collections.namedtuple('Checkpoint', 'topology scheduler state')
+Checkpoint.__doc__ = """
+A simulation restored by load_checkpoint().
+:param topology: The Topology, or None if none was saved.
+:param scheduler: The EventScheduler with its clock and pending events.
+:param state: Whatever was passed as state to save_checkpoint().
+"""
+
+
+def _device(index):
+    """
+    Stands in for a device in a checkpoint; _CheckpointUnpickler resolves it to the restored device.
+    """
+    raise RuntimeError("Device references can only be loaded by load_checkpoint()")
+
+
+def _same(obj):
+    """
+    Identity; a checkpoint stores a foreign scheduler as _same(checkpointed scheduler).
+    """
+    return obj
+
+
+class _CheckpointPickler(pickle.Pickler):
+    # reducer_override is not consulted for plain ints, strings, lists and dicts, so it costs
+    # far less than persistent_id, which runs for every object pickled.
+    def __init__(self, file, devices, scheduler):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._devices = {id(device): i for i, device in enumerate(devices)}
+        self._scheduler = scheduler
+
+    def reducer_override(self, obj):
+        index = self._devices.get(id(obj))
+        if index is not None:
+            return _device, (index,)
+        # Any other scheduler a device holds (usually the default one) is unrelated to this
+        # simulation: restore the device onto the checkpointed scheduler instead of saving
+        # that scheduler and everything pending on it.
+        if isinstance(obj, EventScheduler) and obj is not self._scheduler:
+            return _same, (self._scheduler,)
+        return NotImplemented
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    def __init__(self, file, devices):
+        super().__init__(file)
+        self._devices = devices
+
+    def find_class(self, module, name):
+        if module == __name__ and name == '_device':
+            return self._devices.__getitem__
+        return super().find_class(module, name)
+
+
+def save_checkpoint(path, scheduler, topology=None, state=None):
+    """
+    Pickle a running simulation to path, atomically. Everything reachable from
+    the scheduler's pending events, the topology's devices and `state` is
+    saved, so callbacks must be picklable: functions, bound methods and
+    functools.partial objects are, lambdas and closures are not.
+    :param scheduler: The EventScheduler driving the simulation.
+    :param topology: netsim.topology.Topology, if the simulation has one.
+    :param state: Any other picklable object to save alongside, e.g. a dict of flows and generators.
+    """
+    devices = topology.devices if topology is not None else []
+    buffer = io.BytesIO()
+    with paused_collection():
+        pickle.dump([type(device) for device in devices], buffer, pickle.HIGHEST_PROTOCOL)
+        _CheckpointPickler(buffer, devices, scheduler).dump({
+            'devices': [device.__dict__ for device in devices],
+            'topology': topology,
+            'scheduler': scheduler,
+            'state': state,
+            'random': random.getstate(),
+        })
+    staging = f"{path}.tmp"
+    with open(staging, "wb") as file:
+        file.write(buffer.getbuffer())
+    os.replace(staging, path)
+
+
+def load_checkpoint(path, restore_random=True):
+    """
+    Load a checkpoint written by save_checkpoint(). Run the returned scheduler
+    to continue the simulation; pass it to set_default_scheduler() if code
+    relies on the default one.
+    :param restore_random: Also restore the random module's state.
+    :return: Checkpoint.
+    """
+    with open(path, "rb") as file:
+        classes = pickle.load(file)
+        with paused_collection():
+            devices = [cls.__new__(cls) for cls in classes]
+            saved = _CheckpointUnpickler(file, devices).load()
+    for device, attributes in zip(devices, saved['devices']):
+        device.__dict__.update(attributes)
+    if restore_random:
+        random.setstate(saved['random'])
+    return Checkpoint(saved['topology'], saved['scheduler'], saved['state'])
+
+
+class Checkpointer:
+    """
+    Save a checkpoint every `interval` virtual seconds while the scheduler runs.
+    The next save is scheduled before each one is written, so a simulation
+    restored from a checkpoint keeps checkpointing. Once the checkpointer's
+    own event is the only one left, it saves a last time and stops, so
+    scheduler.run() still returns when the simulation is done.
+    """
+
+    def __init__(self, path, scheduler, interval, topology=None, state=None):
+        self.path = path
+        self.scheduler = scheduler
+        self.interval = interval
+        self.topology = topology
+        self.state = state
+        self.saves = 0
+        self.event = None
+
+    def start(self):
+        self.event = self.scheduler.schedule(self.interval, self._save)
+        return self
+
+    def stop(self):
+        if self.event is not None:
+            self.scheduler.cancel(self.event)
+            self.event = None
+
+    def _save(self):
+        if self.scheduler.has_live_events():
+            self.event = self.scheduler.schedule(self.interval, self._save)
+        else:
+            self.event = None
+        self.saves += 1
+        save_checkpoint(self.path, self.scheduler, self.topology, self.state)
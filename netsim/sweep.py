@@ -0,0 +1,180 @@
+"""
+Parameter sweeps over registered scenarios, fanned out across processes.
+
+A sweep runs a scenario once per (grid point, replica). Each run gets its own
+child of one numpy.random.SeedSequence, chosen by its position in the sweep
+rather than by which worker picks it up. The same base seed therefore gives
+the same results with any number of workers. The child seeds both the random
+module and the scenario's NumPy Generator, so legacy code drawing from
+`random` is reproducible too.
+
+Scenarios take parameters through ScenarioContext.param() and return a dict
+of metrics. iter_sweep() yields each run's metrics as soon as it finishes.
+run_sweep() collects them into a SweepTable of means with Student-t
+confidence intervals per grid point.
+"""
+import collections
+import contextlib
+import io
+import itertools
+import math
+import os
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+SweepResult = collections.namedtuple('SweepResult', 'point params replica metrics elapsed')
+SweepResult.__doc__ = """
+One finished run.
+:param point: Index of the grid point in parameter_grid() order.
+:param params: The grid point's parameters.
+:param replica: Replica number at that point.
+:param metrics: Dict the scenario returned.
+:param elapsed: Wall-clock seconds the run took.
+"""
+
+
+def parameter_grid(grid):
+    """
+    Expand {name: [values]} into the list of all parameter dicts, last name varying fastest.
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def t_quantile(probability, degrees_of_freedom):
+    """
+    Quantile of Student's t distribution. Uses scipy when it is installed. Without
+    it, 1 and 2 degrees of freedom use their closed forms, and more use a
+    Cornish-Fisher expansion around the normal quantile, which is within 0.2%.
+    """
+    try:
+        from scipy.stats import t
+    except ImportError:
+        pass
+    else:
+        return float(t.ppf(probability, degrees_of_freedom))
+    if degrees_of_freedom == 1:
+        return math.tan(math.pi * (probability - 0.5))
+    if degrees_of_freedom == 2:
+        return (2 * probability - 1) / math.sqrt(2 * probability * (1 - probability))
+    z = statistics.NormalDist().inv_cdf(probability)
+    v = degrees_of_freedom
+    return (z + (z ** 3 + z) / (4 * v) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3)
+            + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * v ** 4))
+
+
+def _run_replica(scenario, params, seed):
+    from netsim.scenarios import get_scenario
+    from netsim.tracing import NullSink
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics = get_scenario(scenario).run(headless=True, seed=seed, sink=NullSink(), params=params)
+    if not isinstance(metrics, dict):
+        raise TypeError(f"Scenario {scenario!r} returned {type(metrics).__name__}, not a dict of metrics")
+    return metrics, time.perf_counter() - start
+
+
+def iter_sweep(scenario, grid, replicas=1, workers=None, seed=0):
+    """
+    Run scenario at every grid point replicas times, in worker processes.
+    :param grid: {parameter: [values]}; see parameter_grid().
+    :param workers: Worker processes; defaults to the number of CPUs. 0 runs in this process.
+    :param seed: Base seed. Run i of the sweep gets child i of SeedSequence(seed).
+    :return: Iterator of SweepResult in completion order.
+    """
+    points = parameter_grid(grid)
+    runs = [(point, replica) for point in range(len(points)) for replica in range(replicas)]
+    seeds = np.random.SeedSequence(seed).spawn(len(runs))
+    if workers == 0:
+        for (point, replica), child in zip(runs, seeds):
+            metrics, elapsed = _run_replica(scenario, points[point], child)
+            yield SweepResult(point, points[point], replica, metrics, elapsed)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        pending = {executor.submit(_run_replica, scenario, points[point], child): (point, replica)
+                   for (point, replica), child in zip(runs, seeds)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    point, replica = pending.pop(future)
+                    metrics, elapsed = future.result()
+                    yield SweepResult(point, points[point], replica, metrics, elapsed)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class SweepTable:
+    """
+    Per grid point and metric: replica count, mean, sample standard deviation and
+    the half-width of the `confidence` interval of the mean. Samples are kept by
+    replica number and aggregated in that order, so the table does not depend on
+    the order in which the runs finished.
+    """
+
+    def __init__(self, grid, confidence=0.95):
+        self.points = parameter_grid(grid)
+        self.confidence = confidence
+        self.samples = [collections.defaultdict(dict) for _ in self.points]
+
+    def add(self, result):
+        for name, value in result.metrics.items():
+            self.samples[result.point][name][result.replica] = value
+
+    @property
+    def metrics(self):
+        names = {}
+        for samples in self.samples:
+            names.update(dict.fromkeys(samples))
+        return list(names)
+
+    def rows(self):
+        """
+        :return: One dict per grid point: its parameters, plus for each metric M the
+            keys M, M_std, M_ci and M_n.
+        """
+        rows = []
+        for params, samples in zip(self.points, self.samples):
+            row = dict(params)
+            for name in self.metrics:
+                by_replica = samples.get(name, {})
+                values = np.asarray([by_replica[replica] for replica in sorted(by_replica)], dtype=np.float64)
+                n = len(values)
+                mean = float(values.mean()) if n else math.nan
+                std = float(values.std(ddof=1)) if n > 1 else math.nan
+                ci = t_quantile((1 + self.confidence) / 2, n - 1) * std / math.sqrt(n) if n > 1 else math.nan
+                row.update({name: mean, f'{name}_std': std, f'{name}_ci': ci, f'{name}_n': n})
+            rows.append(row)
+        return rows
+
+    def format(self):
+        """
+        Render the table as text, one line per grid point, metrics as mean ± CI.
+        """
+        parameters = list(self.points[0]) if self.points else []
+        metrics = self.metrics
+        header = parameters + [f"{name} (±{self.confidence:.0%})" for name in metrics]
+        lines = [[str(row[name]) for name in parameters]
+                 + [f"{row[name]:.4g} ± {row[name + '_ci']:.2g}" for name in metrics] for row in self.rows()]
+        widths = [max(len(cell) for cell in column) for column in zip(header, *lines)]
+        return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in [header] + lines)
+
+
+def run_sweep(scenario, grid, replicas=1, workers=None, seed=0, confidence=0.95, progress=None):
+    """
+    Run a sweep and aggregate it.
+    :param progress: Called with each SweepResult as it finishes.
+    :return: SweepTable.
+    """
+    table = SweepTable(grid, confidence)
+    for result in iter_sweep(scenario, grid, replicas, workers, seed):
+        table.add(result)
+        if progress is not None:
+            progress(result)
+    return table
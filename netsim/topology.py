@@ -0,0 +1,434 @@
+"""
+Bulk topology generators.
+
+A generator returns a TopologySpec: one kind code and name per node, and the
+undirected links as two integer arrays. The fabric nodes are Routers. Every
+fabric node that carries hosts gets an access Switch or Hub, or, with
+access=None, has the hosts attached directly. build_topology() then
+instantiates the devices and wires them up in one pass over the arrays:
+
+- Router-router links get a /31 each from link_network. Both ends get an
+  interface named after the peer and a neighbor entry, so RouteCompiler can
+  compile and install routes straight away.
+- Every Switch, Hub or Router with hosts anchors one LAN. The LANs are
+  equal-sized subnets of lan_network. The router facing a LAN takes its
+  first address as gateway, and the hosts take the ones after it.
+- Hosts and switches get MAC addresses base_mac + node index. Switches
+  connect their hosts on consecutive ports, and their CAM tables are preloaded
+  with the hosts' MACs without a trace event per entry.
+
+Apart from the arrays, the cost is one object per device and a handful per
+link, so build time and memory grow linearly with the node and link counts.
+"""
+import collections
+import contextlib
+import gc
+
+import numpy as np
+
+from netsim.data_link import Switch
+from netsim.frames import int_to_mac
+from netsim.ipv4 import IPv4Address, as_ipv4_prefix
+from netsim.network import Router
+from netsim.physical import EndDevice, Hub
+
+ROUTER, SWITCH, HUB, HOST = range(4)
+KIND_NAMES = ('router', 'switch', 'hub', 'host')
+_ACCESS_KINDS = {'switch': SWITCH, 'hub': HUB}
+
+TopologySpec = collections.namedtuple('TopologySpec', 'kinds names src dst')
+TopologySpec.__doc__ = """
+Array description of a topology.
+:param kinds: uint8 array, one of ROUTER, SWITCH, HUB, HOST per node.
+:param names: List of node names; they become router and device IDs.
+:param src: int32 array, one end of each undirected link.
+:param dst: int32 array, the other end.
+"""
+
+
+def _resolve_rng(rng):
+    import random
+
+    if rng is None:
+        return np.random.default_rng(random.getrandbits(64))
+    return rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+
+
+def _spec(names, src, dst, access_nodes=(), hosts=0, access='switch'):
+    """
+    Make a spec of router nodes and links, adding `hosts` hosts to each of
+    access_nodes, behind an access device of kind `access` or directly.
+    """
+    n = len(names)
+    kinds = [np.full(n, ROUTER, np.uint8)]
+    src = [np.asarray(src, np.int64)]
+    dst = [np.asarray(dst, np.int64)]
+    names = list(names)
+    access_nodes = np.asarray(access_nodes, np.int64)
+    if hosts and len(access_nodes):
+        count = len(access_nodes)
+        if access is None:
+            attach = access_nodes
+        else:
+            if access not in _ACCESS_KINDS:
+                raise ValueError(f"Unknown access device {access!r}; expected 'switch', 'hub' or None")
+            attach = n + np.arange(count)
+            kinds.append(np.full(count, _ACCESS_KINDS[access], np.uint8))
+            src.append(access_nodes)
+            dst.append(attach)
+            names += [f"{names[node]}-{access}" for node in access_nodes.tolist()]
+        first = len(names)
+        kinds.append(np.full(count * hosts, HOST, np.uint8))
+        src.append(np.repeat(attach, hosts))
+        dst.append(first + np.arange(count * hosts))
+        names += [f"Host{i}" for i in range(1, count * hosts + 1)]
+    return TopologySpec(np.concatenate(kinds), names, np.concatenate(src).astype(np.int32),
+                        np.concatenate(dst).astype(np.int32))
+
+
+def ring(count, hosts=0, access='switch'):
+    """
+    Routers Router1..RouterN in a ring.
+    :param hosts: Hosts per router.
+    """
+    nodes = np.arange(count)
+    links = count if count > 2 else count - 1
+    return _spec([f"Router{i}" for i in range(1, count + 1)], nodes[:links], (nodes[:links] + 1) % count,
+                 nodes, hosts, access)
+
+
+def grid(rows, columns, hosts=0, torus=False, access='switch'):
+    """
+    A rows x columns mesh of routers named R<row>-<column>, each linked to its
+    four neighbors. With torus=True the edges wrap around.
+    :param hosts: Hosts per router.
+    """
+    index = np.arange(rows * columns).reshape(rows, columns)
+    src = [index[:, :-1].ravel(), index[:-1, :].ravel()]
+    dst = [index[:, 1:].ravel(), index[1:, :].ravel()]
+    if torus and columns > 2:
+        src.append(index[:, -1])
+        dst.append(index[:, 0])
+    if torus and rows > 2:
+        src.append(index[-1, :])
+        dst.append(index[0, :])
+    names = [f"R{row}-{column}" for row in range(rows) for column in range(columns)]
+    return _spec(names, np.concatenate(src), np.concatenate(dst), index.ravel(), hosts, access)
+
+
+def random_graph(count, links, hosts=0, access='switch', rng=None):
+    """
+    A connected random graph of routers Router1..RouterN with `links` distinct
+    links: a uniform random recursive tree, plus uniformly chosen extra links.
+    :param links: Number of links, from count - 1 to count * (count - 1) / 2.
+    :param rng: numpy.random.Generator or seed; defaults to one seeded from the random module.
+    """
+    if not count - 1 <= links <= count * (count - 1) // 2:
+        raise ValueError(f"A connected graph of {count} nodes has {count - 1} to {count * (count - 1) // 2} links")
+    rng = _resolve_rng(rng)
+    order = rng.permutation(count)
+    parents = (rng.random(max(count - 1, 0)) * np.arange(1, count)).astype(np.int64)
+    src, dst = order[1:], order[parents]
+    keys = np.unique(np.minimum(src, dst) * count + np.maximum(src, dst))
+    while len(keys) < links:
+        missing = links - len(keys)
+        u = rng.integers(0, count, 2 * missing + 16)
+        v = rng.integers(0, count, 2 * missing + 16)
+        drawn = np.unique(np.minimum(u, v)[u != v] * count + np.maximum(u, v)[u != v])
+        fresh = drawn[~np.isin(drawn, keys)]
+        keys = np.union1d(keys, rng.permutation(fresh)[:missing])
+    return _spec([f"Router{i}" for i in range(1, count + 1)], keys // count, keys % count,
+                 np.arange(count), hosts, access)
+
+
+def barabasi_albert(count, attach, hosts=0, access='switch', rng=None):
+    """
+    A Barabási–Albert preferential-attachment graph of routers Router1..RouterN.
+    The first attach + 1 routers form a clique; every later one links to
+    `attach` distinct earlier routers chosen with probability proportional to
+    their degree.
+    :param rng: numpy.random.Generator or seed; defaults to one seeded from the random module.
+    """
+    if not 1 <= attach < count:
+        raise ValueError(f"attach must be between 1 and {count - 1}")
+    rng = _resolve_rng(rng)
+    seed_nodes = attach + 1
+    clique_src, clique_dst = np.triu_indices(seed_nodes, 1)
+    total = len(clique_src) + (count - seed_nodes) * attach
+    src = np.empty(total, np.int64)
+    dst = np.empty(total, np.int64)
+    src[:len(clique_src)] = clique_src
+    dst[:len(clique_src)] = clique_dst
+    # Every link contributes both ends, so a uniform pick from `ends` is a degree-proportional pick of a node.
+    ends = np.empty(2 * total, np.int64)
+    ends[:len(clique_src)] = clique_src
+    ends[len(clique_src):2 * len(clique_src)] = clique_dst
+    filled = 2 * len(clique_src)
+    link = len(clique_src)
+    draws = rng.random(0)
+    cursor = 0
+    for node in range(seed_nodes, count):
+        targets = set()
+        while len(targets) < attach:
+            if cursor == len(draws):
+                draws = rng.random(65536)
+                cursor = 0
+            targets.add(int(ends[int(draws[cursor] * filled)]))
+            cursor += 1
+        for target in targets:
+            src[link] = node
+            dst[link] = target
+            ends[filled] = node
+            ends[filled + 1] = target
+            filled += 2
+            link += 1
+    return _spec([f"Router{i}" for i in range(1, count + 1)], src, dst, np.arange(count), hosts, access)
+
+
+def leaf_spine(spines, leaves, hosts=0, access='switch'):
+    """
+    A two-tier Clos: every leaf router Leaf1..LeafL links to every spine router
+    Spine1..SpineS.
+    :param hosts: Hosts per leaf.
+    """
+    names = [f"Spine{i}" for i in range(1, spines + 1)] + [f"Leaf{i}" for i in range(1, leaves + 1)]
+    leaf_nodes = spines + np.arange(leaves)
+    return _spec(names, np.repeat(leaf_nodes, spines), np.tile(np.arange(spines), leaves), leaf_nodes, hosts,
+                 access)
+
+
+def fat_tree(k, hosts=None, access=None):
+    """
+    A k-ary fat tree: (k/2)^2 core routers and k pods of k/2 aggregation and
+    k/2 edge routers. Each aggregation router links to every edge router of
+    its pod and to k/2 core routers.
+    :param k: Even port count of every router.
+    :param hosts: Hosts per edge router; defaults to k/2, giving k^3/4 hosts.
+    :param access: Hosts attach to the edge routers directly by default.
+    """
+    if k < 2 or k % 2:
+        raise ValueError(f"Fat tree arity must be even and at least 2, not {k}")
+    half = k // 2
+    cores = half * half
+    names = [f"Core{i}" for i in range(1, cores + 1)]
+    names += [f"Agg{pod}-{i}" for pod in range(1, k + 1) for i in range(1, half + 1)]
+    names += [f"Edge{pod}-{i}" for pod in range(1, k + 1) for i in range(1, half + 1)]
+    aggregation = cores + np.arange(k * half).reshape(k, half)
+    edge = cores + k * half + np.arange(k * half).reshape(k, half)
+    # Core router j links to aggregation router j // (k/2) of every pod.
+    core = np.arange(cores)
+    core_src = np.tile(core, k)
+    core_dst = aggregation[:, core // half].ravel()
+    pod_src = np.repeat(aggregation, half, axis=1).ravel()
+    pod_dst = np.tile(edge, (1, half)).ravel()
+    return _spec(names, np.concatenate([core_src, pod_src]), np.concatenate([core_dst, pod_dst]), edge.ravel(),
+                 half if hosts is None else hosts, access)
+
+
+@contextlib.contextmanager
+def paused_collection():
+    """
+    Pause the cyclic garbage collector while creating many devices at once.
+    Such a build only allocates, and each collection would rescan the whole
+    growing object graph.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+GENERATORS = {
+    'ring': ring,
+    'grid': grid,
+    'random': random_graph,
+    'barabasi-albert': barabasi_albert,
+    'leaf-spine': leaf_spine,
+    'fat-tree': fat_tree,
+}
+
+
+class Topology:
+    """
+    The devices build_topology() made from a spec, in node order.
+    :param spec: The TopologySpec.
+    :param devices: One Router, Switch, Hub or EndDevice per node.
+    :param macs: int64 array, the MAC address of each node (hubs and routers included).
+    :param addresses: uint32 array, the IPv4 address of each host, 0 for other nodes.
+    """
+
+    def __init__(self, spec, devices, macs, addresses):
+        self.spec = spec
+        self.devices = devices
+        self.macs = macs
+        self.addresses = addresses
+        self.index = {name: i for i, name in enumerate(spec.names)}
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __getitem__(self, name):
+        return self.devices[self.index[name]]
+
+    def of_kind(self, kind):
+        return [self.devices[i] for i in np.flatnonzero(self.spec.kinds == kind).tolist()]
+
+    @property
+    def routers(self):
+        return self.of_kind(ROUTER)
+
+    @property
+    def switches(self):
+        return self.of_kind(SWITCH)
+
+    @property
+    def hubs(self):
+        return self.of_kind(HUB)
+
+    @property
+    def hosts(self):
+        return self.of_kind(HOST)
+
+    def counts(self):
+        """
+        :return: Dict of node counts per kind, plus the number of links.
+        """
+        counts = np.bincount(self.spec.kinds, minlength=len(KIND_NAMES))
+        summary = {name: int(count) for name, count in zip(('routers', 'switches', 'hubs', 'hosts'), counts)}
+        summary['links'] = len(self.spec.src)
+        return summary
+
+    def route_compiler(self, **options):
+        """
+        A RouteCompiler over the routers; call install() on it to fill their routing tables.
+        :param options: Passed to RouteCompiler.from_routers(), e.g. max_memory.
+        """
+        from netsim.routing import RouteCompiler
+
+        return RouteCompiler.from_routers(self.routers, **options)
+
+    def packet_model(self, delay=1e-3, bandwidth=1e9):
+        """
+        The topology as a netsim.parallel.PacketModel, each link in both directions.
+        """
+        from netsim.parallel import PacketModel
+
+        src, dst = self.spec.src, self.spec.dst
+        return PacketModel(len(self.devices), np.concatenate([src, dst]), np.concatenate([dst, src]), delay,
+                           bandwidth, names=self.spec.names)
+
+
+def build_topology(spec, link_network="10.0.0.0/9", lan_network="10.128.0.0/9", base_mac=0x020000000000,
+                   scheduler=None, switch_capacity=8192):
+    """
+    Instantiate the devices of a spec, address them and wire them up.
+    :param link_network: Prefix the router-router /31s are taken from.
+    :param lan_network: Prefix the LAN subnets are taken from.
+    :param base_mac: MAC address of node 0; node i gets base_mac + i.
+    :param scheduler: Scheduler of the hosts, switches and hubs.
+    :param switch_capacity: CAM table size of the switches.
+    :return: Topology.
+    :raise ValueError: If the spec has a link the devices cannot form, or the
+        addresses do not fit in the given prefixes.
+    """
+    with paused_collection():
+        return _build(spec, link_network, lan_network, base_mac, scheduler, switch_capacity)
+
+
+def _build(spec, link_network, lan_network, base_mac, scheduler, switch_capacity):
+    kinds = np.asarray(spec.kinds)
+    names = spec.names
+    n = len(kinds)
+    src = np.asarray(spec.src, np.int64)
+    dst = np.asarray(spec.dst, np.int64)
+    # Put the end with the lower kind code first: router before switch before hub before host.
+    swap = kinds[src] > kinds[dst]
+    upper = np.where(swap, dst, src)
+    lower = np.where(swap, src, dst)
+    upper_kind = kinds[upper]
+    lower_kind = kinds[lower]
+    invalid = ((upper_kind == SWITCH) & (lower_kind == SWITCH)) | ((upper_kind >= HUB) & (lower_kind >= HUB)
+                                                                   & ~((upper_kind == HUB) & (lower_kind == HOST)))
+    if invalid.any():
+        bad = int(np.flatnonzero(invalid)[0])
+        raise ValueError(f"Cannot link {KIND_NAMES[upper_kind[bad]]} {names[upper[bad]]} to "
+                         f"{KIND_NAMES[lower_kind[bad]]} {names[lower[bad]]}")
+
+    devices = [None] * n
+    for i in np.flatnonzero(kinds == ROUTER).tolist():
+        devices[i] = Router(names[i])
+    for i in np.flatnonzero(kinds == SWITCH).tolist():
+        devices[i] = Switch(names[i], capacity=switch_capacity, scheduler=scheduler)
+    for i in np.flatnonzero(kinds == HUB).tolist():
+        devices[i] = Hub(scheduler)
+    macs = base_mac + np.arange(n, dtype=np.int64)
+    for i in np.flatnonzero(kinds == HOST).tolist():
+        devices[i] = EndDevice(names[i], scheduler)
+    for i in np.flatnonzero((kinds == HOST) | (kinds == SWITCH)).tolist():
+        devices[i].set_mac_address(int_to_mac(int(macs[i])))
+
+    # Every host hangs off one LAN anchor: its switch, hub or router.
+    to_host = lower_kind == HOST
+    host_nodes = lower[to_host]
+    anchors = upper[to_host]
+    if len(np.unique(host_nodes)) != len(host_nodes):
+        raise ValueError("A host may only have one link")
+    routed = (upper_kind == ROUTER) & ((lower_kind == SWITCH) | (lower_kind == HUB))
+    lan_of = np.full(n, -1, np.int64)
+    lan_nodes = np.unique(np.concatenate([anchors, lower[routed]]))
+    lan_of[lan_nodes] = np.arange(len(lan_nodes))
+    members = np.bincount(lan_of[anchors], minlength=len(lan_nodes)) if len(lan_nodes) else np.zeros(0, np.int64)
+    # Network, gateway and broadcast addresses plus the hosts, rounded up to a power of two.
+    block = 1 << int(np.ceil(np.log2(int(members.max(initial=0)) + 3)))
+    lan_prefix = as_ipv4_prefix(lan_network)
+    if len(lan_nodes) * block > 1 << (32 - lan_prefix.prefix_len):
+        raise ValueError(f"{len(lan_nodes)} LANs of {block} addresses do not fit in {lan_prefix}")
+    lan_base = lan_prefix.value + np.arange(len(lan_nodes), dtype=np.int64) * block
+    lan_length = 32 - (block.bit_length() - 1)
+
+    addresses = np.zeros(n, np.uint32)
+    order = np.argsort(lan_of[anchors], kind='stable')
+    sorted_lans = lan_of[anchors][order]
+    starts = np.searchsorted(sorted_lans, sorted_lans)
+    rank = np.empty(len(order), np.int64)
+    rank[order] = np.arange(len(order)) - starts
+    addresses[host_nodes] = lan_base[lan_of[anchors]] + 2 + rank
+    cam_entries = collections.defaultdict(list)
+    for host, anchor, address in zip(host_nodes.tolist(), anchors.tolist(), addresses[host_nodes].tolist()):
+        device = devices[host]
+        device.ip_address = IPv4Address(address, lan_length)
+        attachment = devices[anchor]
+        if kinds[anchor] == SWITCH:
+            cam_entries[anchor].append((device.mac_address, attachment.attach(device)))
+        elif kinds[anchor] == HUB:
+            attachment.connect_device(device)
+    for switch, entries in cam_entries.items():
+        devices[switch].preload(entries)
+
+    # Routers: a gateway interface on each LAN they face, and a /31 per router-router link.
+    router_lans = np.flatnonzero((kinds == ROUTER) & (lan_of >= 0)).tolist()
+    for node in router_lans:
+        devices[node].add_interface("lan", int(lan_base[lan_of[node]]) + 1, lan_length)
+    for router, access in zip(upper[routed].tolist(), lower[routed].tolist()):
+        devices[router].add_interface(f"to-{names[access]}", int(lan_base[lan_of[access]]) + 1, lan_length)
+    for switch, hub in zip(upper[(upper_kind == SWITCH) & (lower_kind == HUB)].tolist(),
+                           lower[(upper_kind == SWITCH) & (lower_kind == HUB)].tolist()):
+        devices[switch].attach(devices[hub])
+
+    router_links = (upper_kind == ROUTER) & (lower_kind == ROUTER)
+    link_prefix = as_ipv4_prefix(link_network)
+    if 2 * int(router_links.sum()) > 1 << (32 - link_prefix.prefix_len):
+        raise ValueError(f"{int(router_links.sum())} router links do not fit in {link_prefix}")
+    address = link_prefix.value
+    for a, b in zip(upper[router_links].tolist(), lower[router_links].tolist()):
+        left, right = devices[a], devices[b]
+        left_interface, right_interface = f"to-{names[b]}", f"to-{names[a]}"
+        left.add_interface(left_interface, address, 31)
+        right.add_interface(right_interface, address + 1, 31)
+        left.add_neighbor(right, left_interface)
+        right.add_neighbor(left, right_interface)
+        address += 2
+    return Topology(spec, devices, macs, addresses)
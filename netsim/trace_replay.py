@@ -0,0 +1,343 @@
+"""
+Trace-driven traffic: streaming flow and packet traces into a simulation.
+
+A trace is a sequence of records (time, source, destination, packets, bytes,
+duration). A packet trace has one packet per record; a flow trace spreads a
+record's packets evenly over its duration. Traces are CSV files with a
+header row, or a compact binary format of fixed 28-byte records after an
+8-byte magic. Either way they are read `chunk_records` records at a time as
+NumPy structured arrays (TRACE_DTYPE), so reading a trace needs memory for
+one chunk whatever its length. csv_to_binary() converts a CSV trace once for
+fast repeated replays.
+
+Endpoints are IPv4 addresses; CSV traces may also name devices. EndpointMap
+puts each endpoint on a simulated device: the device with that address or
+name if there is one, otherwise a device picked by hashing the address. A
+production trace with many thousands of endpoints thus replays against a
+candidate topology with far fewer hosts, and a given endpoint always lands
+on the same host.
+
+TraceReplay injects the records with backpressure. Records are admitted in
+order by one chained event at each record's start time, and each active
+flow keeps one event pending for its next packet, so the scheduler holds one
+event per active flow plus one. When max_flows flows are active, or the
+scheduler already holds max_pending events, admission waits instead of
+adding more work, and the wait is reported as lag.
+"""
+import csv
+import functools
+import hashlib
+import itertools
+import os
+
+import numpy as np
+
+from netsim.error_control import ErrorControlProtocol
+from netsim.ipv4 import as_ipv4, int_to_ip, ip_to_int
+from netsim.scheduler import get_default_scheduler
+
+TRACE_DTYPE = np.dtype([('time', '<f8'), ('source', '<u4'), ('destination', '<u4'), ('packets', '<u4'),
+                        ('bytes', '<u4'), ('duration', '<f4')])
+TRACE_MAGIC = b'NSTRACE\x01'
+TRACE_COLUMNS = ('time', 'source', 'destination', 'packets', 'bytes', 'duration')
+DEFAULT_PACKET_SIZE = 64
+
+
+def endpoint_address(endpoint):
+    """
+    Return the 32-bit address of a trace endpoint: an int, a dotted quad, or a
+    device name. Names map to stable addresses in 240.0.0.0/4, which real
+    traces do not use.
+    """
+    if isinstance(endpoint, (int, np.integer)):
+        return int(endpoint)
+    endpoint = endpoint.strip()
+    if endpoint.isdigit():
+        return int(endpoint)
+    try:
+        return ip_to_int(endpoint)
+    except ValueError:
+        digest = hashlib.blake2b(endpoint.encode('utf-8'), digest_size=4).digest()
+        return 0xF0000000 | int.from_bytes(digest, 'big') & 0x0FFFFFFF
+
+
+def _read_csv(path, chunk_records):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, ())]
+        missing = [name for name in TRACE_COLUMNS[:3] if name not in header]
+        if missing:
+            raise ValueError(f"{path} has no {', '.join(missing)} column; the header must name "
+                             f"time, source and destination, and optionally packets, bytes (or size) and duration")
+        columns = {name: index for index, name in enumerate(header)}
+        if 'bytes' not in columns and 'size' in columns:
+            columns['bytes'] = columns['size']
+        while True:
+            rows = list(itertools.islice(reader, chunk_records))
+            if not rows:
+                return
+            chunk = np.zeros(len(rows), TRACE_DTYPE)
+            for name, convert in (('time', float), ('source', endpoint_address), ('destination', endpoint_address),
+                                  ('packets', int), ('bytes', int), ('duration', float)):
+                column = columns.get(name)
+                if column is not None:
+                    chunk[name] = [convert(row[column]) for row in rows]
+            if 'packets' not in columns:
+                chunk['packets'] = 1
+            if 'bytes' not in columns:
+                chunk['bytes'] = chunk['packets'] * DEFAULT_PACKET_SIZE
+            yield chunk
+
+
+def _read_binary(path, chunk_records):
+    size = TRACE_DTYPE.itemsize
+    with open(path, 'rb') as f:
+        f.read(len(TRACE_MAGIC))
+        while True:
+            data = f.read(chunk_records * size)
+            if len(data) % size:
+                raise ValueError(f"{path} ends inside a record")
+            if not data:
+                return
+            yield np.frombuffer(data, TRACE_DTYPE)
+
+
+def read_trace(path, chunk_records=65536):
+    """
+    Lazily read a trace file, binary or CSV (told apart by the binary magic).
+    :param chunk_records: Records per chunk.
+    :return: Iterator of TRACE_DTYPE arrays.
+    :raise ValueError: If a CSV trace lacks a required column.
+    """
+    with open(path, 'rb') as f:
+        binary = f.read(len(TRACE_MAGIC)) == TRACE_MAGIC
+    return _read_binary(path, chunk_records) if binary else _read_csv(path, chunk_records)
+
+
+def write_trace(path, chunks):
+    """
+    Write TRACE_DTYPE chunks as a trace: CSV if path ends in .csv, binary otherwise.
+    :return: The number of records written.
+    """
+    records = 0
+    if os.fspath(path).endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(TRACE_COLUMNS)
+            for chunk in chunks:
+                writer.writerows(zip(chunk['time'].tolist(), map(int_to_ip, chunk['source'].tolist()),
+                                     map(int_to_ip, chunk['destination'].tolist()), chunk['packets'].tolist(),
+                                     chunk['bytes'].tolist(), chunk['duration'].tolist()))
+                records += len(chunk)
+        return records
+    with open(path, 'wb', buffering=1 << 20) as f:
+        f.write(TRACE_MAGIC)
+        for chunk in chunks:
+            f.write(np.ascontiguousarray(chunk, TRACE_DTYPE).tobytes())
+            records += len(chunk)
+    return records
+
+
+def csv_to_binary(csv_path, binary_path, chunk_records=65536):
+    """
+    Convert a CSV trace to the binary format, streaming.
+    :return: The number of records written.
+    """
+    return write_trace(binary_path, _read_csv(csv_path, chunk_records))
+
+
+@functools.lru_cache(maxsize=4096)
+def _payload(size):
+    payload = bytes(size)
+    return payload, ErrorControlProtocol.checksum(payload)
+
+
+def _label(device):
+    return getattr(device, 'device_id', None) or device.name
+
+
+class EndpointMap:
+    """
+    Places trace endpoints on simulated devices and sends packets between them.
+    :param devices: Devices that can be endpoints: EndDevices, Devices, or
+        anything with a device_id or name.
+    :param hubs: Optional dict of device label -> Hub the device sits on.
+    :raise ValueError: If there are no devices.
+    """
+
+    def __init__(self, devices, hubs=None):
+        self.devices = list(devices)
+        if not self.devices:
+            raise ValueError("An endpoint map needs at least one device")
+        hubs = hubs or {}
+        self.hubs = [hubs.get(_label(device)) for device in self.devices]
+        keys, indices = [], []
+        for index, device in enumerate(self.devices):
+            address = getattr(device, 'ip_address', None)
+            if address is not None:
+                keys.append(as_ipv4(address).value)
+                indices.append(index)
+            keys.append(endpoint_address(_label(device)))
+            indices.append(index)
+        keys = np.array(keys, np.uint32)
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._indices = np.array(indices, np.int64)[order]
+
+    @classmethod
+    def from_topology(cls, topology):
+        """
+        Map endpoints onto a built Topology's hosts.
+        """
+        hubs = {device.device_id: hub for hub in topology.hubs for device in hub.connected_devices}
+        return cls(topology.hosts, hubs)
+
+    def map(self, addresses):
+        """
+        Return the device index of each endpoint address.
+        Unknown addresses are spread over the devices by a multiplicative hash.
+        """
+        addresses = np.asarray(addresses, np.uint32)
+        position = np.minimum(np.searchsorted(self._keys, addresses), len(self._keys) - 1)
+        hashed = ((addresses.astype(np.uint64) * 2654435761) & 0xFFFFFFFF) * len(self.devices) >> 32
+        return np.where(self._keys[position] == addresses, self._indices[position], hashed.astype(np.int64))
+
+    def send(self, source, destination, size):
+        """
+        Put a zero-filled packet of `size` bytes from device index source on the
+        medium towards device index destination: the source's hub or connection,
+        or straight to the destination if the source is not attached to anything.
+        """
+        payload, checksum = _payload(size)
+        sender = self.devices[source]
+        receiver = self.devices[destination]
+        hub = self.hubs[source]
+        if hub is not None:
+            hub.broadcast(payload, _label(sender), checksum)
+            return
+        connection = getattr(sender, 'connection', None)
+        if connection is not None:
+            address = getattr(receiver, 'mac_address', None) or _label(receiver)
+            connection.send(payload, address, checksum, _label(sender))
+        elif hasattr(receiver, 'receive_data'):
+            receiver.receive_data(payload, checksum, _label(sender), True)
+
+
+class _Flow:
+    __slots__ = ('source', 'destination', 'remaining', 'interval', 'size')
+
+    def __init__(self, source, destination, remaining, interval, size):
+        self.source = source
+        self.destination = destination
+        self.remaining = remaining
+        self.interval = interval
+        self.size = size
+
+
+class TraceReplay:
+    """
+    Replays a trace through an EndpointMap on the event scheduler.
+    :param trace: Path of a trace file, or an iterable of TRACE_DTYPE chunks.
+    :param endpoints: EndpointMap (or a Topology, mapped onto its hosts).
+    :param scheduler: Scheduler to inject on; defaults to the default scheduler.
+    :param start: Virtual time of the first record; defaults to now.
+    :param speed: Trace seconds per virtual second.
+    :param max_flows: Most flows in progress at once; further records wait.
+    :param max_pending: Hold records back while the scheduler has this many
+        pending events (None: no limit).
+    :param retry_delay: Virtual seconds a held-back record waits before retrying.
+    :param chunk_records: Records per chunk when trace is a path.
+    """
+
+    def __init__(self, trace, endpoints, scheduler=None, start=None, speed=1.0, max_flows=65536, max_pending=None,
+                 retry_delay=1e-3, chunk_records=65536):
+        if not isinstance(endpoints, EndpointMap):
+            endpoints = EndpointMap.from_topology(endpoints)
+        self.endpoints = endpoints
+        self.scheduler = scheduler or get_default_scheduler()
+        self.start_time = self.scheduler.now if start is None else start
+        self.speed = speed
+        self.max_flows = max_flows
+        self.max_pending = max_pending
+        self.retry_delay = retry_delay
+        self._chunks = iter(read_trace(trace, chunk_records) if isinstance(trace, (str, os.PathLike)) else trace)
+        self._records = iter(())
+        self._origin = None
+        self.records = 0
+        self.packets = 0
+        self.bytes = 0
+        self.active = 0
+        self.deferrals = 0
+        self.max_lag = 0.0
+
+    def start(self):
+        """
+        Schedule the first record.
+        :return: self.
+        """
+        self._schedule_next()
+        return self
+
+    def _next_record(self):
+        record = next(self._records, None)
+        while record is None:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return None
+            if not len(chunk):
+                continue
+            if self._origin is None:
+                self._origin = float(chunk['time'][0])
+            endpoints = self.endpoints
+            times = (self.start_time + (chunk['time'] - self._origin) / self.speed).tolist()
+            self._records = zip(times, endpoints.map(chunk['source']).tolist(),
+                                endpoints.map(chunk['destination']).tolist(), chunk['packets'].tolist(),
+                                chunk['bytes'].tolist(), (chunk['duration'] / self.speed).tolist())
+            record = next(self._records, None)
+        return record
+
+    def _schedule_next(self):
+        record = self._next_record()
+        if record is not None:
+            scheduler = self.scheduler
+            scheduler.schedule_at(max(record[0], scheduler.now), self._admit, record)
+
+    def _admit(self, record):
+        scheduler = self.scheduler
+        if self.active >= self.max_flows or (self.max_pending is not None
+                                             and scheduler.pending() >= self.max_pending):
+            self.deferrals += 1
+            scheduler.schedule(self.retry_delay, self._admit, record)
+            return
+        time, source, destination, packets, size, duration = record
+        self.max_lag = max(self.max_lag, scheduler.now - time)
+        self.records += 1
+        if packets == 1:
+            self.packets += 1
+            self.bytes += size
+            self.endpoints.send(source, destination, size)
+        elif packets > 1:
+            # The first packet carries the remainder of an uneven split.
+            base = size // packets
+            self.active += 1
+            self.bytes += size - base * packets
+            self._send_flow(_Flow(source, destination, packets, duration / packets, base), size - base * packets)
+        self._schedule_next()
+
+    def _send_flow(self, flow, extra=0):
+        self.packets += 1
+        self.bytes += flow.size
+        self.endpoints.send(flow.source, flow.destination, flow.size + extra)
+        flow.remaining -= 1
+        if flow.remaining:
+            self.scheduler.schedule(flow.interval, self._send_flow, flow)
+        else:
+            self.active -= 1
+
+
+def replay_trace(trace, endpoints, scheduler=None, **options):
+    """
+    Start replaying a trace; see TraceReplay. Call scheduler.run() to play it.
+    :return: The started TraceReplay.
+    """
+    return TraceReplay(trace, endpoints, scheduler, **options).start()
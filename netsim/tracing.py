@@ -0,0 +1,326 @@
+"""
+Event tracing for the simulator's hot paths.
+
+Instrumented code does
+
+    tracer = get_tracer()
+    if tracer.enabled:
+        tracer.emit(EventKind.RECEIVE, node, peer=..., data=...)
+
+so with the default NullSink a traced call costs one function call and an
+attribute check, and nothing is ever formatted. Sinks receive TraceEvent
+records holding the raw objects; only sinks that produce text (console,
+JSONL) format them, and they do it in the sink rather than at the call site.
+"""
+import collections
+import enum
+import json
+import struct
+
+from netsim.scheduler import get_default_scheduler
+
+
+class EventKind(enum.IntEnum):
+    # Flow control
+    SEND = 1
+    ACK = 2
+    ACK_LOST = 3
+    TIMEOUT = 4
+    TRANSFER_COMPLETE = 5
+    PACKET_LOST = 6
+    # Medium access
+    BACKOFF = 10
+    ACCESS_FAILED = 11
+    # Physical layer delivery
+    RECEIVE = 20
+    CORRUPT = 21
+    COLLISION = 22
+    COLLISION_DROP = 23
+    # Data link forwarding
+    SWITCH_FORWARD = 30
+    SWITCH_FLOOD = 31
+    SWITCH_FLOOD_PORT = 32
+    SWITCH_UNKNOWN = 33
+    SWITCH_LEARN = 34
+    # Network layer forwarding
+    ROUTE_FORWARD = 40
+    ROUTE_MISS = 41
+    PACKET_LOCAL = 42
+    PACKET_NOT_LOCAL = 43
+    # Routing protocols
+    LSA_INSTALL = 50
+    SPF_RUN = 51
+
+
+TraceEvent = collections.namedtuple('TraceEvent', 'time kind node peer port seq value data')
+TraceEvent.__doc__ = """
+One traced event.
+:param time: Virtual time of the event.
+:param kind: EventKind.
+:param node: ID of the device the event happened on.
+:param peer: The other end (sender, next hop, destination MAC), or None.
+:param port: Port number or interface name, or None.
+:param seq: Sequence number (packet index, attempt count), or -1.
+:param value: Numeric detail such as a backoff time, or 0.0.
+:param data: Payload or destination the event concerns, or None.
+"""
+
+_MESSAGES = {
+    EventKind.SEND: "Sending packet {seq}: {data}",
+    EventKind.ACK: "Acknowledgment received for packet {seq}: {data}",
+    EventKind.ACK_LOST: "Acknowledgment not received for packet {seq}: {data}",
+    EventKind.TIMEOUT: "Timeout occurred, resending from packet {seq}: {data}",
+    EventKind.TRANSFER_COMPLETE: "All packets transmitted successfully",
+    EventKind.PACKET_LOST: "Packet {seq} lost: {data}",
+    EventKind.BACKOFF: "Medium is busy, waiting for {value:.2f} seconds...",
+    EventKind.ACCESS_FAILED: "Exceeded maximum backoff attempts. Channel still busy.",
+    EventKind.RECEIVE: "Device {node} received data from {peer}: {data}",
+    EventKind.CORRUPT: "Error: Data received by {node} from {peer} contains errors",
+    EventKind.COLLISION: "Collision on the frame from {node} (attempt {seq}), backing off {value:.6f} seconds",
+    EventKind.COLLISION_DROP: "Frame from {node} dropped after {seq} collisions",
+    EventKind.SWITCH_FORWARD: "Forwarding data to port {port}: {data}",
+    EventKind.SWITCH_FLOOD: "Broadcasting data to all ports: {data}",
+    EventKind.SWITCH_FLOOD_PORT: "Forwarding to port {port}: {data}",
+    EventKind.SWITCH_UNKNOWN: "MAC address {peer} not found in the {node} table.",
+    EventKind.SWITCH_LEARN: "{node} learned MAC address {peer} on port {port}",
+    EventKind.ROUTE_FORWARD: "Forwarding packet to {data} via {peer} on interface {port}",
+    EventKind.ROUTE_MISS: "No route found for destination {data}",
+    EventKind.PACKET_LOCAL: "Packet for {data} received by router {node}",
+    EventKind.PACKET_NOT_LOCAL: "Packet received by router {node} is not for any of its interfaces",
+    EventKind.LSA_INSTALL: "Router {node} installed LSA {seq} from {data} (received from {peer})",
+    EventKind.SPF_RUN: "Router {node} ran SPF over {value:.0f} routers",
+}
+
+
+def format_event(event):
+    """
+    Render an event as the human-readable line the simulator used to print.
+    """
+    return _MESSAGES[event.kind].format(**event._asdict())
+
+
+class NullSink:
+    """
+    Discards everything. Tracers with this sink report enabled = False.
+    """
+    enabled = False
+
+    def write(self, event):
+        pass
+
+    def close(self):
+        pass
+
+
+class ConsoleSink:
+    """
+    Prints each event as a formatted line, for demos and debugging.
+    """
+    enabled = True
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, event):
+        print(format_event(event), file=self.stream)
+
+    def close(self):
+        pass
+
+
+class RingBufferSink:
+    """
+    Keeps the last `capacity` events in memory.
+    """
+    enabled = True
+
+    def __init__(self, capacity=65536):
+        self.events = collections.deque(maxlen=capacity)
+        self.write = self.events.append
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def close(self):
+        pass
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+class JsonlFileSink:
+    """
+    Appends events to a JSON Lines file. Events are buffered in memory and
+    written `buffer_events` at a time, so there is no per-event write call.
+    """
+    enabled = True
+
+    def __init__(self, path, buffer_events=8192):
+        self._file = open(path, 'w', encoding='utf-8')
+        self._buffer = []
+        self._buffer_events = buffer_events
+
+    def write(self, event):
+        self._buffer.append(event)
+        if len(self._buffer) >= self._buffer_events:
+            self.flush()
+
+    def flush(self):
+        lines = []
+        for event in self._buffer:
+            record = {field: _jsonable(value) for field, value in zip(TraceEvent._fields, event)}
+            record['kind'] = EventKind(event.kind).name
+            lines.append(json.dumps(record, separators=(',', ':')))
+        if lines:
+            self._file.write('\n'.join(lines) + '\n')
+        self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+# Binary trace layout: a stream of tagged records.
+#   'S' string:  uint32 id, uint32 length, utf-8 bytes  (defines an interned string)
+#   'E' event:   float64 time, uint8 kind, int32 node, int32 peer, int32 port,
+#                int64 seq, float64 value, int32 data, then `data`-length payload
+#                bytes if data == -2 (raw payload) or nothing otherwise.
+# Node/peer/port/data fields hold an interned string id, or -1 for None.
+_STRING = struct.Struct('<cII')
+_EVENT = struct.Struct('<cdBiiiqdi')
+_PAYLOAD_LENGTH = struct.Struct('<I')
+_RAW_PAYLOAD = -2
+
+
+class BinaryFileSink:
+    """
+    Compact binary trace file; read it back with read_binary_trace().
+    Device IDs and other repeated strings are interned, payloads are stored
+    as raw bytes, and output goes through a large write buffer.
+    """
+    enabled = True
+
+    def __init__(self, path, buffer_size=1 << 20):
+        self._file = open(path, 'wb', buffering=buffer_size)
+        self._strings = {None: -1}
+
+    def _intern(self, value):
+        key = value if isinstance(value, str) else (None if value is None else str(value))
+        string_id = self._strings.get(key)
+        if string_id is None:
+            string_id = self._strings[key] = len(self._strings) - 1
+            encoded = key.encode('utf-8')
+            self._file.write(_STRING.pack(b'S', string_id, len(encoded)))
+            self._file.write(encoded)
+        return string_id
+
+    def write(self, event):
+        data = event.data
+        if isinstance(data, (str, bytes, bytearray, memoryview)):
+            payload = data.encode('utf-8') if isinstance(data, str) else bytes(data)
+            data_id = _RAW_PAYLOAD
+        else:
+            payload = None
+            data_id = self._intern(data)
+        self._file.write(_EVENT.pack(b'E', event.time, event.kind, self._intern(event.node),
+                                     self._intern(event.peer), self._intern(event.port),
+                                     event.seq, event.value, data_id))
+        if payload is not None:
+            self._file.write(_PAYLOAD_LENGTH.pack(len(payload)))
+            self._file.write(payload)
+
+    def close(self):
+        self._file.close()
+
+
+def read_binary_trace(path):
+    """
+    Yield the TraceEvents stored in a BinaryFileSink file.
+    Interned fields come back as strings and payloads as bytes.
+    """
+    strings = {-1: None}
+    with open(path, 'rb') as f:
+        while True:
+            tag = f.read(1)
+            if not tag:
+                return
+            if tag == b'S':
+                string_id, length = struct.unpack('<II', f.read(8))
+                strings[string_id] = f.read(length).decode('utf-8')
+                continue
+            fields = _EVENT.unpack(tag + f.read(_EVENT.size - 1))
+            _, time, kind, node, peer, port, seq, value, data_id = fields
+            if data_id == _RAW_PAYLOAD:
+                (length,) = _PAYLOAD_LENGTH.unpack(f.read(_PAYLOAD_LENGTH.size))
+                data = f.read(length)
+            else:
+                data = strings[data_id]
+            yield TraceEvent(time, EventKind(kind), strings[node], strings[peer], strings[port], seq, value, data)
+
+
+class Tracer:
+    """
+    Stamps events with the virtual time and hands them to a sink.
+    :param sink: One of the sinks above (anything with write/close and an enabled flag).
+    :param clock: Object with a `now` attribute, normally the EventScheduler.
+    """
+
+    def __init__(self, sink=None, clock=None):
+        self.sink = NullSink() if sink is None else sink
+        self.enabled = self.sink.enabled
+        self.clock = clock
+
+    def emit(self, kind, node, peer=None, port=None, seq=-1, value=0.0, data=None):
+        time = (self.clock or get_default_scheduler()).now
+        self.sink.write(TraceEvent(time, kind, node, peer, port, seq, value, data))
+
+    def close(self):
+        self.sink.close()
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    """
+    Return the tracer instrumented code reports to.
+    """
+    return _tracer
+
+
+def set_tracer(tracer):
+    """
+    Install a tracer and return the previous one.
+    """
+    global _tracer
+    previous = _tracer
+    _tracer = tracer
+    return previous
+
+
+def open_sink(spec):
+    """
+    Build a sink from a command line style spec:
+    'null', 'console', 'ring[:capacity]', 'jsonl:path' or 'binary:path'.
+    """
+    name, _, argument = spec.partition(':')
+    if name == 'null':
+        return NullSink()
+    if name == 'console':
+        return ConsoleSink()
+    if name == 'ring':
+        return RingBufferSink(int(argument)) if argument else RingBufferSink()
+    if name == 'jsonl' and argument:
+        return JsonlFileSink(argument)
+    if name == 'binary' and argument:
+        return BinaryFileSink(argument)
+    raise ValueError(f"Unknown trace sink {spec!r}; use null, console, ring[:N], jsonl:PATH or binary:PATH")
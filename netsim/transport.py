@@ -0,0 +1,216 @@
+import os
+from netsim.congestion import TCPFlows
+from netsim.flow_control import FlowControlProtocol
+from netsim.frames import PROTOCOL_TCP
+from netsim.ftp_service import FTPClient, FTPSessionPool, LocalFTPServer
+from netsim.http_service import AsyncHTTPClient, HTTPConnectionPool, LocalHTTPServer
+from netsim.ports import ConnectionTable, PortManager
+
+class TCPSimulator:
+    def __init__(self, time_wait=60.0, scheduler=None):
+        self.port_map = {}
+        self.ports = PortManager(time_wait=time_wait, scheduler=scheduler)
+        self.connections = ConnectionTable()
+        self.processes = {}
+        self.flows = None
+        self.http_pool = HTTPConnectionPool()
+        self.ftp_pool = FTPSessionPool()
+
+    # Transport Layer: Port Management
+    def assign_port(self, process_id, port=None, well_known=False):
+        """
+        Give a process a port: the one asked for, or the lowest free one of the
+        ephemeral (or, for services, well-known) pool. A process keeps its port
+        until release_port().
+        """
+        if process_id in self.processes:
+            return self.port_map[process_id]
+        port = self.ports.bind(port) if port is not None else self.ports.allocate(well_known)
+        self.port_map[process_id] = port
+        self.processes[process_id] = {
+            "port": port,
+            "data_buffer": [],
+            "ack_buffer": [],
+            "connections": [],
+            "listening": [],
+            "bound": []  # further ports bound by listen()
+        }
+        return port
+
+    def release_port(self, process_id, time_wait=True):
+        """
+        Close a process's connections and return its port, through TIME_WAIT by default.
+        """
+        process = self.processes.pop(process_id)
+        del self.port_map[process_id]
+        # Ports first: nothing after this can leave them allocated.
+        self.ports.release(process["port"], time_wait)
+        for port in process["bound"]:
+            self.ports.release(port, time_wait)
+        for key in process["connections"]:
+            self.connections.discard(key)
+        for local_ip, port, protocol in process["listening"]:
+            self.connections.unlisten(port, local_ip, protocol)
+
+    def connect(self, process_id, local_ip, remote_ip, remote_port, protocol=PROTOCOL_TCP):
+        """
+        Register a connection from a process's port to remote_ip:remote_port, so
+        segments for it demultiplex to the process.
+        """
+        local_port = self.assign_port(process_id)
+        key = self.connections.add(local_ip, local_port, remote_ip, remote_port, process_id, protocol)
+        self.processes[process_id]["connections"].append(key)
+        return key
+
+    def listen(self, process_id, port, local_ip=0, protocol=PROTOCOL_TCP):
+        """
+        Bind a process to a port and accept segments for it from any peer.
+        A process that already has a different port binds this one as well.
+        Listening again on the same address, port and protocol does nothing.
+        :raise ValueError: If the port is held by another process or in TIME_WAIT.
+        """
+        if self.assign_port(process_id, port) != port:
+            process = self.processes[process_id]
+            if port not in process["bound"]:
+                self.ports.bind(port)
+                process["bound"].append(port)
+        listening = self.processes[process_id]["listening"]
+        if (local_ip, port, protocol) not in listening:
+            self.connections.listen(port, process_id, local_ip, protocol)
+            listening.append((local_ip, port, protocol))
+
+    def demultiplex(self, source_ip, source_port, destination_ip, destination_port, protocol=PROTOCOL_TCP):
+        """
+        Return the process an incoming segment is for, or None.
+        """
+        return self.connections.demultiplex(source_ip, source_port, destination_ip, destination_port, protocol)
+
+    # Transport Layer: Sending Data
+    def send_data(self, process_id, data):
+        if process_id not in self.processes:
+            raise RuntimeError("Process not registered")
+        FlowControlProtocol.sliding_window(5, data)
+        # For simplicity, we'll just assume data is delivered successfully
+        self.processes[process_id]["data_buffer"].append(data)
+
+    # Transport Layer: Congestion Control
+    def open_flows(self, process_id, link, count=1, **options):
+        """
+        Open count TCP connections for a process over a shared bottleneck. Every
+        process's connections share one TCPFlows table, so they compete for link.
+        :param link: BottleneckLink the connections run over.
+        :param options: Passed to TCPFlows.add_flows(): base_rtt, size, controller, start.
+        :return: Array of the new flows' indices into self.flows.
+        """
+        self.assign_port(process_id)
+        if self.flows is None:
+            self.flows = TCPFlows(link)
+        elif self.flows.link is not link:
+            raise ValueError("All flows of a TCPSimulator share one bottleneck link")
+        index = self.flows.add_flows(count, **options)
+        self.processes[process_id].setdefault("flows", []).extend(index.tolist())
+        return index
+
+    # Application Layer: HTTP Service
+    def http_client_service(self, host, port, path):
+        """
+        GET path from host:port over a pooled keep-alive connection.
+        :return: The decoded body, or the error message if the request failed.
+        """
+        try:
+            return self.http_pool.get(host, port, path).body.decode('utf-8')
+        except Exception as e:
+            return str(e)
+
+    def http_concurrent_service(self, host, port, paths, connections=100):
+        """
+        GET every path from host:port concurrently, with up to `connections` connections.
+        :return: (list of HTTPResponse or exception per path, HTTPStats).
+        """
+        return AsyncHTTPClient.fetch_all([(host, port, path) for path in paths], connections)
+
+    # Application Layer: FTP Service
+    def ftp_service(self, host, username, password, command, filepath=None, port=21, progress=None):
+        """
+        Run an FTP command over a pooled, logged-in session.
+        :param command: "list", "download" (remote filepath to the same local path)
+            or "upload" (local filepath to the same remote path). Transfers stream
+            and resume a partial copy.
+        :return: A description of the result, or the error message if it failed.
+        """
+        client = FTPClient(host, username, password, port, self.ftp_pool)
+        try:
+            if command == "list":
+                return "\n".join(client.list())
+            if command == "download" and filepath:
+                transfer = client.download(filepath, filepath, progress=progress)
+                return f"Downloaded {filepath} ({transfer.bytes} bytes, resumed at {transfer.resumed_from})"
+            if command == "upload" and filepath:
+                transfer = client.upload(filepath, filepath, progress=progress)
+                return f"Uploaded {filepath} ({transfer.bytes} bytes, resumed at {transfer.resumed_from})"
+            return ""
+        except Exception as e:
+            return str(e)
+
+    def ftp_transfer_many(self, host, username, password, transfers, port=21, workers=4):
+        """
+        Run several FTP transfers concurrently; see FTPClient.transfer_many().
+        """
+        return FTPClient(host, username, password, port, self.ftp_pool).transfer_many(transfers, workers)
+
+
+    # Testing the protocol stack
+    def test_protocol_stack(self):
+        # Demonstrate working of the entire protocol stack
+        process_id_1 = "process_1"
+        process_id_2 = "process_2"
+
+        port_1 = self.assign_port(process_id_1)
+        port_2 = self.assign_port(process_id_2)
+
+        print(f"Assigned port {port_1} to {process_id_1}")
+        print(f"Assigned port {port_2} to {process_id_2}")
+
+        data = "Hello, this is a test message for the Transport Layer protocol."
+        print("Sending data from process_1 to process_2...")
+        self.send_data(process_id_1, data)
+
+        with LocalHTTPServer() as server:
+            path = "/todos/1"
+            print(f"Sending HTTP GET request to {server.host}:{server.port}{path}...")
+            response = self.http_client_service(server.host, server.port, path)
+            print(f"Received HTTP response:\n{response}")
+
+            paths = [f"/todos/{i}" for i in range(1, 201)]
+            print(f"Sending {len(paths)} concurrent HTTP GET requests...")
+            responses, stats = self.http_concurrent_service(server.host, server.port, paths)
+            summary = stats.summary()
+            print(f"{summary['requests']} responses, {summary['errors']} errors over "
+                  f"{summary['connections_opened']} connections: {summary['requests_per_second']:.0f} requests/s, "
+                  f"p50 {summary.get('latency_p50', 0.0) * 1e3:.2f} ms, p99 {summary.get('latency_p99', 0.0) * 1e3:.2f} ms")
+            self.http_pool.close()
+
+        # FTP service test
+        print("Testing FTP service...")
+        ftp_username = "netsim"
+        ftp_password = "netsim"
+        with LocalFTPServer(credentials={ftp_username: ftp_password}) as server:
+            for i in range(4):
+                with open(os.path.join(server.root, f"file{i}.txt"), "w") as file:
+                    file.write(f"Sample file {i} for transfer.\n" * 1000)
+            ftp_response = self.ftp_service(server.host, ftp_username, ftp_password, "list", port=server.port)
+            print(f"FTP service response:\n{ftp_response}")
+            local = os.path.join(server.root, "downloads")
+            os.mkdir(local)
+            transfers = [("download", f"file{i}.txt", os.path.join(local, f"file{i}.txt")) for i in range(4)]
+            for transfer in self.ftp_transfer_many(server.host, ftp_username, ftp_password, transfers, server.port):
+                if isinstance(transfer, Exception):
+                    print(f"FTP transfer failed: {transfer}")
+                else:
+                    print(f"Downloaded {transfer.remote_path}: {transfer.bytes} bytes in {transfer.elapsed * 1e3:.1f} ms")
+            self.ftp_pool.close()
+
+        # file_data = "Sample file data for transfer."
+        # print("Testing file transfer service...")
+        # file_transfer_response = self.file_transfer_service(process_id_1, file_data)
+        # print(f"File transfer service response: {file_transfer_response}")
@@ -0,0 +1,429 @@
+"""
+Simulated application-layer load: HTTP-like clients and servers on the
+event scheduler.
+
+Clients and servers are generator coroutines driven by the virtual clock. A
+coroutine yields a delay in seconds to sleep, or a Completion to wait for.
+Each coroutine costs a suspended generator and one heap entry while it waits,
+so tens of thousands of clients run in one process.
+
+Every client is a TCPSimulator process with its own ephemeral port and a
+keep-alive connection to its server. Every server is a listening process.
+Requests reach a server through TCPSimulator.demultiplex(). A request takes:
+
+- a handshake round trip, on the client's first request only;
+- half an RTT plus the request's serialization time to reach the server;
+- time queued for one of the server's workers, plus an exponential service time;
+- half an RTT plus the response's serialization time to get back.
+
+Arrival processes are Poisson, on/off (Poisson bursts during exponential on
+periods) and closed loop (the next request follows the previous response
+after a think time). Latencies go into a LatencyHistogram with HDR-style
+log-linear buckets.
+"""
+import collections
+import math
+import random
+
+import numpy as np
+
+from netsim.ipv4 import int_to_ip, ip_to_int
+from netsim.scheduler import get_default_scheduler
+from netsim.transport import TCPSimulator
+
+POISSON = 'poisson'
+ON_OFF = 'on-off'
+CLOSED_LOOP = 'closed-loop'
+ARRIVAL_PROCESSES = (POISSON, ON_OFF, CLOSED_LOOP)
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram: exact below 2 * 10^significant_digits units, and
+    above that, buckets whose width doubles with every power of two. That
+    keeps `significant_digits` decimal digits of precision over the whole
+    range at a fixed size of a few tens of thousands of counters.
+    :param resolution: Smallest distinguishable value (1 µs by default).
+    :param highest: Largest trackable value; larger values are clamped to it.
+    """
+
+    def __init__(self, resolution=1e-6, highest=3600.0, significant_digits=3):
+        self.resolution = resolution
+        self.highest = highest
+        self.significant_digits = significant_digits
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._half = 1 << (self._sub_bits - 1)
+        self._highest_units = max(int(highest / resolution), 1)
+        self.counts = np.zeros(self._index(np.array([self._highest_units]))[0] + 1, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, units):
+        shift = np.maximum(np.frexp(units.astype(np.float64))[1] - self._sub_bits, 0)
+        return np.where(shift > 0, (shift + 1) * self._half + (units >> shift) - self._half, units)
+
+    def _value(self, index):
+        shift = np.maximum(index // self._half - 1, 0)
+        return ((index - shift * self._half) << shift) * self.resolution
+
+    def record(self, value):
+        self.record_many(np.array([value]))
+
+    def record_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        units = np.clip(np.rint(values / self.resolution), 0, self._highest_units).astype(np.int64)
+        self.counts += np.bincount(self._index(units), minlength=len(self.counts))
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """
+        Add another histogram with the same parameters into this one.
+        """
+        if len(other.counts) != len(self.counts) or other.resolution != self.resolution:
+            raise ValueError("Can only merge histograms with the same resolution and range")
+        self.counts += other.counts
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """
+        Return the value at or below which q percent of the recorded values lie,
+        to the histogram's precision.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(q / 100 * self.count), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return float(min(self._value(np.int64(index)), self.max))
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        """
+        :return: Dict with count, mean, min, max and the given percentiles (keys like 'p99').
+        """
+        summary = {'count': self.count, 'mean': self.mean, 'min': self.min if self.count else 0.0, 'max': self.max}
+        for q in percentiles:
+            summary[f'p{q:g}'] = self.percentile(q)
+        return summary
+
+
+class Completion:
+    """
+    A value a coroutine can wait for by yielding it.
+    """
+    __slots__ = ('done', 'value', '_waiters')
+
+    def __init__(self):
+        self.done = False
+        self.value = None
+        self._waiters = []
+
+    def set(self, value=None):
+        self.done = True
+        self.value = value
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            waiter(value)
+
+
+class Task:
+    """
+    A spawned coroutine and the event that will resume it, if any.
+    """
+    __slots__ = ('coroutine', 'scheduler', 'event', 'done')
+
+    def __init__(self, coroutine, scheduler):
+        self.coroutine = coroutine
+        self.scheduler = scheduler
+        self.event = None
+        self.done = False
+
+    def cancel(self):
+        """
+        Stop the coroutine: cancel its pending wake-up and close it.
+        """
+        if self.event is not None:
+            self.scheduler.cancel(self.event)
+            self.event = None
+        self.done = True
+        self.coroutine.close()
+
+
+def spawn(coroutine, scheduler=None):
+    """
+    Start a generator coroutine on the scheduler. It runs until its first yield now.
+    :return: Task.
+    """
+    task = Task(coroutine, scheduler or get_default_scheduler())
+    _resume(task, None)
+    return task
+
+
+def _resume(task, value):
+    if task.done:
+        return
+    task.event = None
+    try:
+        waited = task.coroutine.send(value)
+    except StopIteration:
+        task.done = True
+        return
+    if isinstance(waited, Completion):
+        if waited.done:
+            task.event = task.scheduler.schedule(0.0, _resume, task, waited.value)
+        else:
+            waited._waiters.append(lambda result: _resume(task, result))
+    else:
+        task.event = task.scheduler.schedule(waited, _resume, task, None)
+
+
+class _Exponential:
+    """
+    Exponential variates drawn from the generator in blocks, so each draw is a list pop.
+    """
+
+    def __init__(self, rng, block=4096):
+        self.rng = rng
+        self.block = block
+        self._buffer = []
+
+    def __call__(self, mean):
+        if not self._buffer:
+            self._buffer = self.rng.standard_exponential(self.block).tolist()
+        return self._buffer.pop() * mean
+
+
+class SimulatedServer:
+    """
+    A listening process serving requests with `workers` parallel workers and a FIFO queue.
+    :param service_time: Mean of the exponential service time in seconds.
+    :param queue_limit: Requests allowed to wait; beyond it they are rejected (None: unlimited).
+    """
+
+    def __init__(self, workload, name, ip, port, workers=4, service_time=0.005, queue_limit=None):
+        self.workload = workload
+        self.name = name
+        self.ip = ip
+        self.port = port
+        self.workers = workers
+        self.service_time = service_time
+        self.queue_limit = queue_limit
+        self.busy = 0
+        self.busy_time = 0.0
+        self.served = 0
+        self.rejected = 0
+        self._queue = collections.deque()
+        workload.simulator.listen(name, port, ip)
+
+    def submit(self):
+        """
+        Queue a request.
+        :return: Completion set to True when it has been served, or False if it was rejected.
+        """
+        completion = Completion()
+        if self.busy < self.workers:
+            self._start(completion)
+        elif self.queue_limit is not None and len(self._queue) >= self.queue_limit:
+            self.rejected += 1
+            completion.set(False)
+        else:
+            self._queue.append(completion)
+        return completion
+
+    def _start(self, completion):
+        self.busy += 1
+        duration = self.workload.exponential(self.service_time)
+        self.busy_time += duration
+        self.workload.scheduler.schedule(duration, self._finish, completion)
+
+    def _finish(self, completion):
+        self.busy -= 1
+        self.served += 1
+        if self._queue:
+            self._start(self._queue.popleft())
+        completion.set(True)
+
+    def utilization(self, duration):
+        return self.busy_time / (self.workers * duration) if duration > 0 else 0.0
+
+
+WorkloadReport = collections.namedtuple(
+    'WorkloadReport', 'duration issued completed rejected outstanding throughput latency utilization')
+WorkloadReport.__doc__ = """
+Result of Workload.run().
+:param issued: Requests started during the run.
+:param completed: Requests answered successfully.
+:param rejected: Requests refused by a full server queue.
+:param outstanding: Requests still in flight when the run ended (0 after draining).
+:param throughput: Completed requests per simulated second.
+:param latency: LatencyHistogram of completed requests' response times.
+:param utilization: Dict of server name -> fraction of worker time spent serving.
+"""
+
+
+class Workload:
+    """
+    Clients and servers over a TCPSimulator's ports and connection table.
+    :param rtt: Round-trip time between any client and server.
+    :param bandwidth: Path bandwidth in bits per second, for request and response serialization.
+    :param rng: NumPy Generator or seed; defaults to one drawn from the random module.
+    """
+
+    def __init__(self, simulator=None, rtt=0.01, bandwidth=100e6, scheduler=None, rng=None):
+        self.scheduler = scheduler or get_default_scheduler()
+        self.simulator = simulator or TCPSimulator(scheduler=self.scheduler)
+        self.rtt = rtt
+        self.bandwidth = bandwidth
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        elif not isinstance(rng, np.random.Generator):
+            rng = np.random.default_rng(rng)
+        self.exponential = _Exponential(rng)
+        self.servers = {}
+        self.latency = LatencyHistogram()
+        self._clients = []
+        self._end = math.inf
+        self.issued = self.completed = self.rejected = self.outstanding = 0
+
+    def add_server(self, name, ip="10.0.0.1", port=None, workers=4, service_time=0.005, queue_limit=None):
+        """
+        Start a server process listening on ip:port (default: 8080, 8081, ...).
+        """
+        port = 8080 + len(self.servers) if port is None else port
+        server = SimulatedServer(self, name, ip, port, workers, service_time, queue_limit)
+        self.servers[name] = server
+        return server
+
+    def add_clients(self, count, server, arrival=POISSON, rate=10.0, think_time=0.1, on_time=1.0, off_time=1.0,
+                    request_size=200, response_size=2000, network="10.1.0.0"):
+        """
+        Add count clients of one server, each its own process and connection.
+        :param arrival: POISSON or ON_OFF (open loop, rate requests per second per
+            client, during on periods for ON_OFF), or CLOSED_LOOP (one request at a
+            time, think_time seconds apart on average).
+        :param on_time: Mean on period of ON_OFF clients in seconds.
+        :param off_time: Mean off period of ON_OFF clients in seconds.
+        :param request_size: Request bytes.
+        :param response_size: Response bytes.
+        :param network: Client addresses are consecutive addresses after this one.
+        """
+        if arrival not in ARRIVAL_PROCESSES:
+            raise ValueError(f"Unknown arrival process {arrival!r}; use one of {', '.join(ARRIVAL_PROCESSES)}")
+        server = self.servers[server] if isinstance(server, str) else server
+        base = ip_to_int(network)
+        first = len(self._clients)
+        for i in range(first, first + count):
+            client = _Client(f"client-{i}", int_to_ip(base + i + 1), server, arrival, rate, think_time, on_time, off_time,
+                             request_size, response_size)
+            self._clients.append(client)
+            client.task = spawn(self._run_client(client), self.scheduler)
+
+    def _run_client(self, client):
+        exponential = self.exponential
+        scheduler = self.scheduler
+        if client.arrival == CLOSED_LOOP:
+            yield exponential(client.think_time)  # so clients added together do not start in lockstep
+            while scheduler.now < self._end:
+                yield from self._request(client)
+                yield exponential(client.think_time)
+            return
+        gap = 1.0 / client.rate
+        while True:
+            if client.arrival == ON_OFF:
+                on_until = scheduler.now + exponential(client.on_time)
+                while True:
+                    wait = exponential(gap)
+                    if scheduler.now + wait >= on_until:
+                        break
+                    yield wait
+                    if scheduler.now >= self._end:
+                        return
+                    spawn(self._request(client), scheduler)
+                yield on_until - scheduler.now + exponential(client.off_time)
+            else:
+                yield exponential(gap)
+            if scheduler.now >= self._end:
+                return
+            if client.arrival == POISSON:
+                spawn(self._request(client), scheduler)
+
+    def _request(self, client):
+        scheduler = self.scheduler
+        start = scheduler.now
+        self.issued += 1
+        self.outstanding += 1
+        server = client.server
+        if client.port is None:
+            self.simulator.connect(client.name, client.ip, server.ip, server.port)
+            client.port = self.simulator.port_map[client.name]
+            yield self.rtt
+        yield self.rtt / 2 + client.request_size * 8 / self.bandwidth
+        # Hand the request to whoever listens on its 5-tuple, as the receiving host would.
+        destination = self.simulator.demultiplex(client.ip, client.port, server.ip, server.port)
+        served = yield self.servers[destination].submit()
+        yield self.rtt / 2 + client.response_size * 8 / self.bandwidth
+        self.outstanding -= 1
+        if served:
+            self.completed += 1
+            client.latencies.append(scheduler.now - start)
+        else:
+            self.rejected += 1
+
+    def run(self, duration, drain=True):
+        """
+        Generate load for duration virtual seconds.
+        :param drain: Afterwards, keep running until every issued request has been answered.
+            The clients are stopped either way, so after draining nothing of the workload
+            is left on the scheduler.
+        :return: WorkloadReport.
+        """
+        scheduler = self.scheduler
+        start = scheduler.now
+        self._end = start + duration
+        scheduler.run(until=self._end)
+        while drain and self.outstanding and scheduler.step():
+            pass
+        # Past the end the clients only wake up to return: stop them instead of leaving their wake-ups queued.
+        for client in self._clients:
+            client.task.cancel()
+        scheduler.discard_cancelled()
+        for client in self._clients:
+            if client.latencies:
+                self.latency.record_many(client.latencies)
+                client.latencies = []
+        elapsed = scheduler.now - start
+        return WorkloadReport(duration, self.issued, self.completed, self.rejected, self.outstanding,
+                              self.completed / duration if duration else 0.0, self.latency,
+                              {name: server.utilization(elapsed) for name, server in self.servers.items()})
+
+
+class _Client:
+    __slots__ = ('name', 'ip', 'server', 'arrival', 'rate', 'think_time', 'on_time', 'off_time', 'request_size',
+                 'response_size', 'port', 'latencies', 'task')
+
+    def __init__(self, name, ip, server, arrival, rate, think_time, on_time, off_time, request_size, response_size):
+        self.name = name
+        self.ip = ip
+        self.server = server
+        self.arrival = arrival
+        self.rate = rate
+        self.think_time = think_time
+        self.on_time = on_time
+        self.off_time = off_time
+        self.request_size = request_size
+        self.response_size = response_size
+        self.port = None
+        self.latencies = []
+        self.task = None
@@ -0,0 +1,18 @@
+import numpy as np
+
+from netsim import checksum
+from netsim.error_control import ErrorControlProtocol
+
+
+def test_additive_batch_matches_scalar_for_non_ascii_text():
+    frames = ['héllo', 'naïve café', '日本語', '\U0001F600 emoji', 'plain ascii', '', b'h\xc3\xa9llo']
+    batch = checksum.additive_checksum_batch(frames)
+    assert batch.tolist() == [checksum.additive_checksum(frame) for frame in frames]
+    assert ErrorControlProtocol.checksum('héllo') == 664
+    for frame, value in zip(frames, batch.tolist()):
+        assert not ErrorControlProtocol.detect_errors(frame, value)
+
+
+def test_internet_batch_matches_scalar():
+    frames = [b'\x45\x00\x00\x1c', b'odd', 'héllo', np.arange(7, dtype=np.uint8)]
+    assert checksum.internet_checksum_batch(frames).tolist() == [checksum.internet_checksum(f) for f in frames]
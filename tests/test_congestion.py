@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from netsim.congestion import FAST_RECOVERY, RTO_WAIT, SLOW_START, BottleneckLink, CubicController, TCPFlows
+from netsim.scheduler import EventScheduler
+
+
+def make_flows(count=1, controller='reno', **link_options):
+    flows = TCPFlows(BottleneckLink(**link_options), scheduler=EventScheduler(), rng=1)
+    index = flows.add_flows(count, base_rtt=0.05, controller=controller)
+    return flows, index
+
+
+def test_reno_halves_the_window_on_fast_retransmit():
+    flows, index = make_flows()
+    flows.cwnd[index] = 40.0
+    flows._react(index, now=1.0)
+    assert flows.ssthresh[0] == 20.0 and flows.cwnd[0] == 20.0
+    assert flows.phase[0] == FAST_RECOVERY and flows.fast_retransmits[0] == 1
+    # A second loss inside the same recovery window is not another reduction.
+    flows._react(index, now=1.01)
+    assert flows.cwnd[0] == 20.0 and flows.fast_retransmits[0] == 1
+
+
+def test_small_window_times_out():
+    flows, index = make_flows()
+    flows.cwnd[index] = 3.0
+    flows._react(index, now=1.0)
+    assert flows.cwnd[0] == 1.0 and flows.ssthresh[0] == 2.0
+    assert flows.phase[0] == RTO_WAIT and flows.timeouts[0] == 1
+
+
+def test_reno_adds_one_packet_per_window():
+    flows, index = make_flows()
+    flows.cwnd[index] = 10.0
+    flows.controllers[0].grow(flows, index, np.array([10.0]), now=0.0)
+    assert flows.cwnd[0] == pytest.approx(11.0)
+
+
+def test_cubic_follows_the_cubic_curve_after_a_loss():
+    cubic = CubicController()
+    flows, index = make_flows(controller=cubic)
+    flows.cwnd[index] = 100.0
+    flows._react(index, now=0.0)
+    assert flows.cwnd[0] == pytest.approx(70.0)
+    k = np.cbrt(100.0 * (1 - cubic.beta) / cubic.c)
+    assert flows.cubic_k[0] == pytest.approx(k)
+    rtt = flows.srtt[0]
+    times = np.linspace(0.5, 2 * k, 40)
+    windows = []
+    for now in times:
+        # Acknowledging a whole window moves cwnd onto the curve.
+        cubic.grow(flows, index, flows.cwnd[index].copy(), now)
+        windows.append(flows.cwnd[0])
+    assert np.all(np.diff(windows) > 0)
+    t = times + rtt
+    curve = cubic.c * (t - k) ** 3 + 100.0
+    reno = 100.0 * cubic.beta + 3 * (1 - cubic.beta) / (1 + cubic.beta) * t / rtt
+    assert np.array(windows) == pytest.approx(np.maximum(curve, reno))
+    assert (curve[times < k / 2] > reno[times < k / 2]).all()
+
+
+def test_cubic_grows_at_least_as_fast_as_reno():
+    cubic = CubicController()
+    flows, index = make_flows(controller=cubic)
+    flows.cwnd[index] = 10.0
+    flows._react(index, now=0.0)
+    rtt = flows.srtt[0]
+    now = 100 * rtt
+    cubic.grow(flows, index, flows.cwnd[index].copy(), now)
+    t = now + rtt
+    reno = 10.0 * cubic.beta + 3 * (1 - cubic.beta) / (1 + cubic.beta) * t / rtt
+    assert reno > cubic.c * (t - flows.cubic_k[0]) ** 3 + 10.0
+    assert flows.cwnd[0] == pytest.approx(reno)
+
+
+def test_jain_fairness_index():
+    flows, index = make_flows(4)
+    flows.scheduler.run(until=1.0)
+    flows.delivered[:4] = [100.0, 100.0, 100.0, 100.0]
+    assert flows.report().fairness == pytest.approx(1.0)
+    flows.delivered[:4] = [400.0, 0.0, 0.0, 0.0]
+    assert flows.report().fairness == pytest.approx(0.25)
+    flows.delivered[:4] = [1.0, 2.0, 3.0, 4.0]
+    assert flows.report().fairness == pytest.approx(100 / (4 * 30))
+
+
+def test_identical_flows_share_the_bottleneck_fairly():
+    flows, index = make_flows(20, bandwidth=20e6, buffer_packets=100)
+    report = flows.run(20.0)
+    assert report.fast_retransmits > 0 and report.loss_rate > 0
+    assert report.utilization > 0.8
+    assert report.fairness > 0.9
+    assert (flows.phase[index] != SLOW_START).all()
+
+
+def test_unknown_controller():
+    with pytest.raises(ValueError):
+        make_flows(controller='vegas')
@@ -0,0 +1,113 @@
+from netsim.access_control import AccessControlProtocol
+from netsim.data_link import Switch
+from netsim.physical import Connection, EndDevice, Hub
+from netsim.scheduler import EventScheduler
+from netsim.tracing import EventKind, RingBufferSink, Tracer, set_tracer
+
+
+def build(scheduler):
+    hubs = [Hub(scheduler), Hub(scheduler)]
+    devices = []
+    for h, hub in enumerate(hubs):
+        for i in range(3):
+            device = EndDevice(f"Device{h}{i}", scheduler)
+            device.set_mac_address(f"00:11:22:33:44:{h}{i}")
+            hub.connect_device(device)
+            devices.append(device)
+    switch = Switch("Switch", scheduler=scheduler)
+    for hub in hubs:
+        switch.attach(hub)
+    return hubs, devices, switch
+
+
+def test_hub_broadcast_is_learned_and_flooded_to_other_hub():
+    scheduler = EventScheduler()
+    hubs, devices, switch = build(scheduler)
+    hubs[0].broadcast("hello", "Device01")
+    scheduler.run()
+    assert switch.lookup("00:11:22:33:44:01") == 1
+    # Two other devices and the switch port on the first hub, three devices and
+    # the switch port on the second.
+    assert hubs[0].deliveries == 3
+    assert hubs[1].deliveries == 4
+    # The copy the switch floods onto the second hub does not come back in.
+    assert hubs[0].frames_delivered == 1
+    assert hubs[1].frames_delivered == 1
+
+
+def test_disconnect_removes_port_from_hub():
+    scheduler = EventScheduler()
+    hubs, devices, switch = build(scheduler)
+    switch.disconnect(2)
+    hubs[0].broadcast("hello", "Device00")
+    scheduler.run()
+    assert hubs[1].bridge_ports == []
+    assert hubs[1].frames_offered == 0
+
+
+def test_chained_switches_learn_and_forward():
+    scheduler = EventScheduler()
+    switches = [Switch(f"Switch{i}", scheduler=scheduler) for i in range(3)]
+    hosts = []
+    for i, switch in enumerate(switches):
+        host = EndDevice(f"Host{i}", scheduler)
+        host.set_mac_address(f"00:11:22:33:44:0{i}")
+        switch.attach(host)
+        hosts.append(host)
+    assert switches[0].attach(switches[1]) == 2
+    assert switches[1].attach(switches[2]) == 3
+
+    hosts[0].send_data("hello", "00:11:22:33:44:02")
+    scheduler.run()
+    # Unknown destination: flooded through the chain, and Host0 learned on the way.
+    assert [switch.lookup("00:11:22:33:44:00") for switch in switches] == [1, 2, 2]
+
+    hosts[2].send_data("hello back", "00:11:22:33:44:00")
+    scheduler.run()
+    assert [switch.lookup("00:11:22:33:44:02") for switch in switches] == [2, 3, 1]
+
+    switches[1].disconnect(3)
+    assert 2 not in switches[2].ports
+    assert switches[2].lookup("00:11:22:33:44:00") is None
+
+
+def test_connection_to_switch_still_works(monkeypatch):
+    monkeypatch.setattr(AccessControlProtocol, "idle_probability", 1.0)
+    scheduler = EventScheduler()
+    switch = Switch("Switch", scheduler=scheduler)
+    host = EndDevice("Host", scheduler)
+    host.set_mac_address("00:11:22:33:44:01")
+    switch.attach(host)
+    other = EndDevice("Other", scheduler)
+    Connection(switch, other)
+    assert switch.connection.device2 is other
+    sink = RingBufferSink()
+    previous = set_tracer(Tracer(sink))
+    try:
+        other.send_data("hello", "Switch")
+        scheduler.run()
+    finally:
+        set_tracer(previous)
+    # Delivered to the switch over the Connection and flooded out of its ports.
+    received = [event for event in sink if event.kind == EventKind.RECEIVE]
+    assert [(event.node, event.peer) for event in received] == [("Switch", "Other"), ("Host", "Other")]
+
+
+def test_hub_keeps_member_index():
+    scheduler = EventScheduler()
+    hubs, devices, switch = build(scheduler)
+    assert hubs[0].members == {device.device_id: device for device in devices[:3]}
+    assert switch.device_id not in hubs[0].members
+
+
+def test_preload_fills_the_table_silently_and_evicts_when_full():
+    sink = RingBufferSink()
+    previous = set_tracer(Tracer(sink))
+    try:
+        switch = Switch("Switch", capacity=3, scheduler=EventScheduler())
+        switch.preload((f"00:00:00:00:00:0{i}", i) for i in range(5))
+    finally:
+        set_tracer(previous)
+    assert list(switch.table.items()) == [("00:00:00:00:00:02", 2), ("00:00:00:00:00:03", 3), ("00:00:00:00:00:04", 4)]
+    assert switch.evictions == 2
+    assert not any(event.kind == EventKind.SWITCH_LEARN for event in sink)
@@ -0,0 +1,59 @@
+import pytest
+
+from netsim.distance_vector import HORIZON_POLICIES, DistanceVectorProtocol
+from netsim.routing import RouteCompiler
+from netsim.scenarios import build_router_ring
+
+
+def isolate_router1(horizon, **options):
+    routers = build_router_ring(4)
+    protocol = DistanceVectorProtocol(routers, horizon=horizon, **options)
+    first = protocol.converge()
+    protocol.link_down("Router1", "Router2")
+    protocol.link_down("Router1", "Router4")
+    return routers, protocol, first, protocol.converge()
+
+
+@pytest.mark.parametrize("horizon", HORIZON_POLICIES)
+def test_converges_to_shortest_paths(horizon):
+    routers = build_router_ring(5)
+    protocol = DistanceVectorProtocol(routers, horizon=horizon)
+    report = protocol.converge()
+    assert report.converged and not report.count_to_infinity
+    assert report.messages == report.rounds * 10
+    compiler = RouteCompiler.from_routers(routers).compile()
+    for a in protocol.nodes:
+        for b in protocol.nodes:
+            assert protocol.distance(a, b) == compiler.distance(a, b)
+    protocol.install()
+    assert routers[1].lookup_route("192.168.4.10")['interface'] in ("to-Router3", "to-Router1")
+
+
+@pytest.mark.parametrize("horizon, counts", [('none', ['Router1']), ('split-horizon', []), ('poison-reverse', [])])
+def test_count_to_infinity_per_horizon_policy(horizon, counts):
+    routers, protocol, first, report = isolate_router1(horizon)
+    assert report.converged
+    assert report.count_to_infinity == counts
+    assert protocol.distance("Router3", "Router1") == protocol.infinity
+    assert protocol.next_hop("Router3", "Router1") is None
+    if horizon == 'none':
+        # The remaining routers bounce the stale route between them up to the metric cap.
+        assert report.rounds >= protocol.infinity - 2
+    else:
+        assert report.rounds <= first.rounds + 1
+
+
+def test_max_rounds_stops_a_count_to_infinity():
+    routers = build_router_ring(4)
+    protocol = DistanceVectorProtocol(routers, infinity=64, horizon='none')
+    protocol.converge()
+    protocol.link_down("Router1", "Router2")
+    protocol.link_down("Router1", "Router4")
+    report = protocol.converge(max_rounds=10)
+    assert not report.converged and report.rounds == 10
+    assert report.count_to_infinity == ['Router1']
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        DistanceVectorProtocol(build_router_ring(3), horizon='holddown')
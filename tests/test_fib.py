@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from netsim.fib import PrefixTrie
+from netsim.ipv4 import MASKS
+
+
+def linear_lookup(routes, address):
+    best = None
+    for (prefix, length), route in routes.items():
+        if address & MASKS[length] == prefix and (best is None or length > best[0]):
+            best = (length, route)
+    return None if best is None else best[1]
+
+
+def test_edge_lengths():
+    trie = PrefixTrie()
+    assert trie.lookup(0x0A000001) is None
+    trie.insert(0, 0, "default")
+    trie.insert(0x0A000001, 32, "host")
+    trie.insert(0x0A000000, 8, "ten")
+    assert trie.lookup(0x0A000001) == "host"
+    assert trie.lookup(0x0A000002) == "ten"
+    assert trie.lookup(0xFFFFFFFF) == "default"
+    trie.insert(0x0A0000FF, 8, "ten again")  # host bits are ignored; replaces the route
+    assert len(trie) == 3
+    assert trie.lookup(0x0A000002) == "ten again"
+    assert trie.remove(0, 0) == "default"
+    assert trie.lookup(0xFFFFFFFF) is None
+    assert trie.remove(0x0A000001, 32) == "host"
+    assert trie.remove(0x0A000001, 32) is None
+    assert trie.lookup(0x0A000001) == "ten again"
+    assert sorted(trie.items()) == [(0x0A000000, 8, "ten again")]
+    with pytest.raises(ValueError):
+        trie.insert(0, 0, None)
+
+
+def test_remove_splices_without_losing_descendants():
+    trie = PrefixTrie()
+    trie.insert(0xC0A80000, 16, "a")
+    trie.insert(0xC0A80100, 24, "b")
+    trie.insert(0xC0A88000, 17, "c")
+    assert trie.remove(0xC0A80000, 16) == "a"
+    assert trie.remove(0xC0A80000, 24) is None  # never inserted
+    assert trie.lookup(0xC0A80105) == "b"
+    assert trie.lookup(0xC0A88001) == "c"
+    assert trie.lookup(0xC0A80205) is None
+    assert len(trie) == 2
+
+
+def test_matches_linear_scan():
+    rng = random.Random(5)
+    trie = PrefixTrie()
+    routes = {}
+    # Prefixes inside one /8 overlap heavily, which exercises glue nodes and splicing.
+    base = 0x0A000000
+    for step in range(4000):
+        length = rng.choice([0, 8, 9, 12, 16, 17, 23, 24, 25, 31, 32])
+        prefix = (base | rng.getrandbits(24)) & MASKS[length]
+        if routes and rng.random() < 0.3:
+            prefix, length = rng.choice(list(routes))
+            assert trie.remove(prefix, length) == routes.pop((prefix, length))
+        else:
+            trie.insert(prefix, length, step)
+            routes[(prefix, length)] = step
+        assert len(trie) == len(routes)
+        if step % 50 == 0:
+            for _ in range(100):
+                address = base | rng.getrandbits(24) if rng.random() < 0.9 else rng.getrandbits(32)
+                assert trie.lookup(address) == linear_lookup(routes, address)
+            assert sorted(trie.items()) == sorted((p, l, r) for (p, l), r in routes.items())
@@ -0,0 +1,17 @@
+import pytest
+
+from netsim.flow_control import GO_BACK_N, ChannelModel, FlowControlProtocol
+
+
+@pytest.mark.parametrize("rates", [dict(loss_rate=1.0), dict(loss_rate=0.1, ack_loss_rate=1.0),
+                                   dict(loss_rate=-0.1), dict(loss_rate=float('nan'))])
+def test_channel_rejects_rates_outside_unit_interval(rates):
+    with pytest.raises(ValueError):
+        ChannelModel(**rates)
+
+
+def test_lossy_channel_completes():
+    channel = ChannelModel(loss_rate=0.9, ack_loss_rate=0.5)
+    result = FlowControlProtocol.simulate(20, 4, GO_BACK_N, channel, rng=1)
+    assert result.packets == 20
+    assert result.retransmissions == result.transmissions - 20
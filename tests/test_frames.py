@@ -0,0 +1,70 @@
+import pytest
+
+from netsim.data_link import Switch
+from netsim.error_control import ErrorControlProtocol
+from netsim.frames import EthernetFrame, IPv4Packet
+from netsim.physical import EndDevice, Hub
+from netsim.scheduler import EventScheduler
+from netsim.tracing import EventKind, RingBufferSink, Tracer, set_tracer
+
+
+@pytest.fixture
+def events():
+    sink = RingBufferSink()
+    previous = set_tracer(Tracer(sink))
+    yield sink
+    set_tracer(previous)
+
+
+def test_ipv4_packet_round_trip():
+    packet = IPv4Packet("10.0.0.1", "192.168.1.20", b"payload", ttl=17, identification=99)
+    wire = packet.to_bytes()
+    assert bytes(packet) == wire
+    parsed = IPv4Packet.from_bytes(wire)
+    assert parsed == packet
+    assert str(parsed.destination_ip) == "192.168.1.20"
+    with pytest.raises(ValueError):
+        IPv4Packet.from_bytes(wire[:10] + bytes([wire[10] ^ 0xFF]) + wire[11:])
+
+
+def test_ethernet_frame_round_trip():
+    packet = IPv4Packet("10.0.0.1", "10.0.0.2", bytes(range(50)))
+    frame = EthernetFrame("00:11:22:33:44:02", "00:11:22:33:44:01", packet)
+    wire = bytes(frame)
+    assert len(wire) == len(frame)
+    parsed = EthernetFrame.from_bytes(wire)
+    assert parsed == frame
+    assert parsed.destination_mac == "00:11:22:33:44:02"
+    assert IPv4Packet.from_bytes(parsed.payload) == packet
+    with pytest.raises(ValueError):
+        EthernetFrame.from_bytes(wire[:-1] + bytes([wire[-1] ^ 1]))
+
+
+def test_frame_checksum_is_over_wire_bytes():
+    frame = EthernetFrame("Broadcast", "00:11:22:33:44:01", b"abc")
+    assert ErrorControlProtocol.checksum(frame) == ErrorControlProtocol.checksum(frame.to_bytes())
+    assert not ErrorControlProtocol.detect_errors(frame, ErrorControlProtocol.checksum(frame))
+
+
+def test_frame_travels_host_switch_hub_host(events):
+    scheduler = EventScheduler()
+    sender = EndDevice("Sender", scheduler)
+    sender.set_mac_address("00:11:22:33:44:01")
+    hub = Hub(scheduler)
+    receivers = [EndDevice(f"Receiver{i}", scheduler) for i in range(2)]
+    for i, receiver in enumerate(receivers):
+        receiver.set_mac_address(f"00:11:22:33:44:1{i}")
+        hub.connect_device(receiver)
+    switch = Switch("Switch", scheduler=scheduler)
+    switch.attach(sender)
+    switch.attach(hub)
+
+    frame = EthernetFrame("00:11:22:33:44:10", "00:11:22:33:44:01", IPv4Packet("10.0.0.1", "10.0.0.2", b"hello"))
+    sender.send_data(frame)
+    scheduler.run()
+
+    assert switch.lookup("00:11:22:33:44:01") == 1
+    received = [event for event in events if event.kind == EventKind.RECEIVE]
+    assert sorted(event.node for event in received) == ["Receiver0", "Receiver1"]
+    assert all(event.data is frame for event in received)
+    assert not [event for event in events if event.kind == EventKind.CORRUPT]
@@ -0,0 +1,143 @@
+import os
+import socket
+
+import pytest
+
+from netsim.ftp_service import FTPClient, FTPSessionPool, LocalFTPServer
+from netsim.transport import TCPSimulator
+
+DATA = bytes(range(256)) * 1024  # 256 KiB
+
+
+@pytest.fixture
+def server():
+    with LocalFTPServer(credentials={"netsim": "secret"}) as running:
+        with open(os.path.join(running.root, "data.bin"), "wb") as f:
+            f.write(DATA)
+        yield running
+
+
+@pytest.fixture
+def client(server):
+    with FTPSessionPool() as pool:
+        yield FTPClient(server.host, "netsim", "secret", server.port, pool=pool, block_size=8192)
+
+
+def test_session_is_reused(client, tmp_path):
+    assert client.size("data.bin") == len(DATA)
+    assert client.size("missing.bin") is None
+    assert any("data.bin" in line for line in client.list())
+    client.download("data.bin", str(tmp_path / "copy.bin"))
+    assert client.pool.logins == 1
+    assert client.pool.reuses == 3
+
+
+def test_download_resumes_partial_local_file(client, tmp_path):
+    local = tmp_path / "data.bin"
+    local.write_bytes(DATA[:100000])
+    transfer = client.download("data.bin", str(local))
+    assert transfer.resumed_from == 100000
+    assert transfer.bytes == len(DATA) - 100000
+    assert local.read_bytes() == DATA
+
+
+def test_download_without_resume_starts_over(client, tmp_path):
+    local = tmp_path / "data.bin"
+    local.write_bytes(b"stale" * 10)
+    transfer = client.download("data.bin", str(local), resume=False)
+    assert transfer.resumed_from == 0
+    assert local.read_bytes() == DATA
+
+
+def test_upload_resumes_partial_remote_file(server, client, tmp_path):
+    local = tmp_path / "upload.bin"
+    local.write_bytes(DATA)
+    with open(os.path.join(server.root, "upload.bin"), "wb") as f:
+        f.write(DATA[:50000])
+    transfer = client.upload(str(local), "upload.bin")
+    assert transfer.resumed_from == 50000
+    assert transfer.bytes == len(DATA) - 50000
+    with open(os.path.join(server.root, "upload.bin"), "rb") as f:
+        assert f.read() == DATA
+
+
+def test_transfer_many(server, client, tmp_path):
+    local = tmp_path / "up.bin"
+    local.write_bytes(DATA[:30000])
+    transfers = [('download', "data.bin", str(tmp_path / f"copy{i}.bin")) for i in range(3)]
+    transfers += [('upload', str(local), "up.bin"), ('sideways', "a", "b"), ('download', "missing.bin", str(tmp_path / "x"))]
+    results = client.transfer_many(transfers, workers=3)
+    assert [result.bytes for result in results[:4]] == [len(DATA)] * 3 + [30000]
+    assert isinstance(results[4], ValueError)
+    assert isinstance(results[5], Exception)
+    for i in range(3):
+        assert (tmp_path / f"copy{i}.bin").read_bytes() == DATA
+    with open(os.path.join(server.root, "up.bin"), "rb") as f:
+        assert f.read() == DATA[:30000]
+
+
+def test_session_discarded_after_failed_transfer(client, tmp_path):
+    def interrupt(done, total):
+        if done > 20000:
+            raise RuntimeError("cancelled")
+
+    local = tmp_path / "data.bin"
+    with pytest.raises(RuntimeError):
+        client.download("data.bin", str(local), progress=interrupt)
+    assert client.pool.logins == 1
+    # The interrupted session is not reused: the next command gets a fresh login
+    # and sees clean replies, and the download resumes from the partial copy.
+    assert client.size("data.bin") == len(DATA)
+    assert client.pool.logins == 2
+    transfer = client.download("data.bin", str(local))
+    assert transfer.resumed_from > 0
+    assert local.read_bytes() == DATA
+
+
+def test_transfers_stream_in_blocks_and_report_progress(server, client, tmp_path):
+    client.block_size = 4096
+    downloaded = []
+    client.download("data.bin", str(tmp_path / "copy.bin"), progress=lambda done, total: downloaded.append((done, total)))
+    steps = [b[0] - a[0] for a, b in zip([(0, None)] + downloaded, downloaded)]
+    assert downloaded[-1] == (len(DATA), len(DATA))
+    assert all(0 < step <= 4096 for step in steps)
+    uploaded = []
+    client.upload(str(tmp_path / "copy.bin"), "back.bin", progress=lambda done, total: uploaded.append(done))
+    assert uploaded == list(range(4096, len(DATA) + 1, 4096))
+    with open(os.path.join(server.root, "back.bin"), "rb") as f:
+        assert f.read() == DATA
+
+
+def test_idle_sessions_are_checked_before_reuse(server):
+    with FTPSessionPool(keepalive=0.0) as pool:
+        client = FTPClient(server.host, "netsim", "secret", server.port, pool=pool)
+        assert client.size("data.bin") == len(DATA)
+        assert client.size("data.bin") == len(DATA)
+        assert (pool.logins, pool.reuses) == (1, 1)
+        (session, _), = pool._idle[(server.host, server.port, "netsim", "secret")]
+        session.sock.shutdown(socket.SHUT_RDWR)
+        # The dead session fails its NOOP and is replaced by a fresh login.
+        assert client.size("data.bin") == len(DATA)
+        assert (pool.logins, pool.reuses) == (2, 1)
+
+
+def test_concurrent_transfers_share_a_bounded_set_of_sessions(server, tmp_path):
+    with FTPSessionPool(max_idle_per_server=2) as pool:
+        client = FTPClient(server.host, "netsim", "secret", server.port, pool=pool, block_size=16384)
+        transfers = [('download', "data.bin", str(tmp_path / f"copy{i}.bin")) for i in range(8)]
+        results = client.transfer_many(transfers, workers=4)
+        assert all(result.bytes == len(DATA) for result in results)
+        assert 1 <= pool.logins <= 4 and pool.logins + pool.reuses == 8
+        assert len(pool._idle[(server.host, server.port, "netsim", "secret")]) <= 2
+
+
+def test_simulator_service_uses_pooled_sessions(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    simulator = TCPSimulator()
+    assert "data.bin" in simulator.ftp_service(server.host, "netsim", "secret", "list", port=server.port)
+    result = simulator.ftp_service(server.host, "netsim", "secret", "download", "data.bin", port=server.port)
+    assert result == f"Downloaded data.bin ({len(DATA)} bytes, resumed at 0)"
+    assert (tmp_path / "data.bin").read_bytes() == DATA
+    assert simulator.ftp_pool.logins == 1
+    assert "530" in simulator.ftp_service(server.host, "netsim", "wrong", "list", port=server.port)
+    simulator.ftp_pool.close()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import socket
+
+import pytest
+
+from netsim.http_service import AsyncHTTPClient, HTTPConnectionPool, LocalHTTPServer
+from netsim.transport import TCPSimulator
+
+
+@pytest.fixture(scope="module")
+def server():
+    with LocalHTTPServer() as running:
+        yield running
+
+
+def test_pool_reuses_keep_alive_connection(server):
+    with HTTPConnectionPool() as pool:
+        responses = [pool.get(server.host, server.port, f"/todos/{n}") for n in range(1, 6)]
+        stats = pool.stats.summary()
+    assert [response.status for response in responses] == [200] * 5
+    assert json.loads(responses[2].body)["id"] == 3
+    assert responses[0].headers["content-type"].startswith("application/json")
+    assert stats['connections_opened'] == 1
+    assert stats['connections_reused'] == 4
+
+
+def test_pool_records_stats(server):
+    with HTTPConnectionPool() as pool:
+        pool.get(server.host, server.port, "/bytes/1000")
+        pool.get(server.host, server.port, "/bytes/24")
+        stats = pool.stats.summary()
+    assert stats['requests'] == 2
+    assert stats['errors'] == 0
+    assert stats['bytes_received'] == 1024
+    assert 0 < stats['latency_p50'] <= stats['latency_max']
+    assert stats['requests_per_second'] > 0
+
+
+def test_pool_reports_missing_path(server):
+    with HTTPConnectionPool() as pool:
+        response = pool.get(server.host, server.port, "/missing")
+    assert response.status == 404
+
+
+def test_async_client_runs_requests_concurrently(server):
+    requests = [(server.host, server.port, f"/todos/{n}") for n in range(1, 41)]
+    responses, stats = AsyncHTTPClient.fetch_all(requests, connections_per_host=8)
+    assert [json.loads(response.body)["id"] for response in responses] == list(range(1, 41))
+    summary = stats.summary()
+    assert summary['requests'] == 40
+    assert summary['errors'] == 0
+    # At most connections_per_host connections, each reused for the remaining requests.
+    assert summary['connections_opened'] <= 8
+    assert summary['connections_opened'] + summary['connections_reused'] == 40
+
+
+def test_async_client_closes_connection_after_error(server):
+    client = AsyncHTTPClient(timeout=5.0)
+    failed = []
+
+    async def broken_exchange(streams, *args):
+        failed.append(streams)
+        raise ValueError("malformed response")
+
+    async def run():
+        client._exchange = broken_exchange
+        with pytest.raises(ValueError):
+            await client.get(server.host, server.port, "/todos/1")
+        del client._exchange
+        response = await client.get(server.host, server.port, "/bytes/10")
+        client.close()
+        return response
+
+    response = asyncio.run(run())
+    assert failed[0][1].is_closing()
+    assert response.body == bytes(10)
+    assert client.stats.errors == 1
+    assert client.stats.connections_opened == 2
+
+
+def test_pool_keeps_connections_per_host(server):
+    with LocalHTTPServer() as other, HTTPConnectionPool() as pool:
+        for n in range(1, 7):
+            target = server if n % 2 else other
+            assert pool.get(target.host, target.port, f"/todos/{n}").status == 200
+        assert sorted(pool._idle) == sorted([(server.host, server.port), (other.host, other.port)])
+        stats = pool.stats.summary()
+    assert stats['connections_opened'] == 2
+    assert stats['connections_reused'] == 4
+
+
+def test_pool_retries_once_on_a_stale_connection(server):
+    with HTTPConnectionPool() as pool:
+        pool.get(server.host, server.port, "/todos/1")
+        idle, = pool._idle[(server.host, server.port)]
+        # The pooled connection goes dead while idle, as when the server times it out.
+        idle.sock.shutdown(socket.SHUT_RDWR)
+        response = pool.get(server.host, server.port, "/todos/2")
+        stats = pool.stats.summary()
+    assert response.status == 200
+    assert json.loads(response.body)["id"] == 2
+    assert stats['connections_opened'] == 2
+    assert stats['errors'] == 0
+
+
+def test_async_client_keeps_hundreds_of_requests_in_flight(server):
+    requests = [(server.host, server.port, f"/bytes/{n}") for n in range(300)]
+    responses, stats = AsyncHTTPClient.fetch_all(requests, connections_per_host=300)
+    assert [len(response.body) for response in responses] == list(range(300))
+    summary = stats.summary()
+    assert summary['errors'] == 0
+    assert summary['bytes_received'] == sum(range(300))
+    # Requests that waited for each other would have shared a handful of connections.
+    assert summary['connections_opened'] > 8
+
+
+def test_simulator_service_uses_the_pool(server):
+    simulator = TCPSimulator()
+    for n in (1, 2):
+        assert json.loads(simulator.http_client_service(server.host, server.port, f"/todos/{n}"))["id"] == n
+    assert simulator.http_pool.stats.connections_reused == 1
+    simulator.http_pool.close()
+    responses, stats = simulator.http_concurrent_service(server.host, server.port, ["/todos/3", "/bytes/5"], 2)
+    assert responses[1].body == bytes(5) and stats.requests == 2
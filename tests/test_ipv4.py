@@ -0,0 +1,76 @@
+import pytest
+
+from netsim.ipv4 import IPv4Address, IPv4Prefix, as_ipv4, as_ipv4_prefix, int_to_ip, ip_to_int, mask_to_length
+from netsim.network import Router
+
+
+def test_parse_and_format():
+    assert ip_to_int("192.168.1.10") == 0xC0A8010A
+    assert int_to_ip(0xC0A8010A) == "192.168.1.10"
+    address = IPv4Address("10.1.2.3/20")
+    assert (address.value, address.prefix_len) == (0x0A010203, 20)
+    assert str(address) == address.address == "10.1.2.3"
+    assert address.with_prefix == "10.1.2.3/20"
+    assert address.subnet_mask == "255.255.240.0"
+    assert repr(address) == "IPv4Address('10.1.2.3/20')"
+    assert f"{address:>10}" == "  10.1.2.3"
+    assert IPv4Address("10.1.2.3", "255.255.255.0").prefix_len == 24
+    assert IPv4Address(5).prefix_len == 32
+    for bad in ("10.1.2", "10.1.2.256", "a.b.c.d"):
+        with pytest.raises(ValueError):
+            IPv4Address(bad)
+    with pytest.raises(ValueError):
+        IPv4Address(1 << 32)
+
+
+def test_masks():
+    assert mask_to_length("255.255.255.0") == 24
+    assert mask_to_length("0.0.0.0") == 0
+    assert mask_to_length(None) == 32
+    assert mask_to_length(IPv4Address("255.255.0.0")) == 16
+    with pytest.raises(ValueError):
+        mask_to_length("255.0.255.0")
+    with pytest.raises(ValueError):
+        mask_to_length(33)
+
+
+def test_parsing_is_cached():
+    assert as_ipv4("172.16.0.1") is as_ipv4("172.16.0.1")
+    assert as_ipv4_prefix("172.16.0.0/12") is as_ipv4_prefix("172.16.0.0/12")
+    address = IPv4Address("1.2.3.4")
+    assert as_ipv4(address) is address
+    assert as_ipv4(address, 8).prefix_len == 8
+
+
+def test_prefix_containment_and_equality():
+    prefix = IPv4Prefix("192.168.7.99/22")
+    assert str(prefix) == "192.168.4.0/22"  # host bits cleared
+    assert prefix.num_addresses == 1024
+    assert prefix.subnet_mask == "255.255.252.0"
+    assert prefix.network_address == IPv4Address("192.168.4.0")
+    assert "192.168.7.255" in prefix
+    assert IPv4Address("192.168.8.0") not in prefix
+    assert prefix.contains(0xC0A80400)
+    assert IPv4Address("192.168.5.1").in_subnet("192.168.4.0/22")
+    assert IPv4Prefix("192.168.4.0", "255.255.252.0") == prefix
+    assert IPv4Prefix("192.168.4.0/23") != prefix
+    assert len({prefix, IPv4Prefix("192.168.4.0/22")}) == 1
+    assert "0.0.0.0" in IPv4Prefix("0.0.0.0/0") and "255.255.255.255" in IPv4Prefix("0.0.0.0/0")
+    assert IPv4Address("10.0.0.1") == IPv4Address("10.0.0.1/8")
+    assert IPv4Address("10.0.0.1") < IPv4Address("10.0.0.2")
+
+
+def test_routing_table_accepts_string_keys():
+    router = Router("R1")
+    router.configure_routing_table("192.168.2.0", "10.0.0.2", "eth0", "255.255.255.0")
+    router.configure_routing_table("192.168.0.0/16", "10.0.0.3", "eth1")
+    route = router.routing_table["192.168.2.0"]
+    assert route is router.routing_table[IPv4Prefix("192.168.2.0/24")]
+    assert str(route['next_hop']) == "10.0.0.2" and route['subnet_mask'] == 24
+    assert router.routing_table["192.168.0.0"]['interface'] == "eth1"
+    assert router.routing_table["192.168.0.0/16"]['interface'] == "eth1"
+    assert "192.168.0.0/24" not in router.routing_table
+    assert router.routing_table.get("192.168.3.0") is None
+    assert router.remove_route("192.168.2.0", 24)['interface'] == "eth0"
+    assert "192.168.2.0" not in router.routing_table
+    assert router.lookup_route("192.168.2.1")['interface'] == "eth1"
@@ -0,0 +1,60 @@
+from netsim.link_state import LinkStateAdvertisement, LinkStateDatabase, LinkStateProtocol
+from netsim.scenarios import build_router_ring
+from netsim.scheduler import EventScheduler
+
+
+def routes(routers):
+    return [{prefix: (route['next_hop'], route['interface']) for prefix, route in router.routing_table.items()}
+            for router in routers]
+
+
+def test_lsdb_drops_duplicate_and_stale_lsas():
+    lsdb = LinkStateDatabase()
+    assert lsdb.install(LinkStateAdvertisement("R1", 2, (), ()))
+    assert not lsdb.install(LinkStateAdvertisement("R1", 2, (), ()))
+    assert not lsdb.install(LinkStateAdvertisement("R1", 1, (), ()))
+    assert lsdb.install(LinkStateAdvertisement("R2", 1, (), ()))
+    assert lsdb.key() == frozenset({("R1", 2), ("R2", 1)})
+    assert lsdb.install(LinkStateAdvertisement("R1", 3, (), ()))
+    assert lsdb.key() == frozenset({("R1", 3), ("R2", 1)})
+
+
+def test_convergence_report():
+    scheduler = EventScheduler()
+    routers = build_router_ring(4)
+    protocol = LinkStateProtocol(routers, scheduler=scheduler)
+    report = protocol.converge()
+    # Every router installs every router's first LSA once; the ring delivers a second copy.
+    assert report.lsas_installed == 16
+    assert report.duplicates > 0
+    assert report.lsas_sent == report.lsas_installed + report.duplicates - 4
+    assert 0 < report.messages <= report.lsas_sent
+    # 8 networks, 3 of them directly connected at each router.
+    assert report.route_changes == 4 * 5
+    assert report.spf_runs >= 4
+    assert report.convergence_time > 0
+    # All routers end with the same LSDB and so share one compiled graph.
+    assert len({state.lsdb.key() for state in protocol.states.values()}) == 1
+
+    protocol.link_down("Router1", "Router2")
+    report = protocol.converge()
+    assert report.route_changes > 0
+    assert routers[0].lookup_route("192.168.2.10")['interface'] == "to-Router4"
+
+
+def test_spf_is_throttled_while_a_link_flaps():
+    scheduler = EventScheduler()
+    routers = build_router_ring(4)
+    protocol = LinkStateProtocol(routers, scheduler=scheduler)
+    protocol.converge()
+    converged = routes(routers)
+    flaps = 40
+    for i in range(flaps):
+        flap = protocol.link_down if i % 2 == 0 else protocol.link_up
+        scheduler.schedule(0.05 * i, flap, "Router1", "Router2")
+    report = protocol.converge()
+    # One run per LSA change would be about 4 routers x 2 LSAs x 40 flaps; the doubling
+    # hold time keeps it to a handful per router.
+    assert report.spf_runs <= 4 * 8
+    assert report.spf_batched > report.spf_runs
+    assert routes(routers) == converged
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from netsim.parallel import PacketModel, ParallelSimulation, partition_graph
+
+
+def grid_model(side=8, flows=60, seed=2):
+    grid = np.arange(side * side).reshape(side, side)
+    a = np.concatenate((grid[:, :-1].ravel(), grid[:-1, :].ravel()))
+    b = np.concatenate((grid[:, 1:].ravel(), grid[1:, :].ravel()))
+    rng = np.random.default_rng(seed)
+    model = PacketModel(side * side, np.concatenate((a, b)), np.concatenate((b, a)),
+                        delay=rng.uniform(1e-4, 1e-3, 2 * len(a)), bandwidth=1e8)
+    model.add_flows(rng.integers(0, side * side, flows), rng.integers(0, side * side, flows), rate=2000.0)
+    return model
+
+
+def test_partitions_are_balanced():
+    model = grid_model()
+    labels = partition_graph(model.indptr, model.indices, 4)
+    sizes = np.bincount(labels, minlength=4)
+    # Refinement may move nodes while every part stays within 3% of its fair share of 16.
+    assert sizes.sum() == 64 and sizes.min() >= 15 and sizes.max() <= 17
+
+
+@pytest.mark.parametrize("capacity", [65536, 4])
+def test_parallel_run_matches_sequential(capacity):
+    simulation = ParallelSimulation(grid_model(), 2, until=0.02, seed=9, capacity=capacity)
+    sequential = simulation.run_sequential()
+    result = simulation.run()
+    assert len(sequential.deliveries) > 100
+    assert result.deliveries.tobytes() == sequential.deliveries.tobytes()
+    assert result.events == sequential.events
+    assert result.partitions == 2 and result.cut_links > 0
+    assert result.lookahead >= 1e-4
+    if capacity == 4:
+        # More boundary events than fit in one round per window: some windows took several rounds.
+        assert result.messages > result.windows * capacity
@@ -0,0 +1,112 @@
+import random
+import struct
+
+import pytest
+
+from netsim.frames import IPv4Packet
+from netsim.pcap import (MAGIC_MICROSECONDS, PcapReader, PcapWriter, Replay, decode, encode, replay,
+                         synthetic_mac)
+from netsim.scheduler import EventScheduler
+
+
+def write_capture(path, count=200, snaplen=65535, seed=1):
+    rng = random.Random(seed)
+    frames = []
+    with PcapWriter(path, snaplen=snaplen, buffer_size=64) as writer:
+        time = 0.0
+        for _ in range(count):
+            time += rng.uniform(0, 0.01)
+            frame = bytes(rng.getrandbits(8) for _ in range(rng.randint(14, 300)))
+            writer.write(frame, time)
+            frames.append((time, frame))
+    return frames
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 16, 100, 1 << 20])
+def test_round_trip_across_chunk_boundaries(tmp_path, chunk_size):
+    path = tmp_path / "capture.pcap"
+    frames = write_capture(path)
+    with PcapReader(path, chunk_size=chunk_size) as reader:
+        records = list(reader)
+    assert reader.linktype == 1 and reader.snaplen == 65535
+    assert [record.data for record in records] == [frame for _, frame in frames]
+    assert [record.original_length for record in records] == [len(frame) for _, frame in frames]
+    for record, (time, _) in zip(records, frames):
+        assert record.time == pytest.approx(time, abs=1e-9)
+
+
+def test_snaplen_truncates_but_keeps_the_wire_length(tmp_path):
+    path = tmp_path / "short.pcap"
+    frames = write_capture(path, count=20, snaplen=32)
+    records = list(PcapReader(path, chunk_size=10))
+    assert [record.data for record in records] == [frame[:32] for _, frame in frames]
+    assert [record.original_length for record in records] == [len(frame) for _, frame in frames]
+
+
+def test_reads_big_endian_microsecond_captures(tmp_path):
+    path = tmp_path / "be.pcap"
+    path.write_bytes(struct.pack('>IHHiIII', MAGIC_MICROSECONDS, 2, 4, 0, 0, 65535, 1)
+                     + struct.pack('>IIII', 3, 250000, 4, 60) + b'abcd')
+    record, = PcapReader(path, chunk_size=5)
+    assert record.time == pytest.approx(3.25)
+    assert record.data == b'abcd' and record.original_length == 60
+
+
+def test_truncated_and_foreign_files(tmp_path):
+    path = tmp_path / "cut.pcap"
+    write_capture(path, count=3)
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+    with pytest.raises(ValueError, match="inside a record"):
+        list(PcapReader(path, chunk_size=8))
+    path.write_bytes(data[:24 + 10])
+    with pytest.raises(ValueError, match="record header"):
+        list(PcapReader(path))
+    path.write_bytes(b"\x0a\x0d\x0d\x0a" + bytes(40))
+    with pytest.raises(ValueError):
+        PcapReader(path)
+
+
+def test_encode_wraps_payloads_and_decode_reads_them_back():
+    data = encode("hello", 0x0200000000ff, synthetic_mac("Host1"), 0x0a000002, 0x0a000001)
+    frame = decode(data)
+    assert frame.destination == 0x0200000000ff and frame.source == synthetic_mac("Host1")
+    packet = IPv4Packet.from_bytes(frame.payload)
+    assert packet.source == 0x0a000001 and packet.destination == 0x0a000002
+    assert bytes(packet.payload)[8:] == b"hello"
+    assert synthetic_mac("Host1") >> 40 == 0x02
+
+
+class Recorder:
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.received = []
+
+    def receive_data(self, data, checksum, sender_id, valid=None):
+        self.received.append((self.scheduler.now, bytes(data.payload)))
+
+
+def test_replay_delivers_records_at_shifted_times(tmp_path):
+    path = tmp_path / "replay.pcap"
+    frames = write_capture(path, count=50)
+    scheduler = EventScheduler()
+    device = Recorder(scheduler)
+    playback = replay(path, device, scheduler, start=10.0, speed=2.0, chunk_size=64)
+    assert scheduler.pending() == 1
+    scheduler.run()
+    assert playback.frames == 50
+    first = frames[0][0]
+    for (now, payload), (time, frame) in zip(device.received, frames):
+        assert now == pytest.approx(10.0 + (time - first) / 2)
+        assert payload == frame[14:]
+    assert playback._reader._file.closed
+
+
+def test_replay_accepts_any_iterable_of_records(tmp_path):
+    path = tmp_path / "list.pcap"
+    write_capture(path, count=5)
+    scheduler = EventScheduler()
+    device = Recorder(scheduler)
+    Replay(list(PcapReader(path)), device, scheduler).start()
+    scheduler.run()
+    assert len(device.received) == 5
@@ -0,0 +1,98 @@
+import pytest
+
+from netsim.frames import PROTOCOL_UDP
+from netsim.ports import ConnectionTable, PortManager, PortPool, connection_key
+from netsim.scheduler import EventScheduler
+from netsim.transport import TCPSimulator
+
+
+def test_pool_allocates_lowest_free_port():
+    pool = PortPool(1000, 1000 + 64 * 70 + 5)
+    ports = [pool.allocate() for _ in range(64 * 70 + 5)]
+    assert ports == list(range(1000, 1000 + 64 * 70 + 5))
+    assert pool.allocate() is None
+    pool.release(1000 + 64 * 65 + 3)
+    pool.release(1000 + 64 * 2)
+    assert pool.allocate() == 1000 + 64 * 2
+    assert pool.allocate() == 1000 + 64 * 65 + 3
+    assert pool.free == 0
+
+
+def test_pool_take_and_release_errors():
+    pool = PortPool(0, 100)
+    pool.take(80)
+    assert not pool.is_free(80)
+    with pytest.raises(ValueError):
+        pool.take(80)
+    with pytest.raises(ValueError):
+        pool.take(100)
+    with pytest.raises(ValueError):
+        pool.release(81)
+    assert pool.allocate() == 0
+    pool.release(80)
+    assert pool.free == 99
+    with pytest.raises(ValueError):
+        PortPool(10, 10)
+
+
+def test_released_port_waits_out_time_wait():
+    scheduler = EventScheduler()
+    ports = PortManager(time_wait=60.0, reuse_time_wait=False, ephemeral=(1024, 1027), scheduler=scheduler)
+    assert [ports.allocate() for _ in range(3)] == [1024, 1025, 1026]
+    ports.release(1025)
+    assert ports.in_use(1025) and ports.in_time_wait == 1
+    with pytest.raises(RuntimeError):
+        ports.allocate()
+    with pytest.raises(ValueError):
+        ports.bind(1025)
+    with pytest.raises(ValueError):
+        ports.release(1025)
+    scheduler.run(until=60.0)
+    assert not ports.in_use(1025) and ports.in_time_wait == 0
+    assert ports.allocate() == 1025
+
+
+def test_exhausted_pool_reuses_oldest_time_wait_port():
+    scheduler = EventScheduler()
+    ports = PortManager(ephemeral=(1024, 1026), scheduler=scheduler)
+    ports.allocate(), ports.allocate()
+    ports.release(1025)
+    ports.release(1024)
+    assert ports.allocate() == 1025
+    assert ports.time_wait_reuses == 1
+    ports.release(1025, time_wait=False)
+    assert ports.allocate() == 1025
+    assert ports.allocate(well_known=True) == 0
+
+
+def test_demultiplex_prefers_connection_then_address_then_wildcard():
+    table = ConnectionTable()
+    key = table.add("10.0.0.1", 80, "10.0.0.9", 5000, "connection")
+    assert key == connection_key("10.0.0.1", 80, "10.0.0.9", 5000)
+    table.listen(80, "specific", "10.0.0.1")
+    table.listen(80, "wildcard")
+    assert table.demultiplex("10.0.0.9", 5000, "10.0.0.1", 80) == "connection"
+    assert table.demultiplex("10.0.0.9", 5001, "10.0.0.1", 80) == "specific"
+    assert table.demultiplex("10.0.0.9", 5000, "10.0.0.2", 80) == "wildcard"
+    assert table.demultiplex("10.0.0.9", 5000, "10.0.0.1", 80, PROTOCOL_UDP) is None
+    assert table.demultiplex("10.0.0.9", 5000, "10.0.0.1", 81) is None
+    with pytest.raises(ValueError):
+        table.add("10.0.0.1", 80, "10.0.0.9", 5000, "again")
+    assert table.remove("10.0.0.1", 80, "10.0.0.9", 5000) == "connection"
+    assert table.demultiplex("10.0.0.9", 5000, "10.0.0.1", 80) == "specific"
+
+
+def test_listen_twice_then_release_frees_every_port():
+    scheduler = EventScheduler()
+    simulator = TCPSimulator(time_wait=0, scheduler=scheduler)
+    simulator.assign_port("web")
+    simulator.listen("web", 80)
+    simulator.listen("web", 80)
+    simulator.connect("web", "10.0.0.1", "10.0.0.2", 443)
+    assert simulator.processes["web"]["listening"] == [(0, 80, 6)]
+    assert simulator.demultiplex("10.0.0.5", 4000, "10.0.0.1", 80) == "web"
+    simulator.release_port("web")
+    assert not simulator.ports.in_use(80)
+    assert not simulator.ports.in_use(1024)
+    assert simulator.demultiplex("10.0.0.5", 4000, "10.0.0.1", 80) is None
+    assert len(simulator.connections) == 0
@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+import pytest
+
+from netsim.rendering import (HIERARCHICAL, RADIAL, LayoutCache, choose_layout, graph_from_devices, graph_hash,
+                              render_topology)
+from netsim.scheduler import EventScheduler
+from netsim.topology import build_topology, fat_tree, ring
+
+
+@pytest.fixture
+def graphs():
+    fabric = graph_from_devices(build_topology(fat_tree(4), scheduler=EventScheduler()))
+    routers = graph_from_devices(build_topology(ring(6), scheduler=EventScheduler()))
+    return fabric, routers
+
+
+def test_memory_hit_and_miss(graphs):
+    fabric, routers = graphs
+    cache = LayoutCache()
+    positions, cached = cache.get(fabric, HIERARCHICAL)
+    assert not cached and positions.shape == (len(fabric.names), 2)
+    again, cached = cache.get(fabric, HIERARCHICAL)
+    assert cached and again is positions
+    # Another layout kind or another graph is a different key.
+    assert not cache.get(fabric, RADIAL)[1]
+    assert not cache.get(routers, RADIAL)[1]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_memory_capacity_evicts_least_recently_used(graphs):
+    fabric, routers = graphs
+    cache = LayoutCache(capacity=1)
+    cache.get(fabric, HIERARCHICAL)
+    cache.get(routers, RADIAL)
+    assert not cache.get(fabric, HIERARCHICAL)[1]
+    assert cache.hits == 0
+
+
+def test_disk_cache_is_shared_between_instances(graphs, tmp_path):
+    fabric, _ = graphs
+    positions, cached = LayoutCache(tmp_path).get(fabric, HIERARCHICAL)
+    assert not cached
+    assert os.listdir(tmp_path) == [f"{graph_hash(fabric, HIERARCHICAL)}.npy"]
+    loaded, cached = LayoutCache(tmp_path).get(fabric, HIERARCHICAL)
+    assert cached and np.array_equal(loaded, positions)
+
+
+def test_unreadable_or_stale_files_are_misses(graphs, tmp_path):
+    fabric, routers = graphs
+    key = graph_hash(fabric, HIERARCHICAL)
+    (tmp_path / f"{key}.npy").write_bytes(b"not a numpy file")
+    cache = LayoutCache(tmp_path)
+    assert not cache.get(fabric, HIERARCHICAL)[1]
+    # A file of the wrong length (e.g. a hash collision) is recomputed too.
+    np.save(tmp_path / f"{graph_hash(routers, RADIAL)}.npy", np.zeros((1, 2)))
+    positions, cached = LayoutCache(tmp_path).get(routers, RADIAL)
+    assert not cached and len(positions) == len(routers.names)
+
+
+def test_hash_changes_with_the_graph(graphs):
+    fabric, _ = graphs
+    changed = fabric._replace(weights=fabric.weights + 1)
+    assert graph_hash(fabric, HIERARCHICAL) != graph_hash(changed, HIERARCHICAL)
+    assert graph_hash(fabric, HIERARCHICAL) != graph_hash(fabric, RADIAL)
+
+
+def test_choose_layout(graphs):
+    fabric, routers = graphs
+    assert choose_layout(fabric) == HIERARCHICAL
+    assert choose_layout(routers) == RADIAL
+
+
+def test_render_reports_cache_use(tmp_path):
+    pytest.importorskip("matplotlib")
+    topology = build_topology(ring(5, hosts=2), scheduler=EventScheduler())
+    cache = LayoutCache(tmp_path / "layouts")
+    first = render_topology(topology, str(tmp_path / "ring.png"), cache=cache)
+    second = render_topology(topology, str(tmp_path / "ring.svg"), cache=cache)
+    assert not first.cached and second.cached
+    assert os.path.getsize(tmp_path / "ring.png") > 0 and os.path.getsize(tmp_path / "ring.svg") > 0
+    with pytest.raises(ValueError):
+        render_topology(topology, str(tmp_path / "x.png"), layout='spring', cache=cache)
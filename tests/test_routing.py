@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from netsim.routing import INF, RouteCompiler
+from netsim.scenarios import build_router_ring
+
+
+def random_graph(rng, n, links):
+    graph = {node: {} for node in range(n)}
+    for _ in range(links):
+        u, v = rng.sample(range(n), 2)
+        graph[u][v] = graph[v][u] = rng.randint(1, 9)
+    return graph
+
+
+def check_against_full_recompute(compiler, graph):
+    fresh = RouteCompiler(graph).compile()
+    order = [fresh.index[node] for node in compiler.nodes]
+    assert np.array_equal(compiler.dist, fresh.dist[np.ix_(order, order)])
+    # Ties may be broken differently, but every first hop and predecessor must lie on a shortest path.
+    n = len(compiler.nodes)
+    for s in range(n):
+        for d in range(n):
+            cost = compiler.dist[s, d]
+            if d == s or cost == INF:
+                continue
+            hop, pred = int(compiler.first_hop[s, d]), int(compiler.pred[s, d])
+            assert compiler._out[s][hop] + compiler.dist[hop, d] == cost
+            assert compiler.dist[s, pred] + compiler._out[pred][d] == cost
+
+
+def test_incremental_repair_matches_full_recompute():
+    rng = random.Random(11)
+    for _ in range(20):
+        graph = random_graph(rng, 12, 20)
+        compiler = RouteCompiler(graph).compile()
+        for _ in range(15):
+            u, v = rng.sample(range(12), 2)
+            if v in graph[u] and rng.random() < 0.4:
+                del graph[u][v], graph[v][u]
+                compiler.remove_link(u, v)
+            else:
+                graph[u][v] = graph[v][u] = rng.randint(1, 9)
+                compiler.set_link_weight(u, v, graph[u][v])
+            check_against_full_recompute(compiler, graph)
+
+
+def test_refuses_graphs_over_memory_limit():
+    graph = {node: {node + 1: 1} for node in range(99)}
+    with pytest.raises(MemoryError):
+        RouteCompiler(graph, max_memory=100 * 100 * 16 - 1)
+    assert RouteCompiler(graph, max_memory=100 * 100 * 16).compile().distance(0, 99) == 99
+
+
+def test_install_routes_interfaces_added_later():
+    routers = build_router_ring(4)
+    compiler = RouteCompiler.from_routers(routers)
+    assert compiler.install() == 4 * 5
+    routers[2].add_interface("lan2", "172.16.3.1", "255.255.255.0")
+    assert compiler.install() == 4 * 5 + 3
+    route = routers[0].lookup_route("172.16.3.9")
+    assert route is not None and route['interface'] in ("to-Router2", "to-Router4")
@@ -0,0 +1,93 @@
+import functools
+import pickle
+
+import pytest
+
+from netsim.scheduler import EventScheduler
+
+
+def test_equal_timestamps_run_in_schedule_order():
+    scheduler = EventScheduler()
+    order = []
+    for label in "abc":
+        scheduler.schedule(1.0, order.append, label)
+    scheduler.schedule(0.5, order.append, "first")
+    scheduler.schedule_at(1.0, order.append, "d")
+    assert scheduler.run() == 5
+    assert order == ["first", "a", "b", "c", "d"]
+    assert scheduler.now == 1.0
+    assert scheduler.events_processed == 5
+
+
+def test_events_scheduled_while_running_are_ordered():
+    scheduler = EventScheduler()
+    order = []
+
+    def chain(n):
+        order.append((scheduler.now, n))
+        if n:
+            scheduler.schedule(0.0, chain, n - 1)
+            scheduler.schedule(0.25, order.append, (None, n))
+
+    scheduler.schedule(1.0, chain, 2)
+    scheduler.run()
+    assert order == [(1.0, 2), (1.0, 1), (1.0, 0), (None, 2), (None, 1)]
+    assert scheduler.now == 1.25
+
+
+def test_cancel_and_discard_cancelled():
+    scheduler = EventScheduler()
+    fired = []
+    events = [scheduler.schedule(t, fired.append, t) for t in (1.0, 2.0, 3.0)]
+    scheduler.cancel(events[1])
+    assert scheduler.pending() == 3
+    assert scheduler.has_live_events()
+    scheduler.discard_cancelled()
+    assert scheduler.pending() == 2
+    scheduler.cancel(events[0])
+    scheduler.cancel(events[2])
+    assert not scheduler.has_live_events()
+    assert scheduler.step() is False
+    assert fired == []
+    assert scheduler.peek() is None
+
+
+def test_run_until_and_max_events():
+    scheduler = EventScheduler()
+    fired = []
+    for t in (1.0, 2.0, 3.0, 4.0):
+        scheduler.schedule(t, fired.append, t)
+    assert scheduler.run(until=2.5) == 2
+    assert scheduler.now == 2.5  # the clock advances to `until`
+    assert scheduler.run(max_events=1) == 1
+    assert scheduler.now == 3.0  # but not past the last event when max_events stops the run
+    assert scheduler.run(until=10.0) == 1
+    assert scheduler.now == 10.0
+    assert fired == [1.0, 2.0, 3.0, 4.0]
+    assert scheduler.run(until=5.0) == 0
+    assert scheduler.now == 10.0
+
+
+def test_schedule_in_the_past_is_rejected():
+    scheduler = EventScheduler(start_time=5.0)
+    with pytest.raises(ValueError):
+        scheduler.schedule(-0.1, print)
+    with pytest.raises(ValueError):
+        scheduler.schedule_at(4.0, print)
+    scheduler.schedule_at(5.0, print)
+    assert scheduler.peek() == 5.0
+
+
+def test_pickled_scheduler_resumes_identically():
+    scheduler = EventScheduler()
+    log = []
+    for t in (3.0, 1.0, 2.0, 1.0):
+        scheduler.schedule(t, functools.partial(log.append), t)
+    scheduler.run(max_events=1)
+    copy = pickle.loads(pickle.dumps(scheduler))
+    assert (copy.now, copy.pending(), copy.events_processed) == (1.0, 3, 1)
+    # Sequence numbers carry over, so new events still sort after existing ones at the same time.
+    copy.schedule_at(2.0, print, "after")
+    assert [event[3] for event in sorted(copy._queue)] == [(1.0,), (2.0,), ("after",), (3.0,)]
+    scheduler.reset()
+    assert (scheduler.now, scheduler.pending()) == (0.0, 0)
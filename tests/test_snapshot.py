@@ -0,0 +1,94 @@
+import random
+
+import numpy as np
+import pytest
+
+from netsim import topology
+from netsim.scheduler import EventScheduler
+from netsim.snapshot import Checkpointer, Snapshot, load_checkpoint, save_checkpoint, save_snapshot
+
+
+@pytest.fixture
+def fabric():
+    scheduler = EventScheduler()
+    network = topology.build_topology(topology.fat_tree(4), scheduler=scheduler)
+    network.route_compiler().install()
+    return network, scheduler
+
+
+def test_snapshot_round_trip(fabric, tmp_path):
+    network, scheduler = fabric
+    path = str(tmp_path / "fabric")
+    manifest = save_snapshot(path, network, scheduler)
+    stored = Snapshot(path)
+    assert len(stored) == manifest['nodes'] == len(network)
+    assert stored.names.tolist() == list(network.spec.names)
+    restored = stored.restore(EventScheduler())
+    assert restored.counts() == network.counts()
+    for original, copy in zip(network.routers, restored.routers):
+        assert copy.routing_table == original.routing_table
+        assert copy.interfaces == original.interfaces
+    for original, copy in zip(network.switches, restored.switches):
+        assert list(copy.table.items()) == list(original.table.items())
+        assert sorted(copy.ports) == sorted(original.ports)
+    for original, copy in zip(network.hosts, restored.hosts):
+        assert (copy.mac_address, copy.ip_address) == (original.mac_address, original.ip_address)
+
+
+def test_mapped_lookups_match_fib(fabric, tmp_path):
+    network, scheduler = fabric
+    path = str(tmp_path / "fabric")
+    save_snapshot(path, network, scheduler)
+    stored = Snapshot(path)
+    rng = np.random.default_rng(3)
+    addresses = np.concatenate([network.addresses[network.addresses > 0],
+                                rng.integers(0, 1 << 32, 200, dtype=np.uint64)]).astype(np.uint32)
+    for router in network.routers[:4]:
+        matches = stored.lookup_many(router.router_id, addresses)
+        for index, address in zip(matches.tolist(), addresses.tolist()):
+            expected = router.lookup_route(address)
+            assert (stored.route(index) if index >= 0 else None) == expected
+
+
+def _traffic(times, senders, checkpoint=None):
+    scheduler = EventScheduler()
+    network = topology.build_topology(topology.ring(6, hosts=3, access='hub'), scheduler=scheduler)
+    hubs = network.hubs
+    for i, (time, sender) in enumerate(zip(times, senders)):
+        hub = hubs[sender]
+        scheduler.schedule(time, hub.broadcast, f"frame {i}", hub.connected_devices[i % 3].device_id)
+    if checkpoint is not None:
+        scheduler.run(until=times[len(times) // 2])
+        save_checkpoint(checkpoint, scheduler, network, state={'hubs': len(hubs)})
+        restored = load_checkpoint(checkpoint)
+        assert restored.state == {'hubs': len(hubs)}
+        scheduler, hubs = restored.scheduler, restored.topology.hubs
+    scheduler.run()
+    return [(hub.frames_delivered, hub.collisions, hub.frames_dropped, hub.busy_time) for hub in hubs], scheduler.now
+
+
+def test_resumed_run_is_identical(tmp_path):
+    rng = np.random.default_rng(7)
+    # Coarse send times put several frames on a hub at once, so backoff draws matter.
+    times = np.sort(np.round(rng.uniform(0, 0.01, 150), 4)).tolist()
+    senders = rng.integers(0, 6, len(times)).tolist()
+    state = random.getstate()
+    straight = _traffic(times, senders)
+    random.setstate(state)
+    resumed = _traffic(times, senders, str(tmp_path / "traffic.ckpt"))
+    assert sum(counters[1] for counters in straight[0]) > 0
+    assert resumed == straight
+
+
+def test_checkpointer_stops_when_simulation_ends(tmp_path):
+    scheduler = EventScheduler()
+    fired = []
+    scheduler.schedule(1.0, fired.append, "done")
+    path = str(tmp_path / "run.ckpt")
+    checkpointer = Checkpointer(path, scheduler, 0.5).start()
+    assert scheduler.run(max_events=50) == 3
+    assert fired == ["done"]
+    assert checkpointer.saves == 2
+    assert checkpointer.event is None
+    assert scheduler.now == 1.0
+    assert load_checkpoint(path).scheduler.pending() == 0
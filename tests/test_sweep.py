@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from netsim.sweep import SweepResult, SweepTable, iter_sweep, parameter_grid, run_sweep, t_quantile
+
+GRID = dict(poisson_clients=[50], on_off_clients=[20], closed_loop_clients=[10], duration=[2.0], rate=[0.5, 1.0])
+
+
+def test_same_seed_same_table_in_process_and_in_workers():
+    sequential = run_sweep('workload', GRID, replicas=3, workers=0, seed=7)
+    pooled = run_sweep('workload', GRID, replicas=3, workers=2, seed=7)
+    assert sequential.rows() == pooled.rows()
+    assert sequential.format() == pooled.format()
+    assert run_sweep('workload', GRID, replicas=3, workers=0, seed=8).rows() != sequential.rows()
+
+
+def test_replicas_differ_and_are_all_reported():
+    results = sorted(iter_sweep('workload', GRID, replicas=2, workers=0, seed=1), key=lambda r: (r.point, r.replica))
+    assert [(r.point, r.replica) for r in results] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert results[0].metrics != results[1].metrics
+    assert results[2].params['rate'] == 1.0
+
+
+def test_parameter_grid_varies_last_name_fastest():
+    assert parameter_grid({'a': [1, 2], 'b': 'xy'}) == [
+        {'a': 1, 'b': 'x'}, {'a': 1, 'b': 'y'}, {'a': 2, 'b': 'x'}, {'a': 2, 'b': 'y'}]
+
+
+@pytest.mark.parametrize("dof, expected", [(1, 12.706), (2, 4.303), (4, 2.776), (10, 2.228), (30, 2.042)])
+def test_t_quantile(dof, expected):
+    assert t_quantile(0.975, dof) == pytest.approx(expected, rel=2e-3)
+
+
+def test_table_statistics():
+    table = SweepTable({'x': [1]})
+    for replica, value in enumerate((1.0, 2.0, 3.0)):
+        table.add(SweepResult(0, {'x': 1}, replica, {'m': value}, 0.0))
+    row, = table.rows()
+    assert row['m'] == 2.0 and row['m_std'] == 1.0 and row['m_n'] == 3
+    assert row['m_ci'] == pytest.approx(t_quantile(0.975, 2) / math.sqrt(3))
+
+
+def test_scenario_must_return_metrics():
+    with pytest.raises(TypeError):
+        run_sweep('dedicated-link', {}, workers=0)
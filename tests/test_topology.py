@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from netsim.scheduler import EventScheduler
+from netsim.topology import (HOST, barabasi_albert, build_topology, fat_tree, grid, leaf_spine, random_graph,
+                             ring)
+
+
+def link_keys(spec):
+    n = len(spec.names)
+    src, dst = spec.src.astype(np.int64), spec.dst.astype(np.int64)
+    return np.minimum(src, dst) * n + np.maximum(src, dst)
+
+
+def assert_simple(spec):
+    assert (spec.src != spec.dst).all()
+    assert len(np.unique(link_keys(spec))) == len(spec.src)
+    assert len(set(spec.names)) == len(spec.names)
+
+
+@pytest.mark.parametrize("k", [2, 4, 8])
+def test_fat_tree_counts(k):
+    topology = build_topology(fat_tree(k), scheduler=EventScheduler())
+    assert topology.counts() == {'routers': 5 * k * k // 4, 'switches': 0, 'hubs': 0, 'hosts': k ** 3 // 4,
+                                 'links': 3 * k ** 3 // 4}
+    assert_simple(topology.spec)
+    degree = np.bincount(np.concatenate([topology.spec.src, topology.spec.dst]))
+    assert (degree[topology.spec.kinds != HOST] == k).all()
+
+
+def test_leaf_spine_counts():
+    spec = leaf_spine(4, 6, hosts=3)
+    assert_simple(spec)
+    topology = build_topology(spec, scheduler=EventScheduler())
+    assert topology.counts() == {'routers': 10, 'switches': 6, 'hubs': 0, 'hosts': 18, 'links': 24 + 6 + 18}
+    switch = topology["Leaf1-switch"]
+    assert len(switch.ports) == 3 and len(switch.table) == 3
+
+
+@pytest.mark.parametrize("count, links", [(1, 0), (2, 1), (3, 3), (10, 10)])
+def test_ring_counts(count, links):
+    spec = ring(count)
+    assert len(spec.names) == count and len(spec.src) == links
+    assert_simple(spec)
+
+
+@pytest.mark.parametrize("torus, links", [(False, 3 * 4 + 2 * 5), (True, 3 * 5 + 3 * 5)])
+def test_grid_counts(torus, links):
+    spec = grid(3, 5, hosts=2, torus=torus, access='hub')
+    assert_simple(spec)
+    topology = build_topology(spec, scheduler=EventScheduler())
+    assert topology.counts() == {'routers': 15, 'switches': 0, 'hubs': 15, 'hosts': 30, 'links': links + 15 + 30}
+
+
+@pytest.mark.parametrize("links", [99, 150, 4950])
+def test_random_graph_is_connected_with_the_requested_links(links):
+    spec = random_graph(100, links, rng=1)
+    assert len(spec.src) == links
+    assert_simple(spec)
+    assert max(spec.src.max(), spec.dst.max()) < 100
+    reached = {0}
+    frontier = [0]
+    neighbors = [[] for _ in range(100)]
+    for a, b in zip(spec.src.tolist(), spec.dst.tolist()):
+        neighbors[a].append(b)
+        neighbors[b].append(a)
+    while frontier:
+        for b in neighbors[frontier.pop()]:
+            if b not in reached:
+                reached.add(b)
+                frontier.append(b)
+    assert len(reached) == 100
+    with pytest.raises(ValueError):
+        random_graph(100, 98)
+
+
+def test_random_generators_are_reproducible():
+    assert (link_keys(random_graph(50, 80, rng=3)) == link_keys(random_graph(50, 80, rng=3))).all()
+    assert (barabasi_albert(50, 2, rng=3).src == barabasi_albert(50, 2, rng=3).src).all()
+
+
+@pytest.mark.parametrize("attach", [1, 3])
+def test_barabasi_albert_counts(attach):
+    count = 200
+    spec = barabasi_albert(count, attach, hosts=1, access=None, rng=2)
+    assert_simple(spec)
+    routers = spec.kinds != HOST
+    clique = attach * (attach + 1) // 2
+    assert routers.sum() == count
+    assert len(spec.src) == clique + (count - attach - 1) * attach + count
+    # Every router after the seed clique brings exactly `attach` links to earlier routers.
+    fabric = spec.kinds[spec.dst] != HOST
+    later = np.maximum(spec.src[fabric], spec.dst[fabric])
+    assert (np.bincount(later, minlength=count)[attach + 1:] == attach).all()
+
+
+def test_build_addresses_hosts_and_routes():
+    topology = build_topology(leaf_spine(2, 3, hosts=2), scheduler=EventScheduler())
+    hosts = topology.hosts
+    assert len(set(topology.addresses[topology.spec.kinds == HOST].tolist())) == len(hosts)
+    compiler = topology.route_compiler()
+    compiler.install()
+    gateway = topology["Leaf1"]
+    assert gateway.lookup_route(str(hosts[-1].ip_address).split("/")[0]) is not None
+
+
+def test_unknown_access_kind():
+    with pytest.raises(ValueError):
+        ring(3, hosts=1, access='bridge')
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from netsim.scheduler import EventScheduler
+from netsim.trace_replay import (TRACE_DTYPE, EndpointMap, TraceReplay, csv_to_binary, endpoint_address, read_trace,
+                                 write_trace)
+
+
+class Host:
+    def __init__(self, name, ip_address, scheduler, log):
+        self.device_id = name
+        self.ip_address = ip_address
+        self.scheduler = scheduler
+        self.log = log
+
+    def receive_data(self, data, checksum, sender_id, valid=None):
+        self.log.append((self.scheduler.now, sender_id, self.device_id, len(data)))
+
+
+def make_hosts(scheduler, count=4):
+    log = []
+    return [Host(f"Host{i}", f"10.0.0.{i}", scheduler, log) for i in range(1, count + 1)], log
+
+
+def write_csv(path, records=40, seed=1):
+    rng = np.random.default_rng(seed)
+    endpoints = ["10.0.0.1", "10.0.0.2", "Host3", "192.168.7.9", "3232235777"]
+    lines = ["Time,Source,Destination,Packets,Size,Duration"]
+    time = 0.0
+    for _ in range(records):
+        time += float(rng.uniform(0, 0.01))
+        packets = int(rng.integers(1, 6))
+        source, destination = rng.choice(endpoints, 2, replace=False)
+        lines.append(f"{time!r},{source},{destination},{packets},{packets * int(rng.integers(40, 1500)) + 3},"
+                     f"{float(rng.uniform(0, 0.02))!r}")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def records(path, chunk_records):
+    return np.concatenate(list(read_trace(path, chunk_records)))
+
+
+def test_csv_and_binary_traces_hold_the_same_records(tmp_path):
+    csv_path, binary_path = tmp_path / "trace.csv", tmp_path / "trace.bin"
+    write_csv(csv_path)
+    assert csv_to_binary(csv_path, binary_path, chunk_records=7) == 40
+    from_csv = records(csv_path, 7)
+    from_binary = records(binary_path, 3)
+    assert from_csv.dtype == TRACE_DTYPE
+    assert from_csv.tobytes() == from_binary.tobytes()
+    assert from_csv['source'][from_csv['source'] == endpoint_address("Host3")].size > 0
+    # And back again to CSV: names become their 240/4 addresses, everything else is kept.
+    assert write_trace(tmp_path / "again.csv", read_trace(binary_path)) == 40
+    assert records(tmp_path / "again.csv", 100).tobytes() == from_binary.tobytes()
+
+
+def replay(trace, **options):
+    scheduler = EventScheduler()
+    hosts, log = make_hosts(scheduler)
+    playback = TraceReplay(trace, EndpointMap(hosts), scheduler, **options).start()
+    scheduler.run()
+    return playback, log
+
+
+def test_csv_and_binary_replays_deliver_the_same_packets(tmp_path):
+    csv_path, binary_path = tmp_path / "trace.csv", tmp_path / "trace.bin"
+    write_csv(csv_path)
+    csv_to_binary(csv_path, binary_path)
+    from_csv, csv_log = replay(csv_path, chunk_records=5)
+    from_binary, binary_log = replay(binary_path)
+    assert csv_log == binary_log
+    trace = records(binary_path, 100)
+    assert from_csv.records == from_binary.records == 40
+    assert from_csv.packets == len(csv_log) == int(trace['packets'].sum())
+    assert from_csv.bytes == sum(entry[3] for entry in csv_log) == int(trace['bytes'].sum())
+    assert from_csv.deferrals == 0 and from_csv.max_lag == 0
+
+
+def long_flows(count=20, packets=10):
+    chunk = np.zeros(count, TRACE_DTYPE)
+    chunk['time'] = np.arange(count) * 0.001
+    chunk['source'] = endpoint_address("10.0.0.1")
+    chunk['destination'] = endpoint_address("10.0.0.2")
+    chunk['packets'] = packets
+    chunk['bytes'] = packets * 100
+    chunk['duration'] = 0.05
+    return [chunk]
+
+
+def test_max_flows_defers_admission():
+    scheduler = EventScheduler()
+    hosts, log = make_hosts(scheduler)
+    playback = TraceReplay(long_flows(), EndpointMap(hosts), scheduler, max_flows=2).start()
+    peak = 0
+    while scheduler.step():
+        peak = max(peak, playback.active)
+    assert peak == 2
+    assert playback.deferrals > 0 and playback.max_lag > 0
+    assert playback.records == 20 and len(log) == 200 and playback.active == 0
+
+
+def test_max_pending_bounds_the_scheduler():
+    scheduler = EventScheduler()
+    hosts, log = make_hosts(scheduler)
+    playback = TraceReplay(long_flows(), EndpointMap(hosts), scheduler, max_pending=4).start()
+    peak = 0
+    while scheduler.step():
+        peak = max(peak, scheduler.pending())
+    unlimited, _ = replay(long_flows())
+    # An admission below the limit queues the new flow's next packet and the next record.
+    assert peak == 4 + 1
+    assert playback.deferrals > 0 and unlimited.deferrals == 0
+    assert len(log) == 200
+
+
+def test_endpoint_map_places_known_and_unknown_addresses():
+    hosts, _ = make_hosts(EventScheduler())
+    endpoints = EndpointMap(hosts)
+    known = [endpoint_address("10.0.0.3"), endpoint_address("Host4")]
+    assert endpoints.map(known).tolist() == [2, 3]
+    unknown = np.arange(1000, dtype=np.uint32) * 7919
+    placed = endpoints.map(unknown)
+    assert ((placed >= 0) & (placed < 4)).all()
+    assert (placed == endpoints.map(unknown)).all()
+    assert len(set(placed.tolist())) == 4
+    with pytest.raises(ValueError):
+        EndpointMap([])
+
+
+def test_bad_traces(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("time,source\n0,10.0.0.1\n")
+    with pytest.raises(ValueError, match="destination"):
+        list(read_trace(path))
+    binary = tmp_path / "cut.bin"
+    write_trace(binary, long_flows(3))
+    binary.write_bytes(binary.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        list(read_trace(binary))
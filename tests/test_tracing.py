@@ -0,0 +1,13 @@
+from netsim.scheduler import EventScheduler
+from netsim.tracing import EventKind, RingBufferSink, Tracer
+
+
+def test_tracer_keeps_empty_ring_buffer():
+    scheduler = EventScheduler()
+    sink = RingBufferSink(capacity=2)
+    tracer = Tracer(sink, clock=scheduler)
+    assert tracer.enabled
+    for seq in range(3):
+        tracer.emit(EventKind.SEND, "Device1", seq=seq)
+    assert [event.seq for event in sink] == [1, 2]
+    assert sink.events[0].node == "Device1"
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from netsim.scheduler import EventScheduler
+from netsim.workload import CLOSED_LOOP, ON_OFF, POISSON, LatencyHistogram, Workload
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    histogram.record_many(np.arange(1, 101) * 1e-6)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == pytest.approx(50e-6)
+    assert histogram.percentile(99) == pytest.approx(99e-6)
+    assert histogram.percentile(100) == pytest.approx(100e-6)
+    assert histogram.mean == pytest.approx(50.5e-6)
+
+
+def test_percentiles_keep_three_significant_digits():
+    values = np.random.default_rng(1).lognormal(np.log(0.01), 1.5, 100000)
+    histogram = LatencyHistogram()
+    histogram.record_many(values)
+    for q in (50, 90, 99, 99.9):
+        exact = np.percentile(values, q, method='inverted_cdf')
+        assert histogram.percentile(q) == pytest.approx(exact, rel=1e-3)
+    summary = histogram.summary()
+    assert summary['max'] == values.max() and summary['min'] == values.min()
+    assert summary['p99.9'] == histogram.percentile(99.9)
+
+
+def test_clamps_and_empty():
+    histogram = LatencyHistogram(highest=1.0)
+    assert histogram.percentile(99) == 0.0 and histogram.summary()['min'] == 0.0
+    histogram.record(5.0)
+    assert histogram.percentile(50) == pytest.approx(1.0, rel=1e-3)
+
+
+def test_merge_matches_recording_together():
+    rng = np.random.default_rng(2)
+    a, b = rng.exponential(0.005, 1000), rng.exponential(0.05, 1000)
+    merged, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    merged.record_many(np.concatenate((a, b)))
+    first.record_many(a)
+    second.record_many(b)
+    first.merge(second)
+    assert (first.counts == merged.counts).all() and first.max == merged.max
+    with pytest.raises(ValueError):
+        first.merge(LatencyHistogram(resolution=1e-3))
+
+
+def run_clients(duration=50.0, **options):
+    scheduler = EventScheduler()
+    load = Workload(rtt=0.001, scheduler=scheduler, rng=3)
+    load.add_server("web", workers=1000, service_time=1e-4)
+    load.add_clients(100, "web", **options)
+    report = load.run(duration)
+    assert report.outstanding == 0 and report.rejected == 0
+    assert report.completed == report.issued
+    assert not scheduler.has_live_events()
+    return report
+
+
+def test_poisson_clients_send_at_their_rate():
+    report = run_clients(arrival=POISSON, rate=2.0)
+    expected = 100 * 2.0 * 50
+    assert abs(report.issued - expected) < 4 * expected ** 0.5
+
+
+def test_on_off_clients_send_during_on_periods():
+    report = run_clients(arrival=ON_OFF, rate=4.0, on_time=1.0, off_time=3.0, duration=200.0)
+    expected = 100 * 4.0 * 200 / 4
+    assert abs(report.issued - expected) < 0.1 * expected
+
+
+def test_closed_loop_clients_wait_for_responses():
+    report = run_clients(arrival=CLOSED_LOOP, think_time=0.5)
+    response = report.latency.mean
+    assert response > 0.001
+    expected = 100 * 50 / (0.5 + response)
+    assert abs(report.issued - expected) < 0.05 * expected
+
+
+def test_full_queue_rejects():
+    load = Workload(rtt=0.001, scheduler=EventScheduler(), rng=4)
+    load.add_server("slow", workers=1, service_time=1.0, queue_limit=2)
+    load.add_clients(50, "slow", arrival=POISSON, rate=1.0)
+    report = load.run(10.0)
+    assert report.rejected > 0
+    assert report.completed + report.rejected == report.issued
+    assert report.utilization['slow'] > 0.5
+
+
+def test_unknown_arrival_process():
+    load = Workload(scheduler=EventScheduler(), rng=5)
+    load.add_server("web")
+    with pytest.raises(ValueError):
+        load.add_clients(1, "web", arrival='bursty')